@@ -8,15 +8,26 @@ from .lab_test_agent import LabTestAgent
 from .scheduling_agent import SchedulingAgent
 from .pharmacy_agent import PharmacyAgent
 from .router_agent import RouterAgent
+from .model_backend import (
+    ModelBackend, AdkBackend, FakeBackend, LatencyModel, ReplayBackend, create_model_backend
+)
+from .model_tiers import ModelTiers
 
 __all__ = [
     'ADKAgent',
-    'OrchestratorAgent', 
+    'OrchestratorAgent',
     'SymptomTriageAgent',
-    'CarePlanDesignAgent'
-    'InsurancePolicyAnalysisAgent'
-    'LabTestAgent'
-    'SchedulingAgent'
-    'PharmacyAgent'
-    'RouterAgent'
+    'CarePlanDesignAgent',
+    'InsurancePolicyAnalysisAgent',
+    'LabTestAgent',
+    'SchedulingAgent',
+    'PharmacyAgent',
+    'RouterAgent',
+    'ModelBackend',
+    'AdkBackend',
+    'FakeBackend',
+    'LatencyModel',
+    'ReplayBackend',
+    'create_model_backend',
+    'ModelTiers'
 ]
\ No newline at end of file
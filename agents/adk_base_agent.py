@@ -7,7 +7,9 @@ class ADKAgent(Agent):
     def __init__(self, name: str, description: str, instruction: str, 
                  model: str = "gemini-2.0-flash", tools: list = None):
         
-        if not os.getenv("GOOGLE_APPLICATION_CREDENTIALS") and not os.getenv("GOOGLE_API_KEY"):
+        # The offline fake backend never calls the model, so it needs no credentials
+        if (os.getenv("WELLNESS_MODEL_BACKEND", "adk").lower() != "fake" and
+                not os.getenv("GOOGLE_APPLICATION_CREDENTIALS") and not os.getenv("GOOGLE_API_KEY")):
             raise ValueError(
                 "Either GOOGLE_APPLICATION_CREDENTIALS or GOOGLE_API_KEY "
                 "environment variable is required"
@@ -54,4 +56,8 @@ class ADKAgent(Agent):
                 continue
         
         if not successful_model:
-            raise Exception(f"All model attempts failed for {name}. Last error: {last_error}")
\ No newline at end of file
+            raise Exception(f"All model attempts failed for {name}. Last error: {last_error}")
+
+    def with_model(self, model: str) -> 'ADKAgent':
+        """Copy of this agent (same name, instruction and tools) on another model"""
+        return self.model_copy(update={'model': model})
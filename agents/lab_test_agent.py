@@ -5,6 +5,8 @@ Handles lab test bookings, package recommendations, and home visit coordination
 """
 
 from .adk_base_agent import ADKAgent
+from services.provider_directory import get_provider_directory
+from services.catalog_store import get_catalog_store
 
 
 # ==================== AGENT PROMPT ====================
@@ -38,14 +40,13 @@ Alternative Prompts:
 STEP 2: LAB PREFERENCE
 Once location is known:
 "Great! We have trusted lab partners in [CITY]:
-- Dr. Lal PathLabs (NABL certified, 2500+ tests)
-- Thyrocare (Fast results, affordable packages)
-- SRL Diagnostics (Premium service, 3000+ tests)
-- Apollo Diagnostics (Multi-specialty, comprehensive)
-- Metropolis Healthcare (Advanced testing)
+- (each partner for that city from LAB PARTNERS BY CITY, with its accreditation)
 
 Do you have a preferred diagnostic lab, or would you like me to recommend one based on your test?"
 
+LAB PARTNERS BY CITY:
+[LABS BY CITY]
+
 STEP 3: TEST TYPE IDENTIFICATION
 Ask about specific test needs:
 - "What type of test are you looking for?"
@@ -282,84 +283,27 @@ class LabTestAgent(ADKAgent):
         super().__init__(
             name="lab_test_agent",
             description="Diagnostic test and lab package booking specialist",
-            instruction=LAB_TEST_AGENT_PROMPT,
+            instruction=LAB_TEST_AGENT_PROMPT.replace(
+                "[LABS BY CITY]", get_provider_directory().labs_by_city_text()),
             model="gemini-2.0-flash"
         )
         
-        # Agent-specific configuration
-        self.supported_cities = [
-            'delhi', 'mumbai', 'bangalore', 'hyderabad', 'chennai',
-            'kolkata', 'pune', 'ahmedabad', 'jaipur', 'lucknow'
-        ]
-        
-        self.lab_partners = {
-            'Dr. Lal PathLabs': {
-                'rating': 4.5,
-                'tests_available': '2500+',
-                'accreditation': 'NABL, CAP',
-                'specialization': 'Comprehensive testing'
-            },
-            'Thyrocare': {
-                'rating': 4.3,
-                'tests_available': '2000+',
-                'accreditation': 'NABL, ISO',
-                'specialization': 'Fast results, affordable'
-            },
-            'SRL Diagnostics': {
-                'rating': 4.4,
-                'tests_available': '3000+',
-                'accreditation': 'NABL, CAP',
-                'specialization': 'Premium service'
-            },
-            'Apollo Diagnostics': {
-                'rating': 4.5,
-                'tests_available': '2200+',
-                'accreditation': 'NABL, CAP',
-                'specialization': 'Multi-specialty'
-            },
-            'Metropolis Healthcare': {
-                'rating': 4.6,
-                'tests_available': '4000+',
-                'accreditation': 'NABL, CAP',
-                'specialization': 'Advanced testing'
-            }
-        }
-        
-        self.test_packages = {
-            'Basic Health Checkup': {
-                'price': 999,
-                'parameters': '40+',
-                'tests': ['CBC', 'Blood Sugar', 'LFT', 'KFT', 'Lipid Profile']
-            },
-            'Full Body Checkup': {
-                'price': 2499,
-                'parameters': '80+',
-                'tests': ['All Basic', 'Thyroid', 'Vitamins', 'HbA1c', 'Urine']
-            },
-            'Executive Health Checkup': {
-                'price': 4999,
-                'parameters': '120+',
-                'tests': ['All Full Body', 'Cardiac Markers', 'Cancer Markers', 'Hormones']
-            },
-            "Women's Wellness Package": {
-                'price': 3499,
-                'parameters': '70+',
-                'tests': ['Hormone Panel', 'Thyroid', 'Vitamins', 'Bone Health']
-            },
-            'Senior Citizen Package': {
-                'price': 3999,
-                'parameters': '90+',
-                'tests': ['Full Body', 'Bone Density', 'Cardiac', 'Diabetes']
-            },
-            'Diabetes Monitoring Package': {
-                'price': 1499,
-                'parameters': '25+',
-                'tests': ['HbA1c', 'Blood Sugar', 'Lipid', 'Kidney', 'Liver']
-            }
-        }
-        
         print(f"✅ {self.name} initialized successfully")
     
+    # Lab partners, packages and cities come from the hot-reloaded lab catalog
+    # (data/catalogs/lab_catalog.json), so price and partner updates need no restart
+    @property
+    def supported_cities(self) -> list:
+        return get_catalog_store().current()['lab_catalog']['supported_cities']
+    
+    @property
+    def lab_partners(self) -> dict:
+        return get_catalog_store().current()['lab_catalog']['lab_partners']
+    
+    @property
+    def test_packages(self) -> dict:
+        return get_catalog_store().current()['lab_catalog']['test_packages']
+    
     def get_lab_info(self, lab_name: str) -> dict:
         """
         Get information about a specific lab partner
@@ -394,7 +338,7 @@ class LabTestAgent(ADKAgent):
         Returns:
             True if city is supported
         """
-        return city.lower() in self.supported_cities
+        return city.lower() in get_catalog_store().current().index('lab_catalog')['cities']
     
     def get_available_labs(self, city: str) -> list:
         """
@@ -406,9 +350,8 @@ class LabTestAgent(ADKAgent):
         Returns:
             List of lab names available in the city
         """
-        # In production, this would query a database
-        # For now, return all lab partners
-        return list(self.lab_partners.keys())
+        labs = get_provider_directory().labs(city=city)
+        return [lab['name'] for lab in labs] if labs else list(self.lab_partners.keys())
     
     def validate_booking_data(self, booking_data: dict) -> tuple:
         """
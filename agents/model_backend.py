@@ -0,0 +1,437 @@
+# agents/model_backend.py
+"""
+Model Backend - Pluggable LLM transport for agent calls
+
+WellnessManager sends every agent call through a backend:
+
+    AdkBackend   Google ADK Runner + Gemini (production, needs credentials)
+    FakeBackend  Deterministic offline replies generated from rules or a script,
+                 with configurable latency distributions and error injection
+    ReplayBackend Model outputs recorded by services/conversation_log.py, fed
+                 back turn by turn (tools/replay_conversations.py)
+
+Select with WELLNESS_MODEL_BACKEND=adk|fake. With the fake backend agents are
+built without credentials, so the whole process_message pipeline - routing,
+shared context, cards, suggestions - runs offline in tests, CI and benchmarks.
+"""
+
+import asyncio
+import contextvars
+import json
+import os
+import random
+import re
+from collections import deque
+
+from google.adk import Runner, sessions
+from google.genai.types import Content, Part
+
+from services.structured_log import get_logger
+from services.structured_output import SUGGESTION_TRAILER_MARKER
+
+log = get_logger('model')
+
+APP_NAME = "wellness-gpt"
+
+_USER_MESSAGE_PATTERN = re.compile(r'USER(?:\'S LAST)? MESSAGE:\s*"(.*?)"', re.DOTALL)
+_STRUCTURED_MARKER = "RESPONSE FORMAT (STRUCTURED MODE)"
+_CLAUSE_PATTERN = re.compile(r'[,;?]|\band\b|\balso\b')
+
+# Token usage of the last generate() in this task; set by backends that know it
+_call_usage = contextvars.ContextVar('wellness_call_usage', default=None)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token) for backends that report none"""
+    return (len(text) + 3) // 4 if text else 0
+
+
+def report_usage(prompt_tokens: int, completion_tokens: int):
+    """Record the token usage of the generate() call running in this task"""
+    _call_usage.set({'prompt': prompt_tokens or 0, 'completion': completion_tokens or 0})
+
+
+def take_usage() -> dict:
+    """Token usage reported by the last generate() in this task (None if unreported), then clear it"""
+    usage = _call_usage.get()
+    if usage is not None:
+        _call_usage.set(None)
+    return usage
+
+
+def backend_name() -> str:
+    """Configured backend (WELLNESS_MODEL_BACKEND, default adk)"""
+    return os.getenv('WELLNESS_MODEL_BACKEND', 'adk').lower()
+
+
+class ModelBackend:
+    """Interface: turn one prompt for one agent into reply text"""
+
+    name = "base"
+
+    async def generate(self, agent, message: str, user_id: str, agent_type: str, session: str = None) -> str:
+        """
+        Run one agent turn
+
+        Args:
+            agent: Agent instance (its instruction is the system prompt)
+            message: Prompt for this turn
+            user_id: Conversation owner (one session per user and agent type)
+            agent_type: Agent key, e.g. 'router', 'pharmacy', 'suggestions'
+            session: Session key when it differs from agent_type (e.g. 'router:full' for the
+                     full tier, so its history is not shared with the lite model's)
+
+        Returns:
+            Reply text ('' if the model produced nothing); backends that know the
+            call's token usage also report it with report_usage()
+        """
+        raise NotImplementedError
+
+
+# ==================== ADK ====================
+
+class AdkBackend(ModelBackend):
+    """Google ADK Runner with one in-memory session per user and agent type"""
+
+    name = "adk"
+
+    def __init__(self, session_service=None):
+        self.session_service = session_service or sessions.InMemorySessionService()
+        self.user_sessions = {}
+        self.session_counter = 0
+
+    async def _session_id(self, user_id: str, agent_type: str) -> str:
+        user_sessions = self.user_sessions.setdefault(user_id, {})
+        if agent_type not in user_sessions:
+            session_id = f"{user_id}-{agent_type}-{self.session_counter}"
+            self.session_counter += 1
+            user_sessions[agent_type] = session_id
+            await self.session_service.create_session(
+                app_name=APP_NAME,
+                user_id=user_id,
+                session_id=session_id,
+            )
+        return user_sessions[agent_type]
+
+    async def generate(self, agent, message: str, user_id: str, agent_type: str, session: str = None) -> str:
+        session_id = await self._session_id(user_id, session or agent_type)
+        runner = Runner(
+            app_name=APP_NAME,
+            agent=agent,
+            session_service=self.session_service
+        )
+        content = Content(parts=[Part(text=message)])
+
+        # run_async keeps the event loop free while the model call is in flight (Runner.run blocks it)
+        async for event in runner.run_async(user_id=user_id, session_id=session_id, new_message=content):
+            usage = getattr(event, 'usage_metadata', None)
+            if usage is not None:
+                report_usage(usage.prompt_token_count, usage.candidates_token_count)
+            if hasattr(event, 'content') and event.content and event.content.parts:
+                return event.content.parts[0].text
+        return ""
+
+
+# ==================== FAKE ====================
+
+class FakeBackendError(RuntimeError):
+    """Injected model failure"""
+
+
+class LatencyModel:
+    """
+    Simulated model latency, parsed from a spec string (milliseconds):
+
+        "0"                    no delay
+        "fixed:120"            always 120 ms
+        "uniform:50:300"       uniform between 50 and 300 ms
+        "normal:200:40"        mean 200, std-dev 40 (clipped at 0)
+        "lognormal:400:0.5"    median 400, sigma 0.5 - the long tail real LLM calls have
+    """
+
+    KINDS = ('fixed', 'uniform', 'normal', 'lognormal')
+
+    def __init__(self, spec: str = "0"):
+        parts = str(spec).strip().split(':')
+        if len(parts) == 1:
+            parts = ['fixed', parts[0]]
+        self.kind = parts[0].lower()
+        self.params = [float(p) for p in parts[1:]]
+        expected = {'fixed': 1, 'uniform': 2, 'normal': 2, 'lognormal': 2}
+        if self.kind not in self.KINDS or len(self.params) != expected[self.kind]:
+            raise ValueError(f"Bad latency spec '{spec}' (use e.g. fixed:100, uniform:50:300, lognormal:400:0.5)")
+        self.spec = spec
+
+    def sample_ms(self, rng: random.Random) -> float:
+        if self.kind == 'fixed':
+            return self.params[0]
+        if self.kind == 'uniform':
+            return rng.uniform(*self.params)
+        if self.kind == 'normal':
+            return max(0.0, rng.gauss(*self.params))
+        median, sigma = self.params
+        return median * rng.lognormvariate(0, sigma) if median > 0 else 0.0
+
+
+# Router intents in priority order (medicine words beat symptoms, as in the router prompt)
+FAKE_ROUTER_RULES = (
+    ('PHARMACY', ('paracetamol', 'dolo', 'crocin', 'medicine', 'tablet', 'strip', 'order', 'in stock',
+                  'do you have', 'azithro', 'cetirizine', 'ibuprofen', 'montek', 'pharmacy')),
+    ('LAB_TEST', ('lab test', 'blood test', 'test package', 'cbc', 'thyroid', 'home collection', 'sample')),
+    ('INSURANCE', ('insurance', 'policy', 'covered', 'coverage', 'claim', 'premium', 'sum insured', 'co-pay')),
+    ('CARE_PLAN', ('recovery', 'care plan', 'rehab', 'exercise', 'after surgery', 'diet plan')),
+    ('SCHEDULING', ('appointment', 'book', 'doctor', 'hospital', 'schedule', 'tomorrow', 'morning',
+                    'evening', 'delhi', 'mumbai', 'bangalore', 'pune', 'chennai', 'apollo', 'fortis', 'max')),
+    ('SYMPTOM', ('fever', 'pain', 'headache', 'cough', 'cold', 'dizzy', 'vomit', 'hurt', 'sick',
+                 'unwell', 'weak', 'nausea', 'rash', 'tired')),
+)
+
+# Specialist replies: first rule whose keyword appears in the user's message wins; () always matches
+FAKE_REPLY_RULES = {
+    'symptom': (
+        (('since', 'days', 'yesterday', 'week'), "Thank you for the details. A fever with headache for a day or two "
+         "is usually viral. Rest, drink plenty of fluids and monitor your temperature. If it stays above 102°F or "
+         "you feel worse, please see a doctor. Would you like me to book an appointment?"),
+        ((), "I'm sorry you're not feeling well. How long have you had these symptoms, and how severe are they "
+         "on a scale of 1 to 10?"),
+    ),
+    'scheduling': (
+        (('morning', 'evening', 'afternoon', 'tomorrow', 'today', 'am', 'pm'), "Your appointment is confirmed. "
+         "Appointment ID will be shared in the confirmation card. Please arrive 15 minutes early."),
+        (('hospital', 'apollo', 'fortis', 'max', 'aiims', 'medanta', 'manipal'), "Great choice. What time would "
+         "you prefer - morning, afternoon or evening?"),
+        (('delhi', 'mumbai', 'bangalore', 'pune', 'chennai', 'kolkata', 'hyderabad', 'ahmedabad'),
+         "Here are some hospitals near you. Please choose the hospital you would like to visit."),
+        ((), "I can help you book an appointment. Which city are you in?"),
+    ),
+    'pharmacy': (
+        (('strip', 'strips', 'quantity'), "Your order has been placed and will be delivered in 2-4 hours. "
+         "Order confirmed."),
+        (('order', 'buy', 'want'), "Great choice! Paracetamol (500mg) is available at ₹20/strip. "
+         "How many strips would you like?"),
+        ((), "Let me check our inventory. Paracetamol (500mg) is available at ₹20/strip and Dolo 650 at "
+         "₹25/strip. Would you like to order one of them?"),
+    ),
+    'lab_test': (
+        (('home', 'lab visit', 'visit'), "Your lab test booking is confirmed. Booking ID will be shared shortly."),
+        (('delhi', 'mumbai', 'bangalore', 'pune', 'chennai'), "Here are our partner labs in your city. "
+         "Which lab would you prefer?"),
+        ((), "I can help you book a lab test. Which city are you in?"),
+    ),
+    'policy_analysis': (
+        ((), "According to your policy, this is covered subject to the policy terms. Please check the waiting "
+         "period and co-payment clauses for details."),
+    ),
+    'care_plan': (
+        ((), "Here is a simple recovery plan: rest well, stay hydrated, eat light meals and take medicines as "
+         "prescribed. Resume normal activity gradually over the next week."),
+    ),
+    'orchestrator': (
+        ((), "Hello! I can help with symptoms, doctor appointments, medicines, lab tests and insurance "
+         "questions. What would you like help with?"),
+    ),
+}
+
+FAKE_SUGGESTIONS = (
+    "What should I do next?",
+    "How much will this cost me?",
+    "Is this covered by my insurance?",
+    "Can I book an appointment for tomorrow?",
+)
+
+
+class FakeBackend(ModelBackend):
+    """
+    Offline, deterministic stand-in for the model.
+
+    Replies come from a per-agent script (consumed in order) when one is given,
+    otherwise from keyword rules over the user's message. Latency and failures
+    are drawn from a random stream seeded per (seed, user, agent, call number),
+    so a conversation replays identically however calls interleave.
+
+    Attributes:
+        calls (deque): One record per call, the most recent max_calls kept - agent_type,
+                       session, user_id, model, latency_ms, error, prompt_chars, response_chars
+        call_count (int): Calls made since the backend was created
+        error_count (int): Injected failures since the backend was created
+    """
+
+    name = "fake"
+
+    def __init__(self, latency: str = "0", error_rate: float = 0.0, empty_rate: float = 0.0,
+                 seed: int = 0, script: dict = None, agent_latency: dict = None, max_calls: int = 10000):
+        self.latency = LatencyModel(latency)
+        self.agent_latency = {agent: LatencyModel(spec) for agent, spec in (agent_latency or {}).items()}
+        self.error_rate = error_rate
+        self.empty_rate = empty_rate
+        self.seed = seed
+        self.script = {agent: list(replies) for agent, replies in (script or {}).items()}
+        # Bounded so long load-harness runs don't grow memory without limit
+        self.calls = deque(maxlen=max_calls)
+        self.call_count = 0
+        self.error_count = 0
+        self._call_numbers = {}
+
+    @classmethod
+    def from_env(cls):
+        """Fake backend configured by WELLNESS_FAKE_LATENCY / _ERROR_RATE / _EMPTY_RATE / _SEED"""
+        return cls(
+            latency=os.getenv('WELLNESS_FAKE_LATENCY', '0'),
+            error_rate=float(os.getenv('WELLNESS_FAKE_ERROR_RATE', '0')),
+            empty_rate=float(os.getenv('WELLNESS_FAKE_EMPTY_RATE', '0')),
+            seed=int(os.getenv('WELLNESS_FAKE_SEED', '0'))
+        )
+
+    def _rng(self, user_id: str, agent_type: str) -> random.Random:
+        key = (user_id, agent_type)
+        number = self._call_numbers.get(key, 0)
+        self._call_numbers[key] = number + 1
+        return random.Random(f"{self.seed}:{user_id}:{agent_type}:{number}")
+
+    async def generate(self, agent, message: str, user_id: str, agent_type: str, session: str = None) -> str:
+        rng = self._rng(user_id, agent_type)
+        latency_ms = self.agent_latency.get(agent_type, self.latency).sample_ms(rng)
+        roll = rng.random()
+        record = {'agent_type': agent_type, 'session': session or agent_type, 'user_id': user_id,
+                  'model': getattr(agent, 'model', None), 'latency_ms': latency_ms, 'error': None,
+                  'prompt_chars': len(message), 'response_chars': 0}
+        self.calls.append(record)
+        self.call_count += 1
+
+        if latency_ms:
+            await asyncio.sleep(latency_ms / 1000)
+        if roll < self.error_rate:
+            record['error'] = 'injected'
+            self.error_count += 1
+            raise FakeBackendError(f"Injected model failure ({agent_type})")
+        if roll < self.error_rate + self.empty_rate:
+            return ""
+
+        response = self.reply(message, agent_type)
+        record['response_chars'] = len(response)
+        report_usage(estimate_tokens(message), estimate_tokens(response))
+        return response
+
+    def reply(self, message: str, agent_type: str) -> str:
+        """The reply text for a prompt (script first, then rules), in the format the prompt asks for"""
+        scripted = self.script.get(agent_type)
+        if scripted:
+            text = scripted.pop(0)
+            return text(message) if callable(text) else text
+
+        match = _USER_MESSAGE_PATTERN.search(message)
+        user_message = (match.group(1) if match else message).lower()
+
+        if agent_type == 'router':
+            # One label per clause; a compound message gets each distinct label, comma-separated
+            labels = []
+            for clause in _CLAUSE_PATTERN.split(user_message):
+                label = next((intent for intent, keywords in FAKE_ROUTER_RULES
+                              if any(keyword in clause for keyword in keywords)), None)
+                if label and label not in labels:
+                    labels.append(label)
+            return ','.join(labels) or 'GENERAL'
+        if agent_type == 'suggestions':
+            return '\n'.join(f"- {suggestion}" for suggestion in FAKE_SUGGESTIONS)
+
+        rules = FAKE_REPLY_RULES.get(agent_type, FAKE_REPLY_RULES['orchestrator'])
+        words = set(re.findall(r"[a-z0-9'-]+", user_message))
+        reply = next(text for keywords, text in rules
+                     if not keywords or any((k in words) if ' ' not in k else (k in user_message) for k in keywords))
+
+        if _STRUCTURED_MARKER in message:
+            return json.dumps({
+                'reply': reply,
+                'step': 'other',
+                'entities': {},
+                'confirmation': {'confirmed': 'confirmed' in reply.lower(), 'booking_id': None},
+                'suggested_replies': list(FAKE_SUGGESTIONS)
+            })
+        if SUGGESTION_TRAILER_MARKER in message:
+            return f"{reply}\n{SUGGESTION_TRAILER_MARKER}\n" + '\n'.join(FAKE_SUGGESTIONS)
+        return reply
+
+    def stats(self) -> dict:
+        """Call counts, injected failures and latency percentiles (ms, over the recorded calls)"""
+        latencies = sorted(call['latency_ms'] for call in self.calls)
+
+        def percentile(pct):
+            if not latencies:
+                return 0.0
+            return latencies[min(len(latencies) - 1, int(pct / 100 * len(latencies)))]
+
+        return {
+            'calls': self.call_count,
+            'errors': self.error_count,
+            'p50_ms': percentile(50),
+            'p95_ms': percentile(95),
+            'max_ms': latencies[-1] if latencies else 0.0
+        }
+
+
+# ==================== REPLAY ====================
+
+class ReplayedModelError(RuntimeError):
+    """A model failure that was recorded, raised again on replay"""
+
+
+class ReplayBackend(ModelBackend):
+    """
+    Recorded model outputs, substituted for the model one turn at a time.
+
+    Before each turn the replayer loads that turn's recorded calls; each call
+    then takes the next recorded output for its agent type. Calls the code
+    makes that were not recorded (misses) are answered by the fake backend,
+    and recorded calls the code no longer makes are counted as unused - both
+    mean the code under test now behaves differently from the recording.
+    """
+
+    name = "replay"
+
+    def __init__(self, latency_scale: float = 0.0, fallback: ModelBackend = None):
+        self.latency_scale = latency_scale
+        self.fallback = fallback or FakeBackend()
+        self.replayed = 0
+        self.misses = {}
+        self.unused = {}
+        self._pending = {}
+
+    def start_turn(self, calls: list):
+        """Queue one recorded turn's model calls (leftovers from the last turn count as unused)"""
+        self.end_turn()
+        for call in calls:
+            self._pending.setdefault(call['agent'], []).append(call)
+
+    def end_turn(self) -> dict:
+        """Drop the current turn's unreplayed calls; returns their count per agent type"""
+        leftover = {agent: len(queue) for agent, queue in self._pending.items() if queue}
+        for agent, count in leftover.items():
+            self.unused[agent] = self.unused.get(agent, 0) + count
+        self._pending = {}
+        return leftover
+
+    async def generate(self, agent, message: str, user_id: str, agent_type: str, session: str = None) -> str:
+        queue = self._pending.get(agent_type)
+        if not queue:
+            self.misses[agent_type] = self.misses.get(agent_type, 0) + 1
+            return await self.fallback.generate(agent, message, user_id, agent_type, session)
+
+        call = queue.pop(0)
+        self.replayed += 1
+        if self.latency_scale and call.get('ms'):
+            await asyncio.sleep(call['ms'] * self.latency_scale / 1000)
+        if call.get('error'):
+            raise ReplayedModelError(f"Recorded model failure ({agent_type}: {call['error']})")
+        return call.get('response') or ""
+
+
+def create_model_backend(session_service=None) -> ModelBackend:
+    """Backend selected by WELLNESS_MODEL_BACKEND (adk | fake)"""
+    name = backend_name()
+    if name == 'fake':
+        backend = FakeBackend.from_env()
+        log.info("Model backend", backend='fake', latency=backend.latency.spec, error_rate=backend.error_rate)
+        return backend
+    if name != 'adk':
+        raise ValueError(f"Unknown WELLNESS_MODEL_BACKEND '{name}' (use adk or fake)")
+    return AdkBackend(session_service)
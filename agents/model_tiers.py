@@ -0,0 +1,129 @@
+# agents/model_tiers.py
+"""
+Model Tiers - Which model serves each kind of agent call
+
+Two tiers: 'full' (the model every agent was built for) and 'lite' (a
+cheaper, faster model). Each call purpose - the agent_type passed to the
+backend: 'router', 'suggestions', 'pharmacy', ... - is assigned a tier.
+Purposes on the lite tier try the lite model first and escalate to the
+full model when the lite output is unusable (a router label outside the
+intent map, too few parseable suggestions, an empty or failed call) or
+low-confidence (a bare GENERAL when the keywords point at a specialist).
+
+Settings:
+    WELLNESS_MODEL_FULL      full-tier model (default gemini-2.0-flash)
+    WELLNESS_MODEL_LITE      lite-tier model (default gemini-2.0-flash-lite)
+    WELLNESS_MODEL_TIERS     purposes on the lite tier, e.g. "router=lite,suggestions=lite"
+                             (the default); anything not listed is full. "" puts
+                             every call on the full model
+    WELLNESS_MODEL_ESCALATION  false keeps lite answers as they are (default true)
+"""
+
+import os
+import threading
+
+
+FULL, LITE = 'full', 'lite'
+TIERS = (LITE, FULL)
+
+DEFAULT_MODELS = {FULL: 'gemini-2.0-flash', LITE: 'gemini-2.0-flash-lite'}
+DEFAULT_TIERS = 'router=lite,suggestions=lite'
+
+
+def parse_tiers(spec: str) -> dict:
+    """'router=lite,suggestions=full' -> {'router': 'lite', 'suggestions': 'full'} (bad entries ignored)"""
+    tiers = {}
+    for item in (spec or '').split(','):
+        purpose, _, tier = item.partition('=')
+        tier = tier.strip().lower()
+        if purpose.strip() and tier in TIERS:
+            tiers[purpose.strip()] = tier
+    return tiers
+
+
+def _empty_tier() -> dict:
+    return {'calls': 0, 'total_ms': 0.0, 'max_ms': 0.0}
+
+
+class ModelTiers:
+    """Tier assignment per call purpose, with escalation and per-tier latency counts"""
+
+    def __init__(self, models: dict = None, tiers: dict = None, escalation: bool = True):
+        """
+        Args:
+            models: Model name per tier ({'full': ..., 'lite': ...})
+            tiers: Tier per call purpose; purposes not listed use the full tier
+            escalation: Retry unusable lite output on the full model
+        """
+        self.models = dict(DEFAULT_MODELS, **(models or {}))
+        self.tiers = dict(parse_tiers(DEFAULT_TIERS) if tiers is None else tiers)
+        self.escalation = escalation
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    @classmethod
+    def from_env(cls) -> 'ModelTiers':
+        """Tiers configured from WELLNESS_MODEL_* settings"""
+        return cls(
+            models={FULL: os.getenv('WELLNESS_MODEL_FULL', DEFAULT_MODELS[FULL]),
+                    LITE: os.getenv('WELLNESS_MODEL_LITE', DEFAULT_MODELS[LITE])},
+            tiers=parse_tiers(os.getenv('WELLNESS_MODEL_TIERS', DEFAULT_TIERS)),
+            escalation=os.getenv('WELLNESS_MODEL_ESCALATION', 'true').lower() == 'true'
+        )
+
+    def tier_for(self, purpose: str) -> str:
+        """Tier a call purpose starts on"""
+        return self.tiers.get(purpose, FULL)
+
+    def model_for(self, tier: str) -> str:
+        return self.models[tier]
+
+    def lite_purposes(self) -> list:
+        """Purposes that start on the lite tier (only when it is a different model)"""
+        if self.models[LITE] == self.models[FULL]:
+            return []
+        return [purpose for purpose, tier in self.tiers.items() if tier == LITE]
+
+    # ==================== ACCOUNTING ====================
+
+    def record(self, purpose: str, tier: str, elapsed_ms: float):
+        """Count one call of a purpose on a tier"""
+        with self._lock:
+            tier_stats = self._purpose_stats(purpose)[tier]
+            tier_stats['calls'] += 1
+            tier_stats['total_ms'] += elapsed_ms
+            tier_stats['max_ms'] = max(tier_stats['max_ms'], elapsed_ms)
+
+    def record_escalation(self, purpose: str, reason: str):
+        """Count one lite answer sent on to the full tier"""
+        with self._lock:
+            escalations = self._purpose_stats(purpose)['escalations']
+            escalations[reason] = escalations.get(reason, 0) + 1
+
+    def _purpose_stats(self, purpose: str) -> dict:
+        if purpose not in self._stats:
+            self._stats[purpose] = {LITE: _empty_tier(), FULL: _empty_tier(), 'escalations': {}}
+        return self._stats[purpose]
+
+    def summary(self) -> dict:
+        """
+        Per purpose: its tier, calls and latency per tier, and escalations
+
+        Returns:
+            {'models': {...}, 'purposes': {purpose: {'tier', 'lite', 'full', 'escalations',
+             'escalation_rate'}}} with 'mean_ms' and 'max_ms' per tier
+        """
+        with self._lock:
+            purposes = {}
+            for purpose, stats in sorted(self._stats.items()):
+                escalated = sum(stats['escalations'].values())
+                entry = {'tier': self.tier_for(purpose), 'escalations': dict(stats['escalations']),
+                         'escalation_rate': round(escalated / stats[LITE]['calls'], 4) if stats[LITE]['calls'] else 0.0}
+                for tier in TIERS:
+                    tier_stats = stats[tier]
+                    entry[tier] = {'calls': tier_stats['calls'],
+                                   'mean_ms': round(tier_stats['total_ms'] / tier_stats['calls'], 1)
+                                   if tier_stats['calls'] else 0.0,
+                                   'max_ms': round(tier_stats['max_ms'], 1)}
+                purposes[purpose] = entry
+            return {'models': dict(self.models), 'purposes': purposes}
@@ -31,11 +31,16 @@ CRITICAL RULES:
 - Medicine-related queries ALWAYS go to PHARMACY, even if symptoms are mentioned
 - Only choose SYMPTOM when there are NO medicine-related words in the query
 
+COMPOUND MESSAGES:
+- If the message asks about two or more SEPARATE topics, return every matching agent name, separated by commas, most important first
+  Example: "I have a fever, is paracetamol available and is this covered by insurance?" -> "SYMPTOM,PHARMACY,INSURANCE"
+- A single question about a medicine for a symptom is still one topic: "can I take dolo for my fever?" -> "PHARMACY"
+
 RESPONSE FORMAT:
-Return ONLY the agent name in uppercase, nothing else.
-Examples: "SYMPTOM" or "SCHEDULING" or "PHARMACY"
+Return ONLY the agent name in uppercase (comma-separated names for a compound message), nothing else.
+Examples: "SYMPTOM" or "SCHEDULING" or "PHARMACY" or "SYMPTOM,INSURANCE"
 
-DO NOT explain your reasoning, just return the agent name.
+DO NOT explain your reasoning, just return the agent name(s).
 """
 
 class RouterAgent(ADKAgent):
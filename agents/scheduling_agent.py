@@ -1,5 +1,6 @@
 # agents/scheduling_agent.py
 from .adk_base_agent import ADKAgent
+from services.provider_directory import get_provider_directory
 
 SCHEDULING_AGENT_PROMPT = """
 You are WellnessGPT's Appointment Scheduling Specialist - a helpful and efficient medical appointment coordinator.
@@ -53,13 +54,7 @@ After gathering all information, provide SPECIFIC confirmation:
 You'll receive a confirmation message shortly. Please arrive 15 minutes early with your ID and any relevant medical reports."
 
 COMMON HOSPITALS BY CITY:
-- Delhi: Apollo Hospital, Max Healthcare, Fortis Hospital, AIIMS
-- Mumbai: Kokilaben Hospital, Lilavati Hospital, Apollo Mumbai, Jaslok Hospital
-- Bangalore: Manipal Hospital, Apollo Bangalore, Fortis Bangalore, Narayana Health
-- Chennai: Apollo Chennai, MIOT International, Fortis Malar, Global Hospitals
-- Kolkata: Apollo Kolkata, AMRI Hospital, Fortis Kolkata, Peerless Hospital
-- Hyderabad: Apollo Hyderabad, Yashoda Hospitals, Continental Hospitals, KIMS
-- Pune: Ruby Hall Clinic, Jehangir Hospital, Apollo Pune, Sahyadri Hospital
+[HOSPITALS BY CITY]
 
 DEPARTMENT MAPPING:
 Use the department recommended by the symptom specialist:
@@ -152,6 +147,7 @@ class SchedulingAgent(ADKAgent):
         super().__init__(
             name="scheduling_agent",
             description="Efficient medical appointment scheduling specialist",
-            instruction=SCHEDULING_AGENT_PROMPT,
+            instruction=SCHEDULING_AGENT_PROMPT.replace(
+                "[HOSPITALS BY CITY]", get_provider_directory().hospitals_by_city_text()),
             model="gemini-2.0-flash"
         )
\ No newline at end of file
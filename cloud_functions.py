@@ -61,6 +61,11 @@ def wellness_gpt_agent(request):
         # Use the singleton instance
         wellness_manager = get_wellness_manager()
         
+        admitted, retry_after = wellness_manager.load_shedder.admit()
+        if not admitted:
+            return (json.dumps({'error': 'Server busy, please retry shortly'}), 503,
+                    dict(headers, **{'Retry-After': str(retry_after)}))
+        
         loop = asyncio.new_event_loop()
         asyncio.set_event_loop(loop)
         
@@ -0,0 +1,75 @@
+# services/__init__.py
+from .structured_output import (
+    STRUCTURED_OUTPUT_INSTRUCTIONS,
+    SUGGESTION_TRAILER_INSTRUCTIONS,
+    parse_structured_reply,
+    split_suggestion_trailer
+)
+from .suggestion_cache import SuggestionCache, describe_signature, state_signature
+from .policy_answer_cache import PolicyAnswerCache, policy_version
+from .policy_query_engine import PolicyQueryEngine
+from .policy_retriever import PolicyRetriever, chunk_policy
+from .policy_store import PolicyStore, parse_policy_upload
+from .slot_engine import SlotEngine, parse_time_preference, preference_window
+from .id_service import IdService, get_id_service, new_id
+from .geo_index import GridIndex, PincodeTable, haversine_km
+from .provider_directory import ProviderDirectory, get_provider_directory
+from .medicine_resolver import MedicineResolver
+from .medicine_images import MedicineImageResolver
+from .catalog_store import CatalogStore, CatalogSnapshot, get_catalog_store
+from .asset_manifest import AssetManifest, get_asset_manifest
+from .conversation_log import ConversationRecorder, read_conversation_log
+from .tracing import LatencyHistogram, Tracer, span, traced
+from .metrics import MetricsRegistry, get_metrics
+from .token_ledger import MODEL_PRICES, SYSTEM_ACCOUNT, TokenLedger
+from .structured_log import configure_logging, get_logger
+from .load_shedder import LoadShedder
+
+__all__ = [
+    'STRUCTURED_OUTPUT_INSTRUCTIONS',
+    'SUGGESTION_TRAILER_INSTRUCTIONS',
+    'parse_structured_reply',
+    'split_suggestion_trailer',
+    'SuggestionCache',
+    'describe_signature',
+    'state_signature',
+    'PolicyAnswerCache',
+    'policy_version',
+    'PolicyQueryEngine',
+    'PolicyRetriever',
+    'chunk_policy',
+    'PolicyStore',
+    'parse_policy_upload',
+    'SlotEngine',
+    'parse_time_preference',
+    'preference_window',
+    'IdService',
+    'get_id_service',
+    'new_id',
+    'GridIndex',
+    'PincodeTable',
+    'haversine_km',
+    'ProviderDirectory',
+    'get_provider_directory',
+    'MedicineResolver',
+    'MedicineImageResolver',
+    'CatalogStore',
+    'CatalogSnapshot',
+    'get_catalog_store',
+    'AssetManifest',
+    'get_asset_manifest',
+    'ConversationRecorder',
+    'read_conversation_log',
+    'LatencyHistogram',
+    'Tracer',
+    'span',
+    'traced',
+    'MetricsRegistry',
+    'get_metrics',
+    'MODEL_PRICES',
+    'SYSTEM_ACCOUNT',
+    'TokenLedger',
+    'configure_logging',
+    'get_logger',
+    'LoadShedder'
+]
@@ -0,0 +1,75 @@
+# services/asset_manifest.py
+"""
+Asset Manifest - Resized, content-hashed variants of static images
+
+tools/build_assets.py writes static/build/ at deploy time: every medicine
+image in several widths, as WebP and JPEG, each named by a hash of its
+content (so a URL never changes meaning and can be cached forever). This
+module reads the manifest it leaves behind and turns an original image URL
+into the fields a card needs for a responsive <picture>. Without a
+manifest, cards fall back to the original image URLs.
+"""
+
+import json
+import os
+
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'static')
+BUILD_URL_PREFIX = '/static/build/'
+MANIFEST_PATH = os.path.join(STATIC_DIR, 'build', 'manifest.json')
+
+# Content-hashed build output never changes, so browsers may keep it for a year
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+def _srcset(variants: list) -> str:
+    return ', '.join(f"{variant['url']} {variant['width']}w" for variant in variants)
+
+
+class AssetManifest:
+    """Original image URL -> built variants"""
+
+    def __init__(self, images: dict):
+        self._cards = {}
+        for url, entry in images.items():
+            jpeg = sorted(entry.get('jpeg', []), key=lambda variant: variant['width'])
+            webp = sorted(entry.get('webp', []), key=lambda variant: variant['width'])
+            if not jpeg:
+                continue
+            # Plain src: the variant nearest the card's 2x display width, for browsers without srcset
+            fallback = next((v for v in jpeg if v['width'] >= entry.get('display_width', 0) * 2), jpeg[-1])
+            self._cards[url] = {
+                'image_url': fallback['url'],
+                'image_srcset': _srcset(jpeg),
+                'image_webp_srcset': _srcset(webp),
+                'image_width': entry['width'],
+                'image_height': entry['height']
+            }
+
+    @classmethod
+    def from_file(cls, path: str = MANIFEST_PATH):
+        """Load a manifest, or an empty one (original URLs only) if it has not been built"""
+        try:
+            with open(path, encoding='utf-8') as f:
+                return cls(json.load(f).get('images', {}))
+        except FileNotFoundError:
+            print(f" No asset manifest at {path} - serving original images (run tools/build_assets.py)")
+            return cls({})
+
+    def __len__(self):
+        return len(self._cards)
+
+    def card_image(self, url: str) -> dict:
+        """Card image fields for an original URL (just image_url when there are no variants)"""
+        return dict(self._cards.get(url) or {'image_url': url})
+
+
+_default_manifest = None
+
+
+def get_asset_manifest() -> AssetManifest:
+    """Process-wide manifest (WELLNESS_ASSET_MANIFEST, default static/build/manifest.json)"""
+    global _default_manifest
+    if _default_manifest is None:
+        _default_manifest = AssetManifest.from_file(os.getenv('WELLNESS_ASSET_MANIFEST', MANIFEST_PATH))
+    return _default_manifest
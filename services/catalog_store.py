@@ -0,0 +1,335 @@
+# services/catalog_store.py
+"""
+Catalog Store - Hot-reloadable medicine, pharmacy, insurance and lab catalogs
+
+Each catalog lives in its own versioned JSON file under data/catalogs:
+
+    {"catalog": "pharmacy_inventory", "version": "2026.10.0", "data": {...}}
+
+The store serves an immutable snapshot of every catalog plus indexes built
+from it. A background watcher polls the files; when one changes it builds a
+complete new snapshot off the request path and swaps it in with a single
+reference assignment (copy-on-write - unchanged catalogs are shared with the
+previous snapshot). A request pins the snapshot it started with, so it
+sees one consistent version even if a reload lands mid-request. A file that
+fails to load leaves the current snapshot in place.
+"""
+
+import contextvars
+import json
+import os
+import threading
+import time
+
+from .medicine_images import MedicineImageResolver
+from .medicine_resolver import MedicineResolver
+
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+STATIC_DIR = os.path.join(os.path.dirname(DATA_DIR), 'static')
+
+CATALOG_NAMES = ('medicine_images', 'insurance_policy', 'pharmacy_inventory', 'lab_catalog', 'medicine_lexicon')
+
+_pinned_snapshot = contextvars.ContextVar('catalog_snapshot', default=None)
+
+
+# ==================== READ-ONLY CONTAINERS ====================
+
+def _read_only(*args, **kwargs):
+    raise TypeError("Catalog snapshots are read-only - edit the catalog file instead")
+
+
+class FrozenDict(dict):
+    """dict that rejects mutation (still JSON-serializable and isinstance(dict))"""
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def __copy__(self):
+        return dict(self)
+
+    def __deepcopy__(self, memo):
+        return thaw(self)
+
+    def __reduce__(self):
+        return (dict, (thaw(self),))
+
+
+class FrozenList(list):
+    """list that rejects mutation (still JSON-serializable and isinstance(list))"""
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+    append = extend = insert = remove = pop = clear = sort = reverse = _read_only
+
+    def __copy__(self):
+        return list(self)
+
+    def __deepcopy__(self, memo):
+        return thaw(self)
+
+    def __reduce__(self):
+        return (list, (thaw(self),))
+
+
+def freeze(value):
+    """Deep read-only copy of parsed JSON"""
+    if isinstance(value, dict):
+        return FrozenDict((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, list):
+        return FrozenList(freeze(item) for item in value)
+    return value
+
+
+def thaw(value):
+    """Deep mutable copy of a frozen value"""
+    if isinstance(value, dict):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [thaw(item) for item in value]
+    return value
+
+
+# ==================== INDEXES ====================
+
+def _index_medicine_images(images: dict) -> dict:
+    resolver = MedicineImageResolver(images, STATIC_DIR)
+    return {
+        'resolver': resolver,
+        'default': resolver.default,
+        'problems': tuple(f"missing image {problem}" for problem in resolver.missing)
+    }
+
+
+def _index_pharmacy_inventory(inventory: dict) -> dict:
+    medicines = tuple(
+        (name.lower(), name, category, details)
+        for category, items in inventory.get('inventory', {}).items()
+        for name, details in items.items()
+    )
+    return {
+        'medicines': medicines,
+        'prompt_json': json.dumps(inventory, indent=2)
+    }
+
+
+def _index_lab_catalog(catalog: dict) -> dict:
+    return {
+        'cities': frozenset(city.lower() for city in catalog.get('supported_cities', []))
+    }
+
+
+def _index_medicine_lexicon(lexicon: dict) -> dict:
+    return {
+        'resolver': MedicineResolver(lexicon.get('medicines', []))
+    }
+
+
+# Catalog name -> builder of derived lookup structures for a snapshot
+INDEX_BUILDERS = {
+    'medicine_images': _index_medicine_images,
+    'pharmacy_inventory': _index_pharmacy_inventory,
+    'lab_catalog': _index_lab_catalog,
+    'medicine_lexicon': _index_medicine_lexicon
+}
+
+
+# ==================== SNAPSHOT ====================
+
+class CatalogSnapshot:
+    """
+    One immutable, consistent version of every catalog.
+
+    Attributes:
+        version (int): Store-wide snapshot number (increases on every swap)
+        catalog_versions (dict): Version string from each catalog file
+        loaded_at (float): Epoch seconds the snapshot was built
+    """
+
+    def __init__(self, version: int, catalogs: dict, catalog_versions: dict, indexes: dict):
+        self.version = version
+        self.catalog_versions = FrozenDict(catalog_versions)
+        self.loaded_at = time.time()
+        self._catalogs = catalogs
+        self._indexes = indexes
+
+    def __getitem__(self, name: str):
+        return self._catalogs[name]
+
+    def __contains__(self, name: str):
+        return name in self._catalogs
+
+    def index(self, name: str) -> dict:
+        """Derived lookups for a catalog (see INDEX_BUILDERS)"""
+        return self._indexes[name]
+
+
+# ==================== STORE ====================
+
+class CatalogStore:
+    """
+    Versioned catalogs with background reload and atomic snapshot swap.
+
+    Attributes:
+        directory (str): Folder containing <catalog>.json files
+        poll_seconds (float): Watcher polling interval
+        problems (dict): Data problems found while indexing the current snapshot, by catalog
+        stats (dict): Reload counters and timings
+    """
+
+    def __init__(self, directory: str, names: tuple = CATALOG_NAMES, poll_seconds: float = 2.0):
+        self.directory = directory
+        self.names = names
+        self.poll_seconds = poll_seconds
+        self._reload_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher = None
+        self._signatures = {}
+        self._entries = {}
+        self.problems = {}
+        self.stats = {
+            'reloads': 0,
+            'reload_failures': 0,
+            'last_reload_ms': 0.0,
+            'last_reload_at': None,
+            'last_error': None
+        }
+
+        self._snapshot = None
+        if not self.reload():
+            raise ValueError(f"Could not load catalogs from {directory}: {self.stats['last_error']}")
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, f"{name}.json")
+
+    def _signature(self, name: str) -> tuple:
+        stat = os.stat(self._path(name))
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _load_entry(self, name: str) -> dict:
+        """Parse, validate, freeze and index one catalog file"""
+        with open(self._path(name), encoding='utf-8') as f:
+            document = json.load(f)
+        if not isinstance(document, dict) or not isinstance(document.get('data'), dict):
+            raise ValueError(f"{name}.json must be an object with a 'data' object")
+
+        data = freeze(document['data'])
+        builder = INDEX_BUILDERS.get(name)
+        index = freeze(builder(data)) if builder else None
+
+        # Data problems an index found (e.g. missing image files) surface at load, not per request
+        problems = tuple(index.get('problems', ())) if index else ()
+        for problem in problems:
+            print(f"⚠️ Catalog {name}: {problem}")
+        return {
+            'version': str(document.get('version', 'unversioned')),
+            'data': data,
+            'index': index,
+            'problems': problems
+        }
+
+    def reload(self) -> bool:
+        """
+        Rebuild the snapshot if any catalog file changed
+
+        Returns:
+            True if a new snapshot was swapped in
+        """
+        with self._reload_lock:
+            start = time.perf_counter()
+            try:
+                signatures = {name: self._signature(name) for name in self.names}
+                changed = [name for name in self.names if signatures[name] != self._signatures.get(name)]
+                if not changed:
+                    return False
+
+                # Copy-on-write: only changed catalogs are re-parsed, the rest are shared
+                entries = dict(self._entries)
+                for name in changed:
+                    entries[name] = self._load_entry(name)
+            except Exception as e:
+                # Any bad file (unreadable, invalid JSON, data an index builder chokes on) keeps the
+                # current snapshot - an exception here would end the watcher thread
+                self.stats['reload_failures'] += 1
+                self.stats['last_error'] = str(e)
+                print(f"⚠️ Catalog reload failed, keeping snapshot "
+                      f"{self._snapshot.version if self._snapshot else None}: {e}")
+                return False
+
+            snapshot = CatalogSnapshot(
+                version=(self._snapshot.version + 1) if self._snapshot else 1,
+                catalogs={name: entry['data'] for name, entry in entries.items()},
+                catalog_versions={name: entry['version'] for name, entry in entries.items()},
+                indexes={name: entry['index'] for name, entry in entries.items()}
+            )
+            self._entries = entries
+            self.problems = {name: list(entry['problems']) for name, entry in entries.items() if entry['problems']}
+            self._signatures = signatures
+            self._snapshot = snapshot  # atomic swap - readers see the old or new snapshot, never a mix
+
+            self.stats['reloads'] += 1
+            self.stats['last_reload_ms'] = (time.perf_counter() - start) * 1000
+            self.stats['last_reload_at'] = snapshot.loaded_at
+            self.stats['last_error'] = None
+            print(f"📦 Catalog snapshot v{snapshot.version} loaded ({', '.join(changed)}) "
+                  f"in {self.stats['last_reload_ms']:.1f}ms")
+            return True
+
+    # ==================== READERS ====================
+
+    def current(self) -> CatalogSnapshot:
+        """Snapshot pinned for this request, or the latest one"""
+        return _pinned_snapshot.get() or self._snapshot
+
+    def latest(self) -> CatalogSnapshot:
+        return self._snapshot
+
+    def pin(self) -> CatalogSnapshot:
+        """Pin the latest snapshot for the current request (asyncio task / context)"""
+        snapshot = self._snapshot
+        _pinned_snapshot.set(snapshot)
+        return snapshot
+
+    # ==================== WATCHER ====================
+
+    def start_watcher(self):
+        """Poll catalog files in a daemon thread and swap in new snapshots"""
+        if self._watcher and self._watcher.is_alive():
+            return
+        self._stop.clear()
+        self._watcher = threading.Thread(target=self._watch, name="catalog-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watcher(self):
+        self._stop.set()
+        if self._watcher:
+            self._watcher.join(timeout=self.poll_seconds + 1)
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_seconds):
+            self.reload()
+
+    def metrics(self) -> dict:
+        """Snapshot version, per-catalog versions and reload timings"""
+        snapshot = self._snapshot
+        return {
+            'snapshot_version': snapshot.version,
+            'catalog_versions': dict(snapshot.catalog_versions),
+            'snapshot_age_seconds': round(time.time() - snapshot.loaded_at, 1),
+            'watching': bool(self._watcher and self._watcher.is_alive()),
+            'problems': self.problems,
+            **self.stats
+        }
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_catalog_store() -> CatalogStore:
+    """Process-wide catalog store (WELLNESS_CATALOG_DIR, default data/catalogs)"""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = CatalogStore(
+                os.getenv('WELLNESS_CATALOG_DIR', os.path.join(DATA_DIR, 'catalogs')),
+                poll_seconds=float(os.getenv('WELLNESS_CATALOG_POLL_SECONDS', '2'))
+            )
+        return _default_store
@@ -0,0 +1,161 @@
+# services/conversation_log.py
+"""
+Conversation Log - Opt-in recording of chat turns for replay
+
+When WELLNESS_RECORD_FILE is set, every process_message turn is appended to
+it as one compact JSON line: the user input, the routing decision, the agent
+that answered, card types, timings and every model call made for the turn
+(agent, prompt size, raw response, latency, error). Prompts themselves are
+not stored - they are rebuilt by the code under test on replay.
+
+Files ending in .zst are zstandard-compressed (needs the optional
+'zstandard' package; without it the recorder falls back to plain JSONL).
+tools/replay_conversations.py feeds a log back through process_message with
+the recorded model outputs substituted, for network-free regression runs.
+"""
+
+import contextvars
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+LOG_VERSION = 1
+COMPRESSED_SUFFIX = '.zst'
+ZSTD_LEVEL = 10
+
+# Model calls of the turn running in the current task (shared with any child tasks)
+_turn_calls = contextvars.ContextVar('wellness_turn_calls', default=None)
+
+
+def response_hash(text: str) -> str:
+    """Short fingerprint of a reply, to spot changed output on replay without storing it"""
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()[:12]
+
+
+def _open_for_append(path: str):
+    """Text stream appending to path, compressed when it ends in .zst"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    if path.endswith(COMPRESSED_SUFFIX):
+        # Each writer adds a zstd frame; concatenated frames decompress as one stream
+        # flush() ends a zstd block, so a crash loses at most the turn being written
+        raw = open(path, 'ab')
+        writer = zstandard.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(raw, closefd=True)
+        return io.TextIOWrapper(writer, encoding='utf-8', write_through=True)
+    return open(path, 'a', encoding='utf-8')
+
+
+def read_conversation_log(path: str):
+    """
+    Yield the recorded turns of a log, in recording order
+
+    Args:
+        path: .jsonl file, or .jsonl.zst when zstandard is installed
+
+    Returns:
+        Generator of turn dicts (truncated trailing lines from a crash are skipped)
+    """
+    if path.endswith(COMPRESSED_SUFFIX):
+        if zstandard is None:
+            raise RuntimeError(f"Reading {path} needs the 'zstandard' package (pip install zstandard)")
+        raw = open(path, 'rb')
+        stream = io.TextIOWrapper(
+            zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True, closefd=True),
+            encoding='utf-8'
+        )
+    else:
+        stream = open(path, encoding='utf-8')
+
+    with stream:
+        for line in stream:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                turn = json.loads(line)
+            except ValueError:
+                print(f" Skipping unreadable line in {path}")
+                continue
+            if turn.get('v') == LOG_VERSION:
+                yield turn
+
+
+class ConversationRecorder:
+    """Append-only writer of recorded turns"""
+
+    def __init__(self, path: str):
+        if path.endswith(COMPRESSED_SUFFIX) and zstandard is None:
+            print(f" 'zstandard' not installed - recording {path} uncompressed")
+            path = path[:-len(COMPRESSED_SUFFIX)]
+        self.path = path
+        self.turns = 0
+        self._lock = threading.Lock()
+        self._stream = _open_for_append(path)
+
+    @classmethod
+    def from_env(cls):
+        """Recorder for WELLNESS_RECORD_FILE, or None when recording is off"""
+        path = os.getenv('WELLNESS_RECORD_FILE')
+        if not path:
+            return None
+        print(f" Recording conversations to {path}")
+        return cls(path)
+
+    def begin_turn(self) -> list:
+        """Start collecting model calls for the turn running in this task"""
+        calls = []
+        _turn_calls.set(calls)
+        return calls
+
+    def record_call(self, agent_type: str, prompt: str, response: str, latency_ms: float, error: str = None):
+        """Note a model call made during the current turn (ignored outside a turn)"""
+        calls = _turn_calls.get()
+        if calls is not None:
+            calls.append({
+                'agent': agent_type,
+                'prompt_chars': len(prompt),
+                'response': response,
+                'ms': round(latency_ms, 1),
+                'error': error
+            })
+
+    def record_turn(self, user_id: str, user_input: str, result: dict, query_type: str,
+                    calls: list, elapsed_ms: float):
+        """Write one finished turn"""
+        _turn_calls.set(None)
+        line = json.dumps({
+            'v': LOG_VERSION,
+            'ts': round(time.time(), 3),
+            'user': user_id,
+            'input': user_input,
+            'route': query_type,
+            'agent': result.get('agent'),
+            'response_chars': len(result.get('response') or ''),
+            'response_hash': response_hash(result.get('response') or ''),
+            'cards': [card.get('type') for card in result.get('cards', [])],
+            'ms': round(elapsed_ms, 1),
+            'calls': calls
+        }, ensure_ascii=False, separators=(',', ':'))
+
+        with self._lock:
+            if self._stream is None:
+                return
+            self._stream.write(line + '\n')
+            self._stream.flush()
+            self.turns += 1
+
+    def close(self):
+        with self._lock:
+            if self._stream is not None:
+                self._stream.close()
+                self._stream = None
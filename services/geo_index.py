@@ -0,0 +1,202 @@
+# services/geo_index.py
+"""
+Geo Index - Nearest-provider search and offline pincode lookup
+
+GridIndex buckets points into fixed lat/lng cells and answers "nearest k"
+by searching rings of cells outward from the query, stopping as soon as no
+unvisited cell can hold anything closer than the current k-th result.
+PincodeTable maps Indian pincodes to area centroids from a local data file,
+so locations resolve without any network call.
+"""
+
+import heapq
+import json
+import math
+import re
+
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = 2 * math.pi * EARTH_RADIUS_KM / 360
+
+# Filtered searches over this many candidates or fewer skip the grid entirely
+BRUTE_FORCE_LIMIT = 256
+
+# Auto-sized grids halve the cell size until a typical point shares its cell with this many
+TARGET_CELL_POINTS = 16
+MIN_CELL_DEG = 0.005
+
+PINCODE_PATTERN = re.compile(r'\b([1-9]\d{5})\b')
+LAT_LNG_PATTERN = re.compile(r'(-?\d{1,2}\.\d+)\s*,\s*(-?\d{1,3}\.\d+)')
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle distance in kilometres"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lng2 - lng1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class GridIndex:
+    """
+    Uniform lat/lng grid over point locations.
+
+    Attributes:
+        cell_deg (float): Cell size in degrees (0.05° ≈ 5.5 km)
+    """
+
+    def __init__(self, points, cell_deg: float = None):
+        self._coords = {item_id: (lat, lng) for item_id, lat, lng in points}
+
+        # Auto-size: dense clusters (cities) need small cells, sparse data large ones
+        self.cell_deg = cell_deg or 0.1
+        self._build_cells()
+        while (cell_deg is None and self.cell_deg / 2 >= MIN_CELL_DEG and
+               self._crowding() > TARGET_CELL_POINTS):
+            self.cell_deg /= 2
+            self._build_cells()
+
+        rows = [row for row, _ in self._cells] or [0]
+        cols = [col for _, col in self._cells] or [0]
+        self._extent = (min(rows), max(rows), min(cols), max(cols))
+
+    def _build_cells(self):
+        self._cells = {}
+        for item_id, (lat, lng) in self._coords.items():
+            self._cells.setdefault(self._cell(lat, lng), []).append(item_id)
+
+    def _crowding(self) -> float:
+        """Average size of the cell each point sits in (weighted by point, so dense clusters count)"""
+        return sum(len(ids) ** 2 for ids in self._cells.values()) / max(1, len(self._coords))
+
+    def __len__(self):
+        return len(self._coords)
+
+    def _cell(self, lat: float, lng: float) -> tuple:
+        return (math.floor(lat / self.cell_deg), math.floor(lng / self.cell_deg))
+
+    def _ring(self, row: int, col: int, ring: int):
+        """Cells exactly `ring` steps (Chebyshev) from (row, col)"""
+        if ring == 0:
+            yield (row, col)
+            return
+        for d_col in range(-ring, ring + 1):
+            yield (row - ring, col + d_col)
+            yield (row + ring, col + d_col)
+        for d_row in range(-ring + 1, ring):
+            yield (row + d_row, col - ring)
+            yield (row + d_row, col + ring)
+
+    def _ring_bound_km(self, lat: float, ring: int) -> float:
+        """Lower bound on the distance to any cell outside `ring`"""
+        widest_lat = min(90.0, abs(lat) + (ring + 1) * self.cell_deg)
+        return 0.99 * ring * self.cell_deg * KM_PER_DEGREE * math.cos(math.radians(widest_lat))
+
+    def nearest(self, lat: float, lng: float, k: int, allowed: set = None, max_km: float = None) -> list:
+        """
+        The k points closest to (lat, lng)
+
+        Args:
+            lat, lng: Query location
+            k: Number of results
+            allowed: Only consider these ids (None = all)
+            max_km: Ignore points further away than this
+
+        Returns:
+            List of (item_id, distance_km), closest first
+        """
+        if k <= 0:
+            return []
+
+        if allowed is not None and len(allowed) <= BRUTE_FORCE_LIMIT:
+            candidates = (
+                (haversine_km(lat, lng, *self._coords[item_id]), item_id)
+                for item_id in allowed if item_id in self._coords
+            )
+            if max_km is not None:
+                candidates = (c for c in candidates if c[0] <= max_km)
+            return [(item_id, distance) for distance, item_id in heapq.nsmallest(k, candidates)]
+
+        best = []  # max-heap of (-distance, item_id), size <= k
+
+        def consider(cell):
+            for item_id in self._cells.get(cell, ()):
+                if allowed is not None and item_id not in allowed:
+                    continue
+                distance = haversine_km(lat, lng, *self._coords[item_id])
+                if max_km is not None and distance > max_km:
+                    continue
+                if len(best) < k:
+                    heapq.heappush(best, (-distance, item_id))
+                elif distance < -best[0][0]:
+                    heapq.heapreplace(best, (-distance, item_id))
+
+        row, col = self._cell(lat, lng)
+        min_row, max_row, min_col, max_col = self._extent
+        last_ring = max(abs(row - min_row), abs(row - max_row), abs(col - min_col), abs(col - max_col))
+
+        for ring in range(last_ring + 1):
+            if 8 * ring > len(self._cells):
+                # Rings are now bigger than the occupied grid: sweep the remaining cells once
+                for cell in self._cells:
+                    if max(abs(cell[0] - row), abs(cell[1] - col)) >= ring:
+                        consider(cell)
+                break
+            for cell in self._ring(row, col, ring):
+                consider(cell)
+            bound = self._ring_bound_km(lat, ring)
+            if len(best) == k and -best[0][0] <= bound:
+                break
+            if max_km is not None and bound > max_km:
+                break
+
+        return [(item_id, -neg_distance) for neg_distance, item_id in sorted(best, reverse=True)]
+
+
+class PincodeTable:
+    """Offline pincode -> area centroid lookup, with 3-digit district fallback"""
+
+    def __init__(self, pincodes: dict):
+        self._pincodes = pincodes
+        districts = {}
+        for pincode, place in pincodes.items():
+            districts.setdefault(pincode[:3], []).append(place)
+        self._districts = {
+            prefix: {
+                'area': None,
+                'city': places[0]['city'],
+                'lat': sum(p['lat'] for p in places) / len(places),
+                'lng': sum(p['lng'] for p in places) / len(places)
+            }
+            for prefix, places in districts.items()
+        }
+
+    @classmethod
+    def from_file(cls, path: str):
+        """Load pincode centroids from a JSON file"""
+        with open(path, encoding='utf-8') as f:
+            return cls(json.load(f).get('pincodes', {}))
+
+    def lookup(self, pincode: str) -> dict:
+        """Centroid for a pincode (district centroid if only the prefix is known)"""
+        place = self._pincodes.get(pincode) or self._districts.get(pincode[:3])
+        if not place:
+            return None
+        return {'pincode': pincode, 'area': place.get('area'), 'city': place['city'],
+                'lat': place['lat'], 'lng': place['lng']}
+
+    def locate(self, text: str) -> dict:
+        """Location from a pincode or "lat, lng" pair in free text (None if neither)"""
+        if not text:
+            return None
+        match = LAT_LNG_PATTERN.search(text)
+        if match:
+            lat, lng = float(match.group(1)), float(match.group(2))
+            if -90 <= lat <= 90 and -180 <= lng <= 180:
+                return {'pincode': None, 'area': None, 'city': None, 'lat': lat, 'lng': lng}
+        for match in PINCODE_PATTERN.finditer(text):
+            place = self.lookup(match.group(1))
+            if place:
+                return place
+        return None
@@ -0,0 +1,165 @@
+# services/id_service.py
+"""
+ID Service - Unique, sortable booking and order IDs without a central lock
+
+IDs pack (milliseconds since epoch, node, sequence) into 80 bits and encode
+them as 16 Crockford base32 characters behind a per-type prefix, e.g.
+APPT-06BX3K9M2A7Q0004. The node is drawn from os.urandom when a process
+starts (and again in forked children), so processes on any number of hosts
+need no coordination: two share a node with probability ~n^2 / 2^29 for n live
+processes. Set WELLNESS_ID_NODE to a unique value per process to rule that out.
+IDs from one process are strictly increasing, and IDs sort by issue time.
+"""
+
+import os
+import threading
+import time
+
+
+# Booking / order types and their ID prefixes
+ID_PREFIXES = {
+    'appointment': 'APPT',
+    'lab_booking': 'LAB',
+    'test_booking': 'TEST',
+    'order': 'ORD'
+}
+
+EPOCH_MS = 1704067200000  # 2024-01-01T00:00:00Z
+
+TIMESTAMP_BITS = 41   # ~69 years of milliseconds
+NODE_BITS = 28        # random per process unless WELLNESS_ID_NODE is set
+SEQUENCE_BITS = 11    # 2048 IDs per millisecond per process
+
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+ENCODED_LENGTH = 16   # 80 bits / 5 bits per character
+
+CROCKFORD_ALPHABET = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+_DECODE = {char: value for value, char in enumerate(CROCKFORD_ALPHABET)}
+
+
+def _default_node() -> int:
+    """Node id from WELLNESS_ID_NODE, or random bits drawn for this process"""
+    configured = os.getenv('WELLNESS_ID_NODE')
+    if configured:
+        return int(configured) & ((1 << NODE_BITS) - 1)
+    return int.from_bytes(os.urandom(4), 'big') & ((1 << NODE_BITS) - 1)
+
+
+def _encode(value: int) -> str:
+    chars = []
+    for _ in range(ENCODED_LENGTH):
+        chars.append(CROCKFORD_ALPHABET[value & 31])
+        value >>= 5
+    return ''.join(reversed(chars))
+
+
+class IdService:
+    """
+    Time + node + sequence ID generator.
+
+    Attributes:
+        stats (dict): Issued / clock-regression / sequence-overflow counters
+    """
+
+    def __init__(self, node: int = None, clock=time.time):
+        self._configured_node = node
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._reset_for_process()
+        self.stats = {'issued': 0, 'clock_regressions': 0, 'sequence_overflows': 0}
+
+    def _reset_for_process(self):
+        """(Re)derive per-process state - also runs in forked children"""
+        self._pid = os.getpid()
+        self._node = self._configured_node if self._configured_node is not None else _default_node()
+        self._last_ms = -1
+        self._last_clock_ms = -1
+        self._sequence = 0
+
+    @property
+    def node(self) -> int:
+        return self._node
+
+    def _next_value(self) -> int:
+        """Next 80-bit ID value for this process"""
+        with self._lock:
+            if os.getpid() != self._pid:
+                self._reset_for_process()
+
+            clock_ms = int(self._clock() * 1000) - EPOCH_MS
+            if clock_ms < self._last_clock_ms:
+                self.stats['clock_regressions'] += 1
+            self._last_clock_ms = clock_ms
+
+            # Never go below the last issued timestamp (clock regression or borrowed ms)
+            now_ms = max(clock_ms, self._last_ms)
+
+            if now_ms == self._last_ms:
+                self._sequence += 1
+                if self._sequence > MAX_SEQUENCE:
+                    # Sequence exhausted for this millisecond: borrow the next one
+                    self.stats['sequence_overflows'] += 1
+                    now_ms += 1
+                    self._sequence = 0
+            else:
+                self._sequence = 0
+
+            self._last_ms = now_ms
+            self.stats['issued'] += 1
+            return (((now_ms & ((1 << TIMESTAMP_BITS) - 1)) << (NODE_BITS + SEQUENCE_BITS))
+                    | (self._node << SEQUENCE_BITS) | self._sequence)
+
+    def next_id(self, kind: str) -> str:
+        """
+        Issue a new ID
+
+        Args:
+            kind: Booking type from ID_PREFIXES (e.g. 'appointment'), or a raw prefix
+
+        Returns:
+            ID string like "APPT-06BX3K9M2A7Q0004"
+        """
+        prefix = ID_PREFIXES.get(kind, kind.upper())
+        return f"{prefix}-{_encode(self._next_value())}"
+
+    @staticmethod
+    def decode(issued_id: str) -> dict:
+        """
+        Recover the components of an issued ID
+
+        Returns:
+            Dictionary with prefix, issued_at (epoch seconds), node and sequence
+
+        Raises:
+            ValueError: If the ID was not issued by this service
+        """
+        prefix, _, encoded = issued_id.rpartition('-')
+        if len(encoded) != ENCODED_LENGTH or any(char not in _DECODE for char in encoded):
+            raise ValueError(f"Not a service-issued ID: {issued_id}")
+
+        value = 0
+        for char in encoded:
+            value = (value << 5) | _DECODE[char]
+        node = (value >> SEQUENCE_BITS) & ((1 << NODE_BITS) - 1)
+        return {
+            'prefix': prefix,
+            'issued_at': ((value >> (NODE_BITS + SEQUENCE_BITS)) + EPOCH_MS) / 1000,
+            'node': node,
+            'sequence': value & MAX_SEQUENCE
+        }
+
+
+_default_service = None
+
+
+def get_id_service() -> IdService:
+    """Process-wide ID service"""
+    global _default_service
+    if _default_service is None:
+        _default_service = IdService()
+    return _default_service
+
+
+def new_id(kind: str) -> str:
+    """Issue an ID from the process-wide service"""
+    return get_id_service().next_id(kind)
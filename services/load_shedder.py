@@ -0,0 +1,198 @@
+# services/load_shedder.py
+"""
+Load Shedder - Adaptive degradation levels from live model latency and load
+
+Watches two signals: the p95 of model call latency over a sliding window,
+and the number of turns in flight. Pressure is the worse of the two,
+relative to its limit. As pressure rises the controller steps up through
+the levels, dropping the least valuable work first:
+
+    0 normal
+    1 no_suggestions   rule-based suggested replies instead of the LLM call
+    2 keyword_router   local keyword routing instead of RouterAgent
+    3 short_history    shorter conversation windows in prompts
+    4 reject           new turns refused with a Retry-After
+
+Stepping up is immediate. Stepping down is one level at a time, and only
+after pressure has stayed below RECOVER_RATIO of the current level's entry
+threshold for the cool-down. This hysteresis keeps the level from
+flapping around a threshold. Shedding work removes latency samples and
+turns in flight, so the signals fall by themselves and the controller
+recovers without intervention.
+
+A turn reads the level once, when it starts, and keeps that level
+throughout.
+"""
+
+import bisect
+import contextvars
+import os
+import threading
+import time
+from collections import deque
+
+from .structured_log import get_logger
+
+log = get_logger('load')
+
+
+LEVELS = ('normal', 'no_suggestions', 'keyword_router', 'short_history', 'reject')
+NORMAL, NO_SUGGESTIONS, KEYWORD_ROUTER, SHORT_HISTORY, REJECT = range(len(LEVELS))
+
+# Pressure at which each level is entered
+ENTER_PRESSURE = (0.0, 1.0, 1.5, 2.0, 3.0)
+# Step down once pressure stays below this fraction of the current level's entry pressure
+RECOVER_RATIO = 0.7
+# Latency p95 is ignored until the window holds this many calls
+MIN_LATENCY_SAMPLES = 5
+# The p95 is recomputed at most this often (seconds) and over at most this many recent calls
+P95_INTERVAL = 0.25
+MAX_LATENCY_SAMPLES = 2000
+
+_turn_level = contextvars.ContextVar('wellness_shed_level', default=NORMAL)
+
+
+class LoadShedder:
+    """Degradation level controller with hysteresis"""
+
+    def __init__(self, enabled: bool = True, latency_target_ms: float = 8000, max_inflight: int = 100,
+                 window_seconds: float = 30, cooldown_seconds: float = 15, retry_after_seconds: int = 10,
+                 clock=time.monotonic):
+        """
+        Args:
+            enabled: False pins the level at normal
+            latency_target_ms: Model call p95 that counts as pressure 1.0
+            max_inflight: Turns in flight that count as pressure 1.0
+            window_seconds: Latency samples older than this are forgotten
+            cooldown_seconds: Time pressure must stay low before stepping down a level
+            retry_after_seconds: Retry-After sent with rejected requests
+            clock: Monotonic time source (seconds)
+        """
+        self.enabled = enabled
+        self.latency_target_ms = latency_target_ms
+        self.max_inflight = max_inflight
+        self.window_seconds = window_seconds
+        self.cooldown_seconds = cooldown_seconds
+        self.retry_after_seconds = retry_after_seconds
+        self.clock = clock
+
+        self.level = NORMAL
+        self.inflight = 0
+        self.pressure = 0.0
+        self.latency_p95_ms = 0.0
+        self._samples = deque(maxlen=MAX_LATENCY_SAMPLES)
+        self._p95_at = None
+        self._calm_since = None
+        self._lock = threading.Lock()
+        self.stats = {'transitions': 0, 'rejected': 0, 'shed_turns': 0}
+
+    @classmethod
+    def from_env(cls) -> 'LoadShedder':
+        """Controller configured from WELLNESS_LOAD_SHEDDING / WELLNESS_SHED_* settings"""
+        return cls(
+            enabled=os.getenv('WELLNESS_LOAD_SHEDDING', 'true').lower() == 'true',
+            latency_target_ms=float(os.getenv('WELLNESS_SHED_LATENCY_MS', '8000')),
+            max_inflight=int(os.getenv('WELLNESS_SHED_MAX_INFLIGHT', '100')),
+            window_seconds=float(os.getenv('WELLNESS_SHED_WINDOW', '30')),
+            cooldown_seconds=float(os.getenv('WELLNESS_SHED_COOLDOWN', '15')),
+            retry_after_seconds=int(os.getenv('WELLNESS_SHED_RETRY_AFTER', '10'))
+        )
+
+    # ==================== SIGNALS ====================
+
+    def observe_latency(self, latency_ms: float):
+        """Record one model call's latency (failed calls included)"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._samples.append((self.clock(), latency_ms))
+
+    def turn_started(self) -> int:
+        """Count a turn in flight; returns the level the turn runs at"""
+        with self._lock:
+            self.inflight += 1
+            level = self._evaluate()
+            if level > NORMAL:
+                self.stats['shed_turns'] += 1
+        _turn_level.set(level)
+        return level
+
+    def turn_finished(self):
+        with self._lock:
+            self.inflight = max(0, self.inflight - 1)
+        _turn_level.set(NORMAL)
+
+    def turn_level(self) -> int:
+        """Level of the turn running in this task (normal outside a turn)"""
+        return _turn_level.get()
+
+    # ==================== CONTROL ====================
+
+    def admit(self) -> tuple:
+        """
+        Whether to accept a new request
+
+        Returns:
+            (True, None) to accept, or (False, retry_after_seconds) at the reject level
+        """
+        with self._lock:
+            if self._evaluate() < REJECT:
+                return True, None
+            self.stats['rejected'] += 1
+        return False, self.retry_after_seconds
+
+    def current_level(self) -> int:
+        with self._lock:
+            return self._evaluate()
+
+    def _evaluate(self) -> int:
+        """Update pressure and level from the signals (caller holds the lock)"""
+        if not self.enabled:
+            return NORMAL
+        now = self.clock()
+        if self._p95_at is None or now - self._p95_at >= P95_INTERVAL:
+            self._p95_at = now
+            while self._samples and now - self._samples[0][0] > self.window_seconds:
+                self._samples.popleft()
+            if len(self._samples) >= MIN_LATENCY_SAMPLES:
+                ordered = sorted(latency for _, latency in self._samples)
+                self.latency_p95_ms = ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+            else:
+                self.latency_p95_ms = 0.0
+        self.pressure = max(self.latency_p95_ms / self.latency_target_ms if self.latency_target_ms else 0.0,
+                            self.inflight / self.max_inflight if self.max_inflight else 0.0)
+
+        target = bisect.bisect_right(ENTER_PRESSURE, self.pressure) - 1
+        if target > self.level:
+            self._set_level(target)
+            self._calm_since = None
+        elif self.level > NORMAL and self.pressure < ENTER_PRESSURE[self.level] * RECOVER_RATIO:
+            if self._calm_since is None:
+                self._calm_since = now
+            elif now - self._calm_since >= self.cooldown_seconds:
+                self._set_level(self.level - 1)
+                self._calm_since = now
+        else:
+            self._calm_since = None
+        return self.level
+
+    def _set_level(self, level: int):
+        log.warning("Degradation level changed", level=level, name=LEVELS[level], previous=LEVELS[self.level],
+                    pressure=round(self.pressure, 2), latency_p95_ms=round(self.latency_p95_ms),
+                    inflight=self.inflight)
+        self.level = level
+        self.stats['transitions'] += 1
+
+    def state(self) -> dict:
+        """Current level and the signals behind it"""
+        with self._lock:
+            level = self._evaluate()
+            return {
+                'enabled': self.enabled,
+                'level': level,
+                'name': LEVELS[level],
+                'pressure': round(self.pressure, 3),
+                'latency_p95_ms': round(self.latency_p95_ms, 1),
+                'inflight': self.inflight,
+                **self.stats
+            }
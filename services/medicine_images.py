@@ -0,0 +1,118 @@
+# services/medicine_images.py
+"""
+Medicine Images - Card image lookup built once per catalog snapshot
+
+The medicine_images catalog maps names ("dolo", "vitamin d3") to files under
+static/images/medicine. Every mapping is checked against the files on disk
+when the catalog loads - a missing file is reported then and served as the
+placeholder, never discovered by a user. Lookups tokenize the medicine name
+and probe a phrase table (no scanning), and each name's result is memoized.
+"""
+
+import os
+import threading
+
+from .medicine_resolver import normalize
+
+
+STATIC_URL_PREFIX = '/static/'
+
+# Memoized names kept per snapshot (cleared when full - names come from a small catalog)
+MEMO_SIZE = 2048
+
+# Words that describe what a medicine treats -> image to use when no name matches
+CATEGORY_IMAGES = (
+    (('paracetamol', 'crocin', 'dolo', 'pain', 'fever', 'headache'), 'crocin'),
+    (('antibiotic', 'amoxicillin', 'azithromycin', 'infection'), 'moxikind'),
+    (('allergy', 'asthma', 'montelukast', 'cetirizine'), 'montair'),
+    (('diabetes', 'metformin', 'glycomet', 'amaryl'), 'glycomet'),
+    (('cholesterol', 'atorvastatin', 'storvas'), 'storvas'),
+    (('blood pressure', 'bp', 'telma', 'amlodipine'), 'telma'),
+    (('stomach', 'acid', 'acidity', 'digestion', 'pan', 'omeprazole'), 'pan'),
+    (('vitamin', 'supplement', 'becosules'), 'becosules'),
+    (('cold', 'cough', 'sinarest'), 'sinarest'),
+)
+
+
+def _tokens(text: str) -> tuple:
+    return tuple(normalize(text).split())
+
+
+class MedicineImageResolver:
+    """
+    Validated name -> image table with token lookup.
+
+    Attributes:
+        default (str): Placeholder image URL
+        missing (list): Problems found at load ("key: path" whose file does not exist)
+    """
+
+    def __init__(self, images: dict, static_dir: str):
+        if 'default' not in images:
+            raise ValueError("medicine_images must map 'default' to a placeholder image")
+
+        self.missing = []
+        self.default = images['default']
+        if not self._exists(self.default, static_dir):
+            self.missing.append(f"default: {self.default}")
+
+        # phrase tokens -> (catalog order, image); earlier keys win, as in the catalog file
+        self._phrases = {}
+        for order, (key, path) in enumerate(images.items()):
+            if key == 'default':
+                continue
+            if not self._exists(path, static_dir):
+                self.missing.append(f"{key}: {path}")
+                path = self.default
+            tokens = _tokens(key)
+            if tokens and tokens not in self._phrases:
+                self._phrases[tokens] = (order, path)
+
+        self._categories = {}
+        for order, (keywords, image_key) in enumerate(CATEGORY_IMAGES):
+            match = self._phrases.get(_tokens(image_key))
+            if not match:
+                self.missing.append(f"category image '{image_key}' is not in the catalog")
+                continue
+            for keyword in keywords:
+                self._categories.setdefault(_tokens(keyword), (order, match[1]))
+
+        self._longest = max((len(tokens) for tokens in list(self._phrases) + list(self._categories)), default=1)
+        self._memo = {}
+        self._memo_lock = threading.Lock()
+
+    @staticmethod
+    def _exists(path: str, static_dir: str) -> bool:
+        if not path.startswith(STATIC_URL_PREFIX):
+            return False
+        return os.path.isfile(os.path.join(static_dir, *path[len(STATIC_URL_PREFIX):].split('/')))
+
+    def _best(self, tokens: tuple, table: dict) -> str:
+        """Image of the earliest-listed phrase occurring in the tokens, or None"""
+        best = None
+        for start in range(len(tokens)):
+            for size in range(1, min(self._longest, len(tokens) - start) + 1):
+                match = table.get(tokens[start:start + size])
+                if match and (best is None or match[0] < best[0]):
+                    best = match
+        return best[1] if best else None
+
+    def lookup(self, medicine_name: str, categories: bool = True) -> str:
+        """
+        Image for a medicine name: a catalog name in it, else (optionally) a category word, else None
+
+        Memoized per name, so repeated cards for the same SKU cost one dict lookup.
+        """
+        key = ((medicine_name or '').lower(), categories)
+        if key in self._memo:
+            return self._memo[key]
+
+        tokens = _tokens(key[0])
+        image = self._best(tokens, self._phrases)
+        if image is None and categories:
+            image = self._best(tokens, self._categories)
+        with self._memo_lock:
+            if len(self._memo) >= MEMO_SIZE:
+                self._memo.clear()
+            self._memo[key] = image
+        return image
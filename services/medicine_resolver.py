@@ -0,0 +1,232 @@
+# services/medicine_resolver.py
+"""
+Medicine Resolver - Typo-tolerant medicine name lookup
+
+Users type "paracetmol", "dolo650", "azithro" or "montek lc". Every generic
+name, brand and alias from the medicine lexicon is indexed by character
+trigrams; a query collects the terms sharing the most trigrams with it and
+verifies them with edit distance (plus prefix matching for abbreviations).
+Everything is local and in memory - a lookup takes a few microseconds.
+"""
+
+import heapq
+import re
+from collections import Counter
+
+
+# Minimum score for a match to be returned
+MIN_SCORE = 0.75
+
+# Terms sharing the most trigrams with the query that get an edit-distance check
+VERIFY_CANDIDATES = 12
+
+# Queries shorter than this must match a term exactly (or as a prefix of length 4+)
+MIN_FUZZY_LENGTH = 5
+MIN_PREFIX_LENGTH = 4
+
+# Longest phrase (in words) tried when scanning free text
+MAX_PHRASE_WORDS = 3
+
+_NON_ALNUM = re.compile(r'[^a-z0-9]+')
+_LETTER_DIGIT = re.compile(r'(?<=[a-z])(?=\d)|(?<=\d)(?=[a-z])')
+
+# Words that never start a medicine mention in free text
+STOPWORDS = frozenset({
+    'a', 'an', 'and', 'any', 'are', 'book', 'buy', 'can', 'do', 'doctor', 'dose', 'for', 'get',
+    'give', 'have', 'how', 'i', 'in', 'is', 'it', 'me', 'medicine', 'my', 'need', 'of', 'on',
+    'or', 'order', 'please', 'price', 'some', 'tablet', 'tablets', 'take', 'the', 'to', 'want',
+    'what', 'with', 'you'
+})
+
+
+def normalize(text: str) -> str:
+    """Lowercase words, punctuation dropped and digits split from letters ("Dolo650" -> "dolo 650")"""
+    text = _LETTER_DIGIT.sub(' ', (text or '').lower())
+    return _NON_ALNUM.sub(' ', text).strip()
+
+
+def _trigrams(compact: str) -> set:
+    padded = f"${compact}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _allowed_edits(length: int) -> int:
+    if length < MIN_FUZZY_LENGTH:
+        return 0
+    return 1 if length < 9 else 2
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Damerau-Levenshtein (optimal string alignment) distance, or limit + 1 once it is exceeded"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    over = limit + 1
+    before = None
+    row = [j if j <= limit else over for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        previous, row = row, [over] * (len(b) + 1)
+        if i <= limit:
+            row[0] = i
+        # Only cells within `limit` of the diagonal can stay under the limit
+        for j in range(max(1, i - limit), min(len(b), i + limit) + 1):
+            value = previous[j - 1] + (a[i - 1] != b[j - 1])
+            if previous[j] + 1 < value:
+                value = previous[j] + 1
+            if row[j - 1] + 1 < value:
+                value = row[j - 1] + 1
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1] and before[j - 2] + 1 < value:
+                value = before[j - 2] + 1
+            row[j] = value
+        if min(row) > limit:
+            return over
+        before = previous
+    return min(row[-1], over)
+
+
+class MedicineResolver:
+    """
+    Trigram index over generic names, brands and aliases.
+
+    Attributes:
+        terms (list): Indexed terms as dicts with name, generic, kind and compact form
+    """
+
+    def __init__(self, medicines):
+        self.terms = []
+        self._exact = {}
+        self._postings = {}
+        for medicine in medicines:
+            generic = medicine['generic']
+            names = [(generic, 'generic')]
+            names += [(brand, 'brand') for brand in medicine.get('brands', [])]
+            names += [(alias, 'alias') for alias in medicine.get('aliases', [])]
+            for name, kind in names:
+                compact = normalize(name).replace(' ', '')
+                if not compact or compact in self._exact:
+                    continue
+                term_id = len(self.terms)
+                self.terms.append({
+                    'name': generic if kind == 'alias' else name,
+                    'generic': generic,
+                    'kind': kind,
+                    'compact': compact
+                })
+                self._exact[compact] = term_id
+                for gram in _trigrams(compact):
+                    self._postings.setdefault(gram, []).append(term_id)
+
+    def _min_shared(self, query: str, grams: int, compact: str) -> int:
+        """Trigrams a term must share with the query to possibly score (each edit breaks at most 3)"""
+        full = grams - 3 * _allowed_edits(min(len(query), len(compact)))
+        if MIN_PREFIX_LENGTH <= len(query) < len(compact):
+            prefix = grams - 1 - 3 * (_allowed_edits(len(query)) // 2)
+            return min(full, prefix)
+        return full
+
+    def _score(self, query: str, term: dict) -> float:
+        """Similarity in [0, 1] from edit distance, or from a prefix match for abbreviations"""
+        compact = term['compact']
+        score = 0.0
+        longest = max(len(query), len(compact))
+        limit = _allowed_edits(min(len(query), len(compact)))
+        if limit:
+            distance = edit_distance(query, compact, limit)
+            if distance <= limit:
+                score = 1 - distance / longest
+
+        if MIN_PREFIX_LENGTH <= len(query) < len(compact):
+            limit = _allowed_edits(len(query)) // 2
+            distance = edit_distance(query, compact[:len(query)], limit)
+            if distance <= limit:
+                prefix_score = (1 - distance / len(query)) * (0.8 + 0.15 * len(query) / len(compact))
+                score = max(score, prefix_score)
+        return score
+
+    def resolve(self, text: str, limit: int = 3, min_score: float = MIN_SCORE) -> list:
+        """
+        Best-matching medicines for a name as typed
+
+        Args:
+            text: Medicine name, possibly misspelled or abbreviated
+            limit: Maximum number of candidates (one per generic)
+            min_score: Drop candidates scoring below this
+
+        Returns:
+            List of {'name', 'generic', 'kind', 'score', 'matched'} sorted by score
+        """
+        query = normalize(text).replace(' ', '')
+        if not query:
+            return []
+
+        term_id = self._exact.get(query)
+        if term_id is not None:
+            return [self._result(term_id, 1.0)]
+        if len(query) < MIN_PREFIX_LENGTH:
+            return []
+
+        grams = _trigrams(query)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self._postings.get(gram, ()))
+        candidates = heapq.nlargest(VERIFY_CANDIDATES, shared.items(), key=lambda item: item[1])
+
+        best = {}
+        for term_id, count in candidates:
+            term = self.terms[term_id]
+            if count < self._min_shared(query, len(grams), term['compact']):
+                continue
+            score = self._score(query, term)
+            if score >= min_score and score > best.get(term['generic'], (0,))[0]:
+                best[term['generic']] = (score, term_id)
+
+        ranked = sorted(best.values(), key=lambda item: (-item[0], item[1]))[:limit]
+        return [self._result(term_id, score) for score, term_id in ranked]
+
+    def best(self, text: str, min_score: float = MIN_SCORE) -> dict:
+        """Top candidate for a name, or None"""
+        results = self.resolve(text, limit=1, min_score=min_score)
+        return results[0] if results else None
+
+    def find_in_text(self, text: str, limit: int = 5) -> list:
+        """
+        Medicines mentioned anywhere in free text
+
+        Tries phrases of up to MAX_PHRASE_WORDS words (so "montek lc" and
+        "dolo 650" are found as one mention) and keeps the best
+        non-overlapping matches.
+
+        Returns:
+            List of resolve() results in the order they appear in the text
+        """
+        words = normalize(text).split()
+        found = []
+        for start, word in enumerate(words):
+            if word in STOPWORDS or word.isdigit():
+                continue
+            phrases = []
+            for size in range(1, min(MAX_PHRASE_WORDS, len(words) - start) + 1):
+                match = self.best(' '.join(words[start:start + size]))
+                if match:
+                    phrases.append((-match['score'], -size, start, match))
+            if phrases:
+                found.append(min(phrases, key=lambda item: item[:2]))
+
+        taken = set()
+        kept = []
+        for _, negative_size, start, match in sorted(found, key=lambda item: item[:3]):
+            span = set(range(start, start - negative_size))
+            if span & taken or any(m['generic'] == match['generic'] for _, m in kept):
+                continue
+            taken |= span
+            kept.append((start, match))
+        return [match for _, match in sorted(kept, key=lambda item: item[0])][:limit]
+
+    def _result(self, term_id: int, score: float) -> dict:
+        term = self.terms[term_id]
+        return {
+            'name': term['name'],
+            'generic': term['generic'],
+            'kind': term['kind'],
+            'score': round(score, 3),
+            'matched': term['compact']
+        }
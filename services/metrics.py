@@ -0,0 +1,228 @@
+# services/metrics.py
+"""
+Metrics - Counters, gauges and histograms in Prometheus text format
+
+A small, dependency-free registry for the chat server's /metrics endpoint.
+Metrics are created once (get-or-create by name, so several WellnessManager
+instances share them) and updated in place: an update is a dict lookup and
+an add under a lock, cheap enough to leave on in production. Values that
+already live elsewhere (cache counters, live contexts) are read at scrape
+time by collector callbacks instead of being mirrored on every change.
+
+Exposition follows text format 0.0.4, so any Prometheus-compatible scraper
+can read it.
+"""
+
+import asyncio
+import bisect
+import math
+import threading
+import time
+
+from .structured_log import get_logger
+
+log = get_logger('metrics')
+
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Request and model-call latency (seconds): 5 ms .. 60 s
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# Event-loop lag (seconds): 1 ms .. 5 s
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _labels(names: tuple, values: tuple, extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class _Metric:
+    kind = 'untyped'
+
+    def __init__(self, name: str, help_text: str, labels: tuple = ()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        if len(labels) != len(self.label_names):
+            raise ValueError(f"{self.name} takes labels {self.label_names}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def header(self) -> list:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """Monotonic count per label set"""
+
+    kind = 'counter'
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def sync(self, total: float, **labels):
+        """Mirror a monotonic count kept by another component (read at scrape time)"""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = total
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def render(self) -> list:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [f"{self.name}{_labels(self.label_names, key)} {_format_value(value)}"
+                                for key, value in items]
+
+
+class Gauge(Counter):
+    """Value that can go up and down"""
+
+    kind = 'gauge'
+
+    def set(self, value: float, **labels):
+        self.sync(value, **labels)
+
+
+class Histogram(_Metric):
+    """Cumulative buckets, sum and count per label set"""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, help_text: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def count(self, **labels) -> int:
+        series = self._values.get(self._key(labels))
+        return sum(series[0]) if series else 0
+
+    def render(self) -> list:
+        with self._lock:
+            items = sorted((key, (list(counts), total)) for key, (counts, total) in self._values.items())
+        lines = self.header()
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, key)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Named metrics plus scrape-time collectors"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, help_text: str, labels: tuple, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help_text, labels, **kwargs)
+            elif type(metric) is not cls or metric.label_names != tuple(labels):
+                raise ValueError(f"Metric {name} already registered as a different type or labels")
+            return metric
+
+    def counter(self, name: str, help_text: str, labels: tuple = ()) -> Counter:
+        return self._get_or_create(Counter, name, help_text, labels)
+
+    def gauge(self, name: str, help_text: str, labels: tuple = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, help_text, labels)
+
+    def histogram(self, name: str, help_text: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, help_text, labels, buckets=buckets)
+
+    def register_collector(self, key: str, collect):
+        """
+        Call collect() before every scrape (replaces an earlier collector with the same key)
+
+        Args:
+            key: Collector identity, e.g. 'wellness_manager'
+            collect: Zero-argument function that sets gauges/counters from live state
+        """
+        with self._lock:
+            self._collectors[key] = collect
+
+    def render(self) -> str:
+        """Every metric in Prometheus text exposition format"""
+        with self._lock:
+            collectors = list(self._collectors.values())
+        for collect in collectors:
+            try:
+                collect()
+            except Exception as e:
+                log.warning("Metrics collector failed", error=e)
+        with self._lock:
+            metrics = [self._metrics[name] for name in sorted(self._metrics)]
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+_default_registry = None
+
+
+def get_metrics() -> MetricsRegistry:
+    """Process-wide registry"""
+    global _default_registry
+    if _default_registry is None:
+        _default_registry = MetricsRegistry()
+    return _default_registry
+
+
+async def monitor_event_loop_lag(registry: MetricsRegistry = None, interval: float = 0.5):
+    """
+    Measure how late the event loop wakes a sleeping task, forever
+
+    A turn that blocks the loop (slow sync code, CPU-heavy parsing) delays every
+    other request by the same amount; this is the direct measure of it.
+    """
+    registry = registry or get_metrics()
+    lag_histogram = registry.histogram('wellness_event_loop_lag_seconds',
+                                       'Delay between a scheduled and actual event-loop wakeup',
+                                       buckets=LAG_BUCKETS)
+    lag_gauge = registry.gauge('wellness_event_loop_lag_last_seconds', 'Most recent event-loop lag sample')
+    while True:
+        expected = time.perf_counter() + interval
+        await asyncio.sleep(interval)
+        lag = max(0.0, time.perf_counter() - expected)
+        lag_histogram.observe(lag)
+        lag_gauge.set(lag)
@@ -0,0 +1,221 @@
+# services/policy_answer_cache.py
+"""
+Policy Answer Cache - Reuses insurance answers for frequently asked questions
+
+Questions are normalized into content-token keys ("What's my sum insured?" and
+"what is the sum insured" share a key), and a token inverted index finds
+near-duplicate questions by Jaccard similarity. Entries are scoped to a policy
+version (a hash of the policy content), so a changed policy never serves answers
+computed against the old one. Entries are shared across users, so callers only
+store answers whose prompt carried no per-user context.
+"""
+
+import hashlib
+import json
+import re
+import time
+from collections import OrderedDict
+
+
+# ==================== NORMALIZATION ====================
+
+STOPWORDS = {
+    'a', 'an', 'the', 'is', 'are', 'was', 'be', 'am', 'do', 'does', 'did', 'i', 'me',
+    'my', 'mine', 'we', 'our', 'you', 'your', 'what', 'whats', 'which', 'how', 'much',
+    'many', 'can', 'could', 'would', 'will', 'should', 'please', 'tell', 'know', 'about',
+    'have', 'has', 'in', 'of', 'for', 'to', 'on', 'at', 'by', 'with', 'under', 'there',
+    'any', 'policy', 'insurance', 'plan', 'get', 'want', 'like', 'details', 'detail', 'and',
+    'yes', 'ok', 'okay', 'sure', 'thanks', 'thank', 'hi', 'hello', 'hey', 'great', 'fine'
+}
+
+# Follow-up questions that lean on earlier turns can't be answered from a shared cache
+REFERENTIAL_WORDS = {'it', 'that', 'this', 'those', 'these', 'them', 'they', 'same', 'also', 'else'}
+
+PHRASE_NORMALIZATION = [
+    (re.compile(r'\bco[\s-]?pay(?:ment)?s?\b'), 'copayment'),
+    (re.compile(r'\bpre[\s-]?existing\b'), 'preexisting'),
+    (re.compile(r'\bwhat\'?s\b'), 'what is'),
+    (re.compile(r'\bsum\s+assured\b'), 'sum insured')
+]
+
+_TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+
+def _stem(token: str) -> str:
+    """Very small suffix stemmer so covered/coverage/covers share a token"""
+    for suffix in ('age', 'ing', 'ed', 'es', 's'):
+        if token.endswith(suffix) and len(token) - len(suffix) >= 4:
+            return token[:-len(suffix)]
+    return token
+
+
+def question_tokens(question: str) -> list:
+    """Lowercase, normalize phrases, drop stopwords and stem"""
+    text = question.lower()
+    for pattern, replacement in PHRASE_NORMALIZATION:
+        text = pattern.sub(replacement, text)
+    return [_stem(t) for t in _TOKEN_PATTERN.findall(text) if t not in STOPWORDS]
+
+
+def policy_version(policy: dict) -> str:
+    """Stable short hash of a policy's content"""
+    canonical = json.dumps(policy, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:16]
+
+
+# ==================== CACHE ====================
+
+class PolicyAnswerCache:
+    """
+    Normalized-question answer cache with a lexical similarity index.
+
+    Attributes:
+        max_entries (int): Maximum cached answers across all policy versions
+        ttl_seconds (float): Age after which an answer is no longer served
+        similarity_threshold (float): Minimum Jaccard score for a near-duplicate hit
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 86400,
+                 similarity_threshold: float = 0.75):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self._entries = OrderedDict()
+        self._index = {}
+        self.stats = {
+            'lookups': 0,
+            'exact_hits': 0,
+            'similar_hits': 0,
+            'misses': 0,
+            'stores': 0,
+            'expired': 0,
+            'evictions': 0
+        }
+        self._served_age_total = 0.0
+        self._served_age_max = 0.0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def is_cacheable(self, question: str) -> bool:
+        """Only self-contained questions with at least one content token are cached"""
+        words = _TOKEN_PATTERN.findall(question.lower())
+        if len(words) < 2 or set(words) & REFERENTIAL_WORDS:
+            return False
+        return bool(question_tokens(question))
+
+    def lookup(self, question: str, version: str) -> str:
+        """
+        Find a cached answer for a question under a policy version
+
+        Args:
+            question: Raw user question
+            version: Policy version the answer must have been computed against
+
+        Returns:
+            Cached answer text, or None on a miss
+        """
+        self.stats['lookups'] += 1
+        tokens = frozenset(question_tokens(question))
+        key = (version, ' '.join(sorted(tokens)))
+
+        entry = self._live_entry(key)
+        if entry is not None:
+            self.stats['exact_hits'] += 1
+            return self._serve(key, entry)
+
+        # Near-duplicate search over entries sharing at least one token
+        candidates = set()
+        for token in tokens:
+            candidates |= self._index.get((version, token), set())
+
+        best_key, best_score = None, 0.0
+        for candidate in candidates:
+            candidate_tokens = self._entries[candidate]['tokens']
+            score = len(tokens & candidate_tokens) / len(tokens | candidate_tokens)
+            if score > best_score:
+                best_key, best_score = candidate, score
+
+        if best_key is not None and best_score >= self.similarity_threshold:
+            entry = self._live_entry(best_key)
+            if entry is not None:
+                self.stats['similar_hits'] += 1
+                return self._serve(best_key, entry)
+
+        self.stats['misses'] += 1
+        return None
+
+    def store(self, question: str, version: str, answer: str):
+        """Cache an answer for a question under a policy version"""
+        tokens = frozenset(question_tokens(question))
+        if not tokens or not answer:
+            return
+        key = (version, ' '.join(sorted(tokens)))
+        if key in self._entries:
+            self._remove(key)
+
+        self._entries[key] = {
+            'answer': answer,
+            'tokens': tokens,
+            'question': question,
+            'created_at': time.monotonic(),
+            'hits': 0
+        }
+        for token in tokens:
+            self._index.setdefault((version, token), set()).add(key)
+        self.stats['stores'] += 1
+
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+            self.stats['evictions'] += 1
+
+    def _live_entry(self, key: tuple) -> dict:
+        """Return an entry if present and within TTL, expiring it otherwise"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry['created_at'] > self.ttl_seconds:
+            self._remove(key)
+            self.stats['expired'] += 1
+            return None
+        return entry
+
+    def _serve(self, key: tuple, entry: dict) -> str:
+        """Record a hit and return the answer"""
+        age = time.monotonic() - entry['created_at']
+        self._served_age_total += age
+        self._served_age_max = max(self._served_age_max, age)
+        entry['hits'] += 1
+        self._entries.move_to_end(key)
+        return entry['answer']
+
+    def _remove(self, key: tuple):
+        """Drop an entry and its index postings"""
+        entry = self._entries.pop(key)
+        version = key[0]
+        for token in entry['tokens']:
+            postings = self._index.get((version, token))
+            if postings is not None:
+                postings.discard(key)
+                if not postings:
+                    del self._index[(version, token)]
+
+    def metrics(self, current_version: str = None) -> dict:
+        """Hit-rate and staleness metrics"""
+        hits = self.stats['exact_hits'] + self.stats['similar_hits']
+        now = time.monotonic()
+        ages = [now - entry['created_at'] for entry in self._entries.values()]
+        metrics = dict(self.stats)
+        metrics.update({
+            'hits': hits,
+            'hit_rate': hits / self.stats['lookups'] if self.stats['lookups'] else 0.0,
+            'entries': len(self._entries),
+            'avg_served_age_seconds': self._served_age_total / hits if hits else 0.0,
+            'max_served_age_seconds': self._served_age_max,
+            'oldest_entry_age_seconds': max(ages) if ages else 0.0
+        })
+        if current_version is not None:
+            metrics['entries_for_other_versions'] = sum(
+                1 for key in self._entries if key[0] != current_version
+            )
+        return metrics
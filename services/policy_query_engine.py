@@ -0,0 +1,422 @@
+# services/policy_query_engine.py
+"""
+Policy Query Engine - Deterministic answers for direct insurance field lookups
+
+Most insurance questions ("what's the room rent limit?", "is maternity covered?",
+"what is the PED waiting period?") map straight onto a field of the policy. The
+engine indexes those fields under synonym phrases and answers direct lookups
+with templated text in microseconds. It only answers when the matched phrases
+account for every content word of the question; anything open-ended, anything
+with an unmatched part ("...and how much is the premium?", "is my mother
+covered for ..."), or any question about a field the policy doesn't have, is
+left to the LLM.
+"""
+
+import re
+
+
+# ==================== TEXT HELPERS ====================
+
+PHRASE_NORMALIZATION = [
+    (re.compile(r'\bco[\s-]?pay(?:ment)?s?\b'), 'copayment'),
+    (re.compile(r'\bpre[\s-]?existing\b'), 'preexisting'),
+    (re.compile(r'hospitali[sz]ation'), 'hospitalization'),
+    (re.compile(r'\bc[\s-]?section\b'), 'csection'),
+    (re.compile(r'\bday[\s-]?care\b'), 'daycare'),
+    (re.compile(r'\bcheck[\s-]?up\b'), 'checkup'),
+    (re.compile(r'\bsum\s+assured\b'), 'sum insured')
+]
+
+# Questions asking for judgement, reasoning, calculation or a process go to the LLM
+# (checked against the words no synonym phrase accounts for, so "no claim bonus" still matches)
+OPEN_ENDED_MARKERS = {
+    'why', 'explain', 'should', 'recommend', 'suggest', 'compare', 'better', 'worth',
+    'if', 'calculate', 'estimate', 'total', 'advice', 'advise', 'difference', 'best',
+    'how', 'claim', 'file', 'rejected', 'reject', 'what now'
+}
+
+# Words that carry no lookup content of their own ("what is my ...", "is ... covered?")
+FILLER_WORDS = {
+    'what', 'whats', 's', 'is', 'are', 'am', 'was', 'the', 'a', 'an', 'my', 'me', 'i', 'we', 'our',
+    'do', 'doe', 'does', 'did', 'have', 'ha', 'has', 'there', 'any', 'in', 'of', 'for', 'on', 'under',
+    'to', 'this', 'it', 'its', 'policy', 'plan', 'insurance', 'cover', 'covered', 'coverage', 'include',
+    'included', 'get', 'tell', 'about', 'please', 'charge', 'limit', 'available', 'treatment', 'period',
+    'benefit', 'amount', 'detail', 'free', 'allowed', 'can', 'will', 'be'
+}
+
+MAX_DIRECT_QUESTION_TOKENS = 20
+
+_TOKEN_PATTERN = re.compile(r'[a-z0-9₹]+')
+
+
+def _tokens(text: str) -> list:
+    """Lowercase, normalize phrases and split into tokens (plurals folded)"""
+    text = text.lower()
+    for pattern, replacement in PHRASE_NORMALIZATION:
+        text = pattern.sub(replacement, text)
+    return [t[:-1] if len(t) > 4 and t.endswith('s') and not t.endswith('ss') else t
+            for t in _TOKEN_PATTERN.findall(text)]
+
+
+def _lookup(policy: dict, path: str):
+    """Read a dotted path from the policy, or None if any part is missing"""
+    value = policy
+    for part in path.split('.'):
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    if value in (None, '', 'unknown'):
+        return None
+    return value
+
+
+def _describe(value) -> str:
+    """Render a policy value as plain text"""
+    if isinstance(value, bool):
+        return 'Yes' if value else 'No'
+    if isinstance(value, list):
+        return ', '.join(_describe(v) for v in value) if value else 'None'
+    if isinstance(value, dict):
+        return '; '.join(f"{k.replace('_', ' ')}: {_describe(v)}" for k, v in value.items())
+    return str(value)
+
+
+# ==================== ANSWER TEMPLATES ====================
+
+def _field_template(path: str, template: str):
+    """Answer builder for a single policy field"""
+    def render(policy):
+        value = _lookup(policy, path)
+        return template.format(value=_describe(value)) if value is not None else None
+    return render
+
+
+def _render_sum_insured(policy):
+    sum_insured = _lookup(policy, 'policy_details.sum_insured')
+    if sum_insured is None:
+        return None
+    policy_name = _lookup(policy, 'policy_details.policy_name')
+    suffix = f" under {policy_name}" if policy_name else ""
+    return f"Your sum insured is {sum_insured}{suffix}. This is the maximum amount the policy pays for covered expenses in a policy year."
+
+
+def _render_policy_overview(policy):
+    details = _lookup(policy, 'policy_details')
+    if not isinstance(details, dict):
+        return None
+    parts = [f"{key.replace('_', ' ').title()}: {_describe(value)}"
+             for key, value in details.items() if key != 'age_entry' and value is not None]
+    return "Here are your policy details:\n" + "\n".join(f"- {part}" for part in parts)
+
+
+def _render_maternity(policy):
+    maternity = _lookup(policy, 'coverage.special_covers.maternity')
+    if not isinstance(maternity, dict):
+        return None
+    if not maternity.get('covered'):
+        return "Maternity is not covered under your policy."
+    lines = ["Yes, maternity is covered under your policy."]
+    labels = [
+        ('waiting_period', 'Waiting period'),
+        ('normal_delivery_limit', 'Normal delivery limit'),
+        ('c_section_limit', 'C-section limit'),
+        ('newborn_cover', 'Newborn cover'),
+        ('vaccination_cover', 'Vaccination cover')
+    ]
+    lines += [f"- {label}: {maternity[key]}" for key, label in labels if maternity.get(key)]
+    return "\n".join(lines)
+
+
+def _special_cover_template(key: str, label: str):
+    """Answer builder for a special cover with covered/waiting_period/limit fields"""
+    def render(policy):
+        cover = _lookup(policy, f'coverage.special_covers.{key}')
+        if cover is None:
+            return None
+        sentence_label = label[0].upper() + label[1:]
+        if not isinstance(cover, dict):
+            return f"{sentence_label}: {_describe(cover)}."
+        if not cover.get('covered'):
+            return f"{sentence_label} is not covered under your policy."
+        details = [f"{k.replace('_', ' ')}: {_describe(v)}"
+                   for k, v in cover.items() if k != 'covered' and v not in (None, '', 'unknown', [])]
+        return f"Yes, {label} is covered" + (f" ({'; '.join(details)})." if details else ".")
+    return render
+
+
+def _render_waiting_periods(policy):
+    waiting = _lookup(policy, 'waiting_periods')
+    if not isinstance(waiting, dict):
+        return None
+    lines = ["Here are the waiting periods in your policy:"]
+    if waiting.get('initial'):
+        lines.append(f"- Initial waiting period: {waiting['initial']}")
+    if waiting.get('pre_existing_diseases'):
+        lines.append(f"- Pre-existing diseases: {waiting['pre_existing_diseases']}")
+    specific = waiting.get('specific_diseases_wait')
+    if isinstance(specific, dict) and specific.get('period'):
+        lines.append(f"- Specific diseases ({_describe(specific.get('diseases', []))}): {specific['period']}")
+    return "\n".join(lines) if len(lines) > 1 else None
+
+
+def _render_specific_diseases(policy):
+    specific = _lookup(policy, 'waiting_periods.specific_diseases_wait')
+    if not isinstance(specific, dict) or not specific.get('period'):
+        return None
+    diseases = _describe(specific.get('diseases', []))
+    return (f"Treatment for specific diseases ({diseases}) is covered after a waiting period of "
+            f"{specific['period']} from the policy start date.")
+
+
+def _render_co_payment(policy):
+    co_payment = _lookup(policy, 'co_payment')
+    if not isinstance(co_payment, dict):
+        return None
+    if not co_payment.get('applicable'):
+        return "There is no co-payment in your policy."
+    answer = f"Yes, a {co_payment.get('percent', 'fixed')} co-payment applies"
+    if co_payment.get('age_threshold'):
+        answer += f" for insured members aged {co_payment['age_threshold']}"
+    return answer + ". You pay that share of each admissible claim and the insurer pays the rest."
+
+
+def _render_exclusions(policy):
+    exclusions = _lookup(policy, 'exclusions')
+    if not isinstance(exclusions, dict):
+        return None
+    items = []
+    for group in exclusions.values():
+        items += group if isinstance(group, list) else [group]
+    if not items:
+        return None
+    return "Your policy does not cover:\n" + "\n".join(f"- {item}" for item in items)
+
+
+def _render_cashless(policy):
+    cashless = _lookup(policy, 'coverage.cashless')
+    if not isinstance(cashless, dict):
+        return None
+    if not cashless.get('available'):
+        return "Cashless treatment is not available under your policy."
+    answer = "Yes, cashless hospitalization is available at network hospitals."
+    if cashless.get('network_hospital_check_url'):
+        answer += f" You can check network hospitals here: {cashless['network_hospital_check_url']}"
+    return answer
+
+
+def _render_ambulance(policy):
+    ambulance = _lookup(policy, 'coverage.hospitalization.ambulance')
+    if ambulance is None:
+        return None
+    if isinstance(ambulance, dict):
+        parts = [f"{mode} ambulance: {limit}" for mode, limit in ambulance.items()
+                 if limit not in (None, '', 'unknown')]
+        return "Ambulance charges are covered - " + "; ".join(parts) + "." if parts else None
+    return f"Ambulance charges: {ambulance}."
+
+
+def _render_entry_age(policy):
+    age_entry = _lookup(policy, 'policy_details.age_entry')
+    if not isinstance(age_entry, dict):
+        return None
+    answer = f"Entry age is {age_entry.get('min_age', 'not specified')} to {age_entry.get('max_age', 'not specified')}"
+    if age_entry.get('lifelong_renewal'):
+        answer += ", with lifelong renewal"
+    return answer + "."
+
+
+# ==================== INTENTS ====================
+
+# name -> (synonym phrases, answer builder, generic)
+# Generic intents are dropped when a more specific intent matches the same question.
+INTENTS = {
+    'sum_insured': (['sum insured', 'coverage amount', 'cover amount', 'insured amount',
+                     'total cover', 'total coverage', 'maximum cover', 'how much cover'],
+                    _render_sum_insured, False),
+    'policy_overview': (['policy name', 'which policy', 'insurer', 'insurance company',
+                         'policy term', 'policy detail'], _render_policy_overview, True),
+    'renewal': (['renewal', 'renewable', 'renew'],
+                _field_template('policy_details.renewal_type', "Your policy renewal type is: {value}."), False),
+    'entry_age': (['entry age', 'age limit', 'maximum age', 'minimum age', 'age entry'], _render_entry_age, False),
+    'room_rent': (['room rent', 'room charge', 'room limit', 'room category', 'room type'],
+                  _field_template('coverage.hospitalization.room_rent_rule', "Room rent is covered as follows: {value}."), False),
+    'icu': (['icu', 'intensive care'],
+            _field_template('coverage.hospitalization.icu_charges', "ICU charges are covered: {value}."), False),
+    'pre_hospitalization': (['pre hospitalization', 'before hospitalization', 'before admission'],
+                            _field_template('coverage.hospitalization.pre_hospitalization_days',
+                                            "Pre-hospitalization expenses are covered for {value} before admission."), False),
+    'post_hospitalization': (['post hospitalization', 'after hospitalization', 'after discharge'],
+                             _field_template('coverage.hospitalization.post_hospitalization_days',
+                                             "Post-hospitalization expenses are covered for {value} after discharge."), False),
+    'day_care': (['daycare', 'daycare procedure', 'daycare treatment'],
+                 _field_template('coverage.hospitalization.day_care_procedures', "Day care procedures: {value}."), False),
+    'domiciliary': (['domiciliary', 'home treatment', 'treatment at home'],
+                    _field_template('coverage.hospitalization.domiciliary_treatment', "Domiciliary (home) treatment - {value}."), False),
+    'ambulance': (['ambulance', 'air ambulance', 'road ambulance'], _render_ambulance, False),
+    'cashless': (['cashless', 'network hospital'], _render_cashless, False),
+    'maternity': (['maternity', 'pregnancy', 'pregnant', 'delivery', 'csection', 'childbirth', 'newborn'],
+                  _render_maternity, False),
+    'bariatric': (['bariatric', 'bariatric surgery', 'weight loss surgery', 'obesity surgery'],
+                  _special_cover_template('bariatric_surgery', 'bariatric surgery'), False),
+    'ayush': (['ayush', 'ayurveda', 'ayurvedic', 'homeopathy', 'unani', 'siddha'],
+              _special_cover_template('ayush_treatment', 'AYUSH treatment'), False),
+    'organ_donor': (['organ donor', 'organ donation'],
+                    _field_template('coverage.special_covers.organ_donor_expenses', "Organ donor expenses: {value}."), False),
+    'modern_treatments': (['modern treatment', 'robotic surgery', 'stem cell', 'oral chemotherapy'],
+                          _field_template('coverage.special_covers.modern_treatments', "Modern treatments: {value}."), False),
+    'restoration': (['restoration', 'restore', 'sum restoration', 'reinstatement'],
+                    _field_template('financial_features.automatic_sum_restoration', "Automatic sum insured restoration: {value}."), False),
+    'cumulative_bonus': (['cumulative bonus', 'no claim bonus', 'ncb', 'bonus'],
+                         _field_template('financial_features.cumulative_bonus', "Cumulative bonus: {value}."), False),
+    'hospital_cash': (['hospital cash', 'daily cash', 'cash allowance'],
+                      _field_template('financial_features.hospital_cash_allowance', "Hospital cash allowance: {value}."), False),
+    'health_checkup': (['health checkup', 'wellness reward', 'preventive checkup', 'annual checkup'],
+                       _field_template('financial_features.health_checkup', "Health checkup benefit: {value}."), False),
+    'waiting_periods': (['waiting period', 'waiting time', 'cooling period'], _render_waiting_periods, True),
+    'initial_waiting': (['initial waiting', 'first 30 day', 'initial period'],
+                        _field_template('waiting_periods.initial', "The initial waiting period is {value} from the policy start date (accidents are usually covered from day one)."), False),
+    'pre_existing': (['preexisting', 'ped', 'preexisting disease', 'preexisting illness',
+                      'preexisting condition', 'existing disease', 'existing illness', 'existing condition'],
+                     _field_template('waiting_periods.pre_existing_diseases', "Pre-existing diseases are covered after a waiting period of {value}."), False),
+    'specific_diseases': (['specific disease', 'specific illness'], _render_specific_diseases, False),
+    'co_payment': (['copayment'], _render_co_payment, False),
+    'exclusions': (['exclusion', 'not covered', 'excluded', 'what is excluded', 'not included'], _render_exclusions, True)
+}
+
+# Separators between the entries of a list-style item ("Hearing aids and spectacles", "War/nuclear events")
+_ITEM_PARTS = re.compile(r'\s*/\s*|\s+and\s+|\s*,\s*')
+# Qualifiers such as "(unless requiring hospitalization)" are part of the answer, not of the name
+_ITEM_QUALIFIER = re.compile(r'\([^)]*\)')
+
+
+# ==================== ENGINE ====================
+
+class PolicyQueryEngine:
+    """
+    Synonym-indexed lookup engine over one policy document.
+
+    Attributes:
+        policy (dict): Policy data the engine answers from
+        stats (dict): Answered / passed-to-LLM counters
+    """
+
+    def __init__(self, policy: dict):
+        self.policy = policy
+        self._phrases = {}
+        self._generic = set()
+        self.max_phrase_length = 1
+        self.stats = {'answered': 0, 'open_ended': 0, 'no_match': 0, 'partial_match': 0, 'missing_field': 0}
+
+        for name, (synonyms, render, generic) in INTENTS.items():
+            for synonym in synonyms:
+                self._add_phrase(synonym, name)
+            if generic:
+                self._generic.add(name)
+
+        self._renderers = {name: render for name, (_, render, _) in INTENTS.items()}
+        self._index_policy_items()
+
+    def _add_phrase(self, phrase: str, intent: str):
+        """Index a synonym phrase under an intent"""
+        key = tuple(_tokens(phrase))
+        if key:
+            self._phrases.setdefault(key, intent)
+            self.max_phrase_length = max(self.max_phrase_length, len(key))
+
+    def _index_policy_items(self):
+        """Index individual exclusions and specific-disease names from the policy itself"""
+        exclusions = _lookup(self.policy, 'exclusions')
+        if isinstance(exclusions, dict):
+            for group in exclusions.values():
+                for item in (group if isinstance(group, list) else [group]):
+                    self._add_item(str(item), self._exclusion_answer(str(item)))
+
+        specific = _lookup(self.policy, 'waiting_periods.specific_diseases_wait')
+        if isinstance(specific, dict) and specific.get('period'):
+            for disease in specific.get('diseases', []):
+                self._add_item(str(disease), (
+                    f"{disease} is covered after a waiting period of {specific['period']} "
+                    f"(it is on the policy's specific-diseases list)."
+                ))
+
+    def _add_item(self, item: str, answer: str):
+        """
+        Index one list item under its whole name and the entries it lists
+
+        Single words taken from inside a name are never indexed - "aids" from
+        "Hearing aids" or "stone" from "Gall stones" would answer unrelated
+        questions with confidence; those questions go to the LLM instead.
+        """
+        intent = f"item:{item}"
+        self._renderers[intent] = lambda policy, answer=answer: answer
+        self._add_phrase(item, intent)
+        name = _ITEM_QUALIFIER.sub(' ', item).strip()
+        self._add_phrase(name, intent)
+        for part in _ITEM_PARTS.split(name):
+            self._add_phrase(part, intent)
+
+    @staticmethod
+    def _exclusion_answer(item: str) -> str:
+        """Templated answer for an excluded item"""
+        return f"No - \"{item}\" is listed under your policy's exclusions, so it isn't covered."
+
+    def match(self, question: str) -> list:
+        """Return the intents whose phrases appear in the question"""
+        return self._match(_tokens(question))[0]
+
+    def _match(self, tokens: list) -> tuple:
+        """(intents matched, token positions their phrases cover)"""
+        matched = []
+        covered = set()
+        start = 0
+        while start < len(tokens):
+            step = 1
+            for length in range(min(self.max_phrase_length, len(tokens) - start), 0, -1):
+                intent = self._phrases.get(tuple(tokens[start:start + length]))
+                if intent:
+                    if intent not in matched:
+                        matched.append(intent)
+                    covered.update(range(start, start + length))
+                    step = length
+                    break
+            start += step
+
+        specific = [intent for intent in matched if intent not in self._generic]
+        return specific or matched, covered
+
+    def answer(self, question: str) -> dict:
+        """
+        Answer a direct policy lookup question
+
+        Args:
+            question: Raw user question
+
+        Returns:
+            Dictionary with 'intents' and 'answer', or None when the question
+            should go to the LLM
+        """
+        tokens = _tokens(question)
+        intents, covered = self._match(tokens)
+        unmatched = [token for index, token in enumerate(tokens) if index not in covered]
+        unmatched_text = f" {' '.join(unmatched)} "
+        if (len(tokens) > MAX_DIRECT_QUESTION_TOKENS or
+                any(f" {marker} " in unmatched_text for marker in OPEN_ENDED_MARKERS)):
+            self.stats['open_ended'] += 1
+            return None
+
+        if not intents or len(intents) > 2:
+            self.stats['no_match'] += 1
+            return None
+
+        # Part of the question no phrase accounts for - a templated answer would miss it
+        if any(token not in FILLER_WORDS for token in unmatched):
+            self.stats['partial_match'] += 1
+            return None
+
+        answers = [self._renderers[intent](self.policy) for intent in intents]
+        if not all(answers):
+            self.stats['missing_field'] += 1
+            return None
+
+        self.stats['answered'] += 1
+        return {'intents': intents, 'answer': "\n\n".join(answers)}
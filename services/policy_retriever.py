@@ -0,0 +1,204 @@
+# services/policy_retriever.py
+"""
+Policy Retriever - Relevance-filtered policy sections for insurance prompts
+
+A policy document is split into section chunks (coverage.hospitalization,
+coverage.special_covers.maternity, waiting_periods, ...) and the chunks are
+indexed with BM25. Only the top-k sections relevant to a question are placed in
+the policy agent's prompt instead of the whole document.
+"""
+
+import json
+import math
+from collections import Counter
+
+from .policy_answer_cache import question_tokens
+
+
+# ==================== CHUNKING ====================
+
+# Sections larger than this (serialized) are split into their sub-sections
+MAX_CHUNK_CHARS = 400
+
+# Abbreviations users type that never appear in policy text
+QUERY_EXPANSIONS = {
+    'ped': ['preexisting', 'disease'],
+    'icu': ['icu', 'intensive', 'care'],
+    'ncb': ['cumulative', 'bonus'],
+    'copayment': ['copayment', 'percent'],
+    'pregnancy': ['maternity', 'delivery'],
+    'pregnant': ['maternity', 'delivery'],
+    'opd': ['domiciliary', 'treatment'],
+    'ayurveda': ['ayush'],
+    'ayurvedic': ['ayush'],
+    'homeopathy': ['ayush'],
+    'surgery': ['surgery', 'procedure', 'assessment']
+}
+
+
+def _chunk_text(path: str, value) -> str:
+    """Flatten a chunk into indexable text (path words, keys and values)"""
+    parts = [path.replace('.', ' ').replace('_', ' ')]
+
+    def walk(node):
+        if isinstance(node, dict):
+            for key, child in node.items():
+                parts.append(str(key).replace('_', ' '))
+                walk(child)
+        elif isinstance(node, list):
+            for child in node:
+                walk(child)
+        elif node is not None:
+            parts.append(str(node))
+
+    walk(value)
+    return ' '.join(parts)
+
+
+def chunk_policy(policy: dict, max_chunk_chars: int = MAX_CHUNK_CHARS) -> list:
+    """
+    Split a policy into section chunks
+
+    Args:
+        policy: Policy document (nested dict)
+        max_chunk_chars: Serialized size above which a section is split further
+
+    Returns:
+        List of chunk dicts with 'path', 'value' and 'text'
+    """
+    chunks = []
+
+    def split(path: str, node):
+        serialized_size = len(json.dumps(node, ensure_ascii=False, default=str))
+        if not isinstance(node, dict) or serialized_size <= max_chunk_chars:
+            chunks.append({'path': path, 'value': node, 'text': _chunk_text(path, node)})
+            return
+
+        # Scalar fields stay together in a chunk for the parent section
+        scalars = {k: v for k, v in node.items() if not isinstance(v, dict)}
+        if scalars:
+            chunks.append({'path': path, 'value': scalars, 'text': _chunk_text(path, scalars)})
+        for key, child in node.items():
+            if isinstance(child, dict):
+                split(f"{path}.{key}" if path else key, child)
+
+    for section, value in policy.items():
+        split(section, value)
+    return chunks
+
+
+def _query_tokens(question: str) -> list:
+    """Question tokens with abbreviation expansion"""
+    tokens = []
+    for token in question_tokens(question):
+        tokens.extend(question_tokens(' '.join(QUERY_EXPANSIONS[token])) if token in QUERY_EXPANSIONS else [token])
+    return tokens
+
+
+# ==================== BM25 INDEX ====================
+
+class PolicyRetriever:
+    """
+    BM25 index over the section chunks of one policy.
+
+    Attributes:
+        chunks (list): Section chunks in document order
+        pinned_sections (tuple): Top-level sections always included in the context
+    """
+
+    def __init__(self, policy: dict, k1: float = 1.5, b: float = 0.75,
+                 pinned_sections: tuple = ('policy_details',)):
+        self.policy = policy
+        self.k1 = k1
+        self.b = b
+        self.pinned_sections = pinned_sections
+        self.chunks = chunk_policy(policy)
+
+        self._term_frequencies = [Counter(question_tokens(chunk['text'])) for chunk in self.chunks]
+        self._lengths = [sum(tf.values()) for tf in self._term_frequencies]
+        self._avg_length = (sum(self._lengths) / len(self._lengths)) if self._lengths else 0.0
+
+        document_frequency = Counter()
+        for tf in self._term_frequencies:
+            document_frequency.update(tf.keys())
+        total = len(self.chunks)
+        self._idf = {
+            term: math.log(1 + (total - df + 0.5) / (df + 0.5))
+            for term, df in document_frequency.items()
+        }
+        # Terms in most sections ("covered", "limit") carry no signal for picking one
+        self._common_terms = {term for term, df in document_frequency.items() if df > total / 2}
+
+    def score(self, question: str) -> list:
+        """BM25 score of every chunk for a question"""
+        query = [term for term in _query_tokens(question) if term not in self._common_terms]
+        scores = []
+        for tf, length in zip(self._term_frequencies, self._lengths):
+            score = 0.0
+            for term in query:
+                frequency = tf.get(term)
+                if not frequency:
+                    continue
+                norm = self.k1 * (1 - self.b + self.b * length / self._avg_length)
+                score += self._idf[term] * frequency * (self.k1 + 1) / (frequency + norm)
+            scores.append(score)
+        return scores
+
+    def retrieve(self, question: str, top_k: int = 3) -> list:
+        """
+        Find the most relevant sections for a question
+
+        Args:
+            question: Raw user question
+            top_k: Number of sections to return
+
+        Returns:
+            List of (chunk, score) tuples, best first; empty if nothing matches
+        """
+        ranked = sorted(
+            ((chunk, score) for chunk, score in zip(self.chunks, self.score(question)) if score > 0),
+            key=lambda item: item[1], reverse=True
+        )
+        return ranked[:top_k]
+
+    def select_paths(self, question: str, top_k: int = 3) -> tuple:
+        """
+        Section paths to include for a question (top-k plus pinned sections)
+
+        Returns:
+            Sorted tuple of chunk paths, or None when no section matches
+        """
+        matches = self.retrieve(question, top_k)
+        if not matches:
+            return None
+        selected = {chunk['path'] for chunk, _ in matches}
+        selected.update(chunk['path'] for chunk in self.chunks
+                        if chunk['path'].split('.')[0] in self.pinned_sections)
+        return tuple(sorted(selected))
+
+    def assemble(self, paths) -> dict:
+        """Reassemble the given section chunks into a policy-shaped dict"""
+        selected = set(paths)
+        context = {}
+        for chunk in self.chunks:
+            if chunk['path'] not in selected:
+                continue
+            node = context
+            parts = chunk['path'].split('.')
+            for part in parts[:-1]:
+                node = node.setdefault(part, {})
+            if isinstance(chunk['value'], dict):
+                # Copy so sub-sections added later never mutate the indexed chunk
+                node.setdefault(parts[-1], {}).update(chunk['value'])
+            else:
+                node[parts[-1]] = chunk['value']
+        return context
+
+    def build_context(self, question: str, top_k: int = 3) -> dict:
+        """
+        Reassemble the relevant sections into a policy-shaped dict
+
+        Falls back to the full policy when no section matches the question.
+        """
+        paths = self.select_paths(question, top_k)
+        return self.assemble(paths) if paths is not None else self.policy
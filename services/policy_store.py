@@ -0,0 +1,267 @@
+# services/policy_store.py
+"""
+Policy Store - Per-user insurance policies, parsed and serialized once
+
+Users can upload their own policy analysis (the "extracted_policy" structure
+produced by the policy analyzer) or the raw JSON document. Each upload is
+parsed, normalized and indexed once; documents are keyed by content hash, so
+identical uploads share one entry and a re-upload does no work at all. The
+prompt JSON (whole document and memoized section subsets) is serialized ahead
+of the turns that use it. Only the indexed entries are LRU-bounded: a user's
+normalized policy is kept while they have it attached, so an evicted entry is
+rebuilt on their next question instead of silently falling back to the default.
+"""
+
+import hashlib
+import json
+import time
+from collections import OrderedDict
+
+from .policy_answer_cache import policy_version
+from .policy_query_engine import PolicyQueryEngine
+from .policy_retriever import PolicyRetriever
+
+
+# Top-level sections at least one of which a policy document must have
+POLICY_SECTIONS = {
+    'policy_details', 'coverage', 'waiting_periods', 'co_payment',
+    'exclusions', 'financial_features', 'surgery_assessment'
+}
+
+# Placeholder values the policy analyzer emits for fields it couldn't read
+MISSING_VALUES = {'', 'unknown', 'n/a', 'not specified', 'not mentioned'}
+
+MAX_SECTION_PROMPTS = 64
+
+
+def _raw_hash(raw) -> str:
+    """Hash of an upload as received, before any parsing"""
+    if isinstance(raw, (bytes, bytearray)):
+        data = bytes(raw)
+    elif isinstance(raw, str):
+        data = raw.encode('utf-8')
+    else:
+        data = json.dumps(raw, sort_keys=True, ensure_ascii=False, default=str).encode('utf-8')
+    return hashlib.sha256(data).hexdigest()
+
+
+def _normalize(node):
+    """Strip strings and drop placeholder values the analyzer couldn't fill"""
+    if isinstance(node, dict):
+        cleaned = {}
+        for key, value in node.items():
+            value = _normalize(value)
+            if value is not None:
+                cleaned[str(key).strip()] = value
+        return cleaned
+    if isinstance(node, list):
+        return [item for item in (_normalize(v) for v in node) if item is not None]
+    if isinstance(node, str):
+        text = node.strip()
+        return None if text.lower() in MISSING_VALUES else text
+    return node
+
+
+def parse_policy_upload(raw) -> dict:
+    """
+    Parse an uploaded policy analysis or raw policy document
+
+    Args:
+        raw: Analysis dict (with 'extracted_policy'), bare policy dict,
+             or the JSON document as str/bytes
+
+    Returns:
+        Dictionary with normalized 'policy', plus 'summary' and 'confidence_score'
+
+    Raises:
+        ValueError: If the upload is not a recognizable policy document
+    """
+    if isinstance(raw, (bytes, bytearray)):
+        raw = bytes(raw).decode('utf-8')
+    if isinstance(raw, str):
+        try:
+            raw = json.loads(raw)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Policy document is not valid JSON: {e}")
+    if not isinstance(raw, dict):
+        raise ValueError("Policy document must be a JSON object")
+
+    policy = raw.get('extracted_policy', raw)
+    if not isinstance(policy, dict) or not POLICY_SECTIONS & set(policy):
+        raise ValueError("No policy sections found (expected e.g. policy_details, coverage, waiting_periods)")
+
+    return {
+        'policy': _normalize(policy),
+        'summary': raw.get('plain_summary'),
+        'confidence_score': raw.get('confidence_score')
+    }
+
+
+class PolicyStore:
+    """
+    Per-user policy documents with parse-once caching.
+
+    Attributes:
+        default_policy (dict): Policy used for users who haven't uploaded one
+        max_documents (int): Maximum distinct uploaded documents kept (LRU)
+        stats (dict): Upload / parse / cache counters
+    """
+
+    def __init__(self, default_policy: dict, max_documents: int = 256, use_engine: bool = True):
+        self.max_documents = max_documents
+        self.use_engine = use_engine
+        self._documents = OrderedDict()
+        self._raw_index = {}
+        self._user_documents = {}
+        self._sources = {}
+        self.stats = {
+            'uploads': 0,
+            'parses': 0,
+            'raw_hits': 0,
+            'content_hits': 0,
+            'evictions': 0,
+            'rebuilds': 0,
+            'section_prompt_hits': 0,
+            'section_prompt_misses': 0
+        }
+        self.default_version = self._add_document(default_policy, source='default')
+
+    def __len__(self):
+        return len(self._documents)
+
+    def _add_document(self, policy: dict, source: str, summary: str = None,
+                      confidence_score: float = None) -> str:
+        """Index and pre-serialize a normalized policy, returning its version"""
+        version = policy_version(policy)
+        if version in self._documents:
+            self._documents.move_to_end(version)
+            self.stats['content_hits'] += 1
+            return version
+
+        self._documents[version] = {
+            'version': version,
+            'policy': policy,
+            'source': source,
+            'summary': summary,
+            'confidence_score': confidence_score,
+            'prompt_json': json.dumps(policy, indent=2),
+            'engine': PolicyQueryEngine(policy) if self.use_engine else None,
+            'retriever': PolicyRetriever(policy),
+            'section_prompts': OrderedDict(),
+            'loaded_at': time.time()
+        }
+        self._evict()
+        return version
+
+    def set_default(self, default_policy: dict) -> str:
+        """Replace the default policy (e.g. after a catalog reload), returning its version"""
+        version = self._add_document(default_policy, source='default')
+        # The previous default stays cached until LRU eviction, so in-flight readers never miss it
+        self.default_version = version
+        return version
+
+    def _evict(self):
+        """Drop least recently used indexed uploads, never the default policy (users keep their source)"""
+        while len(self._documents) > self.max_documents + 1:
+            version = next(v for v in self._documents if v != self.default_version)
+            del self._documents[version]
+            self._raw_index = {raw: v for raw, v in self._raw_index.items() if v != version}
+            self.stats['evictions'] += 1
+
+    def _release_source(self, version: str):
+        """Forget an upload's normalized policy once no user has it attached"""
+        if version and version not in self._user_documents.values():
+            self._sources.pop(version, None)
+
+    def load(self, user_id: str, raw) -> dict:
+        """
+        Attach an uploaded policy to a user
+
+        Args:
+            user_id: User the policy belongs to
+            raw: Uploaded analysis or document (see parse_policy_upload)
+
+        Returns:
+            The stored policy record
+
+        Raises:
+            ValueError: If the upload is not a recognizable policy document
+        """
+        self.stats['uploads'] += 1
+        raw_key = _raw_hash(raw)
+        version = self._raw_index.get(raw_key)
+
+        if version in self._documents:
+            self.stats['raw_hits'] += 1
+            self._documents.move_to_end(version)
+        else:
+            parsed = parse_policy_upload(raw)
+            self.stats['parses'] += 1
+            version = self._add_document(parsed['policy'], source='upload',
+                                         summary=parsed['summary'],
+                                         confidence_score=parsed['confidence_score'])
+            self._raw_index[raw_key] = version
+
+        record = self._documents[version]
+        self._sources[version] = {'policy': record['policy'], 'summary': record['summary'],
+                                  'confidence_score': record['confidence_score']}
+        previous = self._user_documents.get(user_id)
+        self._user_documents[user_id] = version
+        if previous != version:
+            self._release_source(previous)
+        return record
+
+    def get(self, user_id: str) -> dict:
+        """Policy record for a user (rebuilt if it was evicted), or the default policy"""
+        version = self._user_documents.get(user_id)
+        if not version:
+            return self._documents[self.default_version]
+        record = self._documents.get(version)
+        if record is None:
+            source = self._sources[version]
+            self._add_document(source['policy'], source='upload', summary=source['summary'],
+                               confidence_score=source['confidence_score'])
+            self.stats['rebuilds'] += 1
+            record = self._documents[version]
+        return record
+
+    def has_upload(self, user_id: str) -> bool:
+        """Whether a user has their own policy attached"""
+        return user_id in self._user_documents
+
+    def remove(self, user_id: str):
+        """Detach a user's uploaded policy (the document stays cached for other users)"""
+        self._release_source(self._user_documents.pop(user_id, None))
+
+    def prompt_json(self, record: dict, question: str, top_k: int) -> str:
+        """
+        Serialized policy JSON for an insurance prompt
+
+        Args:
+            record: Policy record from get()/load()
+            question: User question used to pick relevant sections
+            top_k: Number of sections to include (0 = whole document)
+
+        Returns:
+            JSON text, memoized per distinct section set
+        """
+        if top_k <= 0:
+            return record['prompt_json']
+
+        paths = record['retriever'].select_paths(question, top_k)
+        if paths is None:
+            return record['prompt_json']
+
+        section_prompts = record['section_prompts']
+        cached = section_prompts.get(paths)
+        if cached is not None:
+            section_prompts.move_to_end(paths)
+            self.stats['section_prompt_hits'] += 1
+            return cached
+
+        self.stats['section_prompt_misses'] += 1
+        serialized = json.dumps(record['retriever'].assemble(paths), indent=2)
+        section_prompts[paths] = serialized
+        while len(section_prompts) > MAX_SECTION_PROMPTS:
+            section_prompts.popitem(last=False)
+        return serialized
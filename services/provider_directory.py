@@ -0,0 +1,368 @@
+# services/provider_directory.py
+"""
+Provider Directory - Hospitals and diagnostic labs loaded once from data files
+
+Records are indexed by city, department, accreditation, service and test into
+posting lists, so a query like "labs in Mumbai with home collection" or
+"cardiac hospitals in Pune" walks only the shortest matching list instead of
+scanning the whole directory. Providers with coordinates are also placed in a
+grid index for "nearest N to this pincode / lat-long" queries. Card
+generators, text detection and agent prompts all read from the same directory.
+"""
+
+import json
+import os
+import re
+
+from .geo_index import GridIndex, PincodeTable
+
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+
+# Alternate city names users type -> canonical (lowercase) city
+CITY_ALIASES = {
+    'new delhi': 'delhi',
+    'bengaluru': 'bangalore',
+    'bombay': 'mumbai',
+    'calcutta': 'kolkata',
+    'madras': 'chennai'
+}
+
+# Everyday words for a specialty -> department name used in the data files
+DEPARTMENT_SYNONYMS = {
+    'cardiac': 'Cardiology',
+    'heart': 'Cardiology',
+    'cardiology': 'Cardiology',
+    'ortho': 'Orthopedics',
+    'orthopedic': 'Orthopedics',
+    'orthopedics': 'Orthopedics',
+    'bone': 'Orthopedics',
+    'fracture': 'Orthopedics',
+    'neuro': 'Neurology',
+    'neurology': 'Neurology',
+    'brain': 'Neurology',
+    'skin': 'Dermatology',
+    'dermatology': 'Dermatology',
+    'child': 'Pediatrics',
+    'pediatric': 'Pediatrics',
+    'pediatrics': 'Pediatrics',
+    'cancer': 'Oncology',
+    'oncology': 'Oncology',
+    'stomach': 'Gastroenterology',
+    'gastro': 'Gastroenterology',
+    'gastroenterology': 'Gastroenterology',
+    'ent': 'ENT',
+    'ear': 'ENT',
+    'throat': 'ENT',
+    'mental': 'Psychiatry',
+    'psychiatry': 'Psychiatry',
+    'general': 'General Medicine',
+    'general medicine': 'General Medicine'
+}
+
+# Spoken service names -> service keys used in the data files
+SERVICE_SYNONYMS = {
+    'home collection': 'home_collection',
+    'home visit': 'home_collection',
+    'same day reports': 'same_day_reports',
+    'same day': 'same_day_reports',
+    'online reports': 'digital_reports',
+    'emergency': 'emergency_24x7',
+    '24/7 emergency': 'emergency_24x7',
+    'cashless': 'cashless'
+}
+
+# A "lat, lng" location is attributed to the city of a provider within this distance
+CITY_RADIUS_KM = 50
+
+HOSPITAL_FIELDS = ('city', 'departments', 'accreditations', 'services')
+LAB_FIELDS = ('city', 'accreditations', 'services', 'tests_available')
+
+
+def _normalize(field: str, value: str) -> str:
+    """Index key for a field value (case-insensitive, synonyms folded)"""
+    key = ' '.join(str(value).lower().replace('_', ' ').split())
+    if field == 'city':
+        return CITY_ALIASES.get(key, key)
+    if field == 'departments':
+        return DEPARTMENT_SYNONYMS.get(key, key).lower()
+    if field == 'services':
+        return SERVICE_SYNONYMS.get(key, key).replace(' ', '_')
+    return key
+
+
+def _name_pattern(names) -> re.Pattern:
+    """Whole-word regex over names, longest first so 'new delhi' beats 'delhi'"""
+    ordered = sorted({name.lower() for name in names if name}, key=len, reverse=True)
+    return re.compile(r'\b(' + '|'.join(re.escape(name) for name in ordered) + r')\b')
+
+
+class _Index:
+    """Posting lists for one provider type, in data-file order"""
+
+    def __init__(self, records: list, id_field: str, fields: tuple):
+        self.id_field = id_field
+        self.records = {record[id_field]: record for record in records}
+        self.order = [record[id_field] for record in records]
+        self.postings = {field: {} for field in fields}
+        self.members = {field: {} for field in fields}
+
+        for record in records:
+            for field in fields:
+                values = record.get(field) or []
+                for value in ([values] if isinstance(values, str) else values):
+                    key = _normalize(field, value)
+                    postings = self.postings[field].setdefault(key, [])
+                    if not postings or postings[-1] != record[id_field]:
+                        postings.append(record[id_field])
+                        self.members[field].setdefault(key, set()).add(record[id_field])
+
+        # Name and alias -> ids, for spotting a provider in free text
+        self.by_name = {}
+        for record in records:
+            for name in [record['name']] + record.get('aliases', []):
+                self.by_name.setdefault(name.lower(), []).append(record[id_field])
+        self._name_pattern = None
+
+        self.grid = GridIndex(
+            (record[id_field], record['lat'], record['lng'])
+            for record in records if record.get('lat') is not None and record.get('lng') is not None
+        )
+
+    def query(self, filters: dict, limit: int = None) -> list:
+        """Records matching every filter, walking the shortest posting list"""
+        lists = []
+        for field, value in filters.items():
+            if value is None:
+                continue
+            key = _normalize(field, value)
+            if key not in self.postings[field]:
+                return []
+            lists.append((self.postings[field][key], self.members[field][key]))
+
+        if not lists:
+            ids = self.order
+        else:
+            lists.sort(key=lambda posting: len(posting[0]))
+            shortest, others = lists[0][0], [members for _, members in lists[1:]]
+            ids = (record_id for record_id in shortest if all(record_id in members for members in others))
+
+        results = []
+        for record_id in ids:
+            results.append(self.records[record_id])
+            if limit and len(results) >= limit:
+                break
+        return results
+
+    def find_in_text(self, text: str, city: str = None) -> dict:
+        """First provider named in the text, preferring one in the given city"""
+        if not text:
+            return None
+        if self._name_pattern is None:
+            self._name_pattern = _name_pattern(self.by_name)
+        match = self._name_pattern.search(text.lower())
+        if not match:
+            return None
+        candidates = [self.records[record_id] for record_id in self.by_name[match.group(1)]]
+        if city:
+            city_key = _normalize('city', city)
+            for record in candidates:
+                if _normalize('city', record['city']) == city_key:
+                    return record
+        return candidates[0]
+
+    def nearest(self, lat: float, lng: float, filters: dict, limit: int, max_km: float = None) -> list:
+        """(record, distance_km) pairs for the closest records matching every filter"""
+        member_sets = []
+        for field, value in filters.items():
+            if value is None:
+                continue
+            members = self.members[field].get(_normalize(field, value))
+            if not members:
+                return []
+            member_sets.append(members)
+
+        allowed = None
+        if member_sets:
+            member_sets.sort(key=len)
+            allowed = member_sets[0].intersection(*member_sets[1:]) if len(member_sets) > 1 else member_sets[0]
+        return [(self.records[record_id], distance)
+                for record_id, distance in self.grid.nearest(lat, lng, limit, allowed, max_km)]
+
+
+class ProviderDirectory:
+    """
+    Indexed hospital and lab directory.
+
+    Returned records are shared - treat them as read-only.
+
+    Attributes:
+        cities (list): Display names of every city with a hospital or lab
+    """
+
+    def __init__(self, hospitals: list, labs: list, pincodes: PincodeTable = None):
+        self._pincodes = pincodes or PincodeTable({})
+        self._hospitals = _Index(hospitals, 'hospital_id', HOSPITAL_FIELDS)
+        self._labs = _Index(labs, 'lab_id', LAB_FIELDS)
+
+        self._city_names = {}
+        for record in hospitals + labs:
+            self._city_names.setdefault(_normalize('city', record['city']), record['city'])
+        self.cities = list(self._city_names.values())
+        self._city_pattern = _name_pattern(list(self._city_names) + list(CITY_ALIASES))
+        self._department_pattern = _name_pattern(DEPARTMENT_SYNONYMS)
+
+    @classmethod
+    def from_files(cls, hospitals_path: str, labs_path: str, pincodes_path: str = None):
+        """Load the directory from hospital, lab and (optional) pincode JSON files"""
+        with open(hospitals_path, encoding='utf-8') as f:
+            hospitals = json.load(f).get('hospitals', [])
+        with open(labs_path, encoding='utf-8') as f:
+            labs = json.load(f).get('labs', [])
+        pincodes = PincodeTable.from_file(pincodes_path) if pincodes_path else None
+        return cls(hospitals, labs, pincodes)
+
+    # ==================== QUERIES ====================
+
+    def hospitals(self, city: str = None, department: str = None, accreditation: str = None,
+                  service: str = None, limit: int = None) -> list:
+        """
+        Hospitals matching every given filter
+
+        Args:
+            city: City name or alias (e.g. "Bengaluru")
+            department: Department or everyday term (e.g. "cardiac")
+            accreditation: e.g. "NABH", "JCI"
+            service: Service key or phrase (e.g. "cashless", "emergency")
+            limit: Maximum number of results
+
+        Returns:
+            List of hospital records in directory order
+        """
+        return self._hospitals.query({
+            'city': city,
+            'departments': department,
+            'accreditations': accreditation,
+            'services': service
+        }, limit)
+
+    def labs(self, city: str = None, accreditation: str = None, service: str = None,
+             test: str = None, limit: int = None) -> list:
+        """
+        Labs matching every given filter
+
+        Args:
+            city: City name or alias
+            accreditation: e.g. "NABL", "CAP"
+            service: Service key or phrase (e.g. "home collection")
+            test: Test category (e.g. "Thyroid")
+            limit: Maximum number of results
+
+        Returns:
+            List of lab records in directory order
+        """
+        return self._labs.query({
+            'city': city,
+            'accreditations': accreditation,
+            'services': service,
+            'tests_available': test
+        }, limit)
+
+    def nearest_hospitals(self, lat: float, lng: float, limit: int = 3, department: str = None,
+                          accreditation: str = None, service: str = None, max_km: float = None) -> list:
+        """
+        Hospitals closest to a location, optionally filtered like hospitals()
+
+        Returns:
+            List of (hospital record, distance_km), closest first
+        """
+        return self._hospitals.nearest(lat, lng, {
+            'departments': department,
+            'accreditations': accreditation,
+            'services': service
+        }, limit, max_km)
+
+    def nearest_labs(self, lat: float, lng: float, limit: int = 3, accreditation: str = None,
+                     service: str = None, test: str = None, max_km: float = None) -> list:
+        """
+        Labs closest to a location, optionally filtered like labs()
+
+        Returns:
+            List of (lab record, distance_km), closest first
+        """
+        return self._labs.nearest(lat, lng, {
+            'accreditations': accreditation,
+            'services': service,
+            'tests_available': test
+        }, limit, max_km)
+
+    def get_hospital(self, hospital_id: str) -> dict:
+        return self._hospitals.records.get(hospital_id)
+
+    def get_lab(self, lab_id: str) -> dict:
+        return self._labs.records.get(lab_id)
+
+    # ==================== TEXT DETECTION ====================
+
+    def find_city(self, text: str) -> str:
+        """Display name of the first city mentioned in the text (None if none)"""
+        match = self._city_pattern.search(text.lower()) if text else None
+        return self._city_names.get(_normalize('city', match.group(1))) if match else None
+
+    def locate(self, text: str) -> dict:
+        """
+        Coordinates from a pincode or "lat, lng" pair in the text
+
+        Returns:
+            Dictionary with pincode, area, city, lat and lng (None if no location found)
+        """
+        place = self._pincodes.locate(text)
+        if place and not place['city']:
+            nearby = (self.nearest_hospitals(place['lat'], place['lng'], limit=1, max_km=CITY_RADIUS_KM) or
+                      self.nearest_labs(place['lat'], place['lng'], limit=1, max_km=CITY_RADIUS_KM))
+            place['city'] = nearby[0][0]['city'] if nearby else None
+        return place
+
+    def find_department(self, text: str) -> str:
+        """Department for the first specialty term in the text (None if none)"""
+        match = self._department_pattern.search(text.lower()) if text else None
+        return DEPARTMENT_SYNONYMS[match.group(1)] if match else None
+
+    def find_hospital(self, text: str, city: str = None) -> dict:
+        """Hospital named in the text, preferring one in the given city"""
+        return self._hospitals.find_in_text(text, city)
+
+    def find_lab(self, text: str, city: str = None) -> dict:
+        """Lab named in the text, preferring one in the given city"""
+        return self._labs.find_in_text(text, city)
+
+    # ==================== PROMPT TEXT ====================
+
+    def hospitals_by_city_text(self) -> str:
+        """One '- City: Hospital, ...' line per city for agent prompts"""
+        return '\n'.join(
+            f"- {city}: {', '.join(h['name'] for h in self.hospitals(city=city))}"
+            for city in self.cities if self.hospitals(city=city)
+        )
+
+    def labs_by_city_text(self) -> str:
+        """One '- City: Lab (accreditation), ...' line per city for agent prompts"""
+        return '\n'.join(
+            f"- {city}: {', '.join(lab['name'] + ' (' + ', '.join(lab['accreditations']) + ')' for lab in self.labs(city=city))}"
+            for city in self.cities if self.labs(city=city)
+        )
+
+
+_default_directory = None
+
+
+def get_provider_directory() -> ProviderDirectory:
+    """Process-wide directory loaded from data/ (or WELLNESS_HOSPITALS_FILE / WELLNESS_LABS_FILE / WELLNESS_PINCODES_FILE)"""
+    global _default_directory
+    if _default_directory is None:
+        _default_directory = ProviderDirectory.from_files(
+            os.getenv('WELLNESS_HOSPITALS_FILE', os.path.join(DATA_DIR, 'hospitals.json')),
+            os.getenv('WELLNESS_LABS_FILE', os.path.join(DATA_DIR, 'labs.json')),
+            os.getenv('WELLNESS_PINCODES_FILE', os.path.join(DATA_DIR, 'pincodes.json'))
+        )
+    return _default_directory
@@ -0,0 +1,438 @@
+# services/slot_engine.py
+"""
+Slot Engine - Appointment slot inventory with concurrency-safe booking
+
+Slots are generated from doctor schedules (hospital -> department -> doctor ->
+weekly sessions) for a rolling horizon of days; days that have passed are
+dropped as the horizon rolls forward. Free-slot queries use a
+start-time index per (hospital, department) searched with bisect. Every slot
+carries a version number; holds and bookings are compare-and-swap updates under
+a striped lock, so two users can never hold or book the same slot. Holds expire
+on their own if a conversation is abandoned mid-booking.
+"""
+
+import bisect
+import json
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+
+WEEKDAY_NAMES = ['mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun']
+
+# Time-of-day preferences as (start_hour, end_hour)
+TIME_OF_DAY_HOURS = {
+    'morning': (6, 12),
+    'afternoon': (12, 17),
+    'evening': (17, 22)
+}
+
+LOCK_STRIPES = 64
+
+
+def preference_window(preference: str, now: datetime) -> dict:
+    """
+    Translate a free-text time preference into slot query filters
+
+    Args:
+        preference: e.g. "Morning", "Tomorrow", "Tomorrow Morning"
+        now: Current time
+
+    Returns:
+        Dictionary with optional 'start', 'end' and 'hours' filters
+    """
+    preference = (preference or '').lower()
+    window = {}
+    midnight = datetime.combine(now.date(), datetime.min.time())
+    if 'today' in preference:
+        window['end'] = midnight + timedelta(days=1)
+    elif 'tomorrow' in preference:
+        window['start'] = midnight + timedelta(days=1)
+        window['end'] = midnight + timedelta(days=2)
+    for name, hours in TIME_OF_DAY_HOURS.items():
+        if name in preference:
+            window['hours'] = hours
+    return window
+
+
+def parse_time_preference(text: str, previous: str = None) -> str:
+    """
+    Read a day and time-of-day preference from a message
+
+    Args:
+        text: User message, e.g. "Tomorrow morning works"
+        previous: Preference from earlier turns; the part the message does not
+            mention (day or time of day) is kept from it
+
+    Returns:
+        e.g. "Tomorrow Morning", "Evening" (previous if the message names neither)
+    """
+    text = (text or '').lower()
+    previous_words = (previous or '').lower().split()
+    day = next((word for word in ('today', 'tomorrow') if word in text), None)
+    part = next((name for name in TIME_OF_DAY_HOURS if name in text), None)
+    if not day and not part:
+        return previous
+    day = day or next((word for word in previous_words if word in ('today', 'tomorrow')), None)
+    part = part or next((word for word in previous_words if word in TIME_OF_DAY_HOURS), None)
+    return ' '.join(word.capitalize() for word in (day, part) if word)
+
+
+def _format_time(moment: datetime) -> str:
+    """12-hour clock without a leading zero, e.g. 9:30 AM"""
+    return moment.strftime('%I:%M %p').lstrip('0')
+
+
+class SlotEngine:
+    """
+    Slot inventory for hospitals x departments x doctors x time slots.
+
+    Attributes:
+        hospitals (dict): Hospital records by hospital_id
+        days_ahead (int): Rolling booking horizon in days
+        hold_seconds (float): How long a held slot stays reserved for its owner
+        stats (dict): Hold / booking / conflict counters
+    """
+
+    def __init__(self, schedule: dict, days_ahead: int = 7, hold_seconds: float = 600,
+                 clock=time.time):
+        self.days_ahead = days_ahead
+        self.hold_seconds = hold_seconds
+        self._clock = clock
+        self._default_slot_minutes = schedule.get('slot_minutes', 15)
+
+        self.hospitals = {h['hospital_id']: h for h in schedule.get('hospitals', [])}
+        self._slots = {}
+        self._index = {}
+        self._holds_by_owner = {}
+        self._generated_from = None
+        self._generated_until = None
+
+        self._locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+        self._inventory_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.stats = {
+            'holds': 0,
+            'bookings': 0,
+            'releases': 0,
+            'conflicts': 0,
+            'expired_holds_reclaimed': 0,
+            'slots_evicted': 0
+        }
+
+        self._ensure_horizon()
+
+    @classmethod
+    def from_file(cls, path: str, **kwargs):
+        """Load doctor schedules from a JSON file"""
+        with open(path, encoding='utf-8') as f:
+            return cls(json.load(f), **kwargs)
+
+    # ==================== INVENTORY ====================
+
+    def _now(self) -> datetime:
+        return datetime.fromtimestamp(self._clock())
+
+    def _ensure_horizon(self):
+        """Generate slots for days that entered the rolling horizon and drop days that left it"""
+        today = self._now().date()
+        last_day = today + timedelta(days=self.days_ahead - 1)
+        if (self._generated_until is not None and self._generated_until >= last_day
+                and self._generated_from >= today):
+            return
+        with self._inventory_lock:
+            if self._generated_from is not None and self._generated_from < today:
+                self._evict_before(today)
+            day = (max(self._generated_until + timedelta(days=1), today)
+                   if self._generated_until is not None else today)
+            while day <= last_day:
+                self._generate_day(day)
+                self._generated_until = day
+                day += timedelta(days=1)
+            self._generated_from = today
+
+    def _evict_before(self, day: date):
+        """Drop every slot (free, held or booked) that starts before a day"""
+        cutoff = datetime.combine(day, datetime.min.time()).timestamp()
+        evicted = 0
+        for key, index in list(self._index.items()):
+            position = bisect.bisect_left(index['starts'], cutoff)
+            if not position:
+                continue
+            for slot_id in index['slot_ids'][:position]:
+                slot = self._slots.pop(slot_id, None)
+                if slot and slot['hold_owner'] and self._holds_by_owner.get(slot['hold_owner']) == slot_id:
+                    del self._holds_by_owner[slot['hold_owner']]
+            evicted += position
+            # Swap in trimmed lists so lock-free readers see the old index or the new one
+            self._index[key] = {'starts': index['starts'][position:], 'slot_ids': index['slot_ids'][position:]}
+        with self._stats_lock:
+            self.stats['slots_evicted'] += evicted
+
+    def _generate_day(self, day: date):
+        """Create every doctor's slots for one day and append them to the index"""
+        weekday = WEEKDAY_NAMES[day.weekday()]
+        new_entries = {}
+
+        for hospital_id, hospital in self.hospitals.items():
+            for department, doctors in hospital.get('departments', {}).items():
+                entries = new_entries.setdefault((hospital_id, department), [])
+                for doctor in doctors:
+                    if weekday not in [d.lower()[:3] for d in doctor.get('days', WEEKDAY_NAMES)]:
+                        continue
+                    length = timedelta(minutes=doctor.get('slot_minutes', self._default_slot_minutes))
+                    for session_start, session_end in doctor.get('sessions', []):
+                        start = datetime.combine(day, datetime.strptime(session_start, '%H:%M').time())
+                        end = datetime.combine(day, datetime.strptime(session_end, '%H:%M').time())
+                        while start + length <= end:
+                            slot_id = f"{doctor['doctor_id']}-{start.strftime('%Y%m%d%H%M')}"
+                            self._slots[slot_id] = {
+                                'slot_id': slot_id,
+                                'hospital_id': hospital_id,
+                                'hospital': hospital['name'],
+                                'department': department,
+                                'doctor_id': doctor['doctor_id'],
+                                'doctor': doctor['name'],
+                                'start': start,
+                                'end': start + length,
+                                'status': 'free',
+                                'version': 0,
+                                'hold_owner': None,
+                                'hold_expires': None,
+                                'booking_id': None
+                            }
+                            entries.append((start.timestamp(), slot_id))
+                            start += length
+
+        # Each new day is later than everything indexed so far, so appending keeps order
+        for key, entries in new_entries.items():
+            entries.sort()
+            index = self._index.setdefault(key, {'starts': [], 'slot_ids': []})
+            index['starts'].extend(start for start, _ in entries)
+            index['slot_ids'].extend(slot_id for _, slot_id in entries)
+
+    def resolve_hospital(self, name: str, city: str = None) -> str:
+        """Map a free-text hospital name to a hospital_id (None if unknown)"""
+        if not name:
+            return None
+        name_lower = name.lower()
+        for hospital_id, hospital in self.hospitals.items():
+            if city and hospital.get('city', '').lower() != city.lower():
+                continue
+            candidates = [hospital['name'].lower()] + [a.lower() for a in hospital.get('aliases', [])]
+            if any(candidate in name_lower or name_lower in candidate for candidate in candidates):
+                return hospital_id
+        return None
+
+    def departments(self, hospital_id: str) -> list:
+        """Departments offered by a hospital"""
+        return list(self.hospitals.get(hospital_id, {}).get('departments', {}))
+
+    # ==================== QUERIES ====================
+
+    def _is_available(self, slot: dict, now: float) -> bool:
+        if slot['status'] == 'free':
+            return True
+        return slot['status'] == 'held' and slot['hold_expires'] <= now
+
+    def _snapshot(self, slot: dict) -> dict:
+        """Public copy of a slot"""
+        return {
+            'slot_id': slot['slot_id'],
+            'hospital_id': slot['hospital_id'],
+            'hospital': slot['hospital'],
+            'department': slot['department'],
+            'doctor_id': slot['doctor_id'],
+            'doctor': slot['doctor'],
+            'start': slot['start'].isoformat(),
+            'end': slot['end'].isoformat(),
+            'date': slot['start'].strftime('%B %d, %Y'),
+            'time': _format_time(slot['start']),
+            'duration_minutes': int((slot['end'] - slot['start']).total_seconds() // 60),
+            'status': slot['status'],
+            'version': slot['version'],
+            'booking_id': slot['booking_id']
+        }
+
+    def find_free_slots(self, hospital_id: str, department: str, start: datetime = None,
+                        end: datetime = None, hours: tuple = None, doctor_id: str = None,
+                        limit: int = 5) -> list:
+        """
+        Find bookable slots in a time window
+
+        Args:
+            hospital_id: Hospital to search
+            department: Department to search
+            start: Earliest slot start (defaults to now)
+            end: Latest slot start (exclusive)
+            hours: Optional (start_hour, end_hour) time-of-day filter
+            doctor_id: Optional doctor filter
+            limit: Maximum slots to return
+
+        Returns:
+            Slot snapshots in start-time order
+        """
+        self._ensure_horizon()
+        index = self._index.get((hospital_id, department))
+        if not index:
+            return []
+
+        now = self._clock()
+        start_ts = max(start.timestamp(), now) if start else now
+        position = bisect.bisect_left(index['starts'], start_ts)
+        stop = bisect.bisect_left(index['starts'], end.timestamp()) if end else len(index['starts'])
+
+        results = []
+        for slot_id in index['slot_ids'][position:stop]:
+            slot = self._slots[slot_id]
+            if doctor_id and slot['doctor_id'] != doctor_id:
+                continue
+            if hours and not hours[0] <= slot['start'].hour < hours[1]:
+                continue
+            if self._is_available(slot, now):
+                results.append(self._snapshot(slot))
+                if len(results) >= limit:
+                    break
+        return results
+
+    def get_slot(self, slot_id: str) -> dict:
+        """Snapshot of a slot by id (None if unknown)"""
+        slot = self._slots.get(slot_id)
+        return self._snapshot(slot) if slot else None
+
+    # ==================== RESERVATIONS ====================
+
+    def _lock_for(self, slot_id: str) -> threading.Lock:
+        return self._locks[hash(slot_id) % LOCK_STRIPES]
+
+    def _count(self, key: str):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def hold(self, slot_id: str, owner: str, expected_version: int = None) -> dict:
+        """
+        Reserve a slot for an owner until the hold expires
+
+        Args:
+            slot_id: Slot to hold
+            owner: Who holds it (e.g. user id)
+            expected_version: Version the caller last saw; the hold fails if the
+                slot changed since (optimistic concurrency)
+
+        Returns:
+            Slot snapshot, or None if the slot is taken or changed
+        """
+        slot = self._slots.get(slot_id)
+        if slot is None:
+            return None
+
+        with self._lock_for(slot_id):
+            now = self._clock()
+            if expected_version is not None and slot['version'] != expected_version:
+                self._count('conflicts')
+                return None
+            own_hold = slot['status'] == 'held' and slot['hold_owner'] == owner
+            if not own_hold and not self._is_available(slot, now):
+                self._count('conflicts')
+                return None
+            if slot['status'] == 'held' and not own_hold:
+                self._count('expired_holds_reclaimed')
+
+            slot['status'] = 'held'
+            slot['hold_owner'] = owner
+            slot['hold_expires'] = now + self.hold_seconds
+            slot['version'] += 1
+            snapshot = self._snapshot(slot)
+
+        # An owner holds at most one slot - release the previous one
+        with self._inventory_lock:
+            previous = self._holds_by_owner.get(owner)
+            self._holds_by_owner[owner] = slot_id
+        if previous and previous != slot_id:
+            self.release(previous, owner)
+
+        self._count('holds')
+        return snapshot
+
+    def hold_next_free(self, hospital_id: str, department: str, owner: str,
+                       max_attempts: int = 5, **filters) -> dict:
+        """
+        Hold the earliest free slot matching the filters
+
+        Candidates are read without locking and claimed with compare-and-swap;
+        a lost race moves on to the next candidate.
+
+        Returns:
+            Held slot snapshot, or None if nothing is free
+        """
+        for _ in range(max_attempts):
+            candidates = self.find_free_slots(hospital_id, department, limit=10, **filters)
+            if not candidates:
+                return None
+            for candidate in candidates:
+                held = self.hold(candidate['slot_id'], owner, expected_version=candidate['version'])
+                if held:
+                    return held
+        return None
+
+    def confirm(self, slot_id: str, owner: str, booking_id: str) -> dict:
+        """
+        Turn an owner's live hold into a booking
+
+        Returns:
+            Booked slot snapshot, or None if the hold is missing or expired
+        """
+        slot = self._slots.get(slot_id)
+        if slot is None:
+            return None
+
+        with self._lock_for(slot_id):
+            if (slot['status'] != 'held' or slot['hold_owner'] != owner
+                    or slot['hold_expires'] <= self._clock()):
+                self._count('conflicts')
+                return None
+            slot['status'] = 'booked'
+            slot['booking_id'] = booking_id
+            slot['hold_expires'] = None
+            slot['version'] += 1
+            snapshot = self._snapshot(slot)
+
+        with self._inventory_lock:
+            if self._holds_by_owner.get(owner) == slot_id:
+                del self._holds_by_owner[owner]
+
+        self._count('bookings')
+        return snapshot
+
+    def book(self, hospital_id: str, department: str, owner: str, booking_id: str, **filters) -> dict:
+        """Hold and immediately confirm the earliest free slot"""
+        held = self.hold_next_free(hospital_id, department, owner, **filters)
+        return self.confirm(held['slot_id'], owner, booking_id) if held else None
+
+    def release(self, slot_id: str, owner: str) -> bool:
+        """Give up an owner's hold"""
+        slot = self._slots.get(slot_id)
+        if slot is None:
+            return False
+        with self._lock_for(slot_id):
+            if slot['status'] != 'held' or slot['hold_owner'] != owner:
+                return False
+            slot['status'] = 'free'
+            slot['hold_owner'] = None
+            slot['hold_expires'] = None
+            slot['version'] += 1
+        self._count('releases')
+        return True
+
+    def held_slot(self, owner: str) -> dict:
+        """The owner's current live hold, if any"""
+        slot_id = self._holds_by_owner.get(owner)
+        slot = self._slots.get(slot_id) if slot_id else None
+        if slot and slot['status'] == 'held' and slot['hold_owner'] == owner \
+                and slot['hold_expires'] > self._clock():
+            return self._snapshot(slot)
+        return None
+
+    def bookings(self) -> list:
+        """Snapshots of every booked slot"""
+        return [self._snapshot(slot) for slot in self._slots.values() if slot['status'] == 'booked']
@@ -0,0 +1,252 @@
+# services/structured_log.py
+"""
+Structured Log - Levelled, sampled, queue-backed logging for the hot path
+
+    log = get_logger('routing')
+    log.info("Router detected", intent='PHARMACY', route='pharmacy')
+    log.debug("Lab card check", location=city, should_show=False)
+
+Loggers are stdlib loggers under 'wellness.<category>'; keyword arguments
+become structured fields. A call below the configured level returns after a
+level check. Records that pass the level and the category's sample rate are
+put on a bounded queue; a listener thread formats and writes them, so the
+event loop never waits on stdout. When the queue is full the record is
+dropped and counted rather than blocking a turn. Warnings and errors are
+never sampled.
+
+Settings (read once, on first use):
+    WELLNESS_LOG_LEVEL        DEBUG | INFO (default) | WARNING | ERROR
+    WELLNESS_LOG_FORMAT       text (default) | json (one JSON object per line,
+                              with 'severity' as Cloud Logging expects;
+                              default on Cloud Run / Cloud Functions)
+    WELLNESS_LOG_SAMPLE       per-category keep rates, e.g. "turn=0.1,cards=0"
+    WELLNESS_LOG_QUEUE_SIZE   records buffered before dropping (default 10000)
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+import time
+
+
+ROOT_LOGGER = 'wellness'
+
+_STANDARD_ATTRS = ('exc_info', 'stack_info', 'stacklevel', 'extra')
+
+_configured = None
+_configure_lock = threading.Lock()
+
+
+class StructuredLogger(logging.LoggerAdapter):
+    """Logger adapter that turns keyword arguments into structured fields"""
+
+    def process(self, msg, kwargs):
+        fields = {key: kwargs.pop(key) for key in list(kwargs) if key not in _STANDARD_ATTRS}
+        if fields:
+            kwargs['extra'] = dict(kwargs.get('extra') or {}, fields=fields)
+        return msg, kwargs
+
+    # The level methods take fields directly, so a field may be called 'level' or 'msg'
+    def _log_fields(self, level, msg, args, kwargs):
+        if self.logger.isEnabledFor(level):
+            msg, kwargs = self.process(msg, kwargs)
+            self.logger.log(level, msg, *args, **kwargs)
+
+    def debug(self, msg, /, *args, **kwargs):
+        self._log_fields(logging.DEBUG, msg, args, kwargs)
+
+    def info(self, msg, /, *args, **kwargs):
+        self._log_fields(logging.INFO, msg, args, kwargs)
+
+    def warning(self, msg, /, *args, **kwargs):
+        self._log_fields(logging.WARNING, msg, args, kwargs)
+
+    def error(self, msg, /, *args, **kwargs):
+        self._log_fields(logging.ERROR, msg, args, kwargs)
+
+    def exception(self, msg, /, *args, exc_info=True, **kwargs):
+        self._log_fields(logging.ERROR, msg, args, dict(kwargs, exc_info=exc_info))
+
+
+class SamplingFilter(logging.Filter):
+    """Keep a category's records at its configured rate (warnings and above always kept)"""
+
+    def __init__(self, rates: dict, seed: int = None):
+        super().__init__()
+        self.rates = rates
+        self._random = random.Random(seed).random
+
+    def filter(self, record) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rates.get(record.name[len(ROOT_LOGGER) + 1:], 1.0)
+        return rate >= 1.0 or (rate > 0.0 and self._random() < rate)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Enqueue without blocking; count records dropped when the queue is full"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Formatting happens on the listener thread; only make the record safe to hand over
+        if record.args:
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _Listener(logging.handlers.QueueListener):
+    def enqueue_sentinel(self):
+        # Blocking put: the writer thread is draining the queue, so a full queue still stops cleanly
+        self.queue.put(self._sentinel)
+
+
+class TextFormatter(logging.Formatter):
+    """'message key=value ...' for local runs"""
+
+    def format(self, record) -> str:
+        line = f"{record.levelname[0]} {record.name[len(ROOT_LOGGER) + 1:] or ROOT_LOGGER}: {record.getMessage()}"
+        fields = getattr(record, 'fields', None)
+        if fields:
+            line += ' ' + ' '.join(f"{key}={value}" for key, value in fields.items())
+        if record.exc_info:
+            line += '\n' + self.formatException(record.exc_info)
+        return line
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line ('severity' and 'message' as Cloud Logging reads them)"""
+
+    converter = time.gmtime
+
+    def format(self, record) -> str:
+        entry = {
+            'severity': record.levelname,
+            'message': record.getMessage(),
+            'category': record.name[len(ROOT_LOGGER) + 1:] or ROOT_LOGGER,
+            'time': self.formatTime(record, '%Y-%m-%dT%H:%M:%S') + f".{int(record.msecs):03d}Z"
+        }
+        fields = getattr(record, 'fields', None)
+        if fields:
+            entry.update(fields)
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class _StdoutHandler(logging.StreamHandler):
+    """Writes to whatever sys.stdout is when the record is emitted"""
+
+    def __init__(self):
+        super().__init__(sys.stdout)
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
+
+def parse_sample_rates(spec: str) -> dict:
+    """'turn=0.1,cards=0' -> {'turn': 0.1, 'cards': 0.0} (bad entries ignored)"""
+    rates = {}
+    for item in (spec or '').split(','):
+        category, _, rate = item.partition('=')
+        try:
+            rates[category.strip()] = min(1.0, max(0.0, float(rate)))
+        except ValueError:
+            continue
+    return rates
+
+
+def configure_logging(level: str = None, fmt: str = None, sample: str = None, queue_size: int = None,
+                      handler: logging.Handler = None) -> dict:
+    """
+    (Re)configure the 'wellness' loggers; settings default to the WELLNESS_LOG_* env vars
+
+    Args:
+        level: Minimum level name
+        fmt: 'text' or 'json'
+        sample: Per-category keep rates, e.g. "turn=0.1,cards=0"
+        queue_size: Records buffered for the writer thread before dropping
+        handler: Where the writer thread sends records (stdout by default)
+
+    Returns:
+        The active configuration: {'level', 'format', 'rates', 'queue_handler', 'listener'}
+    """
+    global _configured
+    with _configure_lock:
+        if _configured is not None:
+            _shutdown(_configured)
+
+        on_gcp = bool(os.getenv('K_SERVICE') or os.getenv('FUNCTION_TARGET'))
+        level = (level or os.getenv('WELLNESS_LOG_LEVEL', 'INFO')).upper()
+        fmt = (fmt or os.getenv('WELLNESS_LOG_FORMAT', 'json' if on_gcp else 'text')).lower()
+        rates = parse_sample_rates(sample if sample is not None else os.getenv('WELLNESS_LOG_SAMPLE', ''))
+        queue_size = queue_size or int(os.getenv('WELLNESS_LOG_QUEUE_SIZE', '10000'))
+
+        output = handler or _StdoutHandler()
+        output.setFormatter(JsonFormatter() if fmt == 'json' else TextFormatter())
+        queue_handler = DroppingQueueHandler(queue.Queue(queue_size))
+        queue_handler.addFilter(SamplingFilter(rates))
+        listener = _Listener(queue_handler.queue, output, respect_handler_level=True)
+        listener.start()
+
+        root = logging.getLogger(ROOT_LOGGER)
+        root.handlers = [queue_handler]
+        root.setLevel(getattr(logging, level, logging.INFO))
+        root.propagate = False
+
+        _configured = {'level': level, 'format': fmt, 'rates': rates,
+                       'queue_handler': queue_handler, 'listener': listener}
+        return _configured
+
+
+def _shutdown(config: dict):
+    try:
+        config['listener'].stop()
+    except AttributeError:
+        pass  # already stopped
+
+
+def flush_logging():
+    """Write out everything queued so far (stops and restarts the writer thread)"""
+    if _configured is not None:
+        listener = _configured['listener']
+        listener.stop()
+        listener.start()
+
+
+def dropped_records() -> int:
+    """Records dropped because the queue was full"""
+    return _configured['queue_handler'].dropped if _configured else 0
+
+
+def get_logger(category: str) -> StructuredLogger:
+    """Logger for a category ('routing', 'cards', 'turn', ...), configuring logging on first use"""
+    if _configured is None:
+        configure_logging()
+    return StructuredLogger(logging.getLogger(f"{ROOT_LOGGER}.{category}"), {})
+
+
+@atexit.register
+def _flush_at_exit():
+    if _configured is not None:
+        _shutdown(_configured)
@@ -0,0 +1,226 @@
+# services/structured_output.py
+"""
+Structured Output - Optional JSON reply format for specialist agents
+
+When structured mode is enabled, each specialist returns its reply text together
+with typed fields (entities, workflow step, confirmation data and suggested
+replies) in a single completion. The manager then drives shared context, cards
+and suggestions from these fields instead of keyword heuristics over free text.
+
+A lighter alternative, inline suggestions, keeps the reply as free text and only
+asks for follow-up questions in a delimited trailer of the same completion.
+"""
+
+import json
+import re
+
+
+# ==================== SCHEMA ====================
+
+STRUCTURED_STEPS = (
+    'greeting', 'assessing', 'answering', 'collecting_location',
+    'choosing_hospital', 'choosing_lab', 'choosing_visit_type',
+    'choosing_package', 'choosing_time', 'choosing_medicine',
+    'awaiting_quantity', 'confirmed', 'other'
+)
+
+STRUCTURED_OUTPUT_INSTRUCTIONS = """
+RESPONSE FORMAT (STRUCTURED MODE):
+Return ONLY one JSON object - no text before or after it and no markdown fences:
+{
+  "reply": "<your complete reply to the user, written exactly as you normally would>",
+  "step": "<one of: greeting, assessing, answering, collecting_location, choosing_hospital, choosing_lab, choosing_visit_type, choosing_package, choosing_time, choosing_medicine, awaiting_quantity, confirmed, other>",
+  "entities": {
+    "location": "<city or null>",
+    "hospital": "<hospital name or null>",
+    "lab": "<lab name or null>",
+    "visit_type": "<home, lab or null>",
+    "test_type": "<test name or null>",
+    "package": "<test package name or null>",
+    "time_preference": "<preferred day or time or null>",
+    "symptoms": ["<symptom>"],
+    "medicines": [{"name": "<medicine name>", "available": true}],
+    "medicine_selected": "<medicine the user chose to order, or null>"
+  },
+  "confirmation": {"confirmed": false, "booking_id": null},
+  "suggested_replies": ["<3-4 short questions the USER would naturally ask next, 6-12 words each>"]
+}
+
+RULES:
+- "step" describes what your reply is asking the user for (or "confirmed" once a booking/order is final)
+- Only fill entities the user has provided or you have confirmed; use null or [] otherwise
+- "medicines" lists every medicine your reply mentions, with its availability from the inventory
+- Set "confirmation.confirmed" to true ONLY in the reply that confirms a booking or order
+- Suggested replies are from the patient's perspective, not questions you would ask them
+"""
+
+MAX_SUGGESTED_REPLIES = 4
+
+SUGGESTION_TRAILER_MARKER = "<<<SUGGESTIONS>>>"
+
+SUGGESTION_TRAILER_INSTRUCTIONS = f"""
+FOLLOW-UP SUGGESTIONS:
+After your reply, add a new line containing exactly {SUGGESTION_TRAILER_MARKER} and then
+3-4 short questions the USER would naturally ask next (6-12 words each), one per line.
+Write them from the patient's perspective. Never mention this section in your reply.
+"""
+
+_TRAILER_PATTERN = re.compile(r'<<<\s*suggestions\s*>>>', re.IGNORECASE)
+_BULLET_PATTERN = re.compile(r'^(?:[•\-*]|\d+[.)])\s*')
+
+
+# ==================== PARSING ====================
+
+def _extract_json_object(raw_text: str) -> str:
+    """Strip markdown fences and surrounding prose from a JSON reply"""
+    text = raw_text.strip()
+    if text.startswith('```'):
+        text = text.split('\n', 1)[1] if '\n' in text else ''
+        if text.rstrip().endswith('```'):
+            text = text.rstrip()[:-3]
+    start = text.find('{')
+    end = text.rfind('}')
+    if start == -1 or end <= start:
+        return ''
+    return text[start:end + 1]
+
+
+def _clean_text(value) -> str:
+    """Return a stripped string or None for empty/null-like values"""
+    if value is None or isinstance(value, (dict, list)):
+        return None
+    text = str(value).strip()
+    if not text or text.lower() in ('null', 'none', 'n/a', 'unknown'):
+        return None
+    return text
+
+
+def _clean_list(values) -> list:
+    """Return the non-empty strings of a list"""
+    if not isinstance(values, list):
+        return []
+    return [text for text in (_clean_text(v) for v in values) if text]
+
+
+def _clean_medicines(values) -> list:
+    """Normalize the medicines list to [{'name': str, 'available': bool|None}]"""
+    medicines = []
+    if not isinstance(values, list):
+        return medicines
+    for value in values:
+        if isinstance(value, dict):
+            name = _clean_text(value.get('name'))
+            available = value.get('available')
+        else:
+            name, available = _clean_text(value), None
+        if name:
+            medicines.append({
+                'name': name,
+                'available': available if isinstance(available, bool) else None
+            })
+    return medicines
+
+
+def _clean_suggestions(values) -> list:
+    """Keep short, unique suggested replies"""
+    suggestions = []
+    for text in _clean_list(values):
+        if 5 < len(text) < 80 and text not in suggestions:
+            suggestions.append(text)
+        if len(suggestions) >= MAX_SUGGESTED_REPLIES:
+            break
+    return suggestions
+
+
+def parse_structured_reply(raw_text: str) -> dict:
+    """
+    Parse a structured specialist reply into normalized typed fields
+
+    Args:
+        raw_text: Raw model output produced under STRUCTURED_OUTPUT_INSTRUCTIONS
+
+    Returns:
+        Dictionary with reply, step, entities, confirmation and suggested_replies,
+        or None when the output is not a usable JSON object
+    """
+    if not raw_text:
+        return None
+
+    candidate = _extract_json_object(raw_text)
+    if not candidate:
+        return None
+
+    try:
+        payload = json.loads(candidate)
+    except ValueError:
+        return None
+
+    if not isinstance(payload, dict):
+        return None
+
+    reply = _clean_text(payload.get('reply'))
+    if not reply:
+        return None
+
+    step = (_clean_text(payload.get('step')) or 'other').lower()
+    if step not in STRUCTURED_STEPS:
+        step = 'other'
+
+    raw_entities = payload.get('entities') if isinstance(payload.get('entities'), dict) else {}
+    visit_type = (_clean_text(raw_entities.get('visit_type')) or '').lower()
+    entities = {
+        'location': _clean_text(raw_entities.get('location')),
+        'hospital': _clean_text(raw_entities.get('hospital')),
+        'lab': _clean_text(raw_entities.get('lab')),
+        'visit_type': 'home' if 'home' in visit_type else ('lab' if 'lab' in visit_type else None),
+        'test_type': _clean_text(raw_entities.get('test_type')),
+        'package': _clean_text(raw_entities.get('package')),
+        'time_preference': _clean_text(raw_entities.get('time_preference')),
+        'symptoms': [s.lower() for s in _clean_list(raw_entities.get('symptoms'))],
+        'medicines': _clean_medicines(raw_entities.get('medicines')),
+        'medicine_selected': _clean_text(raw_entities.get('medicine_selected'))
+    }
+
+    raw_confirmation = payload.get('confirmation') if isinstance(payload.get('confirmation'), dict) else {}
+    confirmation = {
+        'confirmed': raw_confirmation.get('confirmed') is True or step == 'confirmed',
+        'booking_id': _clean_text(raw_confirmation.get('booking_id'))
+    }
+
+    return {
+        'reply': reply,
+        'step': step,
+        'entities': entities,
+        'confirmation': confirmation,
+        'suggested_replies': _clean_suggestions(payload.get('suggested_replies'))
+    }
+
+
+def split_suggestion_trailer(raw_text: str) -> tuple:
+    """
+    Split an inline-suggestions reply into the reply text and its suggestions
+
+    Args:
+        raw_text: Raw model output produced under SUGGESTION_TRAILER_INSTRUCTIONS
+
+    Returns:
+        Tuple of (reply_text, suggestions); suggestions is empty when the model
+        left out the trailer
+    """
+    if not raw_text:
+        return raw_text, []
+
+    match = _TRAILER_PATTERN.search(raw_text)
+    if not match:
+        return raw_text.strip(), []
+
+    reply = raw_text[:match.start()].strip()
+    lines = raw_text[match.end():].split('\n')
+    suggestions = _clean_suggestions([
+        _BULLET_PATTERN.sub('', line.strip()).strip('"') for line in lines
+    ])
+
+    # A trailer with no reply before it is unusable - keep the full text
+    if not reply:
+        return raw_text.strip(), []
+    return reply, suggestions
@@ -0,0 +1,187 @@
+# services/suggestion_cache.py
+"""
+Suggestion Cache - Shares AI-generated suggested replies across conversations
+
+Suggested replies depend mostly on the active agent and a handful of
+conversation-state bits, so they are cached per (agent_type, state signature)
+bucket with a TTL and LRU eviction. Buckets are shared by every user in that
+state, so their suggestions are generated from the signature alone
+(describe_signature) - never from one user's messages or the reply they are
+answering. That trades suggestion quality for model calls, so the manager only
+uses the cache when WELLNESS_SUGGESTION_CACHE=true. Entries older than the
+refresh age are still served instantly while a background task regenerates them.
+"""
+
+import asyncio
+import contextvars
+import time
+from collections import OrderedDict
+
+from .structured_log import get_logger
+
+log = get_logger('suggestions')
+
+
+# ==================== STATE SIGNATURE ====================
+
+SYMPTOM_BUCKETS = {
+    'fever': ['fever', 'temperature', 'chills'],
+    'pain': ['pain', 'ache', 'headache', 'hurt'],
+    'respiratory': ['cough', 'cold', 'throat', 'breath', 'congestion'],
+    'injury': ['broken', 'fracture', 'sprain', 'injury'],
+    'digestive': ['nausea', 'vomit', 'stomach', 'diarrhea']
+}
+
+
+def _symptom_bucket(symptom) -> str:
+    """Collapse a free-text symptom into a coarse bucket"""
+    symptom_lower = str(symptom).lower()
+    for bucket, keywords in SYMPTOM_BUCKETS.items():
+        if any(keyword in symptom_lower for keyword in keywords):
+            return bucket
+    return 'other'
+
+
+def state_signature(agent_type: str, context: dict) -> tuple:
+    """
+    Build the cache key for a conversation state
+
+    Args:
+        agent_type: Agent that produced the current response
+        context: Per-user conversation context
+
+    Returns:
+        Hashable tuple identifying the suggestion bucket
+    """
+    shared = context['shared_memory']
+    scheduling_info = shared.get('scheduling_info', {})
+    pharmacy_info = shared.get('pharmacy_info', {})
+
+    return (
+        agent_type,
+        tuple(sorted({_symptom_bucket(s) for s in shared.get('symptoms_discussed', [])})),
+        bool(scheduling_info.get('location')),
+        bool(scheduling_info.get('hospital_preference')),
+        bool(pharmacy_info.get('medicine_selected')),
+        bool(shared.get('test_booking_info', {}).get('is_test_booking'))
+    )
+
+
+def describe_signature(key: tuple) -> str:
+    """Prompt-ready description of a state signature, with no user-specific details"""
+    agent_type, symptom_buckets, has_location, has_hospital, medicine_selected, test_booking = key
+    return f"""CURRENT AGENT: {agent_type}
+            - Symptom types discussed: {', '.join(symptom_buckets) or 'none'}
+            - Location known: {'yes' if has_location else 'no'}
+            - Hospital chosen: {'yes' if has_hospital else 'no'}
+            - Medicine selected: {'yes' if medicine_selected else 'no'}
+            - Booking a diagnostic test: {'yes' if test_booking else 'no'}"""
+
+
+# ==================== CACHE ====================
+
+class SuggestionCache:
+    """
+    LRU + TTL cache of suggested replies with background refresh.
+
+    Attributes:
+        max_entries (int): Maximum number of buckets kept before LRU eviction
+        ttl_seconds (float): Age after which an entry is no longer served
+        refresh_after_seconds (float): Age after which a served entry is regenerated
+        stats (dict): Hit/miss/refresh counters
+    """
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 900,
+                 refresh_after_seconds: float = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.refresh_after_seconds = (
+            refresh_after_seconds if refresh_after_seconds is not None else ttl_seconds / 3
+        )
+        self._entries = OrderedDict()
+        self._refreshing = set()
+        self._tasks = set()
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'expired': 0,
+            'evictions': 0,
+            'refreshes': 0,
+            'refresh_errors': 0
+        }
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key: tuple) -> tuple:
+        """
+        Look up a bucket
+
+        Returns:
+            Tuple of (suggestions or None, needs_refresh: bool)
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.stats['misses'] += 1
+            return None, False
+
+        age = time.monotonic() - entry['created_at']
+        if age > self.ttl_seconds:
+            del self._entries[key]
+            self.stats['expired'] += 1
+            self.stats['misses'] += 1
+            return None, False
+
+        self._entries.move_to_end(key)
+        self.stats['hits'] += 1
+        return list(entry['suggestions']), age > self.refresh_after_seconds
+
+    def put(self, key: tuple, suggestions: list):
+        """Store suggestions for a bucket, evicting the least recently used entries"""
+        if not suggestions:
+            return
+        self._entries[key] = {'suggestions': list(suggestions), 'created_at': time.monotonic()}
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats['evictions'] += 1
+
+    def schedule_refresh(self, key: tuple, generate) -> bool:
+        """
+        Regenerate a bucket in the background
+
+        The refresh runs in an empty context so it is not counted against (or
+        recorded into) the turn that happened to trigger it.
+
+        Args:
+            key: Bucket to refresh
+            generate: Zero-argument coroutine function returning new suggestions
+
+        Returns:
+            True if a refresh was started, False if one is already running
+        """
+        if key in self._refreshing:
+            return False
+        self._refreshing.add(key)
+        task = asyncio.get_running_loop().create_task(self._refresh(key, generate), context=contextvars.Context())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return True
+
+    async def _refresh(self, key: tuple, generate):
+        """Run one background refresh"""
+        try:
+            suggestions = await generate()
+            if suggestions:
+                self.put(key, suggestions)
+                self.stats['refreshes'] += 1
+        except Exception as e:
+            self.stats['refresh_errors'] += 1
+            log.warning("Suggestion cache refresh failed", error=e)
+        finally:
+            self._refreshing.discard(key)
+
+    def hit_ratio(self) -> float:
+        """Fraction of lookups served from cache"""
+        lookups = self.stats['hits'] + self.stats['misses']
+        return self.stats['hits'] / lookups if lookups else 0.0
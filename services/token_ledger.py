@@ -0,0 +1,285 @@
+# services/token_ledger.py
+"""
+Token Ledger - Token usage and cost per user, agent and turn type
+
+Every model call's prompt and completion tokens (as reported by the backend,
+estimated otherwise) are added to running totals per agent and per user; at
+the end of a turn the turn's calls are also rolled up under its turn type
+(the routed intent), so "what does an insurance turn cost" is answerable.
+Calls made inside a turn are charged to the turn's user, including calls
+issued under derived session ids; background work outside any turn is
+charged to SYSTEM_ACCOUNT.
+
+Each call is priced at its model's rates (MODEL_PRICES, extended or
+overridden by WELLNESS_PRICE_MODELS="model=prompt:completion,..."), so a
+lite-tier call costs what the lite model charges; models without a listed
+price, and calls recorded without a model, use the default prices.
+
+Optional per-user budgets: once a user has spent more than the budget in
+the current window, over_budget() is true and the manager takes its cheaper
+paths for that user until the window rolls over.
+"""
+
+import contextvars
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+# USD per million tokens (gemini-2.0-flash list price)
+DEFAULT_PROMPT_PRICE = 0.10
+DEFAULT_COMPLETION_PRICE = 0.40
+
+# USD per million (prompt, completion) tokens by model (list prices)
+MODEL_PRICES = {
+    'gemini-2.0-flash': (0.10, 0.40),
+    'gemini-2.0-flash-lite': (0.075, 0.30),
+}
+
+# Account charged for model calls made outside any user's turn (background cache refreshes)
+SYSTEM_ACCOUNT = 'system'
+
+_current_turn = contextvars.ContextVar('wellness_token_turn', default=None)
+
+
+def parse_prices(spec: str) -> dict:
+    """'gemini-2.0-flash-lite=0.075:0.30' -> {'gemini-2.0-flash-lite': (0.075, 0.3)} (bad entries ignored)"""
+    prices = {}
+    for item in (spec or '').split(','):
+        model, _, price = item.partition('=')
+        prompt, _, completion = price.partition(':')
+        try:
+            prices[model.strip()] = (float(prompt), float(completion))
+        except ValueError:
+            continue
+    prices.pop('', None)
+    return prices
+
+
+def _empty_usage() -> dict:
+    return {'calls': 0, 'prompt_tokens': 0, 'completion_tokens': 0, 'estimated_calls': 0, 'cost_usd': 0.0}
+
+
+def _add(usage: dict, call: dict):
+    usage['calls'] += 1
+    usage['prompt_tokens'] += call['prompt_tokens']
+    usage['completion_tokens'] += call['completion_tokens']
+    usage['estimated_calls'] += 1 if call['estimated'] else 0
+    usage['cost_usd'] += call['cost_usd']
+
+
+def _rounded(usage: dict) -> dict:
+    return dict(usage, total_tokens=usage['prompt_tokens'] + usage['completion_tokens'],
+                cost_usd=round(usage['cost_usd'], 6))
+
+
+class TokenLedger:
+    """In-memory token and cost rollups with optional per-user budgets"""
+
+    def __init__(self, prompt_price: float = DEFAULT_PROMPT_PRICE,
+                 completion_price: float = DEFAULT_COMPLETION_PRICE,
+                 user_budget: int = 0, window_seconds: float = 86400, max_users: int = 10000,
+                 model_prices: dict = None):
+        """
+        Args:
+            prompt_price: USD per million prompt tokens (models without a listed price)
+            completion_price: USD per million completion tokens (models without a listed price)
+            user_budget: Tokens a user may spend per window (0 = unlimited)
+            window_seconds: Budget window length
+            max_users: Per-user rollups kept (least recently active dropped first)
+            model_prices: (prompt, completion) USD per million tokens by model (default MODEL_PRICES)
+        """
+        self.prompt_price = prompt_price
+        self.completion_price = completion_price
+        self.model_prices = dict(MODEL_PRICES if model_prices is None else model_prices)
+        self.user_budget = user_budget
+        self.window_seconds = window_seconds
+        self.max_users = max_users
+        self._lock = threading.Lock()
+        self.reset()
+
+    @classmethod
+    def from_env(cls) -> 'TokenLedger':
+        """Ledger configured from WELLNESS_TOKEN_* / WELLNESS_PRICE_* settings"""
+        return cls(
+            prompt_price=float(os.getenv('WELLNESS_PRICE_PROMPT_PER_1M', str(DEFAULT_PROMPT_PRICE))),
+            completion_price=float(os.getenv('WELLNESS_PRICE_COMPLETION_PER_1M', str(DEFAULT_COMPLETION_PRICE))),
+            user_budget=int(os.getenv('WELLNESS_USER_TOKEN_BUDGET', '0')),
+            window_seconds=float(os.getenv('WELLNESS_TOKEN_BUDGET_WINDOW', '86400')),
+            max_users=int(os.getenv('WELLNESS_TOKEN_LEDGER_USERS', '10000')),
+            model_prices=dict(MODEL_PRICES, **parse_prices(os.getenv('WELLNESS_PRICE_MODELS', '')))
+        )
+
+    def reset(self):
+        with self._lock:
+            self._totals = _empty_usage()
+            self._by_agent = {}
+            self._by_model = {}
+            self._by_turn_type = {}
+            self._users = OrderedDict()
+            self.stats = {'turns': 0, 'degraded_turns': 0}
+
+    def cost(self, prompt_tokens: int, completion_tokens: int, model: str = None) -> float:
+        """USD for one call at model's prices (the default prices when model has none listed)"""
+        prompt_price, completion_price = self.model_prices.get(model, (self.prompt_price, self.completion_price))
+        return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+
+    # ==================== TURNS ====================
+
+    def begin_turn(self, user_id: str, degraded: bool = False) -> list:
+        """Charge calls made in this task to user_id until end_turn; returns the turn's call list"""
+        calls = []
+        _current_turn.set((user_id, calls, degraded))
+        return calls
+
+    def degraded(self) -> bool:
+        """True when the turn running in this task started over its user's budget"""
+        turn = _current_turn.get()
+        return turn is not None and turn[2]
+
+    def end_turn(self, turn_type: str) -> dict:
+        """Roll the current turn up under turn_type; returns the turn's usage (None outside a turn)"""
+        turn = _current_turn.get()
+        if turn is None:
+            return None
+        _current_turn.set(None)
+        _, calls, degraded = turn
+        usage = _empty_usage()
+        for call in calls:
+            _add(usage, call)
+
+        with self._lock:
+            rollup = self._by_turn_type.get(turn_type or 'none')
+            if rollup is None:
+                rollup = self._by_turn_type[turn_type or 'none'] = dict(_empty_usage(), turns=0)
+            rollup['turns'] += 1
+            for call in calls:
+                _add(rollup, call)
+            self.stats['turns'] += 1
+            self.stats['degraded_turns'] += 1 if degraded else 0
+        return dict(_rounded(usage), degraded=degraded)
+
+    # ==================== CALLS ====================
+
+    def record(self, user_id: str, agent_type: str, prompt_tokens: int, completion_tokens: int,
+               estimated: bool = False, model: str = None) -> dict:
+        """
+        Add one model call's usage
+
+        Args:
+            user_id: Session id the call was made under (the turn's user wins inside a turn)
+            agent_type: Agent that was called
+            prompt_tokens: Input tokens
+            completion_tokens: Output tokens
+            estimated: True when the backend reported no usage
+            model: Model that served the call (prices the call; None = default prices)
+
+        Returns:
+            The call record (tokens and cost)
+        """
+        turn = _current_turn.get()
+        if turn is not None:
+            user_id = turn[0]
+        call = {'agent': agent_type, 'model': model, 'prompt_tokens': prompt_tokens,
+                'completion_tokens': completion_tokens, 'estimated': estimated,
+                'cost_usd': self.cost(prompt_tokens, completion_tokens, model)}
+        if turn is not None:
+            turn[1].append(call)
+
+        with self._lock:
+            _add(self._totals, call)
+            agent_usage = self._by_agent.get(agent_type)
+            if agent_usage is None:
+                agent_usage = self._by_agent[agent_type] = _empty_usage()
+            _add(agent_usage, call)
+            model_usage = self._by_model.get(model or 'unknown')
+            if model_usage is None:
+                model_usage = self._by_model[model or 'unknown'] = _empty_usage()
+            _add(model_usage, call)
+
+            user = self._user(user_id)
+            _add(user['usage'], call)
+            user['window_tokens'] += prompt_tokens + completion_tokens
+        return call
+
+    def _user(self, user_id: str) -> dict:
+        """Per-user record, rolling its budget window over (caller holds the lock)"""
+        now = time.time()
+        user = self._users.get(user_id)
+        if user is None:
+            user = self._users[user_id] = {'usage': _empty_usage(), 'window_start': now, 'window_tokens': 0}
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+        else:
+            self._users.move_to_end(user_id)
+        if now - user['window_start'] >= self.window_seconds:
+            user['window_start'] = now
+            user['window_tokens'] = 0
+        return user
+
+    # ==================== BUDGETS ====================
+
+    def over_budget(self, user_id: str) -> bool:
+        """True when budgets are on and user_id has used up the current window's budget"""
+        if not self.user_budget:
+            return False
+        with self._lock:
+            user = self._users.get(user_id)
+            if user is None:
+                return False
+            if time.time() - user['window_start'] >= self.window_seconds:
+                return False
+            return user['window_tokens'] >= self.user_budget
+
+    def user_usage(self, user_id: str) -> dict:
+        """Lifetime usage of one user plus budget state (None if unknown)"""
+        with self._lock:
+            user = self._users.get(user_id)
+            if user is None:
+                return None
+            window_tokens = user['window_tokens']
+            if time.time() - user['window_start'] >= self.window_seconds:
+                window_tokens = 0
+            return dict(_rounded(user['usage']), window_tokens=window_tokens,
+                        budget_remaining=max(0, self.user_budget - window_tokens) if self.user_budget else None)
+
+    # ==================== SUMMARY ====================
+
+    def summary(self, top_users: int = 10) -> dict:
+        """
+        Queryable rollups
+
+        Args:
+            top_users: How many of the heaviest users to list
+
+        Returns:
+            {'totals', 'by_agent', 'by_model', 'by_turn_type' (with tokens_per_turn), 'top_users', 'budget'}
+        """
+        now = time.time()
+        with self._lock:
+            by_turn_type = {}
+            for turn_type, usage in sorted(self._by_turn_type.items()):
+                rounded = _rounded(usage)
+                rounded['tokens_per_turn'] = round(rounded['total_tokens'] / usage['turns'], 1)
+                by_turn_type[turn_type] = rounded
+            users = sorted(self._users.items(),
+                           key=lambda item: item[1]['usage']['prompt_tokens'] + item[1]['usage']['completion_tokens'],
+                           reverse=True)[:top_users]
+            return {
+                'totals': _rounded(self._totals),
+                'by_agent': {agent: _rounded(usage) for agent, usage in sorted(self._by_agent.items())},
+                'by_model': {model: _rounded(usage) for model, usage in sorted(self._by_model.items())},
+                'by_turn_type': by_turn_type,
+                'top_users': [dict(_rounded(user['usage']), user=user_id) for user_id, user in users],
+                'budget': {
+                    'user_budget': self.user_budget or None,
+                    'window_seconds': self.window_seconds,
+                    'users_tracked': len(self._users),
+                    'users_over_budget': sum(1 for user in self._users.values() if self.user_budget and
+                                             now - user['window_start'] < self.window_seconds and
+                                             user['window_tokens'] >= self.user_budget),
+                    'turns': self.stats['turns'],
+                    'degraded_turns': self.stats['degraded_turns']
+                }
+            }
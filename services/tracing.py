@@ -0,0 +1,211 @@
+# services/tracing.py
+"""
+Tracing - Per-turn stage timing
+
+Every process_message turn gets a trace; the stages of the turn (routing,
+prompt building, the specialist call, context update, suggestions, cards,
+model calls) are timed as spans, either with `with span('stage'):` or by
+decorating the method with @traced('stage'). Finished traces are folded into
+per-stage latency histograms, so p50/p95 per stage - and each stage's share
+of turn time - can be read from a running process.
+
+The current trace and span live in context variables, so concurrent turns
+(one asyncio task each) never mix, and tasks a turn fans out to inherit it.
+Outside a turn, spans cost a context variable lookup and do nothing.
+"""
+
+import asyncio
+import bisect
+import contextvars
+import functools
+import threading
+import time
+
+
+# Upper bucket bounds (ms): 0.05 ms growing by 2^(1/4) (~19%) up to ~100 s, then overflow
+BUCKET_BOUNDS_MS = tuple(0.05 * 2 ** (i / 4) for i in range(85))
+
+_current_trace = contextvars.ContextVar('wellness_trace', default=None)
+_current_span = contextvars.ContextVar('wellness_span', default=None)
+
+
+class LatencyHistogram:
+    """Fixed exponential buckets; percentiles interpolated within a bucket"""
+
+    def __init__(self, bounds: tuple = BUCKET_BOUNDS_MS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, pct: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = pct / 100 * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            if bucket_count and seen + bucket_count >= rank:
+                low = self.bounds[index - 1] if index else 0.0
+                high = self.bounds[index] if index < len(self.bounds) else self.max
+                return min(self.max, low + (high - low) * (rank - seen) / bucket_count)
+            seen += bucket_count
+        return self.max
+
+    def summary(self) -> dict:
+        return {
+            'count': self.count,
+            'mean_ms': self.total / self.count if self.count else 0.0,
+            'p50_ms': self.percentile(50),
+            'p95_ms': self.percentile(95),
+            'p99_ms': self.percentile(99),
+            'max_ms': self.max
+        }
+
+
+class Trace:
+    """Spans of one turn"""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.total_ms = None
+        self.spans = []
+
+    def stage_totals(self) -> dict:
+        """Milliseconds per stage, summed over the turn"""
+        totals = {}
+        for span_record in self.spans:
+            totals[span_record['name']] = totals.get(span_record['name'], 0.0) + span_record['ms']
+        return totals
+
+    def summary(self) -> dict:
+        """JSON-ready timings for a debug response"""
+        return {
+            'total_ms': round(self.total_ms or 0.0, 2),
+            'stages': {name: round(ms, 2) for name, ms in self.stage_totals().items()},
+            'spans': [dict(span_record, start_ms=round(span_record['start_ms'], 2), ms=round(span_record['ms'], 2))
+                      for span_record in self.spans]
+        }
+
+
+class span:
+    """Time a block as a stage of the current turn (no-op outside a turn)"""
+
+    __slots__ = ('name', '_trace', '_start', '_token')
+
+    def __init__(self, name: str):
+        self.name = name
+        self._trace = None
+
+    def __enter__(self):
+        trace = _current_trace.get()
+        # A stage nested in the same stage (a card builder calling another) is timed once
+        if trace is not None and _current_span.get() != self.name:
+            self._trace = trace
+            self._token = _current_span.set(self.name)
+            self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if self._trace is not None:
+            end = time.perf_counter()
+            _current_span.reset(self._token)
+            self._trace.spans.append({
+                'name': self.name,
+                'parent': _current_span.get(),
+                'start_ms': (self._start - self._trace.start) * 1000,
+                'ms': (end - self._start) * 1000
+            })
+            self._trace = None
+        return False
+
+
+def traced(stage: str):
+    """Decorator: time every call of a function or coroutine as `stage`"""
+    def decorate(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(stage):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+class Tracer:
+    """Starts turn traces and aggregates finished ones into per-stage histograms"""
+
+    TURN = 'turn'
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._histograms = {}
+        self._top_level_ms = {}
+        self._lock = threading.Lock()
+
+    def begin_turn(self):
+        """Start timing a turn in the current task; returns the trace (None when disabled)"""
+        if not self.enabled:
+            return None
+        trace = Trace()
+        _current_trace.set(trace)
+        _current_span.set(None)
+        return trace
+
+    def end_turn(self, trace: Trace):
+        """Close a turn's trace and add it to the histograms"""
+        if trace is None:
+            return
+        trace.total_ms = (time.perf_counter() - trace.start) * 1000
+        _current_trace.set(None)
+
+        top_level = {}
+        for span_record in trace.spans:
+            if span_record['parent'] is None:
+                top_level[span_record['name']] = top_level.get(span_record['name'], 0.0) + span_record['ms']
+
+        with self._lock:
+            for name, ms in list(trace.stage_totals().items()) + [(self.TURN, trace.total_ms)]:
+                histogram = self._histograms.get(name)
+                if histogram is None:
+                    histogram = self._histograms[name] = LatencyHistogram()
+                histogram.observe(ms)
+            for name, ms in top_level.items():
+                self._top_level_ms[name] = self._top_level_ms.get(name, 0.0) + ms
+
+    def stats(self) -> dict:
+        """
+        Per-stage latency over all finished turns
+
+        Returns:
+            {stage: {count, mean_ms, p50_ms, p95_ms, p99_ms, max_ms, share}}; share is the
+            stage's fraction of total turn time, given for top-level stages only (so shares
+            don't overlap - model.* calls run inside route/specialist/suggestions)
+        """
+        with self._lock:
+            turn = self._histograms.get(self.TURN)
+            turn_total = turn.total if turn else 0.0
+            stats = {}
+            for name, histogram in sorted(self._histograms.items()):
+                stats[name] = histogram.summary()
+                if name in self._top_level_ms:
+                    stats[name]['share'] = self._top_level_ms[name] / turn_total if turn_total else 0.0
+            return stats
+
+    def reset(self):
+        with self._lock:
+            self._histograms = {}
+            self._top_level_ms = {}
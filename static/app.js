@@ -1067,21 +1067,47 @@ document.addEventListener("DOMContentLoaded", function() {
         cardElement.appendChild(prescriptionContent);
     }
 
+    // Medicine card images render 96 CSS px wide (.medicine-image in style.css)
+    const MEDICINE_IMAGE_SIZES = "96px";
+
     function createMedicineCard(cardElement, card) {
         console.log("Creating medicine card:", card);
         
         const medicineContent = document.createElement("div");
         medicineContent.classList.add("medicine-content");
         
-        // Medicine image
+        // Medicine image - resized, content-hashed variants when the asset build has run
+        const pictureElement = document.createElement("picture");
+        if (card.image_webp_srcset) {
+            const webpSource = document.createElement("source");
+            webpSource.type = "image/webp";
+            webpSource.srcset = card.image_webp_srcset;
+            webpSource.sizes = MEDICINE_IMAGE_SIZES;
+            pictureElement.appendChild(webpSource);
+        }
         const imageElement = document.createElement("img");
         imageElement.classList.add("medicine-image");
         imageElement.src = card.image_url || "/static/images/medicine/medicine-placeholder.jpg";
+        if (card.image_srcset) {
+            imageElement.srcset = card.image_srcset;
+            imageElement.sizes = MEDICINE_IMAGE_SIZES;
+        }
+        if (card.image_width && card.image_height) {
+            // Reserve the box before the image arrives so the grid does not shift
+            imageElement.width = card.image_width;
+            imageElement.height = card.image_height;
+        }
+        imageElement.loading = "lazy";
+        imageElement.decoding = "async";
         imageElement.alt = card.medicine_name;
         imageElement.onerror = function() {
+            this.onerror = null;
+            pictureElement.querySelectorAll("source").forEach(source => source.remove());
+            this.removeAttribute("srcset");
             this.src = "/static/images/medicine/medicine-placeholder.jpg";
         };
-        medicineContent.appendChild(imageElement);
+        pictureElement.appendChild(imageElement);
+        medicineContent.appendChild(pictureElement);
         
         // Medicine info
         const infoElement = document.createElement("div");
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# benchmark_fanout.py
+"""
+Benchmark - compound queries: concurrent fan-out vs one intent per turn
+
+Sends compound messages ("I have a fever, is paracetamol available and is
+this covered by insurance?") through WellnessManager.process_message on the
+fake model backend with simulated model latency, three ways:
+  fanout    one turn; the specialists for every intent run concurrently
+  single    one turn with WELLNESS_FANOUT=false - only the first intent is
+            answered, the rest is left for later turns
+  split     the way users had to ask before: one turn per intent, each paying
+            router + specialist + suggestions
+
+Reports wall time and model calls per compound query, and for fan-out turns
+the specialist stage's wall time against the summed specialist call time
+(about max() of the calls rather than sum()).
+Runs offline - no credentials required.
+"""
+import asyncio
+import contextlib
+import io
+import os
+import statistics
+import sys
+import time
+
+os.environ['WELLNESS_MODEL_BACKEND'] = 'fake'
+os.environ.setdefault('WELLNESS_CATALOG_WATCH', 'false')
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from agents.model_backend import FakeBackend
+from wellness_manager import WellnessManager
+
+LATENCY = "lognormal:300:0.3"
+
+# (compound message, the same question asked one intent per turn)
+COMPOUND_QUERIES = [
+    ("I have a fever, is paracetamol available and is this covered by insurance?",
+     ["I have a fever", "Is paracetamol available?", "Is this covered by insurance?"]),
+    ("I have a bad cough and do you have crocin?",
+     ["I have a bad cough", "Do you have crocin?"]),
+    ("My head hurts, can I get dolo and will my policy pay for it?",
+     ["My head hurts", "Can I get dolo?", "Will my policy pay for it?"]),
+    ("I feel dizzy and is a doctor visit covered under my policy?",
+     ["I feel dizzy", "Is a doctor visit covered under my policy?"]),
+    ("Do you have cetirizine? Also I have a rash and want to know my claim limit",
+     ["Do you have cetirizine?", "I have a rash", "What is my claim limit?"]),
+]
+USERS_PER_QUERY = 4
+
+
+async def ask(manager: WellnessManager, messages: list, user_id: str) -> dict:
+    """One compound query as one or more turns; returns wall ms and the last turn's timings"""
+    start = time.perf_counter()
+    reply = None
+    for message in messages:
+        reply = await manager.process_message(message, user_id)
+    return {'ms': (time.perf_counter() - start) * 1000, 'timings': reply.get('timings', {}),
+            'agents': reply.get('agents', [reply.get('agent')])}
+
+
+async def run_mode(manager: WellnessManager, mode: str) -> dict:
+    manager.model_backend = FakeBackend(latency=LATENCY, seed=7)
+    manager.fanout = mode != 'single'
+    manager.user_contexts.clear()
+    jobs = []
+    for index, (compound, parts) in enumerate(COMPOUND_QUERIES):
+        for user in range(USERS_PER_QUERY):
+            jobs.append(ask(manager, parts if mode == 'split' else [compound], f"{mode}-{index}-{user}"))
+    # Users run concurrently; each user's turns run in order
+    results = await asyncio.gather(*jobs)
+
+    stages = [result['timings'].get('stages', {}) for result in results]
+    fanned = [stage for stage in stages if 'fanout' in stage]
+    timings = sorted(result['ms'] for result in results)
+    return {
+        'mean_ms': statistics.mean(timings),
+        'p95_ms': timings[min(len(timings) - 1, int(0.95 * len(timings)))],
+        'calls_per_query': len(manager.model_backend.calls) / len(results),
+        'intents_answered': statistics.mean(len(result['agents']) for result in results) if mode != 'split'
+                            else statistics.mean(len(parts) for _, parts in COMPOUND_QUERIES),
+        'fanout_ms': statistics.mean(stage['fanout'] for stage in fanned) if fanned else None,
+        'specialist_sum_ms': statistics.mean(stage['specialist'] for stage in fanned) if fanned else None
+    }
+
+
+def main():
+    print(" Benchmarking compound queries...\n")
+    os.environ['WELLNESS_DEBUG_TIMINGS'] = 'true'
+    with contextlib.redirect_stdout(io.StringIO()):
+        manager = WellnessManager()
+    manager.suggestion_cache = None
+    manager.policy_answer_cache = None
+
+    results = {}
+    for mode in ('fanout', 'single', 'split'):
+        with contextlib.redirect_stdout(io.StringIO()):
+            results[mode] = asyncio.run(run_mode(manager, mode))
+
+    print(f"  {'mode':<8} {'mean ms':>9} {'p95 ms':>9} {'calls/query':>12} {'intents answered':>17}")
+    for mode, result in results.items():
+        print(f"  {mode:<8} {result['mean_ms']:>9.0f} {result['p95_ms']:>9.0f} {result['calls_per_query']:>12.2f} "
+              f"{result['intents_answered']:>17.2f}")
+
+    fanout = results['fanout']
+    print(f"\n  fan-out specialist stage: {fanout['fanout_ms']:.0f} ms wall for {fanout['specialist_sum_ms']:.0f} ms "
+          f"of specialist calls ({fanout['specialist_sum_ms'] / fanout['fanout_ms']:.1f}x overlap)")
+    print(f"  fan-out vs split turns: {results['split']['mean_ms'] / fanout['mean_ms']:.1f}x faster per compound query")
+    print(f"\n  {len(COMPOUND_QUERIES)} compound queries x {USERS_PER_QUERY} users per mode, model latency {LATENCY}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# benchmark_geo_search.py
+"""
+Benchmark + correctness test - nearest-provider search
+
+Builds synthetic directories of 10k and 100k providers clustered around
+Indian cities (plus rural scatter), then compares grid-index "nearest N"
+queries against a brute-force scan of every provider, with and without a
+department filter. Also checks offline pincode lookup and nearest results on
+the shipped directory.
+Runs offline - no credentials required.
+"""
+import heapq
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.geo_index import haversine_km
+from services.provider_directory import ProviderDirectory, get_provider_directory
+
+CITY_CENTRES = [
+    ("Delhi", 28.61, 77.21), ("Mumbai", 19.08, 72.88), ("Bangalore", 12.97, 77.59),
+    ("Chennai", 13.08, 80.27), ("Kolkata", 22.57, 88.36), ("Hyderabad", 17.39, 78.49),
+    ("Pune", 18.52, 73.86), ("Ahmedabad", 23.02, 72.57)
+]
+DEPARTMENTS = ["General Medicine", "Cardiology", "Orthopedics", "Neurology", "ENT"]
+SIZES = [10000, 100000]
+QUERIES = 1000
+NEAREST = 5
+
+
+def synthetic_hospitals(count: int, rng: random.Random) -> list:
+    """Providers around city centres, with 10% scattered across the country"""
+    hospitals = []
+    for index in range(count):
+        city, lat, lng = CITY_CENTRES[index % len(CITY_CENTRES)]
+        if index % 10 == 0:
+            lat, lng = rng.uniform(8.0, 32.0), rng.uniform(69.0, 92.0)
+        else:
+            lat, lng = rng.gauss(lat, 0.15), rng.gauss(lng, 0.15)
+        hospitals.append({
+            'hospital_id': f"h{index}",
+            'name': f"Hospital {index}",
+            'city': city,
+            'lat': lat,
+            'lng': lng,
+            'rating': 4.0,
+            'departments': ["General Medicine", rng.choice(DEPARTMENTS)],
+            'services': [],
+            'accreditations': []
+        })
+    return hospitals
+
+
+def brute_force(hospitals: list, lat: float, lng: float, department: str = None) -> list:
+    candidates = ((haversine_km(lat, lng, h['lat'], h['lng']), h['hospital_id'])
+                  for h in hospitals if department is None or department in h['departments'])
+    return [hospital_id for _, hospital_id in heapq.nsmallest(NEAREST, candidates)]
+
+
+def benchmark_size(count: int, rng: random.Random) -> bool:
+    """Grid vs brute force on one directory size"""
+    hospitals = synthetic_hospitals(count, rng)
+    start = time.perf_counter()
+    directory = ProviderDirectory(hospitals, [])
+    build_ms = (time.perf_counter() - start) * 1000
+
+    queries = []
+    for index in range(QUERIES):
+        _, lat, lng = CITY_CENTRES[index % len(CITY_CENTRES)]
+        queries.append((rng.gauss(lat, 0.2), rng.gauss(lng, 0.2)))
+
+    all_ok = True
+    print(f"  {count:,} providers (index built in {build_ms:.0f} ms)")
+    for label, department in [("any department", None), ("Cardiology only", "Cardiology")]:
+        start = time.perf_counter()
+        indexed = [[h['hospital_id'] for h, _ in directory.nearest_hospitals(lat, lng, NEAREST, department=department)]
+                   for lat, lng in queries]
+        indexed_us = (time.perf_counter() - start) / QUERIES * 1e6
+
+        scan_queries = queries[:100]
+        start = time.perf_counter()
+        scanned = [brute_force(hospitals, lat, lng, department) for lat, lng in scan_queries]
+        scan_us = (time.perf_counter() - start) / len(scan_queries) * 1e6
+
+        same = indexed[:len(scan_queries)] == scanned
+        all_ok = all_ok and same
+        print(f"    {label:16s} grid {indexed_us:8.1f} µs/query | brute force {scan_us:9.1f} µs/query "
+              f"({scan_us / indexed_us:,.0f}x) | {'PASS' if same else 'FAIL'}: same {NEAREST} nearest")
+    return all_ok
+
+
+def test_shipped_directory() -> bool:
+    """Pincode and lat-long lookups against the shipped data files"""
+    directory = get_provider_directory()
+    andheri = directory.locate("I'm at 400053")
+    koramangala = directory.locate("pincode 560034 please")
+    raw = directory.locate("my location is 19.12, 72.85")
+    unknown_district = directory.locate("near 110099")
+    nearest = directory.nearest_hospitals(andheri['lat'], andheri['lng'], limit=3)
+
+    checks = {
+        "pincode resolves to area and city": andheri['area'] == "Andheri West" and andheri['city'] == "Mumbai",
+        "second pincode resolves": koramangala['city'] == "Bangalore",
+        "lat-long gets a city from nearby providers": raw['city'] == "Mumbai" and raw['pincode'] is None,
+        "unknown pincode falls back to district centroid": unknown_district['city'] == "Delhi",
+        "nearest hospital is in the same city": nearest[0][0]['city'] == "Mumbai",
+        "results sorted by distance": [d for _, d in nearest] == sorted(d for _, d in nearest),
+        "text without a location returns None": directory.locate("I have a fever") is None
+    }
+    for name, passed in checks.items():
+        print(f"  {'PASS' if passed else 'FAIL'}: {name}")
+    return all(checks.values())
+
+
+def main():
+    print(" Benchmarking nearest-provider search...\n")
+    print("Shipped directory:")
+    shipped_ok = test_shipped_directory()
+
+    print("\nSynthetic directories:")
+    rng = random.Random(42)
+    sizes_ok = all([benchmark_size(count, rng) for count in SIZES])
+
+    print("\n" + "=" * 60)
+    if shipped_ok and sizes_ok:
+        print("All geo search checks passed")
+    else:
+        print("Geo search checks FAILED")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
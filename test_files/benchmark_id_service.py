@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# benchmark_id_service.py
+"""
+Benchmark + collision test - booking ID service
+
+Measures IDs issued per second (single thread and multi-threaded), then issues
+IDs from several worker processes at once and checks that:
+  - no ID is issued twice across processes
+  - IDs from each process are strictly increasing
+  - sorting IDs orders them by issue time
+The shared ID service is created in the parent before the workers fork, so the
+test also covers per-process node re-derivation after fork.
+Runs offline - no credentials required.
+"""
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.id_service import IdService, get_id_service
+
+BENCH_IDS = 200000
+THREADS = 8
+PROCESSES = 8
+IDS_PER_PROCESS = 50000
+KINDS = ['appointment', 'lab_booking', 'test_booking', 'order']
+
+
+def issue_batch(count: int) -> list:
+    """Issue IDs from this process's shared service"""
+    service = get_id_service()
+    return [service.next_id(KINDS[i % len(KINDS)]) for i in range(count)]
+
+
+def benchmark_throughput():
+    """IDs per second from one thread and from a thread pool"""
+    service = IdService()
+    start = time.perf_counter()
+    for _ in range(BENCH_IDS):
+        service.next_id('appointment')
+    single = BENCH_IDS / (time.perf_counter() - start)
+
+    service = IdService()
+    per_thread = BENCH_IDS // THREADS
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=THREADS) as pool:
+        batches = list(pool.map(lambda _: [service.next_id('order') for _ in range(per_thread)], range(THREADS)))
+    threaded = BENCH_IDS / (time.perf_counter() - start)
+    threaded_unique = len({i for batch in batches for i in batch}) == per_thread * THREADS
+
+    print(f"  Single thread:  {single:,.0f} IDs/s")
+    print(f"  {THREADS} threads:      {threaded:,.0f} IDs/s (unique: {threaded_unique})")
+    print(f"  Overflows into next ms: {service.stats['sequence_overflows']}")
+    return threaded_unique
+
+
+def collision_test() -> bool:
+    """Issue IDs from several processes at once and verify uniqueness and ordering"""
+    get_id_service().next_id('appointment')  # parent's service is inherited by forked workers
+
+    start = time.perf_counter()
+    with multiprocessing.Pool(PROCESSES) as pool:
+        batches = pool.map(issue_batch, [IDS_PER_PROCESS] * PROCESSES)
+    elapsed = time.perf_counter() - start
+
+    all_ids = [issued for batch in batches for issued in batch]
+    suffix = lambda issued: issued.rpartition('-')[2]
+    nodes = {IdService.decode(batch[0])['node'] for batch in batches}
+    sample_times = [IdService.decode(issued)['issued_at'] for issued in sorted(all_ids[::97], key=suffix)]
+
+    checks = {
+        "no duplicate IDs across processes": len(set(all_ids)) == len(all_ids),
+        "distinct node per process": len(nodes) == PROCESSES,
+        "strictly increasing within each process": all(
+            all(suffix(a) < suffix(b) for a, b in zip(batch, batch[1:])) for batch in batches
+        ),
+        "sorted order follows issue time": sample_times == sorted(sample_times)
+    }
+    print(f"  {len(all_ids):,} IDs from {PROCESSES} processes in {elapsed:.2f}s")
+    print(f"  Example: {all_ids[0]}  ({len(all_ids[0])} chars)")
+    for name, passed in checks.items():
+        print(f"  {'PASS' if passed else 'FAIL'}: {name}")
+    return all(checks.values())
+
+
+def main():
+    print(" Benchmarking ID service...\n")
+    print("Throughput:")
+    threaded_ok = benchmark_throughput()
+    print("\nCross-process collision test:")
+    collisions_ok = collision_test()
+
+    print("\n" + "=" * 60)
+    if threaded_ok and collisions_ok:
+        print("All ID service checks passed - zero collisions")
+    else:
+        print("ID service checks FAILED")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
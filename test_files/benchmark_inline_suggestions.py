@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# benchmark_inline_suggestions.py
+"""
+A/B benchmark - separate suggestions call vs inline suggestion trailer
+
+Runs the same scripted conversations through WellnessManager.process_message
+twice: (A) the default flow with a separate suggestions LLM call, and (B) inline
+suggestions, where the specialist returns follow-ups in a trailer of its reply.
+Reports LLM calls, turn latency and token usage per turn for both variants.
+
+Token counts are estimated from prompt/response length (~4 characters per token).
+With WELLNESS_MODEL_BACKEND=fake it runs offline; latencies then come from the
+fake backend's latency model (WELLNESS_FAKE_LATENCY). The suggestion cache is
+turned off so every variant-A turn makes its suggestions call.
+"""
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+# CRITICAL: Load .env FIRST, before any other imports
+from dotenv import load_dotenv
+load_dotenv()
+
+if (not os.getenv("GOOGLE_APPLICATION_CREDENTIALS") and not os.getenv("GOOGLE_API_KEY")
+        and os.getenv("WELLNESS_MODEL_BACKEND", "adk").lower() != "fake"):
+    print(" ERROR: No Google Cloud credentials found!")
+    print("Please create a .env file with either:")
+    print("  GOOGLE_APPLICATION_CREDENTIALS=/path/to/service-account.json")
+    print("  OR")
+    print("  GOOGLE_API_KEY=your_api_key")
+    print("  OR run offline with WELLNESS_MODEL_BACKEND=fake (e.g. WELLNESS_FAKE_LATENCY=lognormal:800:0.4)")
+    sys.exit(1)
+
+# A shared suggestion cache would serve variant A's suggestions without a call and skew the comparison
+os.environ['WELLNESS_SUGGESTION_CACHE'] = 'false'
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from wellness_manager import WellnessManager
+
+CHARS_PER_TOKEN = 4
+
+CONVERSATIONS = [
+    [
+        "I have fever and a bad headache since yesterday",
+        "It's around 101 and I feel weak",
+        "Can I book an appointment with a doctor?",
+        "I'm in Delhi",
+        "Apollo Hospital",
+        "Tomorrow morning works"
+    ],
+    [
+        "Do you have paracetamol?",
+        "I want to order paracetamol",
+        "2 strips please"
+    ],
+    [
+        "What is my sum insured?",
+        "Is maternity covered in my policy?",
+        "What's the co-payment for senior citizens?"
+    ]
+]
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate from character length"""
+    return len(text) // CHARS_PER_TOKEN if text else 0
+
+
+def percentile(values: list, pct: float) -> float:
+    """Nearest-rank percentile"""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def instrument(manager: WellnessManager) -> list:
+    """Wrap _call_agent to record latency and token estimates for every LLM call"""
+    calls = []
+    original_call_agent = manager._call_agent
+
+    async def timed_call_agent(agent, message, user_id, agent_type):
+        start = time.perf_counter()
+        response = await original_call_agent(agent, message, user_id, agent_type)
+        calls.append({
+            'agent_type': agent_type,
+            'latency': time.perf_counter() - start,
+            'input_tokens': estimate_tokens(message),
+            'output_tokens': estimate_tokens(response)
+        })
+        return response
+
+    manager._call_agent = timed_call_agent
+    return calls
+
+
+async def run_variant(label: str, inline_suggestions: bool) -> dict:
+    """Run every scripted conversation once and collect per-turn statistics"""
+    manager = WellnessManager()
+    await manager.initialize()
+    manager.inline_suggestions = inline_suggestions
+    calls = instrument(manager)
+
+    turn_latencies = []
+    suggestion_counts = []
+
+    for index, conversation in enumerate(CONVERSATIONS):
+        user_id = f"bench-{label}-{index}"
+        for message in conversation:
+            start = time.perf_counter()
+            result = await manager.process_message(message, user_id)
+            turn_latencies.append(time.perf_counter() - start)
+            suggestion_counts.append(len(result.get('suggested_replies', [])))
+
+    await manager.close()
+
+    turns = len(turn_latencies)
+    return {
+        'label': label,
+        'turns': turns,
+        'llm_calls_per_turn': len(calls) / turns,
+        'suggestion_calls': sum(1 for c in calls if c['agent_type'] == 'suggestions'),
+        'avg_latency': statistics.mean(turn_latencies),
+        'p50_latency': percentile(turn_latencies, 50),
+        'p95_latency': percentile(turn_latencies, 95),
+        'input_tokens_per_turn': sum(c['input_tokens'] for c in calls) / turns,
+        'output_tokens_per_turn': sum(c['output_tokens'] for c in calls) / turns,
+        'suggestions_per_turn': statistics.mean(suggestion_counts)
+    }
+
+
+def print_report(results: list):
+    """Print both variants side by side with the relative change"""
+    baseline, candidate = results
+    rows = [
+        ('LLM calls / turn', 'llm_calls_per_turn', '{:.2f}'),
+        ('Suggestion calls', 'suggestion_calls', '{:d}'),
+        ('Avg turn latency (s)', 'avg_latency', '{:.2f}'),
+        ('p50 turn latency (s)', 'p50_latency', '{:.2f}'),
+        ('p95 turn latency (s)', 'p95_latency', '{:.2f}'),
+        ('Input tokens / turn', 'input_tokens_per_turn', '{:.0f}'),
+        ('Output tokens / turn', 'output_tokens_per_turn', '{:.0f}'),
+        ('Suggestions / turn', 'suggestions_per_turn', '{:.1f}')
+    ]
+
+    print("\n" + "=" * 70)
+    print(f"{'Metric':<24}{baseline['label']:>16}{candidate['label']:>16}{'Change':>14}")
+    print("=" * 70)
+    for title, key, fmt in rows:
+        a, b = baseline[key], candidate[key]
+        change = f"{(b - a) / a * 100:+.0f}%" if a else "n/a"
+        print(f"{title:<24}{fmt.format(a):>16}{fmt.format(b):>16}{change:>14}")
+    print("=" * 70)
+    print(f"Turns per variant: {baseline['turns']}")
+
+
+async def main():
+    print(" Benchmarking suggestion generation modes...")
+    results = [
+        await run_variant("A: separate", inline_suggestions=False),
+        await run_variant("B: inline", inline_suggestions=True)
+    ]
+    print_report(results)
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("\n\nBenchmark interrupted by user")
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# benchmark_logging.py
+"""
+Benchmark - per-turn logging overhead
+
+Runs the same scripted conversations through WellnessManager.process_message
+on the fake model backend (no model latency) with logging:
+  off       level CRITICAL - the baseline
+  inline    every debug dump written synchronously on the event loop, like
+            the print() calls this replaced
+  debug     every debug dump, through the queue (I/O on the writer thread)
+  default   INFO through the queue - one line per turn, dumps disabled
+  sampled   default with WELLNESS_LOG_SAMPLE=turn=0.1
+
+Output goes to a real file so the writes cost what they cost. Reports time per
+turn (best of several interleaved passes), overhead against the baseline
+and records written per turn.
+Runs offline - no credentials required.
+"""
+import asyncio
+import contextlib
+import io
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ['WELLNESS_MODEL_BACKEND'] = 'fake'
+os.environ.setdefault('WELLNESS_CATALOG_WATCH', 'false')
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from agents.model_backend import FakeBackend
+from services.structured_log import ROOT_LOGGER, TextFormatter, configure_logging, flush_logging
+from wellness_manager import WellnessManager
+
+CONVERSATIONS = [
+    ["I have fever and a bad headache since yesterday", "Can I book an appointment with a doctor?",
+     "I'm in Delhi", "Apollo Hospital", "Tomorrow morning works"],
+    ["Do you have paracetamol?", "I want to order paracetamol", "2 strips please"],
+    ["I need a blood test", "I'm in Mumbai", "Home visit please"],
+    ["What is my sum insured?", "Is maternity covered?"],
+]
+ROUNDS = 20
+PASSES = 3
+
+
+class CountingFileHandler(logging.FileHandler):
+    def __init__(self, path: str):
+        super().__init__(path)
+        self.records = 0
+
+    def emit(self, record):
+        self.records += 1
+        super().emit(record)
+
+
+def configure(mode: str, path: str) -> CountingFileHandler:
+    handler = CountingFileHandler(path)
+    handler.setFormatter(TextFormatter())
+    if mode == 'inline':
+        configure_logging(level='DEBUG', handler=logging.NullHandler())
+        root = logging.getLogger(ROOT_LOGGER)
+        root.handlers = [handler]
+    else:
+        level = {'off': 'CRITICAL', 'debug': 'DEBUG'}.get(mode, 'INFO')
+        configure_logging(level=level, sample='turn=0.1' if mode == 'sampled' else '', handler=handler)
+    return handler
+
+
+async def run_turns(manager: WellnessManager, mode: str) -> list:
+    timings = []
+    for round_number in range(ROUNDS):
+        for index, conversation in enumerate(CONVERSATIONS):
+            user_id = f"{mode}-{round_number}-{index}"
+            for message in conversation:
+                start = time.perf_counter()
+                await manager.process_message(message, user_id)
+                timings.append((time.perf_counter() - start) * 1e6)
+    return timings
+
+
+def main():
+    print(" Benchmarking per-turn logging overhead...\n")
+    with contextlib.redirect_stdout(io.StringIO()):
+        manager = WellnessManager()
+    manager.model_backend = FakeBackend()
+    directory = tempfile.mkdtemp(prefix="logbench-")
+
+    # Interleaved passes (contexts cleared each time) so drift and GC hit every mode alike
+    modes = ('off', 'inline', 'debug', 'default', 'sampled')
+    results = {mode: {'mean_us': float('inf'), 'records': 0, 'turns': 0} for mode in modes}
+    for pass_number in range(PASSES):
+        for mode in modes:
+            handler = configure(mode, os.path.join(directory, f"{mode}.log"))
+            manager.user_contexts.clear()
+            with contextlib.redirect_stdout(io.StringIO()):
+                timings = asyncio.run(run_turns(manager, f"{mode}{pass_number}"))
+            flush_logging()
+            handler.close()
+            result = results[mode]
+            if statistics.mean(timings) < result['mean_us']:
+                result.update(mean_us=statistics.mean(timings), p50_us=statistics.median(timings))
+            result['records'] += handler.records
+            result['turns'] += len(timings)
+    configure_logging()
+
+    baseline = results['off']['mean_us']
+    print(f"  {'mode':<10} {'mean µs':>9} {'p50 µs':>9} {'overhead µs':>12} {'records/turn':>13}")
+    for mode, result in results.items():
+        print(f"  {mode:<10} {result['mean_us']:>9.0f} {result['p50_us']:>9.0f} "
+              f"{result['mean_us'] - baseline:>12.0f} {result['records'] / result['turns']:>13.2f}")
+    print(f"\n  {ROUNDS * sum(len(c) for c in CONVERSATIONS)} turns per pass, best of {PASSES} passes; "
+          f"log files in {directory}")
+
+
+if __name__ == "__main__":
+    main()
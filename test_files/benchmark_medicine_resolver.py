@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# benchmark_medicine_resolver.py
+"""
+Benchmark + accuracy test - fuzzy medicine name resolution
+
+Resolves a corpus of misspelled, abbreviated, spaced/unspaced and brand
+medicine names the way users actually type them, and compares the hit rate
+with the substring matching the router used before (a fixed list of names
+checked with `name in text`). Also checks that ordinary chat words do not
+resolve to a medicine, and times single lookups and whole-message scans.
+Runs offline - no credentials required.
+"""
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.catalog_store import CatalogStore
+
+CATALOG_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'catalogs')
+ITERATIONS = 200
+
+# (as typed, expected generic)
+TYPO_CORPUS = [
+    ("paracetmol", "Paracetamol"), ("paracetamoll", "Paracetamol"), ("parcetamol", "Paracetamol"),
+    ("paracetamole", "Paracetamol"), ("dolo650", "Paracetamol"), ("dolo 650", "Paracetamol"),
+    ("Dolo-650", "Paracetamol"), ("crocine", "Paracetamol"), ("calpol", "Paracetamol"),
+    ("acetaminophen", "Paracetamol"), ("ibuprofin", "Ibuprofen"), ("ibuprofen", "Ibuprofen"),
+    ("brufen", "Ibuprofen"), ("combiflam", "Ibuprofen"), ("asprin", "Aspirin"),
+    ("disprin", "Aspirin"), ("azithro", "Azithromycin"), ("azithromycine", "Azithromycin"),
+    ("azithromicin", "Azithromycin"), ("azitral", "Azithromycin"), ("amoxicilin", "Amoxicillin"),
+    ("amoxycillin", "Amoxicillin"), ("amoxcillin", "Amoxicillin"), ("augmentin", "Amoxicillin"),
+    ("moxikind cv", "Amoxicillin"), ("cipro", "Ciprofloxacin"), ("ciprofloxacine", "Ciprofloxacin"),
+    ("ciprofloxcin", "Ciprofloxacin"), ("metfromin", "Metformin"), ("metformine", "Metformin"),
+    ("glycomet", "Metformin"), ("glucophage", "Metformin"), ("atorvastatine", "Atorvastatin"),
+    ("atorvastin", "Atorvastatin"), ("storvas", "Atorvastatin"), ("amlodipin", "Amlodipine"),
+    ("amlodepine", "Amlodipine"), ("telmisartan", "Telmisartan"), ("omeprazol", "Omeprazole"),
+    ("omeprazol 20", "Omeprazole"), ("pantoprazol", "Pantoprazole"), ("panto", "Pantoprazole"),
+    ("pan 40", "Pantoprazole"), ("pan40", "Pantoprazole"), ("domperidon", "Domperidone"),
+    ("cetrizine", "Cetirizine"), ("cetirizin", "Cetirizine"), ("levocetrizine", "Levocetirizine"),
+    ("levocet", "Levocetirizine"), ("alegra", "Fexofenadine"), ("montek lc", "Montelukast"),
+    ("monteklc", "Montelukast"), ("montec lc", "Montelukast"), ("montelukas", "Montelukast"),
+    ("montair", "Montelukast"), ("asthalin", "Salbutamol"), ("vitamin c", "Vitamin C"),
+    ("vit c", "Vitamin C"), ("vitamin d3", "Vitamin D3"), ("vit d3", "Vitamin D3"),
+    ("multivitamins", "Multivitamin"), ("becosules", "Multivitamin"), ("shelcal", "Calcium + Vitamin D3"),
+    ("rantac", "Ranitidine"), ("digene", "Antacid"),
+]
+
+# Chat that must not produce a medicine
+NEGATIVES = [
+    "hello", "book an appointment", "I have a headache", "pain", "can you help", "insurance claim",
+    "japan", "company", "panic", "liver", "cold", "fever since yesterday", "doctor please",
+    "blood test", "thank you", "tablet", "what is covered", "my location is 400053"
+]
+
+# Whole messages: (message, generics that must be found)
+MESSAGES = [
+    ("do you have dolo650 in stock?", {"Paracetamol"}),
+    ("I need montek lc and azithro for my cold", {"Montelukast", "Azithromycin"}),
+    ("is paracetmol available", {"Paracetamol"}),
+    ("price of pan 40 please", {"Pantoprazole"}),
+    ("I want to book a doctor appointment in Pune", set()),
+    ("my company is in japan", set()),
+]
+
+# The router's previous substring list, for the baseline hit rate
+BASELINE_NAMES = [
+    'paracetamol', 'dolo', 'crocin', 'calpol', 'ibuprofen', 'aspirin',
+    'amoxicillin', 'azithromycin', 'ciprofloxacin', 'augmentin',
+    'cetirizine', 'levocetirizine', 'allegra', 'avil', 'montair',
+    'montelukast', 'metformin', 'glucophage', 'glycomet',
+    'atorvastatin', 'lipitor', 'rosuvastatin', 'crestor',
+    'omeprazole', 'pantoprazole', 'rabeprazole', 'pan',
+    'vitamin', 'supplement', 'calcium', 'iron', 'multivitamin',
+    'combiflam', 'disprin', 'saridon', 'sinarest'
+]
+
+
+def time_us(function, inputs) -> float:
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        for value in inputs:
+            function(value)
+    return (time.perf_counter() - start) / (ITERATIONS * len(inputs)) * 1e6
+
+
+def main():
+    print(" Benchmarking medicine name resolution...\n")
+    resolver = CatalogStore(CATALOG_DIR).latest().index('medicine_lexicon')['resolver']
+
+    top1 = sum(1 for typed, generic in TYPO_CORPUS if (resolver.best(typed) or {}).get('generic') == generic)
+    top3 = sum(1 for typed, generic in TYPO_CORPUS
+               if generic in [match['generic'] for match in resolver.resolve(typed)])
+    baseline = sum(1 for typed, _ in TYPO_CORPUS if any(name in typed.lower() for name in BASELINE_NAMES))
+    misses = [typed for typed, generic in TYPO_CORPUS if (resolver.best(typed) or {}).get('generic') != generic]
+    false_positives = [text for text in NEGATIVES if resolver.find_in_text(text)]
+    baseline_false_positives = [text for text in NEGATIVES if any(name in text.lower() for name in BASELINE_NAMES)]
+    wrong_messages = [message for message, expected in MESSAGES
+                      if {match['generic'] for match in resolver.find_in_text(message)} != expected]
+
+    total = len(TYPO_CORPUS)
+    print(f"  Typo corpus: {total} names, {len(resolver.terms)} indexed terms")
+    print(f"    resolver top-1 {top1 / total:6.1%} | top-3 {top3 / total:6.1%} | "
+          f"substring baseline {baseline / total:6.1%}")
+    print(f"    false positives on {len(NEGATIVES)} chat phrases: resolver {len(false_positives)}, "
+          f"baseline {len(baseline_false_positives)}")
+    if misses:
+        print(f"    misses: {', '.join(misses)}")
+    if false_positives:
+        print(f"    false positives: {', '.join(false_positives)}")
+
+    lookup_us = time_us(resolver.resolve, [typed for typed, _ in TYPO_CORPUS])
+    miss_us = time_us(resolver.resolve, NEGATIVES)
+    scan_us = time_us(resolver.find_in_text, [message for message, _ in MESSAGES])
+    print(f"\n  Latency: {lookup_us:.1f} µs/lookup (typos) | {miss_us:.1f} µs/lookup (non-medicine) | "
+          f"{scan_us:.1f} µs/message scan")
+
+    checks = {
+        "top-1 accuracy >= 95% on the typo corpus": top1 / total >= 0.95,
+        "top-3 accuracy >= 98% on the typo corpus": top3 / total >= 0.98,
+        "beats the substring baseline": top1 > baseline,
+        "no false positives on ordinary chat": not false_positives,
+        "messages yield exactly the medicines mentioned": not wrong_messages,
+        "lookups are sub-millisecond": lookup_us < 1000 and miss_us < 1000
+    }
+    print()
+    for name, passed in checks.items():
+        print(f"  {'PASS' if passed else 'FAIL'}: {name}")
+
+    print("\n" + "=" * 60)
+    if all(checks.values()):
+        print("All medicine resolver checks passed")
+    else:
+        print("Medicine resolver checks FAILED")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# benchmark_page_weight.py
+"""
+Benchmark + correctness test - medicine image page weight
+
+Runs the asset build (tools/build_assets.py), then compares the image bytes
+a browser downloads for a grid of medicine cards - one per inventory item -
+before (original JPEGs) and after (the srcset variant a browser picks at
+1x and 2x pixel density, WebP and JPEG fallback). Also checks that:
+  - variant file names match a hash of their content
+  - rebuilding unchanged sources is a no-op, and editing a source changes its URLs
+  - the web server serves build output with immutable far-future caching
+  - medicine cards carry the srcset fields
+Runs offline - no credentials required (needs Pillow, like the build).
+"""
+import asyncio
+import hashlib
+import os
+import shutil
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, 'tools'))
+os.environ.setdefault('WELLNESS_CATALOG_WATCH', 'false')
+
+import build_assets
+from services.asset_manifest import AssetManifest
+from services.catalog_store import get_catalog_store
+
+DISPLAY_WIDTH = build_assets.CARD_DISPLAY_WIDTH
+
+
+def file_bytes(url: str) -> int:
+    return os.path.getsize(os.path.join(ROOT, *url.lstrip('/').split('/')))
+
+
+def pick(variants: list, density: int) -> dict:
+    """The srcset candidate a browser picks for a DISPLAY_WIDTH slot at this pixel density"""
+    ordered = sorted(variants, key=lambda variant: variant['width'])
+    return next((v for v in ordered if v['width'] >= DISPLAY_WIDTH * density), ordered[-1])
+
+
+def grid_images() -> list:
+    """Image URL of every card in a grid showing the whole pharmacy inventory"""
+    snapshot = get_catalog_store().latest()
+    resolver = snapshot.index('medicine_images')['resolver']
+    return [resolver.lookup(name) or resolver.default
+            for _, name, _, _ in snapshot.index('pharmacy_inventory')['medicines']]
+
+
+def test_page_weight(manifest: dict) -> dict:
+    images = grid_images()
+    unique = sorted(set(images))  # the browser fetches each URL once
+    before = sum(file_bytes(url) for url in unique)
+    after = {
+        label: sum(pick(manifest['images'][url][kind], density)['bytes'] for url in unique)
+        for label, kind, density in [("webp 1x", 'webp', 1), ("webp 2x", 'webp', 2), ("jpeg 2x", 'jpeg', 2)]
+    }
+    print(f"  Medicine grid: {len(images)} cards, {len(unique)} distinct images")
+    print(f"    before (original JPEGs): {before / 1024:8.1f} KB")
+    for label, size in after.items():
+        print(f"    after  ({label}):        {size / 1024:8.1f} KB  ({1 - size / before:5.1%} smaller)")
+    return {
+        "2x WebP grid at least 80% lighter": after["webp 2x"] <= before * 0.2,
+        "JPEG fallback grid at least 70% lighter": after["jpeg 2x"] <= before * 0.3
+    }
+
+
+def test_build_properties(manifest: dict) -> dict:
+    hashes_match = all(
+        hashlib.sha256(open(os.path.join(ROOT, *v['url'].lstrip('/').split('/')), 'rb').read()).hexdigest()[:12]
+        == v['url'].rsplit('.', 2)[1]
+        for entry in manifest['images'].values() for kind in ('webp', 'jpeg') for v in entry[kind]
+    )
+
+    directory = tempfile.mkdtemp(prefix="assets-")
+    try:
+        source = os.path.join(directory, 'source')
+        out = os.path.join(directory, 'build')
+        shutil.copytree(build_assets.SOURCE_DIR, source)
+        first = build_assets.build(source, out)
+        second = build_assets.build(source, out)
+        with open(os.path.join(source, 'pan.jpg'), 'rb') as f:
+            data = f.read()
+        shutil.copy(os.path.join(source, 'crocin.jpg'), os.path.join(source, 'pan.jpg'))
+        third = build_assets.build(source, out)
+        with open(os.path.join(source, 'pan.jpg'), 'wb') as f:
+            f.write(data)
+        pan = '/static/images/medicine/pan.jpg'
+        stale_removed = not any(os.path.basename(v['url']) in os.listdir(os.path.join(out, 'medicine'))
+                                for v in first['images'][pan]['webp'])
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    return {
+        "variant names match content hash": hashes_match,
+        "rebuild of unchanged sources is a no-op": first == second,
+        "edited source gets new URLs": third['images'][pan]['webp'] != first['images'][pan]['webp'],
+        "stale variants removed": stale_removed
+    }
+
+
+async def test_serving(manifest: dict) -> dict:
+    from web_server import app, manager
+
+    variant = manifest['images']['/static/images/medicine/crocin.jpg']['webp'][0]['url']
+    client = app.test_client()
+    built = await client.get(variant)
+    original = await client.get('/static/images/medicine/crocin.jpg')
+
+    manager.assets = AssetManifest(manifest['images'])
+    manager._sync_catalogs()
+    card = manager._generate_medicine_cards([{'name': 'Crocin', 'status': 'available', 'price': '₹20/strip'}])[0]
+    return {
+        "build output served with immutable caching": (built.status_code == 200 and
+                                                        'immutable' in built.headers.get('Cache-Control', '')),
+        "original images not marked immutable": 'immutable' not in original.headers.get('Cache-Control', ''),
+        "card carries WebP and JPEG srcsets": ('/static/build/' in card['image_url'] and
+                                               '.webp 96w' in card['image_webp_srcset'] and
+                                               '.jpg 192w' in card['image_srcset'])
+    }
+
+
+def main():
+    print(" Benchmarking medicine image page weight...\n")
+    manifest = build_assets.build()
+    print()
+    checks = test_page_weight(manifest)
+    checks.update(test_build_properties(manifest))
+    checks.update(asyncio.run(test_serving(manifest)))
+
+    print()
+    for name, passed in checks.items():
+        print(f"  {'PASS' if passed else 'FAIL'}: {name}")
+
+    print("\n" + "=" * 60)
+    if all(checks.values()):
+        print("All page weight checks passed")
+    else:
+        print("Page weight checks FAILED")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
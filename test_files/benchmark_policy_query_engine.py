@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# benchmark_policy_query_engine.py
+"""
+Benchmark - deterministic policy query engine vs the insurance policy agent
+
+Runs a corpus of insurance questions through PolicyQueryEngine and reports how
+many it answers directly (and how fast), checks each direct answer's content,
+and checks that open-ended questions - and questions that only share a word
+with an exclusion or disease name - are left to the LLM. Exits non-zero on any
+mismatch. When Google credentials are available, the same questions are also
+sent to the policy_analysis agent for a latency comparison.
+"""
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+# CRITICAL: Load .env FIRST, before any other imports
+from dotenv import load_dotenv
+load_dotenv()
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from wellness_manager import WellnessManager
+
+# (question, text the engine's answer must contain - None when the question must go to the LLM)
+QUESTIONS = [
+    ("What is my sum insured?", "Your sum insured is"),
+    ("How much cover do I have?", "Your sum insured is"),
+    ("Is maternity covered?", "maternity is covered"),
+    ("What is the waiting period for maternity?", "Waiting period:"),
+    ("What's the room rent limit?", "Room rent is covered"),
+    ("Are ICU charges covered?", "ICU charges are covered"),
+    ("What is the PED waiting period?", "Pre-existing diseases are covered after a waiting period"),
+    ("Are pre-existing diseases covered?", "Pre-existing diseases are covered after a waiting period"),
+    ("What are the waiting periods?", "waiting periods in your policy"),
+    ("What's the co-payment?", "co-payment applies"),
+    ("Is there a copay?", "co-payment applies"),
+    ("Is cosmetic surgery covered?", '"Cosmetic surgery" is listed under your policy\'s exclusions'),
+    ("Are dental treatments covered?", '"Dental treatments (unless requiring hospitalization)" is listed'),
+    ("Are hearing aids covered?", '"Hearing aids and spectacles" is listed'),
+    ("Is cataract covered?", "Cataract is covered after a waiting period"),
+    ("Are joint replacements covered?", "Joint replacements is covered after a waiting period"),
+    ("What is not covered in my policy?", "Your policy does not cover"),
+    ("Does my policy cover air ambulance?", "air ambulance"),
+    ("Is cashless treatment available?", "cashless hospitalization is available"),
+    ("Tell me about the no claim bonus", "Cumulative bonus"),
+    ("Is ayurveda treatment covered?", "AYUSH treatment is covered"),
+    ("What is the pre-hospitalisation period?", "Pre-hospitalization expenses are covered"),
+    ("Post hospitalization cover?", "Post-hospitalization expenses are covered"),
+    ("Is bariatric surgery covered?", "bariatric surgery is covered"),
+    ("Does the policy have sum restoration?", "sum insured restoration"),
+    ("Is there a free health checkup?", "Health checkup benefit"),
+    ("What is the entry age?", "Entry age is"),
+    ("Should I buy a top-up plan?", None),
+    ("If I am admitted for 5 days in ICU how much will I pay?", None),
+    ("Why is my claim for knee surgery rejected?", None),
+    ("Explain the difference between co-payment and deductible", None),
+    ("Is surgery covered?", None),
+    ("My father is 65 and needs a bypass, what should we do?", None),
+    # Process questions, and questions with a part no synonym accounts for
+    ("I had a claim rejected for ICU, what now?", None),
+    ("How do I file a claim for ambulance?", None),
+    ("How long does claim settlement take?", None),
+    ("How many days of pre-hospitalisation are covered?", None),
+    ("When does my policy renewal happen and how much is the premium?", None),
+    ("Is my mother covered for pre-existing diabetes?", None),
+    ("Is there a copay for senior citizens?", None),
+    # A word inside an exclusion or disease name is not that item
+    ("Is AIDS covered?", None),
+    ("Is replacement covered?", None),
+    ("Is stone covered?", None),
+    ("Is knee replacement covered?", None),
+    ("Is nuclear medicine covered?", None)
+]
+
+ENGINE_ITERATIONS = 1000
+
+
+def percentile(values: list, pct: float) -> float:
+    """Nearest-rank percentile"""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def benchmark_engine(manager: WellnessManager) -> dict:
+    """Measure engine coverage, answer accuracy and per-query latency"""
+    engine = manager.policy_store.get(None)['engine']
+    answered, correct = 0, 0
+    latencies = []
+
+    for question, expected in QUESTIONS:
+        result = engine.answer(question)
+        direct = result is not None
+        answered += direct
+        if direct != (expected is not None):
+            marker = "  <-- unexpected"
+        elif direct and expected not in result['answer']:
+            marker = f"  <-- wrong answer: {result['answer'][:60]!r}"
+        else:
+            marker = ""
+        correct += not marker
+        status = "ENGINE" if direct else "LLM"
+        print(f"  [{status:6}] {question}{marker}")
+
+        start = time.perf_counter()
+        for _ in range(ENGINE_ITERATIONS):
+            engine.answer(question)
+        latencies.append((time.perf_counter() - start) / ENGINE_ITERATIONS * 1e6)
+
+    return {
+        'answered': answered,
+        'correct': correct,
+        'avg_us': statistics.mean(latencies),
+        'p95_us': percentile(latencies, 95)
+    }
+
+
+async def benchmark_agent(manager: WellnessManager) -> dict:
+    """Measure policy_analysis agent latency for the directly answerable questions"""
+    agent = manager.agents.get('policy_analysis')
+    if not agent:
+        return None
+
+    latencies = []
+    for question, expected in QUESTIONS:
+        if expected is None:
+            continue
+        prompt = f"Policy: {manager.INSURANCE_POLICY_DATA}\n\nQuestion: {question}"
+        start = time.perf_counter()
+        await manager._call_agent(agent, prompt, "bench-policy-engine", 'policy_analysis')
+        latencies.append(time.perf_counter() - start)
+
+    return {
+        'calls': len(latencies),
+        'avg_s': statistics.mean(latencies),
+        'p95_s': percentile(latencies, 95)
+    }
+
+
+async def main():
+    print(" Benchmarking policy query engine...")
+    manager = WellnessManager()
+    await manager.initialize()
+
+    if manager.policy_store.get(None)['engine'] is None:
+        print(" Policy engine disabled (WELLNESS_POLICY_ENGINE=false)")
+        return
+
+    engine_results = benchmark_engine(manager)
+    total = len(QUESTIONS)
+    direct_total = sum(1 for _, expected in QUESTIONS if expected is not None)
+
+    print("\n" + "=" * 60)
+    print(f"Questions:                  {total}")
+    print(f"Answered by engine:         {engine_results['answered']} ({engine_results['answered'] / total:.0%})")
+    print(f"Expected direct lookups:    {direct_total}")
+    print(f"Answer accuracy:            {engine_results['correct'] / total:.0%}")
+    print(f"Engine latency avg / p95:   {engine_results['avg_us']:.1f} us / {engine_results['p95_us']:.1f} us")
+
+    if os.getenv("GOOGLE_APPLICATION_CREDENTIALS") or os.getenv("GOOGLE_API_KEY"):
+        agent_results = await benchmark_agent(manager)
+        if agent_results:
+            print(f"LLM latency avg / p95:      {agent_results['avg_s']:.2f} s / {agent_results['p95_s']:.2f} s "
+                  f"({agent_results['calls']} calls)")
+            speedup = agent_results['avg_s'] * 1e6 / engine_results['avg_us']
+            print(f"Speedup on direct lookups:  {speedup:,.0f}x")
+    else:
+        print("LLM comparison skipped (no Google credentials)")
+    print("=" * 60)
+
+    await manager.close()
+    if engine_results['correct'] != total:
+        print(f"{total - engine_results['correct']} question(s) answered wrongly or routed unexpectedly")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("\n\nBenchmark interrupted by user")
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# benchmark_policy_retrieval.py
+"""
+Benchmark - whole-document policy prompts vs BM25 top-k section retrieval
+
+For a corpus of insurance questions, compares the policy JSON placed in the
+prompt by the full-document approach and by PolicyRetriever (top-k sections):
+prompt tokens, retrieval time, and whether the section needed to answer was
+retrieved. The same comparison is repeated on a synthetically enlarged policy
+to show how prompts grow with uploaded documents. When Google credentials are
+available, answer latency of the policy_analysis agent is measured for both.
+
+Token counts are estimated from prompt length (~4 characters per token).
+"""
+import asyncio
+import copy
+import json
+import os
+import statistics
+import sys
+import time
+
+# CRITICAL: Load .env FIRST, before any other imports
+from dotenv import load_dotenv
+load_dotenv()
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from wellness_manager import WellnessManager
+from services.policy_retriever import PolicyRetriever
+
+CHARS_PER_TOKEN = 4
+TOP_K = 3
+ENLARGED_RIDERS = 25
+
+# (question, section path prefix the answer lives in)
+QUESTIONS = [
+    ("What is the PED waiting period?", "waiting_periods"),
+    ("Is maternity covered and what is the C-section limit?", "coverage.special_covers.maternity"),
+    ("Is knee replacement surgery covered?", "surgery_assessment"),
+    ("How much is covered for ICU per day?", "coverage.hospitalization"),
+    ("Does my policy cover air ambulance?", "coverage.hospitalization.ambulance"),
+    ("My dad is 65, will there be a copay?", "co_payment"),
+    ("Is ayurveda treatment covered?", "coverage.special_covers.ayush_treatment"),
+    ("Is cosmetic surgery excluded?", "exclusions"),
+    ("Do I get a no claim bonus?", "financial_features"),
+    ("Can I get cashless treatment?", "coverage.cashless")
+]
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate from character length"""
+    return len(text) // CHARS_PER_TOKEN if text else 0
+
+
+def enlarge_policy(policy: dict, riders: int) -> dict:
+    """Simulate a long uploaded policy by adding optional rider sections"""
+    enlarged = copy.deepcopy(policy)
+    for index in range(riders):
+        enlarged[f"optional_rider_{index + 1}"] = {
+            "rider_name": f"Add-on benefit {index + 1}",
+            "premium_loading": f"{index + 2}% of base premium",
+            "benefit_terms": {
+                "eligibility": "Insured members aged 18 to 65 at inception",
+                "payout_basis": "Lump sum on first diagnosis of a listed condition",
+                "survival_period": f"{15 + index} days",
+                "listed_conditions": [f"Rider condition {index}-{n}" for n in range(8)]
+            },
+            "claim_process": {
+                "documents": ["Claim form", "Discharge summary", "Diagnosis report", "ID proof"],
+                "intimation_window": "Within 30 days of diagnosis",
+                "settlement_time": "15 working days"
+            }
+        }
+    return enlarged
+
+
+def measure(policy: dict, label: str) -> dict:
+    """Compare full-document and retrieved prompts over the question corpus"""
+    retriever = PolicyRetriever(policy)
+    full_tokens = estimate_tokens(json.dumps(policy, indent=2))
+    retrieved_tokens, retrieval_times, recalled = [], [], 0
+
+    for question, expected_path in QUESTIONS:
+        start = time.perf_counter()
+        relevant = retriever.build_context(question, TOP_K)
+        retrieval_times.append((time.perf_counter() - start) * 1000)
+        retrieved_tokens.append(estimate_tokens(json.dumps(relevant, indent=2)))
+        selected = [chunk['path'] for chunk, _ in retriever.retrieve(question, TOP_K)]
+        recalled += any(path.startswith(expected_path) or expected_path.startswith(path) for path in selected)
+
+    return {
+        'label': label,
+        'chunks': len(retriever.chunks),
+        'full_tokens': full_tokens,
+        'retrieved_tokens': statistics.mean(retrieved_tokens),
+        'retrieval_ms': statistics.mean(retrieval_times),
+        'recall': recalled / len(QUESTIONS)
+    }
+
+
+async def measure_latency(manager: WellnessManager, top_k: int) -> float:
+    """Average policy_analysis answer latency with the given top-k (0 = whole document)"""
+    agent = manager.agents.get('policy_analysis')
+    manager.policy_top_k = top_k
+    latencies = []
+    for question, _ in QUESTIONS:
+        prompt = f"YOUR CURRENT INSURANCE POLICY DETAILS:\n{manager._policy_prompt_json(question, 'bench-policy-retrieval')}\n\nQuestion: {question}"
+        start = time.perf_counter()
+        await manager._call_agent(agent, prompt, "bench-policy-retrieval", 'policy_analysis')
+        latencies.append(time.perf_counter() - start)
+    return statistics.mean(latencies)
+
+
+async def main():
+    print(" Benchmarking policy retrieval...")
+    manager = WellnessManager()
+    await manager.initialize()
+
+    results = [
+        measure(manager.INSURANCE_POLICY_DATA, "Default policy"),
+        measure(enlarge_policy(manager.INSURANCE_POLICY_DATA, ENLARGED_RIDERS), f"+{ENLARGED_RIDERS} riders")
+    ]
+
+    print("\n" + "=" * 78)
+    print(f"{'Document':<18}{'Chunks':>8}{'Full tok':>11}{'Top-' + str(TOP_K) + ' tok':>11}"
+          f"{'Saved':>9}{'Retrieve ms':>13}{'Recall':>8}")
+    print("=" * 78)
+    for r in results:
+        saved = 1 - r['retrieved_tokens'] / r['full_tokens']
+        print(f"{r['label']:<18}{r['chunks']:>8}{r['full_tokens']:>11}{r['retrieved_tokens']:>11.0f}"
+              f"{saved:>9.0%}{r['retrieval_ms']:>13.2f}{r['recall']:>8.0%}")
+    print("=" * 78)
+
+    if (os.getenv("GOOGLE_APPLICATION_CREDENTIALS") or os.getenv("GOOGLE_API_KEY")) and manager.agents.get('policy_analysis'):
+        full_latency = await measure_latency(manager, 0)
+        retrieved_latency = await measure_latency(manager, TOP_K)
+        print(f"Answer latency, whole document: {full_latency:.2f} s")
+        print(f"Answer latency, top-{TOP_K} sections: {retrieved_latency:.2f} s "
+              f"({(retrieved_latency - full_latency) / full_latency * 100:+.0f}%)")
+    else:
+        print("Answer latency comparison skipped (no Google credentials)")
+
+    await manager.close()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("\n\nBenchmark interrupted by user")
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# benchmark_provider_directory.py
+"""
+Benchmark + correctness test - hospital and lab directory
+
+Checks the shipped directory answers typical queries ("labs in Mumbai with
+home collection", "cardiac hospitals in Pune") and spots cities, hospitals and
+labs in user messages. Then grows the directory to thousands of providers and
+compares indexed queries against a linear scan of every record.
+Runs offline - no credentials required.
+"""
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.provider_directory import ProviderDirectory, get_provider_directory
+
+SYNTHETIC_CITIES = 200
+HOSPITALS_PER_CITY = 50
+QUERIES = 2000
+
+
+def test_shipped_directory() -> bool:
+    """Typical queries and text detection against data/hospitals.json and data/labs.json"""
+    directory = get_provider_directory()
+    mumbai_home = directory.labs(city="Mumbai", service="home collection")
+    pune_cardiac = directory.hospitals(city="pune", department="cardiac")
+    delhi_cards = directory.hospitals(city="Delhi", limit=3)
+
+    checks = {
+        "labs in Mumbai with home collection": bool(mumbai_home) and all(
+            lab['city'] == "Mumbai" and 'home_collection' in lab['services'] for lab in mumbai_home),
+        "cardiac hospitals in Pune": bool(pune_cardiac) and all(
+            h['city'] == "Pune" and "Cardiology" in h['departments'] for h in pune_cardiac),
+        "Delhi cards unchanged": [h['hospital_id'] for h in delhi_cards] == ["apollo_delhi", "max_delhi", "fortis_cardiac"],
+        "city alias resolved": directory.find_city("I live in Bengaluru") == "Bangalore",
+        "hospital preferred in user's city": directory.find_hospital("apollo please", city="Chennai")['hospital_id'] == "apollo_chennai",
+        "no partial-word matches": directory.find_hospital("maximum pain in my knee") is None,
+        "lab found by alias": directory.find_lab("book at thyrocare")['name'] == "Thyrocare Technologies",
+        "unknown city returns nothing": directory.hospitals(city="Atlantis") == []
+    }
+    for name, passed in checks.items():
+        print(f"  {'PASS' if passed else 'FAIL'}: {name}")
+    return all(checks.values())
+
+
+def synthetic_hospitals() -> list:
+    """Directory-shaped records: many cities, a few cardiac hospitals per city"""
+    hospitals = []
+    for city_index in range(SYNTHETIC_CITIES):
+        for index in range(HOSPITALS_PER_CITY):
+            hospitals.append({
+                'hospital_id': f"h{city_index}_{index}",
+                'name': f"Hospital {city_index}-{index}",
+                'city': f"City{city_index}",
+                'rating': 4.0,
+                'departments': ["General Medicine", "Cardiology"] if index % 10 == 0 else ["General Medicine"],
+                'services': ["cashless"],
+                'accreditations': ["NABH"]
+            })
+    return hospitals
+
+
+def linear_scan(hospitals: list, city: str, department: str) -> list:
+    return [h for h in hospitals if h['city'].lower() == city.lower() and department in h['departments']]
+
+
+def benchmark_queries() -> bool:
+    """Indexed vs linear-scan lookups on a large synthetic directory"""
+    hospitals = synthetic_hospitals()
+    directory = ProviderDirectory(hospitals, [])
+    cities = [f"City{i % SYNTHETIC_CITIES}" for i in range(QUERIES)]
+
+    start = time.perf_counter()
+    indexed = [directory.hospitals(city=city, department="cardiac") for city in cities]
+    indexed_us = (time.perf_counter() - start) / QUERIES * 1e6
+
+    start = time.perf_counter()
+    scanned = [linear_scan(hospitals, city, "Cardiology") for city in cities]
+    scan_us = (time.perf_counter() - start) / QUERIES * 1e6
+
+    same = [[h['hospital_id'] for h in r] for r in indexed] == [[h['hospital_id'] for h in r] for r in scanned]
+    print(f"  {len(hospitals):,} hospitals, {QUERIES:,} 'cardiac hospitals in <city>' queries")
+    print(f"  Indexed:     {indexed_us:8.1f} µs/query")
+    print(f"  Linear scan: {scan_us:8.1f} µs/query ({scan_us / indexed_us:,.0f}x slower)")
+    print(f"  {'PASS' if same else 'FAIL'}: indexed results match linear scan")
+    return same
+
+
+def main():
+    print(" Benchmarking provider directory...\n")
+    print("Shipped directory:")
+    shipped_ok = test_shipped_directory()
+    print("\nQuery performance:")
+    queries_ok = benchmark_queries()
+
+    print("\n" + "=" * 60)
+    if shipped_ok and queries_ok:
+        print("All provider directory checks passed")
+    else:
+        print("Provider directory checks FAILED")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# load_test_slot_engine.py
+"""
+Load test - concurrent appointment booking against the slot engine
+
+Thousands of simulated users book appointments at the same hospital and
+department from a thread pool, deliberately oversubscribing the available
+slots. The test verifies that:
+  - no slot is booked twice and every booking id maps to exactly one slot
+  - bookings stop exactly when inventory runs out
+  - abandoned holds expire and become bookable again
+  - days that leave the rolling horizon are dropped, so inventory stays bounded
+Runs offline - no credentials required.
+"""
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.slot_engine import SlotEngine
+
+DOCTORS_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'doctors.json')
+
+HOSPITAL_ID = "apollo_delhi"
+DEPARTMENT = "General Medicine"
+USERS = 5000
+WORKERS = 64
+
+
+class FakeClock:
+    """Controllable clock so hold expiry can be tested without waiting"""
+
+    def __init__(self):
+        self.now = time.time()
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds: float):
+        with self._lock:
+            self.now += seconds
+
+
+def test_concurrent_bookings() -> bool:
+    """Oversubscribe one department and check there is no double booking"""
+    engine = SlotEngine.from_file(DOCTORS_FILE, days_ahead=7)
+    capacity = len(engine.find_free_slots(HOSPITAL_ID, DEPARTMENT, limit=100000))
+    print(f"  Inventory: {capacity} free slots, {USERS} users, {WORKERS} threads")
+
+    # Switch threads as often as possible so reads and claims interleave
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+
+    def book(user_index: int):
+        # Half the users hold first and confirm later, like a real conversation
+        owner = f"user-{user_index}"
+        booking_id = f"APPT-{user_index:06d}"
+        if user_index % 2:
+            held = engine.hold_next_free(HOSPITAL_ID, DEPARTMENT, owner)
+            return engine.confirm(held['slot_id'], owner, booking_id) if held else None
+        return engine.book(HOSPITAL_ID, DEPARTMENT, owner, booking_id)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+        results = list(pool.map(book, range(USERS)))
+    elapsed = time.perf_counter() - start
+    sys.setswitchinterval(switch_interval)
+
+    successes = [r for r in results if r]
+    slot_ids = [r['slot_id'] for r in successes]
+    booking_ids = [r['booking_id'] for r in successes]
+    booked_in_engine = [s for s in engine.bookings() if s['hospital_id'] == HOSPITAL_ID]
+
+    print(f"  Bookings: {len(successes)} in {elapsed:.2f}s ({USERS / elapsed:,.0f} attempts/s)")
+    print(f"  Engine stats: {engine.stats}")
+
+    checks = {
+        "no slot returned to two users": len(slot_ids) == len(set(slot_ids)),
+        "no booking id on two slots": len(booking_ids) == len(set(booking_ids)),
+        "engine agrees with callers": sorted(s['slot_id'] for s in booked_in_engine) == sorted(slot_ids),
+        "inventory fully used": len(successes) == min(capacity, USERS),
+        "no free slots left": not engine.find_free_slots(HOSPITAL_ID, DEPARTMENT)
+    }
+    for name, passed in checks.items():
+        print(f"  {'PASS' if passed else 'FAIL'}: {name}")
+    return all(checks.values())
+
+
+def test_hold_expiry() -> bool:
+    """Abandoned holds block other users only until they expire"""
+    clock = FakeClock()
+    engine = SlotEngine.from_file(DOCTORS_FILE, days_ahead=2, hold_seconds=600, clock=clock)
+    slot = engine.find_free_slots(HOSPITAL_ID, DEPARTMENT, limit=1)[0]
+
+    first = engine.hold(slot['slot_id'], "abandoning-user", expected_version=slot['version'])
+    blocked = engine.hold(slot['slot_id'], "second-user")
+    stale = engine.hold(slot['slot_id'], "second-user", expected_version=slot['version'])
+    clock.advance(601)
+    reclaimed = engine.hold(slot['slot_id'], "second-user")
+    late_confirm = engine.confirm(slot['slot_id'], "abandoning-user", "APPT-LATE")
+    confirmed = engine.confirm(slot['slot_id'], "second-user", "APPT-OK")
+
+    checks = {
+        "first hold succeeds": first is not None,
+        "held slot is not bookable by others": blocked is None,
+        "stale version is rejected": stale is None,
+        "expired hold is reclaimed": reclaimed is not None,
+        "expired owner cannot confirm": late_confirm is None,
+        "new owner confirms": confirmed is not None and confirmed['booking_id'] == "APPT-OK"
+    }
+    for name, passed in checks.items():
+        print(f"  {'PASS' if passed else 'FAIL'}: {name}")
+    return all(checks.values())
+
+
+def test_horizon_eviction() -> bool:
+    """Past days are dropped as the horizon rolls forward"""
+    clock = FakeClock()
+    engine = SlotEngine.from_file(DOCTORS_FILE, days_ahead=2, clock=clock)
+    first = engine.find_free_slots(HOSPITAL_ID, DEPARTMENT, limit=1)[0]
+    engine.hold(first['slot_id'], "old-user")
+
+    clock.advance(3 * 86400)
+    for _ in range(4):
+        clock.advance(86400)
+        engine.find_free_slots(HOSPITAL_ID, DEPARTMENT, limit=1)
+    current = engine.find_free_slots(HOSPITAL_ID, DEPARTMENT, limit=1)
+    today = datetime.fromtimestamp(clock()).date()
+    starts = [slot['start'].date() for slot in engine._slots.values()]
+
+    checks = {
+        "past days evicted": min(starts) >= today and engine.stats['slots_evicted'] > 0,
+        "inventory stays within the horizon": max(starts) <= today + timedelta(days=1),
+        "evicted slots are gone from lookups": engine.get_slot(first['slot_id']) is None and
+                                               engine.held_slot("old-user") is None,
+        "current days still bookable": bool(current) and
+                                       engine.hold(current[0]['slot_id'], "new-user") is not None
+    }
+    for name, passed in checks.items():
+        print(f"  {'PASS' if passed else 'FAIL'}: {name}")
+    return all(checks.values())
+
+
+def main():
+    print(" Load testing slot engine...\n")
+    print("Concurrent bookings:")
+    bookings_ok = test_concurrent_bookings()
+    print("\nHold expiry:")
+    expiry_ok = test_hold_expiry()
+    print("\nHorizon eviction:")
+    horizon_ok = test_horizon_eviction()
+
+    print("\n" + "=" * 60)
+    if bookings_ok and expiry_ok and horizon_ok:
+        print("All slot engine checks passed - zero double bookings")
+    else:
+        print("Slot engine checks FAILED")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# test_catalog_reload.py
+"""
+Test - hot-reloadable catalog snapshots
+
+Works on a temporary copy of data/catalogs and checks that:
+  - a price change is picked up by reload() and by the background watcher
+  - a pinned request keeps the snapshot it started with
+  - unchanged catalogs are shared between snapshots (copy-on-write)
+  - a broken file leaves the current snapshot in place, and data an index
+    builder fails on does not stop the watcher
+  - snapshots are read-only
+  - readers never see a half-applied reload while files churn
+Runs offline - no credentials required.
+"""
+import contextvars
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.catalog_store import CatalogStore
+
+CATALOG_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'catalogs')
+MEDICINE = "Paracetamol (500mg)"
+
+
+def write_catalog(directory: str, name: str, version: str, mutate=None):
+    """Rewrite a catalog file atomically (write temp file, then rename)"""
+    path = os.path.join(directory, f"{name}.json")
+    with open(path, encoding='utf-8') as f:
+        document = json.load(f)
+    document['version'] = version
+    if mutate:
+        mutate(document['data'])
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(document, f, indent=2, ensure_ascii=False)
+    os.replace(temp_path, path)
+
+
+def set_price(price: int):
+    def mutate(data):
+        data['inventory']['pain_fever'][MEDICINE]['price'] = price
+    return mutate
+
+
+def price_of(snapshot) -> int:
+    return snapshot['pharmacy_inventory']['inventory']['pain_fever'][MEDICINE]['price']
+
+
+def test_reload(directory: str) -> dict:
+    store = CatalogStore(directory)
+    first = store.latest()
+
+    pinned_view = {}
+
+    def request():
+        store.pin()
+        write_catalog(directory, 'pharmacy_inventory', '2026.10.1', set_price(25))
+        store.reload()  # reload lands while this "request" is in flight
+        pinned_view['price'] = price_of(store.current())
+
+    contextvars.copy_context().run(request)
+    second = store.latest()
+
+    try:
+        second['pharmacy_inventory']['inventory']['pain_fever'][MEDICINE]['price'] = 0
+        read_only = False
+    except TypeError:
+        read_only = True
+
+    with open(os.path.join(directory, 'lab_catalog.json'), 'w', encoding='utf-8') as f:
+        f.write('{"version": "broken", "data": ')
+    broken_reload = store.reload()
+
+    return {
+        "reload swaps in the new price": price_of(second) == 25 and second.version == first.version + 1,
+        "pinned request keeps its snapshot": pinned_view.get('price') == price_of(first),
+        "unchanged catalogs are shared": second['insurance_policy'] is first['insurance_policy'],
+        "per-catalog versions reported": store.metrics()['catalog_versions']['pharmacy_inventory'] == '2026.10.1',
+        "snapshots are read-only": read_only,
+        "broken file keeps current snapshot": (not broken_reload and store.latest() is second
+                                               and store.stats['reload_failures'] == 1)
+    }
+
+
+def test_watcher(directory: str) -> dict:
+    store = CatalogStore(directory, poll_seconds=0.05)
+    store.start_watcher()
+    version_before = store.latest().version
+
+    write_catalog(directory, 'pharmacy_inventory', '30', set_price(30))
+    deadline = time.time() + 5
+    while price_of(store.latest()) != 30 and time.time() < deadline:
+        time.sleep(0.01)
+    picked_up = price_of(store.latest()) == 30
+
+    # Valid JSON the pharmacy index builder fails on: counted as a failed reload, watcher keeps going
+    path = os.path.join(directory, 'pharmacy_inventory.json')
+    with open(path, encoding='utf-8') as f:
+        good_document = f.read()
+    failures_before = store.stats['reload_failures']
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'version': 'bad', 'data': {'inventory': {'pain_fever': ['not', 'a', 'mapping']}}}, f)
+    deadline = time.time() + 5
+    while store.stats['reload_failures'] == failures_before and time.time() < deadline:
+        time.sleep(0.01)
+    survived_bad_data = (store.stats['reload_failures'] == failures_before + 1 and
+                         price_of(store.latest()) == 30 and store.metrics()['watching'])
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(good_document)
+
+    # Churn: every write keeps price == version number; readers must never see a mismatch
+    mismatches = []
+    stop = threading.Event()
+
+    def reader():
+        while not stop.is_set():
+            snapshot = store.current()
+            if str(price_of(snapshot)) != snapshot.catalog_versions['pharmacy_inventory']:
+                mismatches.append(snapshot.version)
+
+    readers = [threading.Thread(target=reader) for _ in range(4)]
+    for thread in readers:
+        thread.start()
+    for price in range(100, 140):
+        write_catalog(directory, 'pharmacy_inventory', str(price), set_price(price))
+        time.sleep(0.06)
+    stop.set()
+    for thread in readers:
+        thread.join()
+    store.stop_watcher()
+
+    metrics = store.metrics()
+    print(f"  Watcher: {metrics['reloads']} reloads, snapshot v{metrics['snapshot_version']}, "
+          f"last reload {metrics['last_reload_ms']:.2f}ms")
+    return {
+        "watcher picks up file changes": picked_up and store.latest().version > version_before,
+        "index builder error keeps snapshot and watcher": survived_bad_data,
+        "readers always see a consistent snapshot": not mismatches,
+        "watcher stops cleanly": not metrics['watching']
+    }
+
+
+def main():
+    print(" Testing catalog hot reload...\n")
+    directory = tempfile.mkdtemp(prefix="catalogs-")
+    try:
+        for name in os.listdir(CATALOG_DIR):
+            shutil.copy(os.path.join(CATALOG_DIR, name), directory)
+        checks = test_reload(directory)
+
+        shutil.rmtree(directory)
+        shutil.copytree(CATALOG_DIR, directory)
+        checks.update(test_watcher(directory))
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    for name, passed in checks.items():
+        print(f"  {'PASS' if passed else 'FAIL'}: {name}")
+
+    print("\n" + "=" * 60)
+    if all(checks.values()):
+        print("All catalog reload checks passed")
+    else:
+        print("Catalog reload checks FAILED")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# test_conversation_replay.py
+"""
+Test - conversation recording and replay
+
+Records scripted conversations on the fake model backend with
+WELLNESS_RECORD_FILE, then replays them with tools/replay_conversations.py
+logic and checks that:
+  - each turn is logged with input, routing, agent, cards, timings and model calls
+  - plain and zstd-compressed logs read back identically, even before close
+  - replaying with recorded model outputs reproduces every reply exactly
+  - recorded model failures fail again on replay
+  - a changed model output shows up as a divergence
+Runs offline - no credentials required.
+"""
+import asyncio
+import contextlib
+import copy
+import os
+import shutil
+import sys
+import tempfile
+
+os.environ['WELLNESS_MODEL_BACKEND'] = 'fake'
+os.environ.setdefault('WELLNESS_CATALOG_WATCH', 'false')
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, 'tools'))
+
+import replay_conversations
+from agents.model_backend import FakeBackend
+from services import conversation_log
+from services.conversation_log import read_conversation_log
+from wellness_manager import WellnessManager
+
+CONVERSATIONS = {
+    'appointment': ["I have fever and a bad headache since yesterday", "Can I book an appointment with a doctor?",
+                    "I'm in Delhi", "Apollo Hospital", "Tomorrow morning works"],
+    'pharmacy': ["Do you have paracetmol?", "I want to order paracetamol", "2 strips please"],
+    'insurance': ["What is my sum insured?", "Is maternity covered?"],
+}
+
+
+async def record(path: str, backend: FakeBackend) -> tuple:
+    """Run the scripted conversations with recording on; returns the replies and the log read before close"""
+    os.environ['WELLNESS_RECORD_FILE'] = path
+    try:
+        manager = WellnessManager()
+    finally:
+        del os.environ['WELLNESS_RECORD_FILE']
+    manager.model_backend = backend
+    replies = []
+    for name, messages in CONVERSATIONS.items():
+        for message in messages:
+            replies.append(await manager.process_message(message, f"replay-{name}"))
+    unclosed = list(read_conversation_log(manager.recorder.path))
+    await manager.close()
+    return replies, unclosed
+
+
+def replay(turns: list) -> dict:
+    with open(os.devnull, 'w') as quiet, contextlib.redirect_stdout(quiet):
+        return asyncio.run(replay_conversations.replay_once(turns, 0.0))
+
+
+def test_recording(directory: str) -> dict:
+    plain = os.path.join(directory, 'chat.jsonl')
+    with open(os.devnull, 'w') as quiet, contextlib.redirect_stdout(quiet):
+        replies, _ = asyncio.run(record(plain, FakeBackend(latency="fixed:2")))
+        recording_off_by_default = WellnessManager().recorder is None
+    turns = list(read_conversation_log(plain))
+    first = turns[0]
+    print(f"  {len(turns)} turns recorded, {os.path.getsize(plain)} bytes plain")
+
+    checks = {
+        "recording is off by default": recording_off_by_default,
+        "every turn recorded": len(turns) == len(replies),
+        "turn fields recorded": (first['input'] == CONVERSATIONS['appointment'][0] and first['route'] == 'symptom'
+                                 and first['agent'] == 'symptom' and first['ms'] > 0),
+        "model calls recorded with prompt size and output": all(
+            call['prompt_chars'] > 0 and call['response'] for turn in turns for call in turn['calls']),
+        "routing call recorded": all(turn['calls'][0]['agent'] == 'router' for turn in turns),
+        "cards recorded": any('hospital' in turn['cards'] for turn in turns)
+    }
+
+    with open(plain, 'a', encoding='utf-8') as f:
+        f.write('{"v": 1, "user": "trunc')
+    checks["truncated last line skipped"] = len(list(read_conversation_log(plain))) == len(turns)
+
+    if conversation_log.zstandard is not None:
+        compressed = os.path.join(directory, 'chat.jsonl.zst')
+        with open(os.devnull, 'w') as quiet, contextlib.redirect_stdout(quiet):
+            _, unclosed = asyncio.run(record(compressed, FakeBackend(latency="fixed:2")))
+            asyncio.run(record(compressed, FakeBackend()))
+        zst_turns = list(read_conversation_log(compressed))
+        print(f"  zstd log: {os.path.getsize(compressed)} bytes for {len(zst_turns)} turns (two appended runs)")
+        checks["zstd log readable before close"] = len(unclosed) == len(turns)
+        checks["appended zstd frames read as one log"] = len(zst_turns) == 2 * len(turns)
+        checks["zstd log matches plain log"] = ([t['input'] for t in zst_turns[:len(turns)]] ==
+                                                [t['input'] for t in turns])
+    else:
+        print("  zstandard not installed - compressed log checks skipped")
+    return checks, turns
+
+
+def test_replay(turns: list, directory: str) -> dict:
+    clean = replay(turns)
+    print(f"  replay: {len(clean['timings'])} turns, divergent {clean['divergent']}, "
+          f"model calls {clean['model_calls']}")
+
+    flaky_path = os.path.join(directory, 'flaky.jsonl')
+    with open(os.devnull, 'w') as quiet, contextlib.redirect_stdout(quiet):
+        asyncio.run(record(flaky_path, FakeBackend(error_rate=0.4, seed=5)))
+    flaky_turns = list(read_conversation_log(flaky_path))
+    flaky = replay(flaky_turns)
+    recorded_errors = sum(1 for turn in flaky_turns for call in turn['calls'] if call['error'])
+
+    changed = copy.deepcopy(turns)
+    pharmacy_turn = next(turn for turn in changed if turn['input'] == "Do you have paracetmol?")
+    pharmacy_turn['calls'][0]['response'] = 'INSURANCE'
+    diverged = replay(changed)
+
+    return {
+        "replay reproduces every reply": not any(clean['divergent'].values()),
+        "every recorded model call replayed": (not clean['model_calls']['misses'] and
+                                               not clean['model_calls']['unused']),
+        "recorded failures fail again": recorded_errors > 0 and not any(flaky['divergent'].values()),
+        "changed model output is a divergence": diverged['divergent']['agent'] >= 1
+    }
+
+
+def main():
+    print(" Testing conversation recording and replay...\n")
+    directory = tempfile.mkdtemp(prefix="replay-")
+    try:
+        checks, turns = test_recording(directory)
+        checks.update(test_replay(turns, directory))
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    print()
+    for name, passed in checks.items():
+        print(f"  {'PASS' if passed else 'FAIL'}: {name}")
+
+    print("\n" + "=" * 60)
+    if all(checks.values()):
+        print("All conversation replay checks passed")
+    else:
+        print("Conversation replay checks FAILED")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# test_load_harness.py
+"""
+Test - concurrent load harness (tools/load_test.py)
+
+Runs small loads through the harness on the fake model backend and checks that:
+  - every scripted turn of every user is recorded, per flow stage
+  - concurrency overlaps model latency (wall time well under the serial sum)
+  - injected model failures show up in the error rate
+  - the ASGI target drives /chat with one session per user
+  - percentiles and memory figures are reported
+Runs offline - no credentials required.
+"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, 'tools'))
+
+import load_test
+
+USERS = 24
+
+
+def test_direct() -> dict:
+    args = load_test.parse_args(['--users', str(USERS), '--latency', 'fixed:25'])
+    report = load_test.run(args)
+    expected_turns = sum(len(load_test.FLOWS[args.flows[i % len(args.flows)]]) for i in range(USERS))
+    expected_stages = {f"{flow}/{stage}" for flow, turns in load_test.FLOWS.items() for stage, _ in turns}
+    serial_ms = sum(stats['count'] * stats['mean_ms'] for stats in report['model_calls'].values())
+    print(f"  direct: {report['turns']} turns in {report['elapsed_s']:.2f}s "
+          f"(serial model time {serial_ms / 1000:.2f}s), p95 {report['overall']['p95_ms']:.0f} ms")
+
+    overall = report['overall']
+    return {
+        "every turn recorded": report['turns'] == expected_turns,
+        "every flow stage reported": set(report['stages']) == expected_stages,
+        "no errors without injection": report['error_rate'] == 0,
+        "users run concurrently": report['elapsed_s'] * 1000 < serial_ms / 4,
+        "percentiles ordered": overall['p50_ms'] <= overall['p95_ms'] <= overall['p99_ms'] <= overall['max_ms'],
+        "memory growth reported": report['memory']['user_contexts_retained'] == USERS
+    }
+
+
+def test_errors_and_asgi() -> dict:
+    failing = load_test.run(load_test.parse_args(['--users', '12', '--latency', '0', '--error-rate', '1.0',
+                                                  '--flows', 'pharmacy_order']))
+    asgi = load_test.run(load_test.parse_args(['--target', 'asgi', '--users', '8', '--latency', 'fixed:5']))
+    print(f"  failing model: error rate {failing['error_rate']:.0%}; asgi: {asgi['turns']} turns, "
+          f"{asgi['memory']['user_contexts_retained']} sessions")
+
+    try:
+        load_test.parse_args(['--flows', 'pharmacy_order,unknown'])
+        unknown_rejected = False
+    except SystemExit:
+        unknown_rejected = True
+
+    return {
+        "injected failures counted as errors": failing['error_rate'] == 1.0,
+        "asgi target answers every turn": asgi['error_rate'] == 0 and asgi['turns'] > 0,
+        "asgi target keeps one session per user": asgi['memory']['user_contexts_retained'] == 8,
+        "unknown flow rejected": unknown_rejected
+    }
+
+
+def main():
+    print(" Testing load harness...\n")
+    checks = test_direct()
+    checks.update(test_errors_and_asgi())
+
+    print()
+    for name, passed in checks.items():
+        print(f"  {'PASS' if passed else 'FAIL'}: {name}")
+
+    print("\n" + "=" * 60)
+    if all(checks.values()):
+        print("All load harness checks passed")
+    else:
+        print("Load harness checks FAILED")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# test_load_shedding.py
+"""
+Test - adaptive load shedding (services/load_shedder.py)
+
+Drives the controller with a simulated clock, then runs turns on the fake
+model backend at each level and checks that:
+  - latency and in-flight pressure step the level up immediately
+  - pressure hovering around a threshold does not make the level flap
+  - the level steps back down one level per cool-down once pressure drops
+  - each level sheds what it should: suggestions call, router call, history
+  - the reject level answers /chat with 503 + Retry-After, and the level is
+    exported on /metrics
+Runs offline - no credentials required.
+"""
+import asyncio
+import contextlib
+import io
+import os
+import sys
+
+os.environ['WELLNESS_MODEL_BACKEND'] = 'fake'
+os.environ.setdefault('WELLNESS_CATALOG_WATCH', 'false')
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from agents.model_backend import FakeBackend
+from services.load_shedder import LoadShedder
+
+with contextlib.redirect_stdout(io.StringIO()):
+    from web_server import app, manager
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+def shedder_at(level_latency_ms: float, clock: Clock = None) -> LoadShedder:
+    """Controller (target 1000 ms) whose latency window holds ten calls of the given latency"""
+    shedder = LoadShedder(latency_target_ms=1000, max_inflight=10, window_seconds=30, cooldown_seconds=10,
+                          retry_after_seconds=7, clock=clock or Clock())
+    for _ in range(10):
+        shedder.observe_latency(level_latency_ms)
+    return shedder
+
+
+def test_controller() -> dict:
+    clock = Clock()
+    shedder = shedder_at(1200, clock)
+    rising = [shedder.current_level()]
+    for latency in (1600, 2200, 3500):
+        clock.advance(0.5)
+        for _ in range(200):
+            shedder.observe_latency(latency)
+        rising.append(shedder.current_level())
+
+    busy = LoadShedder(latency_target_ms=1000, max_inflight=4, clock=Clock())
+    inflight_levels = [busy.turn_started() for _ in range(6)]
+
+    hover_clock = Clock()
+    hovering = shedder_at(1050, hover_clock)
+    hover_levels = []
+    for step in range(40):
+        hover_clock.advance(1)
+        hovering.observe_latency(950 if step % 2 else 1050)
+        hover_levels.append(hovering.current_level())
+
+    # Latency drops back to normal: old samples age out, then one level per cool-down
+    falling = []
+    for _ in range(90):
+        clock.advance(1)
+        shedder.observe_latency(200)
+        falling.append(shedder.current_level())
+    steps_down = [level for index, level in enumerate(falling) if index == 0 or level != falling[index - 1]]
+    print(f"  rising: {rising}; in-flight: {inflight_levels}; recovery path: {steps_down}")
+
+    disabled = LoadShedder(enabled=False, latency_target_ms=1)
+    disabled.observe_latency(10000)
+    return {
+        "latency pressure steps the level up": rising == [1, 2, 3, 4],
+        "in-flight turns step the level up": inflight_levels == [0, 0, 0, 1, 1, 2],
+        "no flapping around a threshold": set(hover_levels) == {1} and hovering.stats['transitions'] == 1,
+        "recovers one level per cool-down": steps_down == [4, 3, 2, 1, 0],
+        "disabled controller stays normal": disabled.current_level() == 0 and disabled.admit() == (True, None)
+    }
+
+
+async def turn_at(latency_ms: float, message: str, user_id: str) -> tuple:
+    """Run one turn with the manager's controller at the level the latency implies; returns (reply, calls)"""
+    manager.load_shedder = shedder_at(latency_ms)
+    backend = manager.model_backend
+    before = len(backend.calls)
+    with contextlib.redirect_stdout(io.StringIO()):
+        reply = await manager.process_message(message, user_id)
+    return reply, list(backend.calls)[before:]
+
+
+async def test_levels() -> dict:
+    manager.model_backend = FakeBackend()
+    manager.suggestion_cache = None
+    history = ["I have fever and a bad headache since yesterday", "It's about 101F and I feel tired",
+               "It started two days ago", "I also have a sore throat"]
+    prompts = {}
+    for latency, name in ((100, 'normal'), (1700, 'keyword_router'), (2600, 'short_history')):
+        for message in history:
+            await turn_at(latency, message, f"shed-{name}")
+        reply, calls = await turn_at(latency, "Can I book an appointment with a doctor?", f"shed-{name}")
+        prompts[name] = (calls, reply)
+
+    _, no_suggestion_calls = await turn_at(1200, "Do you have paracetamol?", "shed-suggestions")
+    agents = {name: [call['agent_type'] for call in calls] for name, (calls, _) in prompts.items()}
+    specialist_chars = {name: calls[-1]['prompt_chars'] for name, (calls, _) in prompts.items()}
+    print(f"  calls per level: {agents} + no_suggestions {[c['agent_type'] for c in no_suggestion_calls]}")
+    print(f"  specialist prompt chars: {specialist_chars}")
+    manager.load_shedder = LoadShedder.from_env()
+    return {
+        "normal turn makes every call": agents['normal'] == ['router', 'scheduling', 'suggestions'],
+        "level 1 drops the suggestions call": [c['agent_type'] for c in no_suggestion_calls] == ['router', 'pharmacy'],
+        "level 2 routes by keyword": agents['keyword_router'] == ['scheduling'] and
+                                     manager.route_decisions.value(source='load_shedding', intent='scheduling') >= 1,
+        "level 3 shortens prompt history": specialist_chars['short_history'] < specialist_chars['keyword_router'],
+        "shed turns still answer": all(reply['response'] and reply.get('suggested_replies')
+                                       for _, reply in prompts.values())
+    }
+
+
+async def test_reject() -> dict:
+    async with app.test_app() as test_app:
+        client = test_app.test_client()
+        manager.load_shedder = shedder_at(5000)
+        rejected = await client.post('/chat', json={'message': "Do you have paracetamol?"})
+        health = await (await client.get('/health')).get_json()
+        scrape = await (await client.get('/metrics')).get_data(as_text=True)
+        manager.load_shedder = LoadShedder.from_env()
+        with contextlib.redirect_stdout(io.StringIO()):
+            accepted = await client.post('/chat', json={'message': "Do you have paracetamol?"})
+    return {
+        "reject level answers 503 with Retry-After": rejected.status_code == 503 and
+                                                     rejected.headers.get('Retry-After') == '7',
+        "level exported on /metrics": 'wellness_degradation_level 4' in scrape and
+                                      'wellness_load_shed_rejections_total 1' in scrape,
+        "level reported on /health": health['load']['name'] == 'reject',
+        "normal level accepts": accepted.status_code == 200
+    }
+
+
+async def main():
+    print(" Testing adaptive load shedding...\n")
+    checks = test_controller()
+    checks.update(await test_levels())
+    checks.update(await test_reject())
+
+    print()
+    for name, passed in checks.items():
+        print(f"  {'PASS' if passed else 'FAIL'}: {name}")
+
+    print("\n" + "=" * 60)
+    if all(checks.values()):
+        print("All load shedding checks passed")
+    else:
+        print("Load shedding checks FAILED")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# test_medicine_images.py
+"""
+Test - medicine card image resolution
+
+Checks that:
+  - every shipped image mapping points at a file that exists
+  - a mapping to a missing file is reported when the catalog loads and
+    served as the placeholder
+  - token lookup agrees with the old substring scan on every inventory and
+    lexicon name (except where the scan matched inside another word)
+  - repeated lookups for the same SKU hit the memo
+Runs offline - no credentials required.
+"""
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.catalog_store import CatalogStore
+
+CATALOG_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'catalogs')
+ITERATIONS = 2000
+
+
+def substring_scan(images: dict, name: str):
+    """The previous lookup: first catalog key contained anywhere in the name"""
+    name_lower = name.lower()
+    for key, path in images.items():
+        if key != 'default' and key in name_lower:
+            return path
+    return None
+
+
+def test_shipped(store: CatalogStore) -> dict:
+    snapshot = store.latest()
+    images = snapshot['medicine_images']
+    resolver = snapshot.index('medicine_images')['resolver']
+
+    names = [name for _, name, _, _ in snapshot.index('pharmacy_inventory')['medicines']]
+    for medicine in snapshot['medicine_lexicon']['medicines']:
+        names += [medicine['generic'], *medicine['brands']]
+
+    disagreements = []
+    for name in names:
+        scanned, looked_up = substring_scan(images, name), resolver.lookup(name, categories=False)
+        if scanned != looked_up:
+            disagreements.append((name, scanned, looked_up))
+    for name, scanned, looked_up in disagreements:
+        print(f"  differs: {name!r} scan={scanned} token={looked_up}")
+
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        for name in names:
+            substring_scan(images, name)
+    scan_us = (time.perf_counter() - start) / (ITERATIONS * len(names)) * 1e6
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        for name in names:
+            resolver.lookup(name)
+    lookup_us = (time.perf_counter() - start) / (ITERATIONS * len(names)) * 1e6
+    print(f"  {len(names)} names: substring scan {scan_us:.2f} µs | memoized token lookup {lookup_us:.2f} µs")
+
+    # Words that only contain a catalog key ("liv" in "Livogen") no longer match it;
+    # brands like Pantocid reach their image through the lexicon's generic instead
+    expected_differences = {'Livogen', 'Pantocid'}
+    return {
+        "shipped mappings all exist on disk": not resolver.missing and not store.problems,
+        "amoxicillin maps to the moxikind image": resolver.lookup("Amoxicillin (500mg)") == "/static/images/medicine/moxikind.jpg",
+        "token lookup agrees with substring scan": {name for name, _, _ in disagreements} <= expected_differences,
+        "category words used when no name matches": resolver.lookup("Antibiotic course") == "/static/images/medicine/moxikind.jpg",
+        "unknown names resolve to None": resolver.lookup("Xyzzy 10mg") is None,
+        "memoized lookup is faster than the scan": lookup_us < scan_us
+    }
+
+
+def test_missing_file() -> dict:
+    directory = tempfile.mkdtemp(prefix="catalogs-")
+    try:
+        shutil.copytree(CATALOG_DIR, directory, dirs_exist_ok=True)
+        path = os.path.join(directory, 'medicine_images.json')
+        with open(path, encoding='utf-8') as f:
+            document = json.load(f)
+        document['data']['telma'] = "/static/images/medicine/telma-missing.jpg"
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(document, f)
+
+        store = CatalogStore(directory)
+        resolver = store.latest().index('medicine_images')['resolver']
+        problems = store.metrics()['problems'].get('medicine_images', [])
+        return {
+            "missing file reported at load": any('telma-missing.jpg' in problem for problem in problems),
+            "missing file served as the placeholder": resolver.lookup("Telma 40") == resolver.default
+        }
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def main():
+    print(" Testing medicine image resolution...\n")
+    checks = test_shipped(CatalogStore(CATALOG_DIR))
+    checks.update(test_missing_file())
+
+    for name, passed in checks.items():
+        print(f"  {'PASS' if passed else 'FAIL'}: {name}")
+
+    print("\n" + "=" * 60)
+    if all(checks.values()):
+        print("All medicine image checks passed")
+    else:
+        print("Medicine image checks FAILED")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# test_metrics_endpoint.py
+"""
+Test - /metrics endpoint (services/metrics.py)
+
+Drives the Quart app on the fake model backend and scrapes /metrics to check that:
+  - the output is valid Prometheus text exposition (cumulative buckets, +Inf = count)
+  - HTTP requests are counted and timed per route pattern
+  - model calls are counted per agent and outcome, with latency and tokens
+  - router and keyword-fallback routing decisions are counted
+  - cache hit ratios, FAQ answer cache size and staleness, live user contexts
+    and event-loop lag are exported
+  - metric updates are cheap enough to leave on
+Runs offline - no credentials required.
+"""
+import asyncio
+import contextlib
+import io
+import os
+import re
+import sys
+import time
+
+os.environ['WELLNESS_MODEL_BACKEND'] = 'fake'
+os.environ.setdefault('WELLNESS_CATALOG_WATCH', 'false')
+os.environ.setdefault('WELLNESS_SUGGESTION_CACHE', 'true')
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.metrics import MetricsRegistry
+
+with contextlib.redirect_stdout(io.StringIO()):
+    from web_server import app, manager
+
+SAMPLE_LINE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{[^}]*\})? (-?[0-9.e+-]+|\+Inf|NaN)$')
+MESSAGES = ["Do you have paracetamol?", "I want to order paracetamol", "What is my sum insured?",
+            "What is my sum insured?", "I have fever and a bad headache"]
+
+
+def parse(text: str) -> dict:
+    """{(name, labels): value} for every sample, or raises on a malformed line"""
+    samples = {}
+    for line in text.splitlines():
+        if not line or line.startswith('#'):
+            continue
+        match = SAMPLE_LINE.match(line)
+        if not match:
+            raise ValueError(f"Malformed sample line: {line!r}")
+        samples[(match.group(1), match.group(2) or '')] = float(match.group(3))
+    return samples
+
+
+def value(samples: dict, name: str, **labels) -> float:
+    """Sum of samples of a metric whose labels include the given ones"""
+    wanted = [f'{key}="{val}"' for key, val in labels.items()]
+    return sum(v for (n, l), v in samples.items() if n == name and all(w in l for w in wanted))
+
+
+def histograms_consistent(samples: dict) -> bool:
+    buckets = {}
+    for (name, labels), count in samples.items():
+        if name.endswith('_bucket'):
+            series = re.sub(r',?le="[^"]*"', '', labels)
+            buckets.setdefault((name[:-len('_bucket')], series), []).append((labels, count))
+    for (base, series), items in buckets.items():
+        counts = [count for _, count in items]
+        total = samples.get((base + '_count', series if series != '{}' else ''))
+        if counts != sorted(counts) or 'le="+Inf"' not in items[-1][0] or counts[-1] != total:
+            return False
+    return bool(buckets)
+
+
+async def exercise() -> dict:
+    async with app.test_app() as test_app:
+        client = test_app.test_client()
+        with contextlib.redirect_stdout(io.StringIO()):
+            for message in MESSAGES:
+                await client.post('/chat', json={'message': message})
+            await client.post('/chat', json={})
+            await client.get('/static/does-not-exist.png')
+
+            router = manager.agents.pop('router')
+            await client.post('/chat', json={'message': "I need a blood test"})
+            manager.agents['router'] = router
+
+            time.sleep(0.7)  # block the loop past a monitor wakeup so there is lag to see
+            await asyncio.sleep(0.6)
+
+        response = await client.get('/metrics')
+        return {'content_type': response.headers['Content-Type'], 'text': await response.get_data(as_text=True)}
+
+
+def test_endpoint() -> dict:
+    scrape = asyncio.run(exercise())
+    samples = parse(scrape['text'])
+    print(f"  /metrics: {len(samples)} samples, {len(scrape['text']) / 1024:.1f} KB")
+
+    chat_ok = value(samples, 'wellness_http_requests_total', route='/chat', status='200')
+    chat_bad = value(samples, 'wellness_http_requests_total', route='/chat', status='400')
+    static = value(samples, 'wellness_http_requests_total', route='/static/<path:filename>')
+    router_calls = value(samples, 'wellness_llm_calls_total', agent='router')
+    prompt_tokens = value(samples, 'wellness_llm_tokens_total', kind='prompt')
+    completion_tokens = value(samples, 'wellness_llm_tokens_total', kind='completion')
+    lag_count = value(samples, 'wellness_event_loop_lag_seconds_count')
+    lag_max_bucket = value(samples, 'wellness_event_loop_lag_seconds_bucket', le="0.1")
+    print(f"  chat 200/400: {chat_ok:.0f}/{chat_bad:.0f}, router calls {router_calls:.0f}, "
+          f"tokens {prompt_tokens:.0f} prompt / {completion_tokens:.0f} completion")
+
+    return {
+        "text exposition content type": scrape['content_type'].startswith('text/plain; version=0.0.4'),
+        "histograms cumulative and consistent": histograms_consistent(samples),
+        "requests counted per route and status": chat_ok == 6 and chat_bad == 1 and static == 1,
+        "request latency histogram per route": value(samples, 'wellness_http_request_duration_seconds_count',
+                                                     route='/chat') == 7,
+        "model calls counted per agent and outcome": router_calls == 5 and
+                                                     value(samples, 'wellness_llm_calls_total', outcome='ok') > 5,
+        "model latency histogram per agent": value(samples, 'wellness_llm_call_duration_seconds_count',
+                                                   agent='router') == router_calls,
+        "token usage counted": prompt_tokens > completion_tokens > 0,
+        "router decisions counted": value(samples, 'wellness_route_decisions_total', source='router') == 5,
+        "keyword fallback counted": value(samples, 'wellness_route_decisions_total',
+                                          source='keyword_fallback', intent='lab_test') == 1,
+        "cache hit ratios exported": ('wellness_cache_hit_ratio', '{cache="suggestions"}') in samples and
+                                     value(samples, 'wellness_cache_hits_total', cache='policy_answers') >= 0,
+        "FAQ answer cache size and staleness exported": ('wellness_policy_answers_cached', '') in samples and
+                                                        ('wellness_policy_answer_served_age_seconds',
+                                                         '{stat="max"}') in samples and
+                                                        ('wellness_policy_answer_oldest_entry_age_seconds', '') in samples,
+        "live user contexts exported": value(samples, 'wellness_user_contexts') >= 1,
+        "event-loop lag measured": lag_count >= 1 and lag_max_bucket < lag_count
+    }
+
+
+def test_overhead() -> dict:
+    registry = MetricsRegistry()
+    counter = registry.counter('bench_total', 'bench', ('agent', 'outcome'))
+    histogram = registry.histogram('bench_seconds', 'bench', ('agent',))
+    rounds = 100000
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        counter.inc(agent='router', outcome='ok')
+    inc_us = (time.perf_counter() - start) / rounds * 1e6
+
+    start = time.perf_counter()
+    for index in range(rounds):
+        histogram.observe(index / rounds, agent='router')
+    observe_us = (time.perf_counter() - start) / rounds * 1e6
+    print(f"  counter.inc {inc_us:.2f} µs, histogram.observe {observe_us:.2f} µs per update")
+
+    try:
+        registry.gauge('bench_total', 'clash')
+        clash_rejected = False
+    except ValueError:
+        clash_rejected = True
+
+    return {
+        "updates cost microseconds": inc_us < 5 and observe_us < 5,
+        "same metric shared by name": registry.counter('bench_total', 'again', ('agent', 'outcome')) is counter,
+        "conflicting registration rejected": clash_rejected
+    }
+
+
+def main():
+    print(" Testing /metrics endpoint...\n")
+    checks = test_endpoint()
+    checks.update(test_overhead())
+
+    print()
+    for name, passed in checks.items():
+        print(f"  {'PASS' if passed else 'FAIL'}: {name}")
+
+    print("\n" + "=" * 60)
+    if all(checks.values()):
+        print("All metrics checks passed")
+    else:
+        print("Metrics checks FAILED")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# test_model_tiers.py
+"""
+Test - lite / full model tiers per call purpose (agents/model_tiers.py)
+
+Runs turns on the fake model backend, scripting the router and suggestion
+replies, and checks that:
+  - router and suggestion calls go to the lite model, specialists to the full one
+  - a router label outside the intent map, or a bare GENERAL the keywords
+    disagree with, escalates to the full model
+  - too few parseable suggestions escalate; a usable lite answer does not
+  - an escalated call runs in its own full-tier session, apart from the lite one
+  - escalations and per-tier calls are counted, exported on /metrics and
+    summarised on /usage
+  - lite-tier calls are charged at the lite model's prices, not the full model's
+Runs offline - no credentials required.
+"""
+import asyncio
+import contextlib
+import io
+import os
+import sys
+
+os.environ['WELLNESS_MODEL_BACKEND'] = 'fake'
+os.environ.setdefault('WELLNESS_CATALOG_WATCH', 'false')
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from agents.model_backend import FakeBackend
+from agents.model_tiers import DEFAULT_MODELS, ModelTiers, parse_tiers
+from services.token_ledger import MODEL_PRICES
+
+with contextlib.redirect_stdout(io.StringIO()):
+    from web_server import app, manager
+
+LITE_MODEL = DEFAULT_MODELS['lite']
+FULL_MODEL = DEFAULT_MODELS['full']
+
+
+async def turn(message: str, user_id: str, script: dict = None) -> list:
+    """Run one turn on a fresh scripted backend; returns (agent_type, model) per call"""
+    manager.model_backend = FakeBackend(script=script)
+    with contextlib.redirect_stdout(io.StringIO()):
+        await manager.process_message(message, user_id)
+    return [(call['agent_type'], call['model']) for call in manager.model_backend.calls]
+
+
+def test_config() -> dict:
+    off = ModelTiers(tiers=parse_tiers(''))
+    same = ModelTiers(models={'lite': FULL_MODEL})
+    return {
+        "tier spec parsed": parse_tiers("router=lite, suggestions=full,bad,x=huge") ==
+                            {'router': 'lite', 'suggestions': 'full'},
+        "router and suggestions on the lite tier by default": sorted(manager.lite_agents) == ['router', 'suggestions'],
+        "empty spec or identical models disable the lite tier": off.lite_purposes() == [] and
+                                                                 same.lite_purposes() == []
+    }
+
+
+async def test_escalation() -> dict:
+    manager.suggestion_cache = None
+    clean = await turn("Do you have paracetamol?", "tier-clean")
+    malformed = await turn("Do you have paracetamol?", "tier-malformed",
+                           script={'router': ["I think this is about medicines", "PHARMACY"]})
+    router_sessions = [call['session'] for call in manager.model_backend.calls if call['agent_type'] == 'router']
+    unsure = await turn("Do you have paracetamol?", "tier-unsure", script={'router': ["GENERAL", "PHARMACY"]})
+    general = await turn("Hello there", "tier-general", script={'router': ["GENERAL"]})
+    suggestions = await turn("Do you have paracetamol?", "tier-suggestions", script={'suggestions': ["ok"]})
+    print(f"  clean turn: {clean}")
+    print(f"  malformed router label: {malformed[:2]}")
+
+    tiers = manager.model_tiers.summary()['purposes']
+    return {
+        "usable lite answers are kept": clean == [('router', LITE_MODEL), ('pharmacy', FULL_MODEL),
+                                                  ('suggestions', LITE_MODEL)],
+        "unrecognized router label escalates": malformed[:3] == [('router', LITE_MODEL), ('router', FULL_MODEL),
+                                                                 ('pharmacy', FULL_MODEL)],
+        "GENERAL the keywords disagree with escalates": unsure[:3] == [('router', LITE_MODEL), ('router', FULL_MODEL),
+                                                                       ('pharmacy', FULL_MODEL)],
+        "escalated call uses its own session": router_sessions == ['router', 'router:full'],
+        "GENERAL the keywords agree with is kept": [c for c in general if c[0] == 'router'] == [('router', LITE_MODEL)],
+        "malformed suggestions escalate": [c for c in suggestions if c[0] == 'suggestions'] ==
+                                          [('suggestions', LITE_MODEL), ('suggestions', FULL_MODEL)],
+        "escalations counted per reason": tiers['router']['escalations'] == {'unrecognized': 1, 'low_confidence': 1}
+                                          and tiers['suggestions']['escalations'] == {'malformed': 1}
+    }
+
+
+async def test_disabled_escalation() -> dict:
+    manager.model_tiers.escalation = False
+    try:
+        calls = await turn("Do you have paracetamol?", "tier-no-escalation",
+                           script={'router': ["I think this is about medicines"]})
+    finally:
+        manager.model_tiers.escalation = True
+    return {
+        "escalation can be turned off": [c for c in calls if c[0] == 'router'] == [('router', LITE_MODEL)]
+    }
+
+
+async def test_reporting() -> dict:
+    async with app.test_app() as test_app:
+        client = test_app.test_client()
+        scrape = await (await client.get('/metrics')).get_data(as_text=True)
+        usage = await (await client.get('/usage')).get_json()
+    router = usage['model_tiers']['purposes']['router']
+    by_model = usage['by_model']
+    print(f"  /usage router tiers: {router}")
+    print(f"  /usage cost by model: " + ", ".join(f"{model} ${rollup['cost_usd']}" for model, rollup in by_model.items()))
+
+    def priced_at(rollup: dict, model: str) -> float:
+        prompt_price, completion_price = MODEL_PRICES[model]
+        return round((rollup['prompt_tokens'] * prompt_price + rollup['completion_tokens'] * completion_price) / 1e6, 6)
+    return {
+        "escalations on /metrics": 'wellness_model_escalations_total{agent="router",reason="unrecognized"} 1' in scrape,
+        "tier latency on /metrics": 'wellness_model_tier_call_duration_seconds_count{agent="router",tier="lite"}' in scrape,
+        "escalation rate on /usage": router['lite']['calls'] == 6 and router['full']['calls'] == 2 and
+                                     router['escalation_rate'] == round(2 / 6, 4),
+        "lite calls priced at the lite model's rates": by_model[LITE_MODEL]['calls'] > 0 and
+                                                       all(by_model[model]['cost_usd'] == priced_at(by_model[model], model)
+                                                           for model in (LITE_MODEL, FULL_MODEL))
+    }
+
+
+async def main():
+    print(" Testing model tiers...\n")
+    checks = test_config()
+    checks.update(await test_escalation())
+    checks.update(await test_disabled_escalation())
+    checks.update(await test_reporting())
+
+    print()
+    for name, passed in checks.items():
+        print(f"  {'PASS' if passed else 'FAIL'}: {name}")
+
+    print("\n" + "=" * 60)
+    if all(checks.values()):
+        print("All model tier checks passed")
+    else:
+        print("Model tier checks FAILED")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# test_multi_intent.py
+"""
+Test - multi-intent fan-out for compound messages
+
+Runs turns on the fake model backend (fixed 150 ms per model call) and checks that:
+  - a compound message is routed to every specialist it mentions
+  - the specialists run concurrently: the fan-out takes about one call, not three
+  - their answers and cards are merged into one reply, with one suggestion call
+    and one history entry
+  - single-intent messages, WELLNESS_FANOUT=false and keyword routing under load
+    shedding still take the one-specialist path
+Runs offline - no credentials required.
+"""
+import asyncio
+import contextlib
+import io
+import os
+import sys
+
+os.environ['WELLNESS_MODEL_BACKEND'] = 'fake'
+os.environ.setdefault('WELLNESS_CATALOG_WATCH', 'false')
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from agents.model_backend import FakeBackend
+from services.load_shedder import LoadShedder
+
+with contextlib.redirect_stdout(io.StringIO()):
+    from wellness_manager import WellnessManager
+    manager = WellnessManager()
+
+CALL_MS = 150
+COMPOUND = "I have a fever, is paracetamol available and is this covered by insurance?"
+
+
+async def turn(message: str, user_id: str) -> tuple:
+    """Run one turn on a fresh backend; returns (reply, agent types called)"""
+    manager.model_backend = FakeBackend(latency=f"fixed:{CALL_MS}")
+    with contextlib.redirect_stdout(io.StringIO()):
+        reply = await manager.process_message(message, user_id)
+    return reply, [call['agent_type'] for call in manager.model_backend.calls]
+
+
+async def test_fan_out() -> dict:
+    manager.debug_timings = True
+    manager.suggestion_cache = None
+    manager.policy_answer_cache = None
+    reply, calls = await turn(COMPOUND, "multi-compound")
+    stages = reply['timings']['stages']
+    history = manager.user_contexts['multi-compound']['conversation_history']
+    print(f"  calls: {calls}")
+    print(f"  fan-out {stages['fanout']:.0f} ms for {stages['specialist']:.0f} ms of specialist time")
+    return {
+        "compound message routed to each specialist": reply.get('agents') == ['symptom', 'pharmacy', 'policy_analysis'],
+        "one router and one suggestion call": calls.count('router') == 1 and calls.count('suggestions') == 1 and
+                                              sorted(calls[1:4]) == ['pharmacy', 'policy_analysis', 'symptom'],
+        "specialists run concurrently": stages['fanout'] < 1.5 * CALL_MS and stages['specialist'] >= 3 * CALL_MS * 0.9,
+        "answers merged in intent order": reply['response'].index("I'm sorry you're not feeling well") <
+                                          reply['response'].index("Paracetamol (500mg)") <
+                                          reply['response'].index("According to your policy"),
+        "medicine cards and suggestions kept": any(card.get('type') == 'medicine' for card in reply.get('cards', []))
+                                               and bool(reply.get('suggested_replies')),
+        "one history entry for the turn": len(history) == 2 and history[1] == f"Agent: {reply['response']}"
+    }
+
+
+async def test_single_paths() -> dict:
+    single, single_calls = await turn("Do you have paracetamol?", "multi-single")
+
+    manager.fanout = False
+    try:
+        unfanned, _ = await turn(COMPOUND, "multi-off")
+    finally:
+        manager.fanout = True
+
+    shedder = LoadShedder(latency_target_ms=1000)
+    for _ in range(10):
+        shedder.observe_latency(1700)
+    manager.load_shedder = shedder
+    try:
+        shed, shed_calls = await turn(COMPOUND, "multi-shed")
+    finally:
+        manager.load_shedder = LoadShedder.from_env()
+    return {
+        "single intent unchanged": 'agents' not in single and single_calls == ['router', 'pharmacy', 'suggestions'],
+        "WELLNESS_FANOUT=false answers the first intent": 'agents' not in unfanned and unfanned['agent'] == 'symptom',
+        "keyword routing under load does not fan out": 'agents' not in shed and 'router' not in shed_calls
+    }
+
+
+async def main():
+    print(" Testing multi-intent fan-out...\n")
+    checks = await test_fan_out()
+    checks.update(await test_single_paths())
+
+    print()
+    for name, passed in checks.items():
+        print(f"  {'PASS' if passed else 'FAIL'}: {name}")
+
+    print("\n" + "=" * 60)
+    if all(checks.values()):
+        print("All multi-intent checks passed")
+    else:
+        print("Multi-intent checks FAILED")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+# test_offline_pipeline.py
+"""
+Test - full process_message pipeline on the offline fake model backend
+
+Runs scripted conversations through WellnessManager with
+WELLNESS_MODEL_BACKEND=fake and checks that:
+  - agents build and every turn is answered without credentials or network
+  - routing, cards and suggestions come out as in production
+  - replays are deterministic (same replies, routing and card types)
+  - hospital aliases that are ordinary words ('global', 'max') only set a
+    hospital preference while booking
+  - every directory hospital takes bookings; the slot quoted to the scheduling
+    agent (on the requested day and time of day) is the one booked on the card;
+    with no bookable slot the agent is told so and no card is marked shown
+  - scripted replies override the rules
+  - the latency model shapes call latency
+  - the call log is bounded while call counts stay complete
+  - injected model failures degrade to a polite reply instead of crashing
+Runs offline - no credentials required.
+"""
+import asyncio
+import os
+import re
+import sys
+import time
+from datetime import datetime
+
+os.environ['WELLNESS_MODEL_BACKEND'] = 'fake'
+os.environ.setdefault('WELLNESS_CATALOG_WATCH', 'false')
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from agents.model_backend import FakeBackend, LatencyModel
+from services.slot_engine import SlotEngine, preference_window
+from wellness_manager import WellnessManager, AGENT_ERROR_RESPONSE
+
+CONVERSATIONS = {
+    'appointment': [
+        ("I have fever and a bad headache since yesterday", 'symptom', None),
+        ("Can I book an appointment with a doctor?", 'scheduling', None),
+        ("I'm in Delhi", 'scheduling', 'hospital'),
+        ("Apollo Hospital", 'scheduling', None),
+        ("Tomorrow morning works", 'scheduling', 'booking_confirmation'),
+    ],
+    'pharmacy': [
+        ("Do you have paracetmol?", 'pharmacy', 'medicine'),
+        ("I want to order paracetamol", 'pharmacy', None),
+        ("2 strips please", 'pharmacy', None),
+    ],
+    'lab': [
+        ("I want to book a blood test", 'lab_test', None),
+    ],
+    'insurance': [
+        ("What is my sum insured?", 'policy_analysis', None),
+    ],
+}
+
+
+async def run_conversations(manager: WellnessManager) -> list:
+    """(conversation, message, agent, card types, reply) for every turn"""
+    turns = []
+    for name, conversation in CONVERSATIONS.items():
+        for message, _, _ in conversation:
+            result = await manager.process_message(message, f"offline-{name}")
+            turns.append((name, message, result['agent'], [card['type'] for card in result.get('cards', [])],
+                          result['response'], result.get('suggested_replies', [])))
+    return turns
+
+
+async def test_pipeline() -> dict:
+    manager = WellnessManager()
+    await manager.initialize()
+    first = await run_conversations(manager)
+    replay = await run_conversations(WellnessManager())
+
+    expected = [(agent, card) for conversation in CONVERSATIONS.values() for _, agent, card in conversation]
+    routed = all(turn[2] == agent for turn, (agent, _) in zip(first, expected))
+    cards = all(card is None or card in turn[3] for turn, (_, card) in zip(first, expected))
+    for turn, (agent, card) in zip(first, expected):
+        if turn[2] != agent or (card and card not in turn[3]):
+            print(f"  unexpected: {turn[1]!r} -> {turn[2]} {turn[3]} (wanted {agent} {card})")
+
+    # Hospital aliases such as 'global' or 'max' are ordinary words outside a booking
+    await manager.process_message("Is treatment abroad covered under my global health cover?", "offline-aliases")
+    booked = manager.user_contexts['offline-appointment']['shared_memory']['scheduling_info']
+    aliases = manager.user_contexts['offline-aliases']['shared_memory'].get('scheduling_info', {})
+
+    return {
+        "all agents built without credentials": len(manager.agents) == 8,
+        "backend is the fake": manager.model_backend.name == 'fake',
+        "every turn answered": all(turn[4] and turn[4] != AGENT_ERROR_RESPONSE for turn in first),
+        "turns routed to the expected agents": routed,
+        "expected cards shown": cards,
+        "suggestions generated": all(turn[5] for turn in first),
+        "replay is deterministic": [t[:5] for t in first] == [t[:5] for t in replay],
+        "hospital choice tracked while booking": booked.get('hospital_preference') == 'Apollo Hospital',
+        "hospital words ignored outside booking": 'hospital_preference' not in aliases
+    }
+
+
+async def test_script_and_latency() -> dict:
+    manager = WellnessManager()
+    manager.model_backend = FakeBackend(
+        latency="fixed:30",
+        script={'symptom': ["Scripted symptom reply - how long has this been going on?"]}
+    )
+    start = time.perf_counter()
+    result = await manager.process_message("I have a bad cough", "offline-script")
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    calls = len(manager.model_backend.calls)
+
+    backend = FakeBackend(latency="lognormal:200:0.5", seed=7)
+    samples = sorted(backend.latency.sample_ms(backend._rng('u', 'a')) for _ in range(2000))
+    median = samples[len(samples) // 2]
+    p95 = samples[int(len(samples) * 0.95)]
+    print(f"  lognormal:200:0.5 -> p50 {median:.0f} ms, p95 {p95:.0f} ms")
+
+    bounded = FakeBackend(max_calls=5)
+    for index in range(8):
+        await bounded.generate(None, "Do you have paracetamol?", f"offline-bounded-{index}", 'pharmacy')
+
+    try:
+        LatencyModel("gamma:1")
+        bad_spec_rejected = False
+    except ValueError:
+        bad_spec_rejected = True
+
+    return {
+        "scripted reply used": result['response'].startswith("Scripted symptom reply"),
+        "fixed latency applied per call": elapsed_ms >= 30 * calls,
+        "lognormal latency has the requested median and a tail": 180 <= median <= 220 and p95 > 1.8 * median,
+        "bad latency spec rejected": bad_spec_rejected,
+        "call log bounded, counts complete": len(bounded.calls) == 5 and bounded.stats()['calls'] == 8
+    }
+
+
+BOOKING_TURNS = [
+    ("Can I book an appointment with a doctor?", "Which city are you in?"),
+    ("I'm in Mumbai", "Please choose the hospital you would like to visit."),
+    ("Lilavati Hospital", "What time would you prefer?"),
+    ("Tomorrow morning works", "Your appointment is confirmed. Please arrive 15 minutes early."),
+]
+
+
+async def book_appointment(manager: WellnessManager, user_id: str) -> tuple:
+    """Run BOOKING_TURNS; returns (last reply, last scheduling prompt)"""
+    prompts = []
+
+    def scheduling_reply(text):
+        return lambda prompt: prompts.append(prompt) or text
+
+    manager.model_backend = FakeBackend(script={'scheduling': [scheduling_reply(text) for _, text in BOOKING_TURNS]})
+    for message, _ in BOOKING_TURNS:
+        result = await manager.process_message(message, user_id)
+    return result, prompts[-1]
+
+
+async def test_appointment_booking() -> dict:
+    manager = WellnessManager()
+    unbookable = [h['hospital_id'] for h in manager.directory.hospitals()
+                  if h['hospital_id'] not in manager.slot_engine.hospitals]
+
+    result, prompt = await book_appointment(manager, "offline-booking")
+    scheduling_info = manager.user_contexts['offline-booking']['shared_memory']['scheduling_info']
+    booked = scheduling_info.get('booked_slot') or {}
+    quoted = re.search(r"Date: (.+)\n.*Time: (.+)\n", prompt)
+    # Doctors have no Sunday sessions - then any free slot is offered instead
+    wanted = manager.slot_engine.find_free_slots('lilavati_mumbai', booked.get('department'), limit=1,
+                                                 **preference_window('Tomorrow Morning', datetime.now()))
+    print(f"  quoted {quoted.groups() if quoted else None}, booked {booked.get('date')} {booked.get('time')}")
+
+    # The same conversation at a hospital with no inventory
+    full_engine = manager.slot_engine
+    manager.slot_engine = SlotEngine({'hospitals': []})
+    no_slot, no_slot_prompt = await book_appointment(manager, "offline-no-slots")
+    no_slot_info = manager.user_contexts['offline-no-slots']['shared_memory']['scheduling_info']
+    shown_without_card = no_slot_info.get('confirmation_shown', False)
+    manager.slot_engine = full_engine
+    manager.model_backend = FakeBackend(script={'scheduling': ["Your appointment is confirmed."]})
+    retried = await manager.process_message("Tomorrow morning is fine", "offline-no-slots")
+
+    return {
+        "every directory hospital takes bookings": not unbookable,
+        "time preference keeps day and time of day": scheduling_info.get('time_preference') == 'Tomorrow Morning',
+        "booking card shown": [card['type'] for card in result.get('cards', [])] == ['booking_confirmation'],
+        "booked slot is the one quoted to the agent": quoted is not None and booked.get('slot_id') and
+                                                      quoted.groups() == (booked['date'], booked['time']),
+        "booked on the requested day and time of day": not wanted or (booked.get('date') == wanted[0]['date'] and
+                                                                      booked.get('time', '').endswith('AM')),
+        "agent told when no slot can be booked": 'NO BOOKABLE SLOT' in no_slot_prompt and 'RESERVED SLOT' not in no_slot_prompt,
+        "no card marked shown until one is made": not no_slot.get('cards') and not shown_without_card and
+                                                  [card['type'] for card in retried.get('cards', [])] ==
+                                                  ['booking_confirmation']
+    }
+
+
+async def test_error_injection() -> dict:
+    manager = WellnessManager()
+    manager.model_backend = FakeBackend(error_rate=1.0)
+    result = await manager.process_message("I have fever", "offline-errors")
+
+    flaky = WellnessManager()
+    flaky.model_backend = FakeBackend(error_rate=0.3, seed=3)
+    answered = 0
+    for index in range(20):
+        reply = await flaky.process_message("Do you have paracetamol?", f"offline-flaky-{index}")
+        answered += bool(reply.get('response'))
+    stats = flaky.model_backend.stats()
+    print(f"  30% error rate: {stats['errors']}/{stats['calls']} calls failed, {answered}/20 turns answered")
+
+    return {
+        "failing model degrades to a reply": bool(result.get('response')) and 'agent' in result,
+        "injected failures are recorded": all(call['error'] for call in manager.model_backend.calls),
+        "partial failures never break a turn": answered == 20 and 0 < stats['errors'] < stats['calls']
+    }
+
+
+async def main():
+    print(" Testing offline pipeline on the fake model backend...\n")
+    checks = await test_pipeline()
+    checks.update(await test_script_and_latency())
+    checks.update(await test_appointment_booking())
+    checks.update(await test_error_injection())
+
+    print()
+    for name, passed in checks.items():
+        print(f"  {'PASS' if passed else 'FAIL'}: {name}")
+
+    print("\n" + "=" * 60)
+    if all(checks.values()):
+        print("All offline pipeline checks passed")
+    else:
+        print("Offline pipeline checks FAILED")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -11,15 +11,20 @@ print(" Checking environment variables...")
 has_creds = os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
 has_api_key = os.getenv("GOOGLE_API_KEY")
 
-if not has_creds and not has_api_key:
+offline = os.getenv("WELLNESS_MODEL_BACKEND", "adk").lower() == "fake"
+
+if not has_creds and not has_api_key and not offline:
     print(" ERROR: No Google Cloud credentials found!")
     print("Please create a .env file with either:")
     print("  GOOGLE_APPLICATION_CREDENTIALS=/path/to/service-account.json")
     print("  OR")
     print("  GOOGLE_API_KEY=your_api_key")
+    print("  OR run offline with WELLNESS_MODEL_BACKEND=fake")
     sys.exit(1)
 
-if has_creds:
+if offline:
+    print("Using the offline fake model backend")
+elif has_creds:
     print(f" Using service account: {has_creds}")
     if not os.path.exists(has_creds):
         print(f" ERROR: Service account file not found at: {has_creds}")
@@ -28,7 +33,7 @@ else:
     print(f"Using API key authentication")
 
 # NOW it's safe to import WellnessManager
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from wellness_manager import WellnessManager
 
 # Sample insurance analysis data
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# test_policy_answer_cache.py
+"""
+Test - FAQ answer cache for insurance questions (services/policy_answer_cache.py)
+
+Checks the cache on its own:
+  - exact and near-duplicate questions hit, unrelated ones miss
+  - entries are scoped to a policy version, expire after their TTL and are
+    evicted oldest first
+  - follow-up questions that lean on earlier turns are not cacheable
+and through WellnessManager on the fake model backend:
+  - an answer computed with one user's conversation context is never stored,
+    so it cannot be served to another user
+  - an answer from a context-free prompt is stored and served without a model call
+Runs offline - no credentials required.
+"""
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import time
+
+os.environ['WELLNESS_MODEL_BACKEND'] = 'fake'
+os.environ.setdefault('WELLNESS_CATALOG_WATCH', 'false')
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from agents.model_backend import FakeBackend
+from services.policy_answer_cache import PolicyAnswerCache, policy_version
+
+with contextlib.redirect_stdout(io.StringIO()):
+    from wellness_manager import WellnessManager
+    manager = WellnessManager()
+
+QUESTION = "Does my policy cover knee replacement abroad?"
+
+
+def test_cache() -> dict:
+    cache = PolicyAnswerCache(similarity_threshold=0.6)
+    v1 = policy_version({'policy_number': 'P-1'})
+    v2 = policy_version({'policy_number': 'P-2'})
+    cache.store("Is knee replacement covered abroad?", v1, "Answer for P-1")
+
+    exact = cache.lookup("is knee replacement covered abroad", v1)
+    similar = cache.lookup("Is knee replacement surgery covered abroad?", v1)
+    unrelated = cache.lookup("What is the maternity waiting period?", v1)
+    other_version = cache.lookup("Is knee replacement covered abroad?", v2)
+
+    expiring = PolicyAnswerCache(ttl_seconds=0.05)
+    expiring.store("Is knee replacement covered abroad?", v1, "old")
+    time.sleep(0.1)
+    expired = expiring.lookup("Is knee replacement covered abroad?", v1)
+
+    bounded = PolicyAnswerCache(max_entries=2)
+    bounded.store("Is cataract covered?", v1, "cataract")
+    bounded.store("Is dialysis covered?", v1, "dialysis")
+    bounded.lookup("Is cataract covered?", v1)
+    bounded.store("Is hernia covered?", v1, "hernia")
+
+    return {
+        "exact question hits": exact == "Answer for P-1",
+        "near-duplicate question hits": similar == "Answer for P-1" and cache.stats['similar_hits'] == 1,
+        "unrelated question misses": unrelated is None,
+        "other policy version misses": other_version is None and cache.stats['misses'] == 2,
+        "expired answer not served": expired is None and expiring.stats['expired'] == 1,
+        "least recently used answer evicted": bounded.lookup("Is dialysis covered?", v1) is None and
+                                              bounded.lookup("Is cataract covered?", v1) == "cataract" and
+                                              bounded.stats['evictions'] == 1,
+        "referential follow-ups not cacheable": not cache.is_cacheable("Is that covered too?") and
+                                                cache.is_cacheable(QUESTION)
+    }
+
+
+def personal_reply(prompt: str) -> str:
+    """Policy agent reply that leans on the user's context when the prompt carries it"""
+    if 'diabetes' in prompt.lower():
+        return "Knee replacement abroad isn't covered; with your diabetes, ask about the domestic network."
+    return "Knee replacement is covered in India only; treatment abroad isn't covered."
+
+
+async def ask(message: str, user_id: str) -> tuple:
+    """One turn; returns (reply text, policy agent calls made)"""
+    manager.model_backend = FakeBackend(script={'policy_analysis': [personal_reply] * 3})
+    with contextlib.redirect_stdout(io.StringIO()):
+        reply = await manager.process_message(message, user_id)
+    calls = [call for call in manager.model_backend.calls if call['agent_type'] == 'policy_analysis']
+    return reply['response'], len(calls)
+
+
+async def test_user_scoping() -> dict:
+    manager.suggestion_cache = None
+    manager.policy_answer_cache = PolicyAnswerCache()
+    cache = manager.policy_answer_cache
+
+    await ask("I have diabetes and my knee hurts", "faq-personal")
+    personal, personal_calls = await ask(QUESTION, "faq-personal")
+    stored_after_personal = len(cache)
+
+    fresh, fresh_calls = await ask(QUESTION, "faq-fresh")
+    other, other_calls = await ask(QUESTION, "faq-other")
+    print(f"  personal answer: {personal}")
+    print(f"  shared answer:   {other}")
+
+    return {
+        "answer with user context computed by the agent": personal_calls == 1 and 'diabetes' in personal,
+        "answer with user context not stored": stored_after_personal == 0,
+        "context-free answer stored": fresh_calls == 1 and len(cache) == 1,
+        "stored answer served without a model call": other_calls == 0 and other == fresh,
+        "no user's context leaks into the shared answer": 'diabetes' not in other
+    }
+
+
+async def main():
+    print(" Testing policy answer cache...\n")
+    checks = test_cache()
+    checks.update(await test_user_scoping())
+
+    print()
+    for name, passed in checks.items():
+        print(f"  {'PASS' if passed else 'FAIL'}: {name}")
+
+    print("\n" + "=" * 60)
+    if all(checks.values()):
+        print("All policy answer cache checks passed")
+    else:
+        print("Policy answer cache checks FAILED")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# test_policy_store.py
+"""
+Test - per-user policy uploads (services/policy_store.py, POST /policy)
+
+Checks the store on its own:
+  - a byte-identical re-upload is not parsed again, and the same policy in
+    another form shares one content-addressed entry
+  - unrecognizable uploads are rejected
+  - a user whose policy entry was evicted still gets their own policy (it is
+    rebuilt), never the default; removing it falls back to the default
+and through the web server:
+  - POST /policy attaches the policy to the session user, whose insurance
+    questions are then answered from it; bad uploads get a 400
+Runs offline - no credentials required.
+"""
+import asyncio
+import contextlib
+import io
+import json
+import os
+import sys
+
+os.environ['WELLNESS_MODEL_BACKEND'] = 'fake'
+os.environ.setdefault('WELLNESS_CATALOG_WATCH', 'false')
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.policy_store import PolicyStore
+
+DEFAULT_POLICY = {'policy_details': {'policy_name': 'Default Plan', 'sum_insured': '₹3,00,000'}}
+
+
+def uploaded_policy(number: int) -> dict:
+    """An analysis document as the policy analyzer produces it"""
+    return {
+        'extracted_policy': {
+            'policy_details': {'policy_name': f'Uploaded Plan {number}', 'sum_insured': f'₹{number},00,000',
+                               'policy_number': 'Not specified'},
+            'waiting_periods': {'initial': '30 days'}
+        },
+        'plain_summary': f'Plan {number} summary',
+        'confidence_score': 0.9
+    }
+
+
+def test_store() -> dict:
+    store = PolicyStore(DEFAULT_POLICY, max_documents=2)
+    first = store.load('user-1', uploaded_policy(5))
+    store.load('user-1', json.dumps(uploaded_policy(5)))
+    store.load('user-2', uploaded_policy(5))
+    parses_after_duplicates = store.stats['parses']
+    documents_after_duplicates = len(store)
+
+    try:
+        store.load('user-bad', {'message': 'not a policy'})
+        rejected = False
+    except ValueError:
+        rejected = True
+
+    store.load('user-3', uploaded_policy(7))
+    store.load('user-4', uploaded_policy(9))
+    evicted = store.stats['evictions']
+    rebuilt = store.get('user-1')
+
+    store.remove('user-4')
+    return {
+        "identical uploads share one entry": parses_after_duplicates == 2 and store.stats['raw_hits'] == 1 and
+                                             store.stats['content_hits'] == 1 and documents_after_duplicates == 2,
+        "placeholder values dropped": 'policy_number' not in first['policy']['policy_details'],
+        "unrecognizable upload rejected": rejected and not store.has_upload('user-bad'),
+        "evicted policy rebuilt for its user": evicted >= 1 and store.stats['rebuilds'] == 1 and
+                                               rebuilt['version'] == first['version'] and
+                                               rebuilt['summary'] == 'Plan 5 summary' and
+                                               rebuilt['engine'] is not None,
+        "evicted user never served the default": store.get('user-2')['policy']['policy_details']['policy_name'] ==
+                                                 'Uploaded Plan 5',
+        "removed upload falls back to the default": not store.has_upload('user-4') and
+                                                    store.get('user-4')['version'] == store.default_version,
+        "entries stay bounded": len(store) <= store.max_documents + 1
+    }
+
+
+async def test_upload_endpoint() -> dict:
+    with contextlib.redirect_stdout(io.StringIO()):
+        from web_server import app, manager
+    manager.policy_answer_cache = None
+    async with app.test_app() as test_app:
+        client = test_app.test_client()
+        with contextlib.redirect_stdout(io.StringIO()):
+            await client.post('/chat', json={'message': "Hello"})
+            uploaded = await client.post('/policy', json=uploaded_policy(42))
+            reply = await (await client.post('/chat', json={'message': "What is my sum insured?"})).get_json()
+            other = await (await test_app.test_client().post(
+                '/chat', json={'message': "What is my sum insured?"})).get_json()
+        invalid = await client.post('/policy', json={'message': 'not a policy'})
+        empty = await client.post('/policy', json={})
+    print(f"  uploaded policy answer: {reply['response'][:80]}")
+    return {
+        "POST /policy accepts an analysis": uploaded.status_code == 200 and
+                                            (await uploaded.get_json()) == {'status': 'loaded'},
+        "session user answered from the upload": '₹42,00,000' in reply['response'],
+        "other users keep the default policy": '₹42,00,000' not in other['response'],
+        "bad uploads rejected": invalid.status_code == 400 and empty.status_code == 400
+    }
+
+
+async def main():
+    print(" Testing policy store...\n")
+    checks = test_store()
+    checks.update(await test_upload_endpoint())
+
+    print()
+    for name, passed in checks.items():
+        print(f"  {'PASS' if passed else 'FAIL'}: {name}")
+
+    print("\n" + "=" * 60)
+    if all(checks.values()):
+        print("All policy store checks passed")
+    else:
+        print("Policy store checks FAILED")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
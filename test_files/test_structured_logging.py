@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# test_structured_logging.py
+"""
+Test - structured, sampled, queue-backed logging (services/structured_log.py)
+
+Checks that:
+  - keyword arguments become fields in text and JSON output
+  - a default turn writes one INFO line and nothing to stdout on the event loop;
+    the card / intent dumps only appear at DEBUG
+  - per-category sampling thins info records but never warnings
+  - a slow sink does not slow the logging call, and a full queue drops records
+    instead of blocking
+Runs offline - no credentials required.
+"""
+import asyncio
+import contextlib
+import io
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+os.environ['WELLNESS_MODEL_BACKEND'] = 'fake'
+os.environ.setdefault('WELLNESS_CATALOG_WATCH', 'false')
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from agents.model_backend import FakeBackend
+from services.structured_log import configure_logging, dropped_records, flush_logging, get_logger
+from wellness_manager import WellnessManager
+
+
+class ListHandler(logging.Handler):
+    def __init__(self, delay: float = 0.0, gate: threading.Event = None):
+        super().__init__()
+        self.lines = []
+        self.delay = delay
+        self.gate = gate
+
+    def emit(self, record):
+        if self.gate is not None:
+            self.gate.wait()
+        if self.delay:
+            time.sleep(self.delay)
+        self.lines.append((record.name, record.levelname, self.format(record)))
+
+
+def test_formats() -> dict:
+    text = ListHandler()
+    configure_logging(level='INFO', fmt='text', handler=text)
+    get_logger('routing').info("Router detected", intent='PHARMACY', route='pharmacy')
+    flush_logging()
+
+    json_sink = ListHandler()
+    configure_logging(level='INFO', fmt='json', handler=json_sink)
+    get_logger('routing').warning("Router failed", error=ValueError("bad"))
+    flush_logging()
+    entry = json.loads(json_sink.lines[0][2]) if json_sink.lines else {}
+    return {
+        "text lines carry fields": text.lines == [('wellness.routing', 'INFO',
+                                                   'I routing: Router detected intent=PHARMACY route=pharmacy')],
+        "json lines carry severity and fields": entry.get('severity') == 'WARNING' and
+                                                entry.get('category') == 'routing' and entry.get('error') == 'bad'
+    }
+
+
+def test_turns() -> dict:
+    with contextlib.redirect_stdout(io.StringIO()):
+        manager = WellnessManager()
+    manager.model_backend = FakeBackend()
+
+    def run(level: str) -> tuple:
+        sink = ListHandler()
+        configure_logging(level=level, handler=sink)
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            asyncio.run(manager.process_message("I need a blood test", f"log-{level}"))
+            asyncio.run(manager.process_message("I'm in Mumbai", f"log-{level}"))
+        flush_logging()
+        return sink.lines, stdout.getvalue()
+
+    info_lines, info_stdout = run('INFO')
+    debug_lines, _ = run('DEBUG')
+    categories = {name for name, _, _ in debug_lines}
+    print(f"  INFO: {len(info_lines)} records for 2 turns; DEBUG: {len(debug_lines)} records")
+    return {
+        "one INFO line per turn": [name for name, _, _ in info_lines] == ['wellness.turn', 'wellness.turn'],
+        "nothing printed on the event loop": info_stdout == '',
+        "dumps only at DEBUG": {'wellness.cards', 'wellness.routing', 'wellness.context'} <= categories
+    }
+
+
+def test_sampling() -> dict:
+    sink = ListHandler()
+    configure_logging(level='INFO', sample='turn=0.2,cards=0', handler=sink)
+    for index in range(2000):
+        get_logger('turn').info("Turn", index=index)
+    get_logger('cards').info("dropped")
+    get_logger('cards').warning("kept")
+    get_logger('booking').info("kept")
+    flush_logging()
+    turns = sum(1 for name, _, _ in sink.lines if name == 'wellness.turn')
+    others = [line for name, _, line in sink.lines if name != 'wellness.turn']
+    print(f"  sampled turn=0.2: {turns}/2000 kept")
+    return {
+        "category sampled at its rate": 300 < turns < 500,
+        "warnings and unsampled categories kept": len(others) == 2 and all('kept' in line for line in others)
+    }
+
+
+def test_non_blocking() -> dict:
+    slow = ListHandler(delay=0.05)
+    configure_logging(level='INFO', handler=slow)
+    log = get_logger('turn')
+    start = time.perf_counter()
+    for index in range(20):
+        log.info("Turn", index=index)
+    call_ms = (time.perf_counter() - start) * 1000
+    flush_logging()
+
+    gate = threading.Event()
+    blocked = ListHandler(gate=gate)
+    configure_logging(level='INFO', queue_size=10, handler=blocked)
+    start = time.perf_counter()
+    for index in range(200):
+        log.info("Turn", index=index)
+    full_ms = (time.perf_counter() - start) * 1000
+    dropped = dropped_records()
+    gate.set()
+    flush_logging()
+    configure_logging()
+    print(f"  20 records to a 50 ms sink in {call_ms:.1f} ms; 200 into a full queue in {full_ms:.1f} ms, "
+          f"{dropped} dropped")
+    return {
+        "slow sink does not slow callers": call_ms < 50 and len(slow.lines) == 20,
+        "full queue drops instead of blocking": full_ms < 100 and dropped >= 185
+    }
+
+
+def main():
+    print(" Testing structured logging...\n")
+    checks = test_formats()
+    checks.update(test_turns())
+    checks.update(test_sampling())
+    checks.update(test_non_blocking())
+
+    print()
+    for name, passed in checks.items():
+        print(f"  {'PASS' if passed else 'FAIL'}: {name}")
+
+    print("\n" + "=" * 60)
+    if all(checks.values()):
+        print("All structured logging checks passed")
+    else:
+        print("Structured logging checks FAILED")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
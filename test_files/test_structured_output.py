@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# test_structured_output.py
+"""
+Test - structured specialist replies (services/structured_output.py)
+
+Checks parse_structured_reply on fenced, prose-wrapped, partial and invalid
+JSON, split_suggestion_trailer on inline-suggestion replies (with a missing
+marker or an empty trailer), and runs structured-mode turns on the fake model
+backend to check that:
+  - the reply text and suggested replies come from one specialist call
+  - entities (location, hospital, time, symptoms, selected medicine) and the
+    confirmation flag are applied to the shared context, and a hospital named
+    in a reply replaces the booking hospital chosen earlier
+  - an unparseable structured reply falls back to the raw text
+Runs offline - no credentials required.
+"""
+import asyncio
+import contextlib
+import io
+import json
+import os
+import sys
+
+os.environ['WELLNESS_MODEL_BACKEND'] = 'fake'
+os.environ.setdefault('WELLNESS_CATALOG_WATCH', 'false')
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from agents.model_backend import FakeBackend
+from services.structured_output import SUGGESTION_TRAILER_MARKER, parse_structured_reply, split_suggestion_trailer
+
+with contextlib.redirect_stdout(io.StringIO()):
+    from wellness_manager import WellnessManager
+    manager = WellnessManager()
+
+SUGGESTIONS = ["What should I bring to the appointment?", "Can I reschedule it later?"]
+
+SCHEDULING_REPLY = json.dumps({
+    'reply': "Your appointment at Apollo Hospital is confirmed for tomorrow morning.",
+    'step': 'confirmed',
+    'entities': {
+        'location': 'delhi',
+        'hospital': 'Apollo Hospital',
+        'time_preference': 'tomorrow morning',
+        'symptoms': ['Fever'],
+        'medicines': [],
+        'visit_type': None
+    },
+    'confirmation': {'confirmed': True, 'booking_id': None},
+    'suggested_replies': SUGGESTIONS
+})
+
+
+def test_parsing() -> dict:
+    plain = parse_structured_reply('{"reply": "Hello there", "step": "greeting"}')
+    fenced = parse_structured_reply('```json\n{"reply": "Fenced reply", "step": "answering"}\n```')
+    wrapped = parse_structured_reply('Sure! {"reply": "Wrapped reply", "suggested_replies": ["Is it covered?", "ok"]} Hope that helps')
+    partial = parse_structured_reply('{"reply": "Cut off mid-way", "entities": {"location": "Del')
+    odd_fields = parse_structured_reply(json.dumps({
+        'reply': "Odd fields", 'step': 'dancing', 'entities': {'location': 'null', 'visit_type': 'Home visit',
+                                                                'medicines': ['Crocin', {'name': 'Dolo', 'available': 'yes'}]},
+        'confirmation': 'yes'
+    }))
+
+    return {
+        "plain JSON parsed": plain is not None and plain['reply'] == "Hello there" and plain['step'] == 'greeting',
+        "markdown fences stripped": fenced is not None and fenced['reply'] == "Fenced reply",
+        "surrounding prose ignored": wrapped is not None and wrapped['reply'] == "Wrapped reply" and
+                                     wrapped['suggested_replies'] == ["Is it covered?"],
+        "partial JSON rejected": partial is None,
+        "invalid replies rejected": all(parse_structured_reply(raw) is None for raw in
+                                        ("", "Just some text", "[1, 2, 3]", '{"step": "greeting"}',
+                                         '{"reply": null}', '{"reply": "x",}')),
+        "fields normalized": odd_fields['step'] == 'other' and odd_fields['entities']['location'] is None and
+                             odd_fields['entities']['visit_type'] == 'home' and
+                             odd_fields['entities']['medicines'] == [{'name': 'Crocin', 'available': None},
+                                                                    {'name': 'Dolo', 'available': None}] and
+                             odd_fields['confirmation'] == {'confirmed': False, 'booking_id': None},
+        "confirmed step implies confirmation": parse_structured_reply(SCHEDULING_REPLY)['confirmation']['confirmed']
+    }
+
+
+def test_trailer() -> dict:
+    reply, suggestions = split_suggestion_trailer(
+        f"Paracetamol is in stock.\n{SUGGESTION_TRAILER_MARKER}\n- How many tablets can I take?\n"
+        f"2. \"Is there a generic version?\"\n- ok\n- How many tablets can I take?"
+    )
+    spaced = split_suggestion_trailer("Rest and drink fluids.\n<<< Suggestions >>>\n* When should I see a doctor?")
+    missing = split_suggestion_trailer("  Rest and drink fluids.\n- When should I see a doctor?  ")
+    empty = split_suggestion_trailer(f"Rest and drink fluids.\n{SUGGESTION_TRAILER_MARKER}\n\n")
+    no_reply = split_suggestion_trailer(f"{SUGGESTION_TRAILER_MARKER}\nWhen should I see a doctor?")
+
+    return {
+        "trailer split from the reply": reply == "Paracetamol is in stock." and
+                                        suggestions == ["How many tablets can I take?", "Is there a generic version?"],
+        "marker matched loosely": spaced == ("Rest and drink fluids.", ["When should I see a doctor?"]),
+        "missing marker keeps the whole reply": missing == ("Rest and drink fluids.\n- When should I see a doctor?", []),
+        "empty trailer gives no suggestions": empty == ("Rest and drink fluids.", []),
+        "trailer without a reply keeps the raw text": no_reply[1] == [] and SUGGESTION_TRAILER_MARKER in no_reply[0],
+        "empty output passed through": split_suggestion_trailer("") == ("", [])
+    }
+
+
+async def test_structured_turns() -> dict:
+    manager.structured_output = True
+    manager.suggestion_cache = None
+    try:
+        manager.model_backend = FakeBackend(script={'scheduling': [SCHEDULING_REPLY]})
+        with contextlib.redirect_stdout(io.StringIO()):
+            reply = await manager.process_message("I want to book a doctor appointment", "structured-booking")
+        calls = [call['agent_type'] for call in manager.model_backend.calls]
+        shared = manager.user_contexts['structured-booking']['shared_memory']
+        scheduling_info = shared['scheduling_info']
+
+        context = manager._get_user_context('structured-pharmacy')
+        manager.model_backend = FakeBackend(script={'pharmacy': [json.dumps({
+            'reply': "How many strips of Paracetamol would you like?",
+            'step': 'awaiting_quantity',
+            'entities': {'medicine_selected': 'Paracetamol (500mg)'}
+        })]})
+        pharmacy_text = await manager._call_specialist(manager.agents['pharmacy'], "I'll take paracetamol",
+                                                       'structured-pharmacy', 'pharmacy', context)
+        manager._apply_structured_fields(context['current_structured'], context, 'pharmacy')
+
+        switch_context = manager._get_user_context('structured-switch')
+        switch_context['shared_memory']['scheduling_info'] = {
+            'location': 'Delhi', 'hospital_preference': 'Apollo Hospital', 'hospital_id': 'apollo_delhi'}
+        switch_reply = parse_structured_reply(json.dumps({
+            'reply': "Sure, let's book at Max instead.", 'entities': {'hospital': 'Max Super Specialty Hospital'}}))
+        manager._apply_structured_fields(switch_reply, switch_context, 'scheduling')
+        switched = dict(switch_context['shared_memory']['scheduling_info'])
+        unknown_reply = parse_structured_reply(json.dumps({
+            'reply': "Noted.", 'entities': {'hospital': 'Sunshine Clinic'}}))
+        manager._apply_structured_fields(unknown_reply, switch_context, 'scheduling')
+        unknown = switch_context['shared_memory']['scheduling_info']
+
+        fallback_context = manager._get_user_context('structured-fallback')
+        manager.model_backend = FakeBackend(script={'pharmacy': ["Paracetamol is in stock."]})
+        fallback_text = await manager._call_specialist(manager.agents['pharmacy'], "Do you have paracetamol?",
+                                                       'structured-fallback', 'pharmacy', fallback_context)
+    finally:
+        manager.structured_output = False
+
+    print(f"  structured turn calls: {calls}")
+    print(f"  scheduling info: {scheduling_info}")
+    return {
+        "reply text taken from the JSON": reply['response'].startswith("Your appointment at Apollo Hospital"),
+        "suggestions come from the same call": reply['suggested_replies'] == SUGGESTIONS and 'suggestions' not in calls,
+        "scheduling entities applied": scheduling_info.get('location') == 'Delhi' and
+                                       scheduling_info.get('hospital_preference') == 'Apollo Hospital' and
+                                       scheduling_info.get('time_preference') == 'tomorrow morning',
+        "confirmation applied": scheduling_info.get('appointment_confirmed') is True,
+        "hospital switch updates the booking hospital": switched.get('hospital_id') == 'max_delhi' and
+                                                        manager._appointment_hospital_id(switched) == 'max_delhi',
+        "unknown hospital clears the old booking hospital": 'hospital_id' not in unknown and
+                                                            unknown['hospital_preference'] == 'Sunshine Clinic',
+        "symptoms applied": 'fever' in shared['symptoms_discussed'],
+        "selected medicine applied": pharmacy_text.startswith("How many strips") and
+                                     context['shared_memory']['pharmacy_info']['medicine_selected'] == 'Paracetamol (500mg)',
+        "unparseable reply falls back to text": fallback_text == "Paracetamol is in stock." and
+                                                fallback_context['current_structured'] is None
+    }
+
+
+async def main():
+    print(" Testing structured output...\n")
+    checks = test_parsing()
+    checks.update(test_trailer())
+    checks.update(await test_structured_turns())
+
+    print()
+    for name, passed in checks.items():
+        print(f"  {'PASS' if passed else 'FAIL'}: {name}")
+
+    print("\n" + "=" * 60)
+    if all(checks.values()):
+        print("All structured output checks passed")
+    else:
+        print("Structured output checks FAILED")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
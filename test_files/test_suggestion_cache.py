@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# test_suggestion_cache.py
+"""
+Test - shared suggested-reply cache (services/suggestion_cache.py)
+
+Checks the cache on its own:
+  - entries expire after their TTL and the least recently used bucket is evicted
+  - stale entries are served while one background refresh regenerates them
+  - the refresh runs outside the triggering turn's context (token ledger turn,
+    trace), so it is not charged to or recorded into that turn
+and through WellnessManager on the fake model backend:
+  - the cache is off unless WELLNESS_SUGGESTION_CACHE=true
+  - suggestion prompts are built from the state signature, never from a
+    user's messages, and a second user in the same state is served from cache
+  - a background refresh is charged to the system account, not to a user
+Runs offline - no credentials required.
+"""
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import time
+
+os.environ['WELLNESS_MODEL_BACKEND'] = 'fake'
+os.environ.setdefault('WELLNESS_CATALOG_WATCH', 'false')
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from agents.model_backend import FakeBackend
+from services.suggestion_cache import SuggestionCache
+from services.token_ledger import SYSTEM_ACCOUNT, TokenLedger
+from services.tracing import Tracer, span
+
+with contextlib.redirect_stdout(io.StringIO()):
+    from wellness_manager import WellnessManager
+    manager = WellnessManager()
+
+SUGGESTIONS = ["What medicine should I take?", "When should I see a doctor?"]
+
+
+def test_ttl_and_lru() -> dict:
+    expiring = SuggestionCache(ttl_seconds=0.05)
+    expiring.put(('symptom',), SUGGESTIONS)
+    fresh, _ = expiring.get(('symptom',))
+    time.sleep(0.1)
+    expired, _ = expiring.get(('symptom',))
+
+    bounded = SuggestionCache(max_entries=2)
+    bounded.put(('symptom',), SUGGESTIONS)
+    bounded.put(('pharmacy',), SUGGESTIONS)
+    bounded.get(('symptom',))
+    bounded.put(('scheduling',), SUGGESTIONS)
+
+    return {
+        "fresh entry served": fresh == SUGGESTIONS,
+        "expired entry dropped": expired is None and expiring.stats['expired'] == 1 and len(expiring) == 0,
+        "least recently used bucket evicted": bounded.get(('pharmacy',))[0] is None and
+                                              bounded.get(('symptom',))[0] == SUGGESTIONS and
+                                              bounded.stats['evictions'] == 1
+    }
+
+
+async def test_refresh() -> dict:
+    cache = SuggestionCache(ttl_seconds=60, refresh_after_seconds=0)
+    cache.put(('symptom',), ["Old suggestion one", "Old suggestion two"])
+    tracer, token_ledger = Tracer(), TokenLedger()
+
+    async def generate():
+        with span('refresh'):
+            await asyncio.sleep(0.01)
+        token_ledger.record('refresh-user', 'suggestions', 100, 20)
+        return SUGGESTIONS
+
+    turn_calls = token_ledger.begin_turn('turn-user')
+    trace = tracer.begin_turn()
+    with span('suggestions'):
+        stale, needs_refresh = cache.get(('symptom',))
+        started = cache.schedule_refresh(('symptom',), generate)
+        duplicate = cache.schedule_refresh(('symptom',), generate)
+    await asyncio.gather(*cache._tasks)
+    tracer.end_turn(trace)
+    token_ledger.end_turn('symptom')
+
+    refreshed, _ = cache.get(('symptom',))
+    return {
+        "stale entry served while refreshing": stale == ["Old suggestion one", "Old suggestion two"] and needs_refresh,
+        "one refresh per bucket at a time": started and not duplicate,
+        "refresh replaces the entry": refreshed == SUGGESTIONS and cache.stats['refreshes'] == 1,
+        "refresh runs outside the turn's trace": 'refresh' not in trace.stage_totals(),
+        "refresh not charged to the triggering turn": turn_calls == [] and
+                                                      token_ledger.user_usage('refresh-user')['calls'] == 1
+    }
+
+
+async def test_shared_buckets() -> dict:
+    prompts = []
+
+    def suggestions_reply(prompt: str) -> str:
+        prompts.append(prompt)
+        return '\n'.join(f"- {suggestion}" for suggestion in SUGGESTIONS)
+
+    off_by_default = manager.suggestion_cache is None
+    manager.suggestion_cache = SuggestionCache()
+    manager.model_backend = FakeBackend(script={'suggestions': [suggestions_reply] * 4})
+    with contextlib.redirect_stdout(io.StringIO()):
+        first = await manager.process_message("I have a fever since my trip to Goa", "cache-first")
+        second = await manager.process_message("I have had a fever for two days", "cache-second")
+    calls = [call['agent_type'] for call in manager.model_backend.calls]
+    prompts_before_refresh = len(prompts)
+
+    # A stale bucket served to a third user is refreshed in the background
+    manager.suggestion_cache.refresh_after_seconds = 0
+    with contextlib.redirect_stdout(io.StringIO()):
+        await manager.process_message("My fever is back", "cache-third")
+        await asyncio.gather(*manager.suggestion_cache._tasks)
+    system_usage = manager.token_ledger.user_usage(SYSTEM_ACCOUNT)
+    ledger_users = [user['user'] for user in manager.token_ledger.summary(top_users=100)['top_users']]
+    print(f"  suggestion prompt: {prompts[0].strip().splitlines()[:3] if prompts else None}")
+
+    return {
+        "cache off by default": off_by_default,
+        "first user in a state generates suggestions": prompts_before_refresh == 1 and first['suggested_replies'] == SUGGESTIONS,
+        "second user in the same state served from cache": calls.count('suggestions') == 1 and
+                                                           second['suggested_replies'] == SUGGESTIONS,
+        "suggestion prompt carries no user messages": bool(prompts) and 'goa' not in prompts[0].lower()
+                                                      and 'fever since' not in prompts[0].lower(),
+        "refresh charged to the system account": manager.suggestion_cache.stats['refreshes'] == 1 and
+                                                 system_usage is not None and system_usage['calls'] == 1 and
+                                                 not any(user.endswith('_suggestions') for user in ledger_users)
+    }
+
+
+async def main():
+    print(" Testing suggestion cache...\n")
+    checks = test_ttl_and_lru()
+    checks.update(await test_refresh())
+    checks.update(await test_shared_buckets())
+
+    print()
+    for name, passed in checks.items():
+        print(f"  {'PASS' if passed else 'FAIL'}: {name}")
+
+    print("\n" + "=" * 60)
+    if all(checks.values()):
+        print("All suggestion cache checks passed")
+    else:
+        print("Suggestion cache checks FAILED")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# test_token_ledger.py
+"""
+Test - token usage and cost accounting (services/token_ledger.py)
+
+Runs turns on the fake model backend and checks that:
+  - every model call's tokens and cost roll up per agent, per user and per turn type
+  - suggestion calls (made under a derived session id) are charged to the turn's user
+  - each call is priced at its model's rates; unpriced models use the defaults
+  - per-user rollups are bounded and budget windows roll over
+  - a user over budget gets the cheaper paths: keyword routing, no suggestion
+    call, a single policy section - and other users are unaffected
+  - /usage serves the rollups without user ids, /usage/me the session user's
+    own usage and remaining budget
+Runs offline - no credentials required.
+"""
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import time
+
+os.environ['WELLNESS_MODEL_BACKEND'] = 'fake'
+os.environ.setdefault('WELLNESS_CATALOG_WATCH', 'false')
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from agents.model_backend import FakeBackend
+from services.token_ledger import TokenLedger, parse_prices
+from wellness_manager import WellnessManager
+
+
+def new_manager(budget: int = 0) -> WellnessManager:
+    os.environ['WELLNESS_USER_TOKEN_BUDGET'] = str(budget)
+    os.environ['WELLNESS_DEBUG_TIMINGS'] = 'true'
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            manager = WellnessManager()
+    finally:
+        del os.environ['WELLNESS_USER_TOKEN_BUDGET']
+        del os.environ['WELLNESS_DEBUG_TIMINGS']
+    manager.model_backend = FakeBackend()
+    return manager
+
+
+async def quiet_turn(manager: WellnessManager, message: str, user_id: str) -> dict:
+    with contextlib.redirect_stdout(io.StringIO()):
+        return await manager.process_message(message, user_id)
+
+
+def test_model_prices() -> dict:
+    ledger = TokenLedger(prompt_price=1.0, completion_price=2.0,
+                         model_prices={'full-model': (0.10, 0.40), 'lite-model': (0.075, 0.30)})
+    full = ledger.record('dave', 'router', 1000, 100, model='full-model')
+    lite = ledger.record('dave', 'router', 1000, 100, model='lite-model')
+    unpriced = ledger.record('dave', 'router', 1000, 100, model='other-model')
+    by_model = ledger.summary()['by_model']
+    return {
+        "price spec parsed": parse_prices("a=0.075:0.30, b=1:x,bad,=1:2") == {'a': (0.075, 0.30)},
+        "lite call priced at lite rates": abs(lite['cost_usd'] - (1000 * 0.075 + 100 * 0.30) / 1e6) < 1e-12 and
+                                          lite['cost_usd'] < full['cost_usd'],
+        "unpriced model uses default prices": abs(unpriced['cost_usd'] - (1000 * 1.0 + 100 * 2.0) / 1e6) < 1e-12,
+        "rolled up per model": sorted(by_model) == ['full-model', 'lite-model', 'other-model'] and
+                               by_model['lite-model']['calls'] == 1
+    }
+
+
+def test_ledger() -> dict:
+    ledger = TokenLedger(prompt_price=1.0, completion_price=2.0, user_budget=100, window_seconds=0.2, max_users=2)
+    ledger.begin_turn('alice')
+    ledger.record('alice', 'router', 40, 2)
+    ledger.record('alice_suggestions', 'suggestions', 30, 10, estimated=True)
+    turn = ledger.end_turn('pharmacy')
+    ledger.record('bob', 'router', 5, 1)
+    ledger.record('carol', 'router', 5, 1)
+
+    summary = ledger.summary()
+    over = ledger.over_budget('alice')
+    time.sleep(0.25)
+    return {
+        "turn usage summed": turn['total_tokens'] == 82 and turn['calls'] == 2,
+        "cost from per-million prices": abs(turn['cost_usd'] - (70 * 1.0 + 12 * 2.0) / 1e6) < 1e-12,
+        "rolled up per agent": summary['by_agent']['suggestions']['estimated_calls'] == 1 and
+                               summary['by_agent']['router']['calls'] == 3,
+        "rolled up per turn type": summary['by_turn_type']['pharmacy']['tokens_per_turn'] == 82,
+        "derived session charged to the turn's user": 'alice_suggestions' not in
+                                                      [user['user'] for user in summary['top_users']],
+        "per-user rollups bounded": summary['budget']['users_tracked'] == 2 and ledger.user_usage('alice') is None,
+        "budget window rolls over": not over and ledger.over_budget('carol') is False
+    }
+
+
+async def test_manager_accounting() -> dict:
+    manager = new_manager()
+    await quiet_turn(manager, "Do you have paracetamol?", "acct-user")
+    result = await quiet_turn(manager, "What is my sum insured?", "acct-user")
+    summary = manager.token_ledger.summary()
+    user = manager.token_ledger.user_usage("acct-user")
+    print(f"  by turn type: " + ", ".join(f"{name} {usage['tokens_per_turn']:.0f} tok/turn"
+                                          for name, usage in summary['by_turn_type'].items()))
+    print(f"  acct-user: {user['total_tokens']} tokens, ${user['cost_usd']:.6f}")
+    return {
+        "every call accounted": summary['totals']['calls'] == len(manager.model_backend.calls),
+        "calls charged to the chat user": [u['user'] for u in summary['top_users']] == ["acct-user"],
+        "turn types recorded": {'pharmacy', 'policy_analysis'} <= set(summary['by_turn_type']),
+        "turn usage attached in debug mode": result['usage']['total_tokens'] > 0 and not result['usage']['degraded'],
+        "token metric matches ledger": sum(
+            manager.llm_tokens.value(agent=agent, kind=kind) for agent in summary['by_agent']
+            for kind in ('prompt', 'completion')) >= summary['totals']['total_tokens']
+    }
+
+
+async def test_budget() -> dict:
+    manager = new_manager(budget=200)
+    first = await quiet_turn(manager, "Do you have paracetamol?", "heavy-user")
+    calls_before = len(manager.model_backend.calls)
+    second = await quiet_turn(manager, "I want to order paracetamol", "heavy-user")
+    degraded_calls = [call['agent_type'] for call in list(manager.model_backend.calls)[calls_before:]]
+    light = await quiet_turn(manager, "Do you have paracetamol?", "light-user")
+    light_calls = [call['agent_type'] for call in manager.model_backend.calls
+                   if call['user_id'].startswith("light-user")]
+    degraded_turns = manager.token_ledger.summary()['budget']['degraded_turns']
+    manager.token_ledger.begin_turn("heavy-user", degraded=True)
+    degraded_policy = manager._policy_prompt_json("What is my room rent limit?", "heavy-user")
+    manager.token_ledger.end_turn(None)
+    full_policy = manager._policy_prompt_json("What is my room rent limit?", "heavy-user")
+    print(f"  degraded turn calls: {degraded_calls}; normal user: {light_calls}")
+    print(f"  policy prompt: {len(full_policy)} chars normally, {len(degraded_policy)} over budget")
+
+    return {
+        "first turn not degraded": not first['usage']['degraded'],
+        "over-budget turn degraded": second['usage']['degraded'] and second['response'],
+        "router and suggestion calls skipped": degraded_calls == ['pharmacy'] and second.get('suggested_replies'),
+        "routing falls back to keywords": manager.route_decisions.value(source='budget', intent='pharmacy') == 1,
+        "other users unaffected": 'router' in light_calls and not light['usage']['degraded'],
+        "fewer policy sections over budget": len(degraded_policy) < len(full_policy),
+        "degraded turns counted": degraded_turns == 1
+    }
+
+
+async def test_endpoint() -> dict:
+    with contextlib.redirect_stdout(io.StringIO()):
+        from web_server import app
+    async with app.test_app() as test_app:
+        client = test_app.test_client()
+        with contextlib.redirect_stdout(io.StringIO()):
+            await client.post('/chat', json={'message': "Do you have paracetamol?"})
+        summary = await (await client.get('/usage')).get_json()
+        mine = await client.get('/usage/me')
+        stranger = await test_app.test_client().get('/usage/me')
+    return {
+        "/usage serves rollups": summary['totals']['calls'] > 0 and 'pharmacy' in summary['by_turn_type'],
+        "/usage lists no user ids": 'top_users' not in summary,
+        "/usage/me serves only the session user": mine.status_code == 200 and
+                                                  (await mine.get_json())['calls'] > 0 and
+                                                  stranger.status_code == 404
+    }
+
+
+async def main():
+    print(" Testing token usage and cost accounting...\n")
+    checks = test_ledger()
+    checks.update(test_model_prices())
+    checks.update(await test_manager_accounting())
+    checks.update(await test_budget())
+    checks.update(await test_endpoint())
+
+    print()
+    for name, passed in checks.items():
+        print(f"  {'PASS' if passed else 'FAIL'}: {name}")
+
+    print("\n" + "=" * 60)
+    if all(checks.values()):
+        print("All token ledger checks passed")
+    else:
+        print("Token ledger checks FAILED")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# test_turn_tracing.py
+"""
+Test - per-turn stage timing (services/tracing.py)
+
+Runs turns on the fake model backend with per-agent latencies and checks that:
+  - histogram percentiles track exact percentiles
+  - every turn is broken into route / prompt / specialist / update_context /
+    suggestions / cards / format spans, with model calls nested inside them
+  - debug mode attaches the spans to the response
+  - the aggregated stats point at the stage that really dominates p95
+  - concurrent turns keep separate traces
+  - a disabled tracer adds nothing
+  - a turn that raises is still closed: its trace and token usage are rolled up
+Runs offline - no credentials required.
+"""
+import asyncio
+import contextlib
+import os
+import random
+import sys
+
+os.environ['WELLNESS_MODEL_BACKEND'] = 'fake'
+os.environ.setdefault('WELLNESS_CATALOG_WATCH', 'false')
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from agents.model_backend import FakeBackend
+from services.tracing import LatencyHistogram, Tracer, span
+from wellness_manager import WellnessManager
+
+AGENT_LATENCY = {'router': 'fixed:40', 'suggestions': 'fixed:5', 'pharmacy': 'fixed:15'}
+TURN_STAGES = {'route', 'prompt', 'specialist', 'update_context', 'suggestions', 'format'}
+
+
+def test_histogram() -> dict:
+    rng = random.Random(1)
+    values = sorted(rng.lognormvariate(5.5, 0.6) for _ in range(5000))
+    histogram = LatencyHistogram()
+    for value in values:
+        histogram.observe(value)
+    errors = {pct: abs(histogram.percentile(pct) - values[int(pct / 100 * len(values)) - 1]) /
+              values[int(pct / 100 * len(values)) - 1] for pct in (50, 95, 99)}
+    print(f"  histogram relative error: " + ", ".join(f"p{pct} {err:.1%}" for pct, err in errors.items()))
+    return {
+        "histogram percentiles within 10%": all(err < 0.10 for err in errors.values()),
+        "histogram max exact": histogram.max == values[-1]
+    }
+
+
+def new_manager(debug: bool = True, tracing: bool = True) -> WellnessManager:
+    os.environ['WELLNESS_DEBUG_TIMINGS'] = 'true' if debug else 'false'
+    os.environ['WELLNESS_TRACING'] = 'true' if tracing else 'false'
+    with open(os.devnull, 'w') as quiet, contextlib.redirect_stdout(quiet):
+        manager = WellnessManager()
+    manager.model_backend = FakeBackend(agent_latency=AGENT_LATENCY)
+    return manager
+
+
+async def quiet_turn(manager: WellnessManager, message: str, user_id: str) -> dict:
+    with open(os.devnull, 'w') as quiet, contextlib.redirect_stdout(quiet):
+        return await manager.process_message(message, user_id)
+
+
+async def test_turn_spans() -> dict:
+    manager = new_manager()
+    result = await quiet_turn(manager, "Do you have paracetamol?", "trace-user")
+    timings = result.get('timings', {})
+    spans = timings.get('spans', [])
+    names = {s['name'] for s in spans}
+    router_span = next((s for s in spans if s['name'] == 'model.router'), {})
+    top_level_ms = sum(s['ms'] for s in spans if s['parent'] is None)
+    print(f"  pharmacy turn: {timings.get('total_ms')} ms; stages {timings.get('stages')}")
+
+    for index in range(30):
+        await quiet_turn(manager, "Do you have paracetamol?", f"trace-{index}")
+    stats = manager.tracer.stats()
+    dominant = max((name for name in stats if 'share' in stats[name]), key=lambda name: stats[name]['p95_ms'])
+    shares = sum(stage['share'] for stage in stats.values() if 'share' in stage)
+    print(f"  p95 by stage: " + ", ".join(f"{name} {stats[name]['p95_ms']:.1f}" for name in sorted(stats)))
+
+    return {
+        "turn split into stages": TURN_STAGES <= names and 'cards' in names,
+        "model calls nested in their stage": router_span.get('parent') == 'route',
+        "router span matches its latency": 40 <= router_span.get('ms', 0) < 80,
+        "stages account for the turn": top_level_ms <= timings['total_ms'] and top_level_ms > 0.9 * timings['total_ms'],
+        "histograms cover every turn": stats['turn']['count'] == 31 and stats['route']['count'] == 31,
+        "router identified as the p95 stage": dominant == 'route',
+        "top-level shares do not overlap": 0.9 < shares <= 1.0 + 1e-9
+    }
+
+
+async def test_concurrency_and_off() -> dict:
+    manager = new_manager()
+    with open(os.devnull, 'w') as quiet, contextlib.redirect_stdout(quiet):
+        results = await asyncio.gather(*(manager.process_message("Do you have paracetamol?", f"concurrent-{index}")
+                                         for index in range(20)))
+    separate = all(sum(1 for s in r['timings']['spans'] if s['name'] == 'route') == 1 and
+                   r['timings']['total_ms'] < 200 for r in results)
+
+    no_debug = new_manager(debug=False)
+    plain = await quiet_turn(no_debug, "Do you have paracetamol?", "no-debug")
+
+    disabled = new_manager(tracing=False)
+    off = await quiet_turn(disabled, "Do you have paracetamol?", "tracing-off")
+
+    outside = Tracer()
+    with span('orphan'):
+        pass
+
+    failing = new_manager()
+
+    async def broken_route(*args):
+        with span('route'):
+            await failing._call_agent(failing.agents['router'], "hello", "failing-turn", 'router')
+        raise RuntimeError("routing failed")
+
+    failing._route_message = broken_route
+    try:
+        await failing.process_message("Do you have paracetamol?", "failing-turn")
+        raised = False
+    except RuntimeError:
+        raised = True
+
+    return {
+        "concurrent turns keep separate traces": separate,
+        "timings only attached in debug mode": 'timings' not in plain and no_debug.tracer.stats()['turn']['count'] == 1,
+        "disabled tracer records nothing": 'timings' not in off and disabled.tracer.stats() == {},
+        "spans outside a turn are no-ops": outside.stats() == {},
+        "failed turn still closed": raised and failing.tracer.stats().get('turn', {}).get('count') == 1 and
+                                    failing.token_ledger.stats['turns'] == 1 and
+                                    failing.token_ledger.summary()['by_turn_type']['none']['calls'] == 1
+    }
+
+
+async def main():
+    print(" Testing per-turn stage timing...\n")
+    checks = test_histogram()
+    checks.update(await test_turn_spans())
+    checks.update(await test_concurrency_and_off())
+
+    print()
+    for name, passed in checks.items():
+        print(f"  {'PASS' if passed else 'FAIL'}: {name}")
+
+    print("\n" + "=" * 60)
+    if all(checks.values()):
+        print("All turn tracing checks passed")
+    else:
+        print("Turn tracing checks FAILED")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
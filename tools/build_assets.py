@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# tools/build_assets.py
+"""
+Build responsive, content-hashed variants of the medicine images
+
+For every image in static/images/medicine this writes WebP and JPEG copies
+at the widths a medicine card needs (1x/2x/4x of its display width) to
+static/build/medicine, named <image>-<width>.<content hash>.<ext>, plus
+static/build/manifest.json mapping each original URL to its variants.
+The web server serves static/build with immutable far-future caching, and
+medicine cards carry srcset attributes built from the manifest.
+
+Unchanged images are skipped (the manifest records each source's hash) and
+variants no longer referenced are deleted. Requires Pillow (build-time only).
+
+Usage:
+    python tools/build_assets.py [--source DIR] [--out DIR]
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import sys
+
+from PIL import Image
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCE_DIR = os.path.join(ROOT, 'static', 'images', 'medicine')
+BUILD_DIR = os.path.join(ROOT, 'static', 'build')
+
+# URLs the web server serves the source images and build output under
+SOURCE_URL = '/static/images/medicine/'
+VARIANT_URL = '/static/build/medicine/'
+
+# Medicine cards show images 96 CSS px wide (see .medicine-image in style.css)
+CARD_DISPLAY_WIDTH = 96
+WIDTHS = (CARD_DISPLAY_WIDTH, CARD_DISPLAY_WIDTH * 2, CARD_DISPLAY_WIDTH * 4)
+
+FORMATS = {
+    'webp': {'format': 'WEBP', 'quality': 80, 'method': 6},
+    'jpeg': {'format': 'JPEG', 'quality': 82, 'optimize': True, 'progressive': True}
+}
+EXTENSIONS = {'webp': 'webp', 'jpeg': 'jpg'}
+SOURCE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+
+def sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def flatten(image: Image.Image) -> Image.Image:
+    """RGB copy, with any transparency composited onto white (JPEG has no alpha)"""
+    if image.mode in ('RGBA', 'LA', 'P'):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.split()[-1])
+        return background
+    return image.convert('RGB')
+
+
+def build_image(source_path: str, out_dir: str) -> dict:
+    """Write every variant of one image and return its manifest entry"""
+    with open(source_path, 'rb') as f:
+        source_bytes = f.read()
+    stem = os.path.splitext(os.path.basename(source_path))[0]
+    image = flatten(Image.open(io.BytesIO(source_bytes)))
+
+    # Never upscale: widths beyond the original collapse to the original width
+    widths = sorted({min(width, image.width) for width in WIDTHS})
+    entry = {
+        'source_sha256': sha256(source_bytes),
+        'source_bytes': len(source_bytes),
+        'width': image.width,
+        'height': image.height,
+        'display_width': CARD_DISPLAY_WIDTH,
+        'jpeg': [],
+        'webp': []
+    }
+    for width in widths:
+        height = max(1, round(image.height * width / image.width))
+        resized = image.resize((width, height), Image.LANCZOS) if width != image.width else image
+        for kind, options in FORMATS.items():
+            buffer = io.BytesIO()
+            resized.save(buffer, **options)
+            data = buffer.getvalue()
+            path = os.path.join(out_dir, f"{stem}-{width}.{sha256(data)[:12]}.{EXTENSIONS[kind]}")
+            if not os.path.exists(path):
+                with open(path, 'wb') as f:
+                    f.write(data)
+            entry[kind].append({'url': VARIANT_URL + os.path.basename(path), 'width': width, 'bytes': len(data)})
+    return entry
+
+
+def build(source_dir: str = SOURCE_DIR, build_dir: str = BUILD_DIR) -> dict:
+    """
+    Build variants for every image in source_dir
+
+    Returns:
+        The manifest that was written
+    """
+    out_dir = os.path.join(build_dir, 'medicine')
+    os.makedirs(out_dir, exist_ok=True)
+    manifest_path = os.path.join(build_dir, 'manifest.json')
+    try:
+        with open(manifest_path, encoding='utf-8') as f:
+            previous = json.load(f).get('images', {})
+    except (OSError, ValueError):
+        previous = {}
+
+    images = {}
+    built = skipped = 0
+    for name in sorted(os.listdir(source_dir)):
+        if not name.lower().endswith(SOURCE_EXTENSIONS):
+            continue
+        source_path = os.path.join(source_dir, name)
+        url = SOURCE_URL + name
+        with open(source_path, 'rb') as f:
+            source_hash = sha256(f.read())
+
+        old = previous.get(url)
+        outputs_exist = old and all(
+            os.path.exists(os.path.join(out_dir, os.path.basename(variant['url'])))
+            for kind in FORMATS for variant in old.get(kind, [])
+        )
+        if old and old.get('source_sha256') == source_hash and old.get('display_width') == CARD_DISPLAY_WIDTH \
+                and outputs_exist:
+            images[url] = old
+            skipped += 1
+        else:
+            images[url] = build_image(source_path, out_dir)
+            built += 1
+
+    # Drop variants nothing references any more
+    referenced = {os.path.basename(variant['url']) for entry in images.values()
+                  for kind in FORMATS for variant in entry[kind]}
+    removed = 0
+    for name in os.listdir(out_dir):
+        if name not in referenced:
+            os.remove(os.path.join(out_dir, name))
+            removed += 1
+
+    manifest = {'version': 1, 'images': images}
+    temp_path = manifest_path + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(temp_path, manifest_path)
+
+    original = sum(entry['source_bytes'] for entry in images.values())
+    variants = sum(variant['bytes'] for entry in images.values() for kind in FORMATS for variant in entry[kind])
+    print(f"✓ {len(images)} images ({built} built, {skipped} unchanged, {removed} stale variants removed)")
+    print(f"  originals {original / 1024:.0f} KB -> all variants {variants / 1024:.0f} KB in {out_dir}")
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--source', default=SOURCE_DIR, help="Directory of original images")
+    parser.add_argument('--out', default=BUILD_DIR, help="Build output directory (served under /static/build)")
+    args = parser.parse_args()
+    if not os.path.isdir(args.source):
+        print(f" ERROR: source directory not found: {args.source}")
+        sys.exit(1)
+    build(args.source, args.out)
+
+
+if __name__ == "__main__":
+    main()
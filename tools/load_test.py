@@ -0,0 +1,444 @@
+#!/usr/bin/env python3
+# tools/load_test.py
+"""
+Load test - concurrent simulated users through scripted conversations
+
+Drives N simulated users through multi-turn flows (symptom -> scheduling,
+pharmacy order, lab test booking, insurance Q&A) and reports throughput,
+per-stage latency percentiles, error rate, model tier escalations and memory
+growth.
+
+Targets:
+    direct  WellnessManager.process_message in this process
+    asgi    POST /chat through the Quart app in this process (routing,
+            sessions and JSON encoding included, no sockets)
+    http    POST /chat on a running web_server.py (--url)
+
+In-process targets run on the fake model backend (WELLNESS_MODEL_BACKEND=fake)
+with the latency model from --latency, so results measure this codebase, not
+the LLM provider. Load shedding is off for them unless --shed is given. For
+--target http, start the server with the same settings:
+
+    WELLNESS_MODEL_BACKEND=fake WELLNESS_FAKE_LATENCY=lognormal:400:0.5 python web_server.py
+
+Usage:
+    python tools/load_test.py [--target direct|asgi|http] [--users 200] [--ramp 5]
+                              [--latency lognormal:400:0.5] [--error-rate 0.02]
+                              [--flows pharmacy_order,lab_test] [--shed] [--json report.json]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import gc
+import http.cookiejar
+import json
+import os
+import random
+import resource
+import sys
+import time
+import tracemalloc
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+# Each flow is a list of (stage, message); stages are reported as flow/stage
+FLOWS = {
+    'symptom_to_scheduling': [
+        ('symptom', "I have fever and a bad headache since yesterday"),
+        ('severity', "It's about 101F and I feel tired"),
+        ('book', "Can I book an appointment with a doctor?"),
+        ('location', "I'm in Delhi"),
+        ('hospital', "Apollo Hospital"),
+        ('time', "Tomorrow morning works"),
+    ],
+    'pharmacy_order': [
+        ('availability', "Do you have paracetmol?"),
+        ('order', "I want to order paracetamol"),
+        ('quantity', "2 strips please"),
+    ],
+    'lab_test': [
+        ('request', "I want to book a blood test"),
+        ('location', "I'm in Delhi"),
+        ('visit_type', "Home collection please"),
+        ('time', "Tomorrow at 8 am"),
+    ],
+    'insurance_qa': [
+        ('sum_insured', "What is my sum insured?"),
+        ('coverage', "Is maternity covered under my policy?"),
+        ('waiting_period', "What is the waiting period for pre-existing diseases?"),
+    ],
+}
+
+# Replies process_message gives when a turn failed without raising
+FAILURE_REPLIES = (
+    "I'm having trouble responding.",
+    "I apologize, I'm having trouble right now. Could you try again?",
+    "I'm having some technical issues right now. Please try again.",
+)
+
+
+# ==================== MEASUREMENT ====================
+
+def percentile(ordered: list, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))]
+
+
+def summarize(latencies_ms: list) -> dict:
+    ordered = sorted(latencies_ms)
+    return {
+        'count': len(ordered),
+        'mean_ms': sum(ordered) / len(ordered) if ordered else 0.0,
+        'p50_ms': percentile(ordered, 50),
+        'p90_ms': percentile(ordered, 90),
+        'p95_ms': percentile(ordered, 95),
+        'p99_ms': percentile(ordered, 99),
+        'max_ms': ordered[-1] if ordered else 0.0
+    }
+
+
+def rss_mb() -> float:
+    """Current resident set size (falls back to peak RSS where /proc is unavailable)"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+# ==================== TARGETS ====================
+
+class DirectTarget:
+    """process_message on an in-process WellnessManager"""
+
+    name = 'direct'
+
+    def __init__(self):
+        from wellness_manager import WellnessManager
+        self.manager = WellnessManager()
+
+    async def start(self):
+        await self.manager.initialize()
+
+    def session(self, user_id: str):
+        async def send(message: str) -> dict:
+            return await self.manager.process_message(message, user_id)
+        return send
+
+    async def stop(self):
+        await self.manager.close()
+
+
+class AsgiTarget(DirectTarget):
+    """POST /chat through the Quart app, one cookie session per user"""
+
+    name = 'asgi'
+
+    def __init__(self):
+        from web_server import app, manager
+        self.app = app
+        self.manager = manager
+
+    async def start(self):
+        await self.app.startup()
+
+    def session(self, user_id: str):
+        client = self.app.test_client()
+
+        async def send(message: str) -> dict:
+            response = await client.post('/chat', json={'message': message})
+            if response.status_code != 200:
+                raise RuntimeError(f"HTTP {response.status_code}")
+            return await response.get_json()
+        return send
+
+    async def stop(self):
+        await self.app.shutdown()
+
+
+class HttpTarget:
+    """POST /chat on a running server, one cookie jar per user"""
+
+    name = 'http'
+    manager = None
+
+    def __init__(self, url: str, users: int, timeout: float):
+        self.url = url.rstrip('/') + '/chat'
+        self.timeout = timeout
+        self.pool = ThreadPoolExecutor(max_workers=max(1, users))
+
+    async def start(self):
+        pass
+
+    def session(self, user_id: str):
+        opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+
+        def post(message: str) -> dict:
+            body = json.dumps({'message': message}).encode('utf-8')
+            request = urllib.request.Request(self.url, data=body, headers={'Content-Type': 'application/json'})
+            with opener.open(request, timeout=self.timeout) as response:
+                return json.loads(response.read().decode('utf-8'))
+
+        async def send(message: str) -> dict:
+            return await asyncio.get_running_loop().run_in_executor(self.pool, post, message)
+        return send
+
+    async def stop(self):
+        self.pool.shutdown(wait=False)
+
+
+# ==================== LOAD GENERATION ====================
+
+async def simulate_user(target, index: int, flow_name: str, args, results: list):
+    """Run one user through one flow, recording every turn"""
+    rng = random.Random(f"{args.seed}:{index}")
+    if args.ramp:
+        await asyncio.sleep(args.ramp * index / args.users)
+    send = target.session(f"load-{args.seed}-{index}")
+
+    for stage, message in FLOWS[flow_name]:
+        start = time.perf_counter()
+        error = None
+        try:
+            reply = await send(message)
+            if not reply.get('response') or reply['response'] in FAILURE_REPLIES:
+                error = 'degraded reply'
+        except Exception as e:
+            error = type(e).__name__
+        results.append({
+            'flow': flow_name,
+            'stage': f"{flow_name}/{stage}",
+            'latency_ms': (time.perf_counter() - start) * 1000,
+            'error': error
+        })
+        if args.think_ms:
+            await asyncio.sleep(rng.uniform(0.5, 1.5) * args.think_ms / 1000)
+
+
+async def run_load(target, args) -> dict:
+    """Drive args.users users through the selected flows and build the report"""
+    flows = args.flows
+    results = []
+    await target.start()
+
+    manager = target.manager
+    gc.collect()
+    rss_before = rss_mb()
+    contexts_before = len(manager.user_contexts) if manager else 0
+    if args.trace_memory:
+        tracemalloc.start()
+    heap_before = tracemalloc.take_snapshot() if args.trace_memory else None
+
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        simulate_user(target, index, flows[index % len(flows)], args, results)
+        for index in range(args.users)
+    ))
+    elapsed = time.perf_counter() - start
+
+    gc.collect()
+    memory = {
+        # With --target http the server is another process; only the load generator is measured here
+        'process': 'server' if manager else 'load generator',
+        'rss_before_mb': rss_before,
+        'rss_after_mb': rss_mb(),
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+    }
+    memory['rss_growth_mb'] = memory['rss_after_mb'] - memory['rss_before_mb']
+    if args.trace_memory:
+        growth = tracemalloc.take_snapshot().compare_to(heap_before, 'lineno')
+        memory['heap_growth_kb'] = sum(stat.size_diff for stat in growth) / 1024
+        memory['top_allocations'] = [
+            f"{stat.traceback[0].filename}:{stat.traceback[0].lineno} {stat.size_diff / 1024:+.0f} KB"
+            for stat in growth[:5]
+        ]
+        tracemalloc.stop()
+    if manager:
+        memory['user_contexts_retained'] = len(manager.user_contexts) - contexts_before
+        memory['rss_per_user_kb'] = memory['rss_growth_mb'] * 1024 / args.users
+
+    await target.stop()
+
+    stages = {}
+    for result in results:
+        stages.setdefault(result['stage'], []).append(result)
+    errors = [result for result in results if result['error']]
+    report = {
+        'target': target.name,
+        'users': args.users,
+        'flows': flows,
+        'latency': args.latency,
+        'elapsed_s': elapsed,
+        'turns': len(results),
+        'turns_per_s': len(results) / elapsed if elapsed else 0.0,
+        'conversations_per_s': args.users / elapsed if elapsed else 0.0,
+        'error_rate': len(errors) / len(results) if results else 0.0,
+        'errors': {},
+        'overall': summarize([result['latency_ms'] for result in results]),
+        'stages': {
+            stage: dict(summarize([r['latency_ms'] for r in turns]),
+                        errors=sum(1 for r in turns if r['error']))
+            for stage, turns in stages.items()
+        },
+        'memory': memory
+    }
+    for error in errors:
+        report['errors'][error['error']] = report['errors'].get(error['error'], 0) + 1
+
+    backend = getattr(manager, 'model_backend', None)
+    if backend is not None and hasattr(backend, 'calls'):
+        calls = {}
+        for call in backend.calls:
+            calls.setdefault(call['agent_type'], []).append(call['latency_ms'])
+        report['model_calls'] = {agent: summarize(latencies) for agent, latencies in sorted(calls.items())}
+        report['model_calls_per_turn'] = backend.stats()['calls'] / len(results) if results else 0.0
+    tracer = getattr(manager, 'tracer', None)
+    if tracer is not None and tracer.enabled:
+        report['stage_timings'] = tracer.stats()
+    shedder = getattr(manager, 'load_shedder', None)
+    if shedder is not None and shedder.enabled:
+        report['load_shedding'] = shedder.state()
+    ledger = getattr(manager, 'token_ledger', None)
+    if ledger is not None:
+        report['token_usage'] = ledger.summary()['by_turn_type']
+    tiers = getattr(manager, 'model_tiers', None)
+    if tiers is not None:
+        report['model_tiers'] = tiers.summary()['purposes']
+    return report
+
+
+def print_report(report: dict):
+    print(f"\n Load test: {report['users']} users on '{report['target']}' "
+          f"(model latency {report['latency']})")
+    print(f"  {report['turns']} turns in {report['elapsed_s']:.2f}s - "
+          f"{report['turns_per_s']:.1f} turns/s, {report['conversations_per_s']:.1f} conversations/s")
+    print(f"  Error rate: {report['error_rate']:.2%} {report['errors'] or ''}")
+    if report.get('load_shedding'):
+        load = report['load_shedding']
+        print(f"  Load shedding: ended at level {load['level']} ({load['name']}), {load['transitions']} transitions, "
+              f"{load['shed_turns']} shed turns, {load['rejected']} rejected")
+
+    header = f"  {'stage':<38} {'n':>5} {'p50':>8} {'p90':>8} {'p95':>8} {'p99':>8} {'max':>8} {'err':>4}"
+    print("\n Turn latency (ms)")
+    print(header)
+    overall = dict(report['overall'], errors=sum(report['errors'].values()))
+    for stage, stats in list(report['stages'].items()) + [('ALL', overall)]:
+        print(f"  {stage:<38} {stats['count']:>5} {stats['p50_ms']:>8.1f} {stats['p90_ms']:>8.1f} "
+              f"{stats['p95_ms']:>8.1f} {stats['p99_ms']:>8.1f} {stats['max_ms']:>8.1f} {stats['errors']:>4}")
+
+    if report.get('model_calls'):
+        print(f"\n Model calls ({report['model_calls_per_turn']:.2f} per turn, simulated latency ms)")
+        for agent, stats in report['model_calls'].items():
+            print(f"  {agent:<38} {stats['count']:>5} {stats['p50_ms']:>8.1f} {stats['p90_ms']:>8.1f} "
+                  f"{stats['p95_ms']:>8.1f} {stats['p99_ms']:>8.1f} {stats['max_ms']:>8.1f}")
+
+    if report.get('stage_timings'):
+        print("\n Turn stages (ms, from the manager's tracer; share = fraction of turn time)")
+        print(f"  {'stage':<38} {'n':>5} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8} {'share':>6}")
+        for stage, stats in sorted(report['stage_timings'].items(), key=lambda item: -item[1]['p95_ms']):
+            share = f"{stats['share']:.0%}" if 'share' in stats else ''
+            print(f"  {stage:<38} {stats['count']:>5} {stats['p50_ms']:>8.1f} {stats['p95_ms']:>8.1f} "
+                  f"{stats['p99_ms']:>8.1f} {stats['max_ms']:>8.1f} {share:>6}")
+
+    if report.get('token_usage'):
+        print("\n Tokens by turn type (estimated unless the backend reports usage)")
+        print(f"  {'turn type':<38} {'turns':>5} {'prompt':>9} {'compl.':>8} {'per turn':>9} {'USD':>9}")
+        for turn_type, usage in sorted(report['token_usage'].items(), key=lambda item: -item[1]['total_tokens']):
+            print(f"  {turn_type:<38} {usage['turns']:>5} {usage['prompt_tokens']:>9} "
+                  f"{usage['completion_tokens']:>8} {usage['tokens_per_turn']:>9.0f} {usage['cost_usd']:>9.4f}")
+
+    if report.get('model_tiers'):
+        print("\n Model tiers (ms measured in-process)")
+        print(f"  {'purpose':<24} {'tier':>5} {'lite n':>7} {'lite ms':>8} {'full n':>7} {'full ms':>8} {'escalated':>10}")
+        for purpose, tiers in report['model_tiers'].items():
+            print(f"  {purpose:<24} {tiers['tier']:>5} {tiers['lite']['calls']:>7} {tiers['lite']['mean_ms']:>8.1f} "
+                  f"{tiers['full']['calls']:>7} {tiers['full']['mean_ms']:>8.1f} {tiers['escalation_rate']:>10.1%}")
+
+    memory = report['memory']
+    print(f"\n Memory ({memory['process']}): RSS {memory['rss_before_mb']:.1f} -> {memory['rss_after_mb']:.1f} MB "
+          f"({memory['rss_growth_mb']:+.1f} MB), peak {memory['peak_rss_mb']:.1f} MB")
+    if 'user_contexts_retained' in memory:
+        print(f"  {memory['user_contexts_retained']} user contexts retained, "
+              f"~{memory['rss_per_user_kb']:.1f} KB RSS per user")
+    if 'heap_growth_kb' in memory:
+        print(f"  Python heap {memory['heap_growth_kb']:+.0f} KB; top growth:")
+        for line in memory['top_allocations']:
+            print(f"    {line}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--target', choices=('direct', 'asgi', 'http'), default='direct')
+    parser.add_argument('--url', default='http://127.0.0.1:5000', help="Server for --target http")
+    parser.add_argument('--users', type=int, default=200, help="Simulated users, one conversation each")
+    parser.add_argument('--ramp', type=float, default=0.0, help="Seconds over which users arrive")
+    parser.add_argument('--think-ms', type=float, default=0.0, help="Mean pause between a user's turns")
+    parser.add_argument('--flows', default=','.join(FLOWS), help="Comma-separated flows, assigned round-robin")
+    parser.add_argument('--latency', default='lognormal:400:0.5', help="Fake model latency spec (in-process targets)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fake model failure rate (in-process targets)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--shed', action='store_true', help="Leave load shedding on (in-process targets)")
+    parser.add_argument('--timeout', type=float, default=60.0, help="Per-request timeout for --target http")
+    parser.add_argument('--trace-memory', action='store_true', help="Track Python heap growth with tracemalloc")
+    parser.add_argument('--json', help="Also write the report to this file")
+    parser.add_argument('--verbose', action='store_true', help="Keep the manager's per-turn logging")
+    args = parser.parse_args(argv)
+
+    args.flows = [flow.strip() for flow in args.flows.split(',') if flow.strip()]
+    unknown = [flow for flow in args.flows if flow not in FLOWS]
+    if unknown or not args.flows:
+        parser.error(f"unknown flows {unknown} (choose from {', '.join(FLOWS)})")
+    if args.users < 1:
+        parser.error("--users must be at least 1")
+    return args
+
+
+def run(args) -> dict:
+    """Configure the environment, run the load and return the report"""
+    if args.target != 'http':
+        # Must be set before wellness_manager builds its backend and agents
+        os.environ['WELLNESS_MODEL_BACKEND'] = 'fake'
+        os.environ['WELLNESS_FAKE_LATENCY'] = args.latency
+        os.environ['WELLNESS_FAKE_ERROR_RATE'] = str(args.error_rate)
+        os.environ['WELLNESS_FAKE_SEED'] = str(args.seed)
+        os.environ.setdefault('WELLNESS_CATALOG_WATCH', 'false')
+        # Measure the full pipeline unless load shedding is what's being tested
+        os.environ['WELLNESS_LOAD_SHEDDING'] = 'true' if args.shed else 'false'
+
+    quiet = open(os.devnull, 'w') if not args.verbose else None
+    with contextlib.redirect_stdout(quiet) if quiet else contextlib.nullcontext():
+        if args.target == 'direct':
+            target = DirectTarget()
+        elif args.target == 'asgi':
+            target = AsgiTarget()
+        else:
+            target = HttpTarget(args.url, args.users, args.timeout)
+        report = asyncio.run(run_load(target, args))
+    if quiet:
+        quiet.close()
+    return report
+
+
+def main():
+    args = parse_args()
+    report = run(args)
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n Report written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
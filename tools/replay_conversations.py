@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+# tools/replay_conversations.py
+"""
+Replay recorded conversations through process_message
+
+Reads a conversation log written with WELLNESS_RECORD_FILE (see
+services/conversation_log.py) and feeds every turn back through
+WellnessManager.process_message, in recording order, with the recorded model
+outputs substituted for the model. No network or credentials are needed, and
+the model's answers are fixed, so the timings measure this codebase on real
+conversation shapes and can be compared run to run.
+
+The report covers per-turn processing time, throughput and divergence from
+the recording: turns routed to a different agent, different cards or reply
+text, and model calls the code now makes (misses) or no longer makes (unused).
+
+Record:
+    WELLNESS_RECORD_FILE=recordings/chat.jsonl.zst python web_server.py
+    WELLNESS_RECORD_FILE=recordings/load.jsonl python tools/load_test.py --latency 0
+
+Replay:
+    python tools/replay_conversations.py recordings/chat.jsonl.zst [--repeat 3]
+        [--latency-scale 0] [--json after.json] [--baseline before.json]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from load_test import summarize
+
+MAX_EXAMPLES = 5
+
+# Agents whose calls depend on cache state (and so on how recorded turns interleaved):
+# a differing call count for these is reported but is not a divergence
+CACHED_AGENTS = ('suggestions',)
+
+
+def load_turns(paths: list) -> list:
+    """All recorded turns of the given logs, in order"""
+    from services.conversation_log import read_conversation_log
+    turns = []
+    for path in paths:
+        turns.extend(read_conversation_log(path))
+    return turns
+
+
+async def replay_once(turns: list, latency_scale: float) -> dict:
+    """Replay every turn through a fresh manager; returns timings and divergences"""
+    from agents.model_backend import ReplayBackend
+    from services.conversation_log import response_hash
+    from wellness_manager import WellnessManager
+
+    manager = WellnessManager()
+    manager.recorder = None
+    backend = ReplayBackend(latency_scale=latency_scale)
+    manager.model_backend = backend
+    await manager.initialize()
+
+    timings = []
+    divergent = {'agent': 0, 'cards': 0, 'response': 0, 'model_calls': 0}
+    cache_dependent = 0
+    examples = []
+    start = time.perf_counter()
+    for index, turn in enumerate(turns):
+        backend.start_turn(turn['calls'])
+        misses_before = dict(backend.misses)
+        turn_start = time.perf_counter()
+        result = await manager.process_message(turn['input'], turn['user'])
+        timings.append((time.perf_counter() - turn_start) * 1000)
+        unused = backend.end_turn()
+
+        differences = []
+        if result.get('agent') != turn['agent']:
+            differences.append(f"agent {turn['agent']} -> {result.get('agent')}")
+            divergent['agent'] += 1
+        cards = [card.get('type') for card in result.get('cards', [])]
+        if cards != turn['cards']:
+            differences.append(f"cards {turn['cards']} -> {cards}")
+            divergent['cards'] += 1
+        if response_hash(result.get('response') or '') != turn['response_hash']:
+            differences.append("reply text changed")
+            divergent['response'] += 1
+        missed = {agent: count - misses_before.get(agent, 0) for agent, count in backend.misses.items()
+                  if count != misses_before.get(agent, 0)}
+        changed_calls = set(missed) | set(unused)
+        if changed_calls - set(CACHED_AGENTS):
+            differences.append(f"model calls unrecorded {missed or '-'} / unused {unused or '-'}")
+            divergent['model_calls'] += 1
+        elif changed_calls:
+            cache_dependent += 1
+        if differences and len(examples) < MAX_EXAMPLES:
+            examples.append(f"turn {index} ({turn['input'][:40]!r}): {'; '.join(differences)}")
+
+    elapsed = time.perf_counter() - start
+    await manager.close()
+    return {
+        'elapsed_s': elapsed,
+        'timings': timings,
+        'divergent': divergent,
+        'examples': examples,
+        'cache_dependent': cache_dependent,
+        'model_calls': {'replayed': backend.replayed, 'misses': backend.misses, 'unused': backend.unused}
+    }
+
+
+def build_report(turns: list, runs: list, latency_scale: float) -> dict:
+    timings = [ms for run in runs for ms in run['timings']]
+    elapsed = sum(run['elapsed_s'] for run in runs)
+    last = runs[-1]
+    return {
+        'turns': len(turns),
+        'conversations': len({turn['user'] for turn in turns}),
+        'repeats': len(runs),
+        'latency_scale': latency_scale,
+        'turns_per_s': len(timings) / elapsed if elapsed else 0.0,
+        'turn': summarize(timings),
+        'recorded_turn': summarize([turn['ms'] for turn in turns]),
+        'recorded_model_ms_per_turn': (sum(call['ms'] or 0 for turn in turns for call in turn['calls']) /
+                                       len(turns) if turns else 0.0),
+        'model_calls': last['model_calls'],
+        'divergent_turns': last['divergent'],
+        'cache_dependent_turns': last['cache_dependent'],
+        'divergence_examples': last['examples']
+    }
+
+
+def compare(report: dict, baseline: dict, max_regression: float) -> list:
+    """Latency regressions against a baseline report, as messages"""
+    regressions = []
+    for key in ('p50_ms', 'p95_ms'):
+        before, after = baseline['turn'][key], report['turn'][key]
+        change = (after - before) / before if before else 0.0
+        print(f"  {key}: {before:.2f} -> {after:.2f} ms ({change:+.1%})")
+        if change > max_regression:
+            regressions.append(f"{key} regressed {change:.1%} (limit {max_regression:.0%})")
+    return regressions
+
+
+def print_report(report: dict):
+    turn, recorded = report['turn'], report['recorded_turn']
+    print(f"\n Replayed {report['turns']} turns from {report['conversations']} conversations "
+          f"x{report['repeats']} (model latency x{report['latency_scale']})")
+    print(f"  {report['turns_per_s']:.1f} turns/s; per turn p50 {turn['p50_ms']:.2f} ms, "
+          f"p95 {turn['p95_ms']:.2f} ms, p99 {turn['p99_ms']:.2f} ms, max {turn['max_ms']:.2f} ms")
+    print(f"  Recorded: p50 {recorded['p50_ms']:.0f} ms, p95 {recorded['p95_ms']:.0f} ms per turn "
+          f"({report['recorded_model_ms_per_turn']:.0f} ms of model time)")
+    calls = report['model_calls']
+    print(f"  Model calls: {calls['replayed']} replayed, unrecorded {calls['misses'] or '-'}, "
+          f"unused {calls['unused'] or '-'}")
+    print(f"  Divergent turns: {report['divergent_turns']}")
+    if report['cache_dependent_turns']:
+        print(f"  {report['cache_dependent_turns']} turns made a different number of {'/'.join(CACHED_AGENTS)} "
+              f"calls (cache hits depend on how recorded turns interleaved)")
+    for example in report['divergence_examples']:
+        print(f"    {example}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('logs', nargs='+', help="Conversation logs (.jsonl or .jsonl.zst)")
+    parser.add_argument('--repeat', type=int, default=1, help="Replay the logs this many times (fresh manager each)")
+    parser.add_argument('--latency-scale', type=float, default=0.0,
+                        help="Wait this multiple of each recorded model latency (0 = measure code only)")
+    parser.add_argument('--json', help="Write the report to this file")
+    parser.add_argument('--baseline', help="Earlier report to compare latency against")
+    parser.add_argument('--max-regression', type=float, default=0.2,
+                        help="Fail if p50/p95 turn time grows by more than this fraction of the baseline")
+    parser.add_argument('--strict', action='store_true', help="Fail if any turn diverges from the recording")
+    parser.add_argument('--verbose', action='store_true', help="Keep the manager's per-turn logging")
+    args = parser.parse_args()
+
+    # Agents are built offline; the replay backend is swapped in afterwards
+    os.environ['WELLNESS_MODEL_BACKEND'] = 'fake'
+    os.environ.pop('WELLNESS_RECORD_FILE', None)
+    os.environ.setdefault('WELLNESS_CATALOG_WATCH', 'false')
+
+    turns = load_turns(args.logs)
+    if not turns:
+        print(" ERROR: no recorded turns found")
+        sys.exit(1)
+
+    with open(os.devnull, 'w') as quiet, contextlib.redirect_stdout(sys.stdout if args.verbose else quiet):
+        runs = [asyncio.run(replay_once(turns, args.latency_scale)) for _ in range(max(1, args.repeat))]
+    report = build_report(turns, runs, args.latency_scale)
+    print_report(report)
+
+    failures = []
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        print(f"\n Against {args.baseline}:")
+        failures += compare(report, baseline, args.max_regression)
+    if args.strict and any(report['divergent_turns'].values()):
+        failures.append("turns diverged from the recording")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n Report written to {args.json}")
+
+    if failures:
+        for failure in failures:
+            print(f" FAIL: {failure}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
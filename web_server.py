@@ -1,7 +1,12 @@
 # web_server.py 
-from quart import Quart, request, jsonify, render_template, session
+from quart import Quart, request, jsonify, render_template, session, g
 from wellness_manager import WellnessManager
+from services.asset_manifest import BUILD_URL_PREFIX, IMMUTABLE_CACHE_CONTROL
+from services.metrics import CONTENT_TYPE, get_metrics, monitor_event_loop_lag
+from services.structured_log import get_logger
+import asyncio
 import secrets
+import time
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -9,16 +14,45 @@ load_dotenv()
 app = Quart(__name__)
 app.secret_key = secrets.token_hex(16)
 manager = WellnessManager()
+log = get_logger('http')
+metrics = get_metrics()
+http_requests = metrics.counter('wellness_http_requests_total', 'HTTP requests by route, method and status',
+                                ('route', 'method', 'status'))
+http_latency = metrics.histogram('wellness_http_request_duration_seconds', 'HTTP request latency by route',
+                                 ('route',))
 
 @app.before_serving
 async def startup():
     await manager.initialize()
+    app.lag_monitor = asyncio.get_running_loop().create_task(monitor_event_loop_lag(metrics))
+
+@app.after_serving
+async def shutdown():
+    app.lag_monitor.cancel()
+    await manager.close()
 
 @app.before_request
 def assign_session_id():
+    g.request_start = time.perf_counter()
     if 'user_id' not in session:
         session['user_id'] = f"local-user-{secrets.token_hex(8)}"
 
+@app.after_request
+def count_request(response):
+    # Label by route pattern, not path, so static files and 404s don't explode cardinality
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    http_requests.inc(route=route, method=request.method, status=response.status_code)
+    if 'request_start' in g:
+        http_latency.observe(time.perf_counter() - g.request_start, route=route)
+    return response
+
+@app.after_request
+def cache_static_assets(response):
+    # Build output is named by content hash, so a URL's bytes never change
+    if request.path.startswith(BUILD_URL_PREFIX) and response.status_code == 200:
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    return response
+
 @app.route("/")
 async def index():
     return await render_template("index.html")
@@ -32,19 +66,59 @@ async def chat():
     if not user_input:
         return jsonify({"error": "No message provided"}), 400
 
-    print(f"\nUser: {user_input}")
+    admitted, retry_after = manager.load_shedder.admit()
+    if not admitted:
+        return jsonify({"error": "Server busy, please retry shortly"}), 503, {"Retry-After": str(retry_after)}
+
+    log.debug("Chat message", user=user_id, message=user_input)
     
     # Get response (already includes agent info)
     result = await manager.process_message(user_input, user_id=user_id)
     
-    print(f"Agent: {result['agent']}")
-    print(f"Response: {result['response'][:100]}...")
+    log.debug("Chat reply", user=user_id, agent=result['agent'], response=result['response'][:100])
     
     return jsonify(result)
 
+@app.route("/policy", methods=["POST"])
+async def upload_policy():
+    data = await request.get_json()
+    user_id = session.get('user_id')
+
+    if not data:
+        return jsonify({"error": "No policy provided"}), 400
+
+    if not manager.load_insurance_analysis(data, user_id):
+        return jsonify({"error": "Could not read policy document"}), 400
+
+    return jsonify({"status": "loaded"})
+
+@app.route("/metrics")
+async def metrics_endpoint():
+    return metrics.render(), 200, {'Content-Type': CONTENT_TYPE}
+
+@app.route("/usage")
+async def usage():
+    # Rollups only (with lite / full model calls and escalation rates per call purpose);
+    # this route is unauthenticated, so the per-user top list stays server-side
+    summary = manager.token_ledger.summary(top_users=0)
+    summary.pop('top_users')
+    return jsonify(dict(summary, model_tiers=manager.model_tiers.summary()))
+
+@app.route("/usage/me")
+async def my_usage():
+    # The session user's own usage and remaining budget
+    user_usage = manager.token_ledger.user_usage(session.get('user_id'))
+    if user_usage is None:
+        return jsonify({"error": "No usage recorded yet"}), 404
+    return jsonify(user_usage)
+
+@app.route("/timings")
+async def timings():
+    return jsonify(manager.tracer.stats())
+
 @app.route("/health")
 async def health():
-    return jsonify({"status": "healthy"})
+    return jsonify({"status": "healthy", "catalogs": manager.catalogs.metrics(), "load": manager.load_shedder.state()})
 
 if __name__ == "__main__":
     app.run(port=5000, debug=True)
\ No newline at end of file
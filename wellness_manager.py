@@ -17,12 +17,68 @@ Version: 2.0 (with Lab Test Agent integration)
 import asyncio
 import firebase_admin
 from firebase_admin import firestore, credentials, auth
-from google.adk import Runner, sessions
-from google.genai.types import Content, Part
+from google.adk import sessions
 import json
+import os
 import re
-import random
+import time
 from datetime import datetime, timedelta
+from services.structured_output import (
+    STRUCTURED_OUTPUT_INSTRUCTIONS, SUGGESTION_TRAILER_INSTRUCTIONS,
+    parse_structured_reply, split_suggestion_trailer
+)
+from services.suggestion_cache import SuggestionCache, describe_signature, state_signature
+from services.policy_answer_cache import PolicyAnswerCache
+from services.policy_store import PolicyStore
+from services.slot_engine import SlotEngine, parse_time_preference, preference_window
+from services.id_service import get_id_service
+from services.provider_directory import get_provider_directory
+from services.catalog_store import get_catalog_store
+from services.asset_manifest import get_asset_manifest
+from services.conversation_log import ConversationRecorder
+from services.tracing import Tracer, span, traced
+from services.metrics import get_metrics
+from services.token_ledger import SYSTEM_ACCOUNT, TokenLedger
+from services.structured_log import get_logger
+from services.load_shedder import LEVELS, LoadShedder, NO_SUGGESTIONS, KEYWORD_ROUTER, SHORT_HISTORY
+from agents.model_backend import create_model_backend, estimate_tokens, take_usage
+from agents.model_tiers import FULL, LITE, ModelTiers
+
+
+# Placeholder replies from _call_agent - never worth caching
+AGENT_EMPTY_RESPONSE = "I'm processing..."
+AGENT_ERROR_RESPONSE = "I'm having trouble responding."
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+log = get_logger('manager')
+routing_log = get_logger('routing')
+context_log = get_logger('context')
+cards_log = get_logger('cards')
+suggestions_log = get_logger('suggestions')
+booking_log = get_logger('booking')
+turn_log = get_logger('turn')
+
+# Router labels and the route each one selects
+ROUTER_INTENT_MAP = {
+    'SYMPTOM': 'symptom',
+    'SCHEDULING': 'scheduling',
+    'PHARMACY': 'pharmacy',
+    'INSURANCE': 'policy_analysis',
+    'CARE_PLAN': 'care_plan',
+    'LAB_TEST': 'lab_test',
+    'GENERAL': 'general'
+}
+
+# Specialists a compound message can fan out to (answer-only agents, no booking flow)
+FANOUT_INTENTS = ('symptom', 'pharmacy', 'policy_analysis')
+FANOUT_TOPICS = {'symptom': 'symptoms', 'pharmacy': 'medicines', 'policy_analysis': 'insurance coverage'}
+
+# Call purposes served by another agent's instruction (the rest use the agent of the same key)
+PURPOSE_AGENTS = {'suggestions': 'orchestrator'}
+
+# Tokens per turn: 250 .. 64k
+TURN_TOKEN_BUCKETS = (250, 500, 1000, 2000, 4000, 8000, 16000, 32000, 64000)
 
 
 # ==================== MAIN MANAGER CLASS ====================
@@ -37,6 +93,12 @@ class WellnessManager:
     Attributes:
         agents (dict): Dictionary of initialized agent instances
         session_service: ADK session service for conversation management
+        model_backend: Transport for agent calls (ADK, or the offline fake)
+        tracer: Per-stage turn timing and latency histograms
+        metrics: Prometheus-style metrics registry (/metrics)
+        token_ledger: Token usage and cost per user, agent and turn type (/usage)
+        load_shedder: Degradation level from live model latency and turns in flight
+        model_tiers: Lite / full model per call purpose, with escalation counts
         db: Firestore database client
         user_contexts (dict): Per-user conversation contexts
     """
@@ -45,216 +107,70 @@ class WellnessManager:
         """Initialize WellnessManager with Firebase and agent setup"""
         self.setup_firebase()
         self.session_service = sessions.InMemorySessionService()
-        
-        print("🏥 Initializing WellnessGPT Agents...")
+        # ADK + Gemini by default; WELLNESS_MODEL_BACKEND=fake runs fully offline
+        self.model_backend = create_model_backend(self.session_service)
+        # Opt-in turn log for offline replay (WELLNESS_RECORD_FILE, .jsonl or .jsonl.zst)
+        self.recorder = ConversationRecorder.from_env()
+        # Per-stage timing of every turn, aggregated into histograms (see /timings);
+        # WELLNESS_DEBUG_TIMINGS=true also attaches each turn's spans to its response
+        self.tracer = Tracer(enabled=os.getenv('WELLNESS_TRACING', 'true').lower() == 'true')
+        self.debug_timings = os.getenv('WELLNESS_DEBUG_TIMINGS', 'false').lower() == 'true'
+        
+        # Prometheus-style counters and histograms served at /metrics
+        self.metrics = get_metrics()
+        self.llm_calls = self.metrics.counter('wellness_llm_calls_total', 'Model calls by agent and outcome',
+                                              ('agent', 'outcome'))
+        self.llm_latency = self.metrics.histogram('wellness_llm_call_duration_seconds', 'Model call latency',
+                                                  ('agent',))
+        self.llm_tokens = self.metrics.counter('wellness_llm_tokens_total',
+                                               'Model tokens by agent (estimated when the backend reports none)',
+                                               ('agent', 'kind'))
+        self.route_decisions = self.metrics.counter('wellness_route_decisions_total',
+                                                    'Routing decisions by source and intent', ('source', 'intent'))
+        self.llm_cost = self.metrics.counter('wellness_llm_cost_usd_total', 'Model spend in USD by agent', ('agent',))
+        self.turn_tokens = self.metrics.histogram('wellness_turn_tokens', 'Model tokens per turn by turn type',
+                                                  ('turn_type',), buckets=TURN_TOKEN_BUCKETS)
+        self.budget_degraded_turns = self.metrics.counter('wellness_budget_degraded_turns_total',
+                                                          'Turns served on cheaper paths because the user was over budget')
+        
+        # Token usage and cost rollups; with WELLNESS_USER_TOKEN_BUDGET set, users over
+        # budget skip the router and suggestion calls and get fewer policy sections
+        self.token_ledger = TokenLedger.from_env()
+        # Under load, turns drop the suggestion call, then the router call, then shorten
+        # prompt history; at the last level the web layer rejects with Retry-After
+        self.load_shedder = LoadShedder.from_env()
+        self.shed_decisions = self.metrics.counter('wellness_load_shed_turns_total',
+                                                   'Turns run at a degradation level above normal', ('level',))
+        # Router and suggestion calls try a lite model first; unusable or low-confidence
+        # output is asked again of the full model (see agents/model_tiers.py)
+        self.model_tiers = ModelTiers.from_env()
+        self.tier_calls = self.metrics.counter('wellness_model_tier_calls_total', 'Model calls by agent and tier',
+                                               ('agent', 'tier'))
+        self.tier_latency = self.metrics.histogram('wellness_model_tier_call_duration_seconds',
+                                                   'Model call latency by agent and tier', ('agent', 'tier'))
+        self.tier_escalations = self.metrics.counter('wellness_model_escalations_total',
+                                                     'Lite-tier answers escalated to the full model',
+                                                     ('agent', 'reason'))
+        # Compound messages ("fever - is paracetamol available - is it covered?") are answered by
+        # every relevant specialist concurrently, merged into one reply
+        self.fanout = os.getenv('WELLNESS_FANOUT', 'true').lower() == 'true'
+        self.fanout_max = int(os.getenv('WELLNESS_FANOUT_MAX', '3'))
+        self.fanout_turns = self.metrics.counter('wellness_fanout_turns_total',
+                                                 'Compound messages answered by several specialists at once',
+                                                 ('specialists',))
+        
+        log.info("Initializing WellnessGPT agents")
         self.agents = {}
+        self.lite_agents = {}
         
-        # ==================== MEDICINE IMAGE MAPPING ====================
-        # Maps medicine names/categories to appropriate images for pharmacy agent
-        self.MEDICINE_IMAGE_MAP = {
-            # Pain & Fever
-            "paracetamol": "/static/images/medicine/crocin.jpg",
-            "dolo": "/static/images/medicine/dolo.jpg",
-            "ibuprofen": "/static/images/medicine/volini.jpg",
-            "aspirin": "/static/images/medicine/crocin.jpg",
-            "calpol": "/static/images/medicine/crocin.jpg",
-            "crocin": "/static/images/medicine/crocin.jpg",
-            "volini": "/static/images/medicine/volini.jpg",
-            
-            # Antibiotics
-            "amoxicillin": "/static/images/medicine/moxkind.jpg",
-            "azithromycin": "/static/images/medicine/azithral.jpg",
-            "ciprofloxacin": "/static/images/medicine/cifran.jpg",
-            "moxikind": "/static/images/medicine/moxkind.jpg",
-            "azithral": "/static/images/medicine/azithral.jpg",
-            "cifran": "/static/images/medicine/cifran.jpg",
-            
-            # Allergy & Asthma
-            "montelukast": "/static/images/medicine/montair.jpg",
-            "cetirizine": "/static/images/medicine/allegra.jpg",
-            "levocetirizine": "/static/images/medicine/allegra.jpg",
-            "allegra": "/static/images/medicine/allegra.jpg",
-            "montair": "/static/images/medicine/montair.jpg",
-            "asthalin": "/static/images/medicine/asthalin.jpg",
-            "duolin": "/static/images/medicine/duolin.jpg",
-            
-            # Chronic Care (Diabetes, BP, Cholesterol)
-            "metformin": "/static/images/medicine/glycomet.jpg",
-            "atorvastatin": "/static/images/medicine/storvas.jpg",
-            "lisinopril": "/static/images/medicine/telma.jpg",
-            "amlodipine": "/static/images/medicine/telma.jpg",
-            "enalapril": "/static/images/medicine/telma.jpg",
-            "ramipril": "/static/images/medicine/telma.jpg",
-            "glycomet": "/static/images/medicine/glycomet.jpg",
-            "storvas": "/static/images/medicine/storvas.jpg",
-            "telma": "/static/images/medicine/telma.jpg",
-            "amaryl": "/static/images/medicine/amaryl.jpg",
-            
-            # Gastrointestinal
-            "omeprazole": "/static/images/medicine/pan.jpg",
-            "pantoprazole": "/static/images/medicine/pan.jpg",
-            "domperidone": "/static/images/medicine/digene.jpg",
-            "rabeprazole": "/static/images/medicine/rantac.jpg",
-            "pan": "/static/images/medicine/pan.jpg",
-            "digene": "/static/images/medicine/digene.jpg",
-            "rantac": "/static/images/medicine/rantac.jpg",
-            
-            # Vitamins & Supplements
-            "vitamin c": "/static/images/medicine/becosules.jpg",
-            "vitamin d3": "/static/images/medicine/becosules.jpg",
-            "calcium": "/static/images/medicine/shelcal.jpg",
-            "multivitamin": "/static/images/medicine/revital.jpg",
-            "iron": "/static/images/medicine/becosules.jpg",
-            "becosules": "/static/images/medicine/becosules.jpg",
-            "shelcal": "/static/images/medicine/shelcal.jpg",
-            "revital": "/static/images/medicine/revital.jpg",
-            "liv": "/static/images/medicine/liv.jpg",
-            
-            # Cold & Cough
-            "sinarest": "/static/images/medicine/sinarest.jpg",
-            "combiflam": "/static/images/medicine/combiflam.jpg",
-            
-            # Default
-            "default": "/static/images/medicine/medicine-placeholder.jpg"
-        }
-        # Insurance Policy Data 
-        self.INSURANCE_POLICY_DATA = {
-            "policy_details": {
-                "insurer": "HealthSure Insurance",
-                "policy_name": "HealthSure Comprehensive Care",
-                "sum_insured": "₹5,00,000",
-                "policy_term": "1 Year",
-                "renewal_type": "Lifelong Renewable",
-                "age_entry": {"min_age": "18 years", "max_age": "65 years", "lifelong_renewal": True}
-            },
-            "coverage": {
-                "hospitalization": {
-                    "room_rent_rule": "Up to ₹5,000 per day (Single Private AC Room)",
-                    "icu_charges": "Up to ₹10,000 per day",
-                    "pre_hospitalization_days": "30 days",
-                    "post_hospitalization_days": "60 days",
-                    "day_care_procedures": "Covered (200+ procedures)",
-                    "domiciliary_treatment": {"covered": "Yes", "exclusions": ["Chronic conditions requiring long-term home care"]},
-                    "ambulance": {"road": "₹2,000 per emergency", "air": "₹50,000 per emergency (subject to approval)"}
-                },
-                "cashless": {
-                    "available": True,
-                    "network_hospital_check_url": "https://healthsure.in/network-hospitals",
-                    "hospital_cashless_eligibility": "Yes"
-                },
-                "special_covers": {
-                    "maternity": {
-                        "covered": True, 
-                        "waiting_period": "24 months", 
-                        "normal_delivery_limit": "₹50,000", 
-                        "c_section_limit": "₹75,000", 
-                        "newborn_cover": "Covered for first 90 days", 
-                        "vaccination_cover": "₹5,000 per year"
-                    },
-                    "bariatric_surgery": {"covered": True, "waiting_period": "48 months", "limit": "₹2,00,000"},
-                    "ayush_treatment": {"covered": True, "limit": "₹25,000 per year", "exclusions": ["Experimental AYUSH treatments"]},
-                    "organ_donor_expenses": "Covered up to ₹1,00,000",
-                    "modern_treatments": "Covered (Robotic surgery, Stem cell therapy, Oral chemotherapy)"
-                }
-            },
-            "financial_features": {
-                "automatic_sum_restoration": "Yes (once per policy year)",
-                "cumulative_bonus": "10% increase in sum insured for each claim-free year (max 50%)",
-                "hospital_cash_allowance": "₹2,000 per day (max 15 days)",
-                "wellness_rewards": "₹2,000 annual health checkup",
-                "health_checkup": "Comprehensive health checkup every 2 years"
-            },
-            "waiting_periods": {
-                "initial": "30 days",
-                "pre_existing_diseases": "36 months",
-                "specific_diseases_wait": {
-                    "period": "24 months",
-                    "diseases": ["Hernia", "Cataract", "Joint replacements", "Gall stones"]
-                }
-            },
-            "co_payment": {
-                "applicable": True,
-                "age_threshold": "61 years and above",
-                "percent": "20%"
-            },
-            "exclusions": {
-                "standard_exclusions": [
-                    "Cosmetic surgery", 
-                    "Infertility treatments", 
-                    "Experimental/Unproven treatments", 
-                    "War/nuclear events",
-                    "Dental treatments (unless requiring hospitalization)",
-                    "Hearing aids and spectacles"
-                ],
-                "policy_specific_exclusions": ["Adventure sports injuries", "Self-inflicted injuries"]
-            },
-            "surgery_assessment": {
-                "procedure_name": "Knee Replacement Surgery",
-                "is_covered_now": True,
-                "reason": "Covered after 24-month waiting period for specific diseases",
-                "out_of_pocket_estimate": "Approximately ₹20,000 (20% co-payment if applicable)",
-                "cashless_available": "Yes at network hospitals",
-                "red_flags": ["Required 24-month waiting period for joint replacements"]
-            }
-        }
-        
-        self.PHARMACY_INVENTORY_DATA = {
-            "pharmacy_info": {
-                "name": "Wellness Pharmacy",
-                "locations": ["Delhi", "Mumbai", "Bangalore", "Chennai"],
-                "delivery_available": True,
-                "min_delivery_amount": 500,
-                "delivery_time": "2-4 hours"
-            },
-            "inventory": {
-                "pain_fever": {
-                    "Paracetamol (500mg)": {"available": True, "price": 20, "type": "strip", "generic_available": True},
-                    "Ibuprofen (400mg)": {"available": True, "price": 35, "type": "strip", "generic_available": True},
-                    "Aspirin (75mg)": {"available": True, "price": 15, "type": "strip", "generic_available": True},
-                    "Dolo 650": {"available": False, "price": 25, "type": "strip", "generic_available": True}
-                },
-                "antibiotics": {
-                    "Amoxicillin (500mg)": {"available": False, "price": 150, "type": "strip", "generic_available": True},
-                    "Azithromycin (500mg)": {"available": False, "price": 200, "type": "strip", "generic_available": True},
-                    "Ciprofloxacin (500mg)": {"available": True, "price": 120, "type": "strip", "generic_available": True}
-                },
-                "chronic_care": {
-                    "Metformin (500mg)": {"available": True, "price": 80, "type": "strip", "generic_available": True},
-                    "Atorvastatin (10mg)": {"available": True, "price": 110, "type": "strip", "generic_available": True},
-                    "Lisinopril (10mg)": {"available": False, "price": 120, "type": "strip", "generic_available": False},
-                    "Amlodipine (5mg)": {"available": True, "price": 95, "type": "strip", "generic_available": True}
-                },
-                "gastrointestinal": {
-                    "Omeprazole (20mg)": {"available": True, "price": 90, "type": "strip", "generic_available": True},
-                    "Pantoprazole (40mg)": {"available": True, "price": 110, "type": "strip", "generic_available": True},
-                    "Domperidone (10mg)": {"available": True, "price": 45, "type": "strip", "generic_available": True}
-                },
-                "allergy_cold": {
-                    "Cetirizine (10mg)": {"available": True, "price": 25, "type": "strip", "generic_available": True},
-                    "Levocetirizine (5mg)": {"available": True, "price": 40, "type": "strip", "generic_available": True},
-                    "Montelukast (10mg)": {"available": True, "price": 85, "type": "strip", "generic_available": True}
-                },
-                "supplements": {
-                    "Vitamin C (500mg)": {"available": True, "price": 30, "type": "strip", "generic_available": True},
-                    "Vitamin D3 (60K IU)": {"available": True, "price": 50, "type": "bottle", "generic_available": True},
-                    "Calcium + Vitamin D3": {"available": True, "price": 60, "type": "bottle", "generic_available": True},
-                    "Multivitamin": {"available": True, "price": 75, "type": "bottle", "generic_available": True}
-                }
-            },
-            "ordering_info": {
-                "pickup_ready_time": "2-4 hours",
-                "order_arrival_time": "1-2 days",
-                "delivery_charge": "Free for orders above ₹500, ₹50 otherwise",
-                "prescription_required": True,
-                "id_required": True
-            },
-            "alternative_options": {
-                "Paracetamol": ["Dolo 650", "Calpol 650"],
-                "Amoxicillin": ["Amoxclav", "Moxikind CV"],
-                "Azithromycin": ["Azipro", "Zithrox"],
-                "Lisinopril": ["Enalapril", "Ramipril"]
-            }
-        }
+        # ==================== CATALOGS ====================
+        # Medicine images, insurance policy, pharmacy inventory and lab catalog are
+        # versioned files in data/catalogs, hot-reloaded into immutable snapshots
+        self.catalogs = get_catalog_store()
+        if os.getenv('WELLNESS_CATALOG_WATCH', 'true').lower() == 'true':
+            self.catalogs.start_watcher()
+        # Resized, content-hashed image variants from tools/build_assets.py (originals if not built)
+        self.assets = get_asset_manifest()
         
         # Routing keywords
         self.INSURANCE_KEYWORDS = [
@@ -292,65 +208,266 @@ class WellnessManager:
             'out of stock', 'delivery', 'pickup', 'pharmaceutical'
         ]
         
+        # Structured output mode: specialists return reply + typed fields as JSON
+        self.structured_output = os.getenv('WELLNESS_STRUCTURED_OUTPUT', 'false').lower() == 'true'
+        # Inline suggestions mode: follow-ups come in a trailer of the specialist reply
+        self.inline_suggestions = os.getenv('WELLNESS_INLINE_SUGGESTIONS', 'false').lower() == 'true'
+        
+        # Suggested replies shared per (agent, conversation state) bucket. Off by default: shared
+        # suggestions are generated from the state signature and never see the actual reply
+        self.suggestion_cache = None
+        if os.getenv('WELLNESS_SUGGESTION_CACHE', 'false').lower() == 'true':
+            self.suggestion_cache = SuggestionCache(
+                max_entries=int(os.getenv('WELLNESS_SUGGESTION_CACHE_SIZE', '256')),
+                ttl_seconds=float(os.getenv('WELLNESS_SUGGESTION_CACHE_TTL', '900'))
+            )
+        
+        # Answers to frequent insurance questions, scoped to the policy version
+        self.policy_answer_cache = None
+        if os.getenv('WELLNESS_POLICY_CACHE', 'true').lower() == 'true':
+            self.policy_answer_cache = PolicyAnswerCache(
+                ttl_seconds=float(os.getenv('WELLNESS_POLICY_CACHE_TTL', '86400'))
+            )
+        
+        # Per-user uploaded policies (default policy otherwise), each with a deterministic
+        # query engine for direct field lookups and a section retriever for prompts
+        self._default_policy = self.INSURANCE_POLICY_DATA
+        self.policy_store = PolicyStore(
+            self._default_policy,
+            max_documents=int(os.getenv('WELLNESS_POLICY_STORE_SIZE', '256')),
+            use_engine=os.getenv('WELLNESS_POLICY_ENGINE', 'true').lower() == 'true'
+        )
+        
+        # Only the top-k relevant policy sections go into the prompt (0 = whole document)
+        self.policy_top_k = int(os.getenv('WELLNESS_POLICY_TOP_K', '3'))
+        
+        # Unique, sortable booking IDs (safe across worker processes)
+        self.id_service = get_id_service()
+        
+        # Hospital and lab directory (indexed by city, department, accreditation, services)
+        self.directory = get_provider_directory()
+        # Cards list providers within this distance when the user shares a pincode / lat-long
+        self.nearby_km = float(os.getenv('WELLNESS_NEARBY_KM', '50'))
+        
+        # Doctor slot inventory for hospital appointments
+        self.slot_engine = SlotEngine.from_file(
+            os.getenv('WELLNESS_DOCTORS_FILE', os.path.join(DATA_DIR, 'doctors.json')),
+            days_ahead=int(os.getenv('WELLNESS_SLOT_DAYS_AHEAD', '7')),
+            hold_seconds=float(os.getenv('WELLNESS_SLOT_HOLD_SECONDS', '600'))
+        )
+        
         self._initialize_agents()
-        self.session_counter = 0
         self.user_contexts = {}
-        self.user_sessions = {}
-        
-        print("✓ All agents initialized successfully!")
+        self.metrics.register_collector('wellness_manager', self._collect_metrics)
+        
+        log.info("All agents initialized")
+
+    # === CATALOG ACCESS ===
+    # Read through the request's pinned snapshot so a reload never splits a request
+    @property
+    def MEDICINE_IMAGE_MAP(self) -> dict:
+        return self.catalogs.current()['medicine_images']
+
+    @property
+    def INSURANCE_POLICY_DATA(self) -> dict:
+        return self.catalogs.current()['insurance_policy']
+
+    @property
+    def PHARMACY_INVENTORY_DATA(self) -> dict:
+        return self.catalogs.current()['pharmacy_inventory']
+
+    @property
+    def medicine_resolver(self):
+        """Typo-tolerant medicine name lookup built from the medicine lexicon catalog"""
+        return self.catalogs.current().index('medicine_lexicon')['resolver']
+
+    @traced('catalogs')
+    def _sync_catalogs(self):
+        """Pin this request's catalog snapshot and refresh state derived from it"""
+        snapshot = self.catalogs.pin()
+        if snapshot['insurance_policy'] is not self._default_policy:
+            self._default_policy = snapshot['insurance_policy']
+            self.policy_store.set_default(self._default_policy)
+            log.info("Default policy reloaded", catalog_version=snapshot.version)
 
     # === CARD GENERATION METHODS ===
-    def _generate_hospital_cards(self) -> list:
-        """Generate hospital selection cards"""
+    def _provider_meta(self, provider: dict, distance_km: float = None) -> str:
+        """Card meta line: city, distance (when known), rating and badge"""
+        distance = f" • 🚗 {distance_km:.1f} km" if distance_km is not None else ""
+        return f"📍 {provider['city']}{distance} • ⭐ {provider['rating']} • {provider['badge']}"
+
+    @traced('cards')
+    def _generate_hospital_cards(self, context: dict = None) -> list:
+        """Generate hospital selection cards for the user's location and symptoms"""
+        city = 'Delhi'
+        department = None
+        near = None
+        if context:
+            scheduling_info = context['shared_memory'].get('scheduling_info', {})
+            city = scheduling_info.get('location') or city
+            near = scheduling_info.get('near')
+            department = self._symptom_department(context)
+        
+        hospitals = []
+        if near:
+            hospitals = (
+                self.directory.nearest_hospitals(near['lat'], near['lng'], limit=3, department=department,
+                                                 max_km=self.nearby_km) or
+                self.directory.nearest_hospitals(near['lat'], near['lng'], limit=3, max_km=self.nearby_km)
+            )
+        if not hospitals:
+            hospitals = [(hospital, None) for hospital in (
+                self.directory.hospitals(city=city, department=department, limit=3) or
+                self.directory.hospitals(city=city, limit=3) or
+                self.directory.hospitals(city='Delhi', limit=3)
+            )]
         return [
             {
                 "type": "hospital",
-                "title": "Apollo Hospital",
-                "description": "Multi-specialty hospital with emergency services, ICU, and all major departments",
-                "meta": "📍 Delhi • ⭐ 4.5 • 🚑 24/7 Emergency",
-                "selection_text": "Apollo Hospital",
-                "hospital_id": "apollo_delhi"
-            },
-            {
-                "type": "hospital", 
-                "title": "Max Super Specialty Hospital",
-                "description": "Advanced cardiac care, neurosciences, oncology with latest medical technology",
-                "meta": "📍 Delhi • ⭐ 4.6 • 💰 Cashless Available",
-                "selection_text": "Max Super Specialty Hospital", 
-                "hospital_id": "max_delhi"
-            },
-            {
-                "type": "hospital",
-                "title": "Fortis Escorts Heart Institute",
-                "description": "World-class cardiac care center with renowned cardiologists and cardiac surgeons",
-                "meta": "📍 Delhi • ⭐ 4.7 • ❤️ Cardiac Specialist",
-                "selection_text": "Fortis Escorts Heart Institute",
-                "hospital_id": "fortis_cardiac"
+                "title": hospital['name'],
+                "description": hospital['description'],
+                "meta": self._provider_meta(hospital, distance_km),
+                "selection_text": hospital.get('selection_text', hospital['name']),
+                "hospital_id": hospital['hospital_id']
             }
+            for hospital, distance_km in hospitals
         ]
 
+    def _pending_booking_id(self, info: dict, kind: str) -> str:
+        """Booking ID the agent quotes in its confirmation, issued once per booking flow"""
+        if not info.get('pending_booking_id'):
+            info['pending_booking_id'] = self.id_service.next_id(kind)
+        return info['pending_booking_id']
+
+    def _claim_booking_id(self, context: dict, info: dict, kind: str) -> str:
+        """Take the pending booking ID for a confirmed booking and record it"""
+        booking_id = info.pop('pending_booking_id', None) or self.id_service.next_id(kind)
+        context['shared_memory'].setdefault('bookings', []).append({
+            'id': booking_id,
+            'type': kind,
+            'created_at': datetime.now().isoformat()
+        })
+        booking_log.info("Issued booking ID", kind=kind, booking_id=booking_id)
+        return booking_id
+
+    def _symptom_department(self, context: dict) -> str:
+        """Department suggested by the symptoms discussed (None if no match)"""
+        symptoms = context['shared_memory'].get('symptoms_discussed', [])
+        if any(symptom in ['fever', 'cold', 'cough'] for symptom in symptoms):
+            return "General Medicine"
+        if any(symptom in ['broken', 'fracture', 'pain', 'broken leg'] for symptom in symptoms):
+            return "Orthopedics"
+        for symptom in symptoms:
+            department = self.directory.find_department(symptom)
+            if department:
+                return department
+        return None
+
+    def _appointment_department(self, context: dict, hospital_id: str) -> str:
+        """Department for the appointment, based on symptoms discussed"""
+        department = self._symptom_department(context) or "General Medicine"
+        
+        departments = self.slot_engine.departments(hospital_id)
+        if department not in departments and departments:
+            department = "General Medicine" if "General Medicine" in departments else departments[0]
+        return department
+
+    def _appointment_hospital_id(self, scheduling_info: dict) -> str:
+        """Slot-inventory hospital for the user's choice (None if it takes no online bookings)"""
+        hospital_id = scheduling_info.get('hospital_id')
+        if hospital_id:
+            return hospital_id if hospital_id in self.slot_engine.hospitals else None
+        return self.slot_engine.resolve_hospital(scheduling_info.get('hospital_preference'),
+                                                 scheduling_info.get('location'))
+
+    def _hold_appointment_slot(self, context: dict) -> dict:
+        """Hold the next free slot at the selected hospital for this user (None if none)"""
+        scheduling_info = context['shared_memory'].setdefault('scheduling_info', {})
+        hospital_id = self._appointment_hospital_id(scheduling_info)
+        if not hospital_id:
+            return None
+        
+        owner = context['user_id']
+        department = self._appointment_department(context, hospital_id)
+        time_preference = scheduling_info.get('time_preference')
+        
+        held = self.slot_engine.held_slot(owner)
+        if (held and held['hospital_id'] == hospital_id and held['department'] == department
+                and scheduling_info.get('held_slot_preference') == time_preference):
+            return held
+        
+        window = preference_window(time_preference, datetime.now())
+        held = (self.slot_engine.hold_next_free(hospital_id, department, owner, **window) or
+                self.slot_engine.hold_next_free(hospital_id, department, owner))
+        scheduling_info['held_slot'] = held
+        scheduling_info['held_slot_preference'] = time_preference
+        if held:
+            booking_log.info("Holding slot", slot_id=held['slot_id'], owner=owner)
+        return held
+
+    def _track_time_preference(self, user_input: str, context: dict):
+        """Record the day / time of day the user asked for (e.g. "Tomorrow Morning")"""
+        shared = context['shared_memory']
+        previous = shared.get('scheduling_info', {}).get('time_preference')
+        time_preference = parse_time_preference(user_input, previous)
+        if time_preference and time_preference != previous:
+            shared.setdefault('scheduling_info', {})['time_preference'] = time_preference
+            context_log.debug("Time preference", time=time_preference)
+
+    def _reserve_appointment_slot(self, user_input: str, context: dict):
+        """
+        Before prompting the scheduling agent, hold a slot at the hospital the user picked
+        
+        The message's time preference is read first so the held slot - the one quoted
+        to the agent and later confirmed on the card - already matches it.
+        """
+        shared = context['shared_memory']
+        scheduling_info = shared.get('scheduling_info', {})
+        scheduling_info.pop('quoted_slot_id', None)
+        if (scheduling_info.get('hospital_preference') and
+                not shared.get('test_booking_info', {}).get('is_test_booking')):
+            self._track_time_preference(user_input, context)
+            held = self._hold_appointment_slot(context)
+            if held:
+                scheduling_info['quoted_slot_id'] = held['slot_id']
+
+    def _quoted_appointment_slot(self, context: dict) -> dict:
+        """The slot quoted to the scheduling agent this turn, held again if its hold lapsed (None if gone)"""
+        slot_id = context['shared_memory'].get('scheduling_info', {}).get('quoted_slot_id')
+        if not slot_id:
+            return None
+        held = self.slot_engine.held_slot(context['user_id'])
+        if held and held['slot_id'] == slot_id:
+            return held
+        return self.slot_engine.hold(slot_id, context['user_id'])
+
+    @traced('cards')
     def _generate_booking_confirmation_card(self, context: dict) -> dict:
         """Generate comprehensive booking confirmation card with all appointment details"""
         scheduling_info = context['shared_memory'].get('scheduling_info', {})
         
-        # Generate appointment details
-        appointment_id = f"APPT-{random.randint(1000, 9999)}-{datetime.now().strftime('%m%d')}"
-        
-        # Determine department based on symptoms
-        symptoms = context['shared_memory'].get('symptoms_discussed', [])
-        if any(symptom in ['fever', 'cold', 'cough'] for symptom in symptoms):
-            department = "General Medicine"
-            doctor = "Dr. Sharma"
-        elif any(symptom in ['broken', 'fracture', 'pain'] for symptom in symptoms):
-            department = "Orthopedics" 
-            doctor = "Dr. Kumar"
-        else:
-            department = "General Medicine"
-            doctor = "Dr. Sharma"
-        
-        # Generate appointment time (next available slot)
-        tomorrow = datetime.now() + timedelta(days=1)
-        time_slot = "10:00 AM"
+        # Book the slot held during the conversation (or the next free one), once
+        booked = scheduling_info.get('booked_slot')
+        if not booked:
+            # Confirm under the pending ID; it is only claimed (and recorded) once the slot is ours
+            appointment_id = self._pending_booking_id(scheduling_info, 'appointment')
+            if scheduling_info.get('quoted_slot_id'):
+                # The reply already named this slot's doctor, date and time - book exactly it
+                slot = self._quoted_appointment_slot(context)
+            else:
+                slot = self._hold_appointment_slot(context)
+            booked = self.slot_engine.confirm(slot['slot_id'], context['user_id'], appointment_id) if slot else None
+            if not booked:
+                booking_log.warning("No appointment slot could be booked")
+                return None
+            self._claim_booking_id(context, scheduling_info, 'appointment')
+            scheduling_info['booked_slot'] = booked
+        
+        appointment_id = booked['booking_id']
+        department = booked['department']
+        doctor = booked['doctor']
+        hospital = booked['hospital']
+        location = scheduling_info.get('location', 'Delhi')
         
         return {
             "type": "booking_confirmation",
@@ -358,11 +475,11 @@ class WellnessManager:
             "appointment_id": appointment_id,
             "details": {
                 "Department": department,
-                "Hospital": scheduling_info.get('hospital_preference', 'Apollo Hospital'),
+                "Hospital": hospital,
                 "Doctor": doctor,
-                "Date": tomorrow.strftime("%B %d, %Y"),
-                "Time": time_slot,
-                "Location": scheduling_info.get('location', 'Delhi')
+                "Date": booked['date'],
+                "Time": booked['time'],
+                "Location": location
             },
             "instructions": [
                 "📍 Arrive 15 minutes early for registration",
@@ -370,19 +487,20 @@ class WellnessManager:
                 "💊 Bring current medications list",
                 "📱 Keep this appointment ID for reference"
             ],
-            "meta": f"Appointment ID: {appointment_id} • ⏰ Duration: 30 mins",
+            "meta": f"Appointment ID: {appointment_id} • ⏰ Duration: {booked['duration_minutes']} mins",
             "full_details": f"""Excellent! I've scheduled your appointment:
 
     **Department:** {department}
-    **Hospital:** {scheduling_info.get('hospital_preference', 'Apollo Hospital')}, {scheduling_info.get('location', 'Delhi')}
+    **Hospital:** {hospital}, {location}
     **Doctor:** {doctor}
-    **Date:** {tomorrow.strftime("%B %d, %Y")}
-    **Time:** {time_slot}
+    **Date:** {booked['date']}
+    **Time:** {booked['time']}
     **Appointment ID:** {appointment_id}
 
     You'll receive a confirmation message shortly. Please arrive 15 minutes early with your ID and any relevant medical reports."""
         }
 
+    @traced('cards')
     def _generate_medicine_cards(self, medicines_data):
         """Generate medicine availability cards"""
         cards = []
@@ -392,7 +510,8 @@ class WellnessManager:
                 "medicine_name": medicine['name'],
                 "status": medicine['status'],  # 'available' or 'unavailable'
                 "price": medicine['price'],
-                "image_url": self._get_medicine_image(medicine['name']),
+                # image_url plus image_srcset / image_webp_srcset / image_width / image_height when built
+                **self.assets.card_image(self._get_medicine_image(medicine['name'])),
                 "description": medicine.get('description', ''),
                 "generic_available": medicine.get('generic_available', False),
                 "alternatives": medicine.get('alternatives', []),
@@ -402,40 +521,28 @@ class WellnessManager:
         return cards
 
     def _get_medicine_image(self, medicine_name):
-        """Map medicine names to appropriate images using exact filenames"""
-        name_lower = medicine_name.lower()
-        
-        # First, check for exact brand name matches
-        for medicine_key, image_path in self.MEDICINE_IMAGE_MAP.items():
-            if medicine_key in name_lower and medicine_key != "default":
-                return image_path
-        
-        # Then check for generic name mappings
-        if any(word in name_lower for word in ['paracetamol', 'crocin', 'dolo', 'pain', 'fever', 'headache']):
-            return self.MEDICINE_IMAGE_MAP['crocin']
-        elif any(word in name_lower for word in ['antibiotic', 'amoxicillin', 'azithromycin', 'infection']):
-            return self.MEDICINE_IMAGE_MAP['moxkind']
-        elif any(word in name_lower for word in ['allergy', 'asthma', 'montelukast', 'cetirizine']):
-            return self.MEDICINE_IMAGE_MAP['montair']
-        elif any(word in name_lower for word in ['diabetes', 'metformin', 'glycomet', 'amaryl']):
-            return self.MEDICINE_IMAGE_MAP['glycomet']
-        elif any(word in name_lower for word in ['cholesterol', 'atorvastatin', 'storvas']):
-            return self.MEDICINE_IMAGE_MAP['storvas']
-        elif any(word in name_lower for word in ['blood pressure', 'bp', 'telma', 'amlodipine']):
-            return self.MEDICINE_IMAGE_MAP['telma']
-        elif any(word in name_lower for word in ['stomach', 'acid', 'digestion', 'pan', 'omeprazole']):
-            return self.MEDICINE_IMAGE_MAP['pan']
-        elif any(word in name_lower for word in ['vitamin', 'supplement', 'becosules']):
-            return self.MEDICINE_IMAGE_MAP['becosules']
-        elif any(word in name_lower for word in ['cold', 'cough', 'sinarest']):
-            return self.MEDICINE_IMAGE_MAP['sinarest']
-        
-        # Default fallback
-        return self.MEDICINE_IMAGE_MAP['default']
-    def _extract_medicines_from_response(self, response):
+        """Card image for a medicine: its name, then its resolved brand / generic, then what it treats"""
+        images = self.catalogs.current().index('medicine_images')['resolver']
+        image = images.lookup(medicine_name, categories=False)
+        if image is None:
+            match = self.medicine_resolver.best(medicine_name)
+            if match:
+                image = images.lookup(match['name'], categories=False) or images.lookup(match['generic'], categories=False)
+        return image or images.lookup(medicine_name) or images.default
+
+    @traced('cards')
+    def _extract_medicines_from_response(self, response, context: dict = None):
         """Extract medicine data from pharmacy agent response"""
         medicines = []
         
+        # Structured replies list the medicines they mention explicitly
+        structured = context.get('current_structured') if context else None
+        if structured:
+            names = [medicine['name'] for medicine in structured['entities']['medicines']]
+            # Brands and misspellings map to their generic so they still get a card
+            resolved = [self.medicine_resolver.best(name) for name in names]
+            response = ' '.join(names + [match['generic'] for match in resolved if match])
+        
         # Look for medicine patterns in the response
         medicine_patterns = [
             'Paracetamol', 'Dolo', 'Ibuprofen', 'Aspirin', 'Amoxicillin', 
@@ -458,20 +565,30 @@ class WellnessManager:
         
         return medicines
 
+    def _inventory_item(self, medicine_name):
+        """Inventory details for a medicine as typed - exact name first, then its resolved brand / generic"""
+        medicines = self.catalogs.current().index('pharmacy_inventory')['medicines']
+        candidates = [medicine_name]
+        match = self.medicine_resolver.best(medicine_name)
+        if match:
+            candidates += [match['name'], match['generic']]
+        for candidate in candidates:
+            candidate_lower = candidate.lower()
+            for med_name_lower, _, _, details in medicines:
+                if candidate_lower in med_name_lower:
+                    return details
+        return None
+
     def _check_medicine_availability(self, medicine_name):
         """Check if medicine is available in inventory"""
-        for category, medicines in self.PHARMACY_INVENTORY_DATA['inventory'].items():
-            for med_name, details in medicines.items():
-                if medicine_name.lower() in med_name.lower():
-                    return details['available']
-        return False
+        details = self._inventory_item(medicine_name)
+        return details['available'] if details else False
 
     def _get_medicine_price(self, medicine_name):
         """Get medicine price from inventory"""
-        for category, medicines in self.PHARMACY_INVENTORY_DATA['inventory'].items():
-            for med_name, details in medicines.items():
-                if medicine_name.lower() in med_name.lower():
-                    return f"₹{details['price']}/{details['type']}"
+        details = self._inventory_item(medicine_name)
+        if details:
+            return f"₹{details['price']}/{details['type']}"
         return "Price not available"
 
     def _get_medicine_description(self, medicine_name):
@@ -493,6 +610,7 @@ class WellnessManager:
         }
         return descriptions.get(medicine_name, 'General medication')
 
+    @traced('cards')
     def _generate_quick_reply_cards(self, options: list) -> list:
         """Generate quick reply action cards"""
         cards = []
@@ -504,84 +622,29 @@ class WellnessManager:
             })
         return cards
 
-    def _generate_lab_cards(self, location: str) -> list:
-        """Generate lab selection cards based on location"""
-        labs_data = {
-            "delhi": [
-                {
-                    "type": "lab",
-                    "title": "Dr. Lal PathLabs",
-                    "description": "NABL accredited lab with home collection service",
-                    "meta": "📍 Delhi • ⭐ 4.5 • 🏠 Home Visit Available",
-                    "selection_text": "Dr. Lal PathLabs",
-                    "lab_id": "lal_delhi",
-                    "tests_available": ["Blood Tests", "Thyroid", "Diabetes", "Liver Function", "Kidney Function"]
-                },
-                {
-                    "type": "lab",
-                    "title": "Thyrocare Technologies",
-                    "description": "Advanced testing with same-day reports for most tests",
-                    "meta": "📍 Delhi • ⭐ 4.4 • ⚡ Same Day Reports",
-                    "selection_text": "Thyrocare",
-                    "lab_id": "thyrocare_delhi",
-                    "tests_available": ["Full Body Checkup", "Hormone Tests", "Vitamin Tests", "Cardiac Tests"]
-                },
-                {
-                    "type": "lab",
-                    "title": "SRL Diagnostics",
-                    "description": "Comprehensive diagnostic services with digital reports",
-                    "meta": "📍 Delhi • ⭐ 4.6 • 📱 Digital Reports",
-                    "selection_text": "SRL Diagnostics",
-                    "lab_id": "srl_delhi",
-                    "tests_available": ["Blood Tests", "Urine Tests", "Pathology", "Radiology"]
-                }
-            ],
-            "mumbai": [
-                {
-                    "type": "lab",
-                    "title": "Suburban Diagnostics",
-                    "description": "Leading diagnostic chain with multiple collection centers",
-                    "meta": "📍 Mumbai • ⭐ 4.5 • 🏠 Home Visit Available",
-                    "selection_text": "Suburban Diagnostics",
-                    "lab_id": "suburban_mumbai",
-                    "tests_available": ["Blood Tests", "Thyroid", "Diabetes", "Full Body Checkup"]
-                },
-                {
-                    "type": "lab",
-                    "title": "Metropolis Healthcare",
-                    "description": "Advanced laboratory testing with quality assurance",
-                    "meta": "📍 Mumbai • ⭐ 4.6 • 🔬 Advanced Testing",
-                    "selection_text": "Metropolis",
-                    "lab_id": "metropolis_mumbai",
-                    "tests_available": ["Blood Tests", "Genetic Tests", "Oncology Tests", "Infectious Diseases"]
-                }
-            ],
-            "bangalore": [
-                {
-                    "type": "lab",
-                    "title": "Aster Labs",
-                    "description": "Comprehensive diagnostic services with quick turnaround",
-                    "meta": "📍 Bangalore • ⭐ 4.4 • ⚡ Quick Results",
-                    "selection_text": "Aster Labs",
-                    "lab_id": "aster_bangalore",
-                    "tests_available": ["Blood Tests", "Thyroid", "Diabetes", "Liver Function"]
-                },
-                {
-                    "type": "lab",
-                    "title": "Apollo Diagnostics",
-                    "description": "Trusted diagnostic services from Apollo healthcare group",
-                    "meta": "📍 Bangalore • ⭐ 4.5 • 🏥 Hospital Network",
-                    "selection_text": "Apollo Diagnostics",
-                    "lab_id": "apollo_diagnostics_bangalore",
-                    "tests_available": ["Blood Tests", "Full Body Checkup", "Specialized Tests"]
-                }
-            ]
-        }
-        
-        # Default labs if location not found
-        default_labs = labs_data.get("delhi", [])
-        return labs_data.get(location.lower(), default_labs)
+    @traced('cards')
+    def _generate_lab_cards(self, location: str, near: dict = None) -> list:
+        """Generate lab selection cards based on location (nearest first if coordinates are known)"""
+        labs = []
+        if near:
+            labs = self.directory.nearest_labs(near['lat'], near['lng'], limit=3, max_km=self.nearby_km)
+        if not labs:
+            # Default labs if location not found
+            labs = [(lab, None) for lab in self.directory.labs(city=location) or self.directory.labs(city='Delhi')]
+        return [
+            {
+                "type": "lab",
+                "title": lab['name'],
+                "description": lab['description'],
+                "meta": self._provider_meta(lab, distance_km),
+                "selection_text": lab.get('selection_text', lab['name']),
+                "lab_id": lab['lab_id'],
+                "tests_available": lab['tests_available']
+            }
+            for lab, distance_km in labs
+        ]
 
+    @traced('cards')
     def _generate_visit_type_cards(self) -> list:
         """Generate visit type selection cards (home visit vs lab visit)"""
         return [
@@ -603,6 +666,7 @@ class WellnessManager:
             }
         ]
     
+    @traced('cards')
     def _generate_test_package_cards(self) -> list:
         """Generate test package selection cards - NEW"""
         return [
@@ -705,12 +769,13 @@ class WellnessManager:
             }
         ]
     
+    @traced('cards')
     def _generate_lab_booking_confirmation(self, context: dict) -> dict:
         """Generate lab booking confirmation card - NEW"""
         lab_info = context['shared_memory'].get('lab_test_info', {})
         
-        # Generate booking ID with LAB- prefix
-        booking_id = f"LAB-{random.randint(10000, 99999)}"
+        # Booking ID with LAB- prefix (the one quoted to the agent, if any)
+        booking_id = self._claim_booking_id(context, lab_info, 'lab_booking')
         
         lab_name = lab_info.get('preferred_lab', 'Selected Lab')
         test_or_package = lab_info.get('package_selected') or lab_info.get('test_type', 'Diagnostic Test')
@@ -741,12 +806,13 @@ class WellnessManager:
             "next_steps": next_steps
         }
 
+    @traced('cards')
     def _generate_test_booking_confirmation(self, context: dict) -> dict:
         """Generate test booking confirmation card"""
         test_info = context['shared_memory'].get('test_booking_info', {})
         
         # Generate booking ID
-        booking_id = f"TEST-{random.randint(1000, 9999)}-{datetime.now().strftime('%m%d')}"
+        booking_id = self._claim_booking_id(context, test_info, 'test_booking')
         
         lab_name = test_info.get('lab_preference', 'Selected Lab')
         test_type = test_info.get('test_type', 'Blood Test')
@@ -848,12 +914,9 @@ class WellnessManager:
         
         result = is_test_booking or current_test_booking
         
-        print(f"🔍 User intent analysis:")
-        print(f"   - User said: '{user_input}'")
-        print(f"   - Test-specific terms: {is_test_booking}")
-        print(f"   - Doctor terms found: {any(phrase in user_input_lower for phrase in doctor_phrases)}")
-        print(f"   - Already in test flow: {current_test_booking}")
-        print(f"   - Final decision: {'TEST BOOKING' if result else 'HOSPITAL APPOINTMENT'}")
+        routing_log.debug("Test booking intent", test_terms=is_test_booking,
+                          already_in_test_flow=current_test_booking,
+                          decision='test_booking' if result else 'hospital_appointment')
         
         return result
 
@@ -887,42 +950,35 @@ class WellnessManager:
         if not test_booking_info.get('is_test_booking'):
             return
         
-        # Track location
-        location_indicators = ['delhi', 'mumbai', 'bangalore', 'chennai', 'kolkata', 'hyderabad', 'pune', 'ahmedabad']
-        for location in location_indicators:
-            if location in user_input_lower:
-                test_booking_info['location'] = location.title()
-                test_booking_info['step'] = 'lab_selection'
-                print(f" Test booking location set: {location.title()}")
-                break
+        # Track location (city name, pincode or "lat, lng")
+        place = self.directory.locate(user_input)
+        city = (place or {}).get('city') or self.directory.find_city(user_input)
+        if place:
+            test_booking_info['near'] = place
+        elif city:
+            test_booking_info.pop('near', None)
+        if city:
+            test_booking_info['location'] = city
+            test_booking_info['step'] = 'lab_selection'
+            context_log.debug("Test booking location set", city=city)
         
         # Track lab selection from cards or user input
-        lab_mappings = {
-            'lal': 'Dr. Lal PathLabs',
-            'thyrocare': 'Thyrocare Technologies', 
-            'srl': 'SRL Diagnostics',
-            'suburban': 'Suburban Diagnostics',
-            'metropolis': 'Metropolis Healthcare',
-            'aster': 'Aster Labs',
-            'apollo': 'Apollo Diagnostics'
-        }
-        
-        for lab_key, lab_name in lab_mappings.items():
-            if lab_key in user_input_lower:
-                test_booking_info['lab_preference'] = lab_name
-                test_booking_info['step'] = 'visit_type_selection'
-                print(f" Lab selected: {lab_name}")
-                break
+        lab = self.directory.find_lab(user_input, test_booking_info.get('location'))
+        if lab:
+            test_booking_info['lab_preference'] = lab['name']
+            test_booking_info['lab_id'] = lab['lab_id']
+            test_booking_info['step'] = 'visit_type_selection'
+            context_log.debug("Lab selected", lab=lab['name'])
         
         # Track visit type
         if any(phrase in user_input_lower for phrase in ['home', 'home visit', 'at home']):
             test_booking_info['visit_type'] = 'Home Visit'
             test_booking_info['step'] = 'confirmation'
-            print(" Visit type: Home Visit")
+            context_log.debug("Visit type", visit_type='Home Visit')
         elif any(phrase in user_input_lower for phrase in ['lab', 'center', 'clinic', 'visit lab']):
             test_booking_info['visit_type'] = 'Lab Visit' 
             test_booking_info['step'] = 'confirmation'
-            print(" Visit type: Lab Visit")
+            context_log.debug("Visit type", visit_type='Lab Visit')
         
         # Track specific test types
         test_mappings = {
@@ -941,7 +997,7 @@ class WellnessManager:
         for test_key, test_name in test_mappings.items():
             if test_key in user_input_lower:
                 test_booking_info['test_type'] = test_name
-                print(f" Test type: {test_name}")
+                context_log.debug("Test type", test_type=test_name)
         
     # === CARD DETECTION LOGIC ===
     def _should_show_lab_cards(self, user_input: str, context: dict) -> bool:
@@ -957,20 +1013,16 @@ class WellnessManager:
         is_test_booking = test_booking_info.get('is_test_booking', False)
         has_location = test_booking_info.get('location')
         no_lab_selected = not test_booking_info.get('lab_preference')
-        no_lab_mentioned = not any(lab in user_input.lower() for lab in 
-                                ['lal', 'thyrocare', 'srl', 'suburban', 'metropolis', 'aster', 'apollo'])
+        no_lab_mentioned = self.directory.find_lab(user_input) is None
         
         should_show = (is_test_booking and 
                     has_location and 
                     no_lab_selected and
                     no_lab_mentioned)
         
-        print(f"   LAB CARD CHECK:")
-        print(f"   - Test Booking: {is_test_booking}")
-        print(f"   - Location: {has_location} ({test_booking_info.get('location')})")
-        print(f"   - No lab selected: {no_lab_selected}")
-        print(f"   - No lab mentioned: {no_lab_mentioned}")
-        print(f"   - Should show: {should_show}")
+        cards_log.debug("Lab card check", test_booking=is_test_booking, location=has_location,
+                        no_lab_selected=no_lab_selected, no_lab_mentioned=no_lab_mentioned,
+                        should_show=bool(should_show))
         
         return should_show
 
@@ -990,19 +1042,20 @@ class WellnessManager:
         no_visit_type = not test_booking_info.get('visit_type')
         
         # Check if agent is asking about visit type in the current response
-        current_response = context.get('current_agent_response', '')
-        asks_about_visit = any(phrase in current_response.lower() for phrase in [
-            'home visit', 'visit the lab', 'technician collects', 'prefer a home',
-            'would you prefer', 'home or lab'
-        ])
+        structured = context.get('current_structured')
+        if structured:
+            asks_about_visit = structured['step'] == 'choosing_visit_type'
+        else:
+            current_response = context.get('current_agent_response', '')
+            asks_about_visit = any(phrase in current_response.lower() for phrase in [
+                'home visit', 'visit the lab', 'technician collects', 'prefer a home',
+                'would you prefer', 'home or lab'
+            ])
         
         should_show = (has_lab and no_visit_type and asks_about_visit)
         
-        print(f"   VISIT TYPE CARD CHECK:")
-        print(f"   - Has lab: {has_lab}")
-        print(f"   - No visit type: {no_visit_type}")
-        print(f"   - Asks about visit: {asks_about_visit}")
-        print(f"   - Should show: {should_show}")
+        cards_log.debug("Visit type card check", has_lab=bool(has_lab), no_visit_type=no_visit_type,
+                        asks_about_visit=asks_about_visit, should_show=bool(should_show))
         
         return should_show
     
@@ -1026,11 +1079,8 @@ class WellnessManager:
         
         should_show = (has_lab and no_package and asking_about_packages)
         
-        print(f"   PACKAGE CARD CHECK:")
-        print(f"   - Has lab: {has_lab}")
-        print(f"   - No package: {no_package}")
-        print(f"   - Asking about packages: {asking_about_packages}")
-        print(f"   - Should show: {should_show}")
+        cards_log.debug("Package card check", has_lab=bool(has_lab), no_package=no_package,
+                        asking_about_packages=asking_about_packages, should_show=bool(should_show))
         
         return should_show
     
@@ -1042,10 +1092,14 @@ class WellnessManager:
             return False
         
         # Show confirmation when all details are collected and agent confirms
-        response_lower = agent_response.lower()
-        has_confirmation = any(phrase in response_lower for phrase in [
-            'confirmed', 'booked', 'booking id', 'lab-'
-        ])
+        structured = context.get('current_structured')
+        if structured:
+            has_confirmation = structured['confirmation']['confirmed']
+        else:
+            response_lower = agent_response.lower()
+            has_confirmation = any(phrase in response_lower for phrase in [
+                'confirmed', 'booked', 'booking id', 'lab-'
+            ])
         
         has_all_info = (
             lab_info.get('location') and
@@ -1060,10 +1114,8 @@ class WellnessManager:
         if should_show:
             lab_info['confirmation_shown'] = True
         
-        print(f"   LAB BOOKING CONFIRMATION CHECK:")
-        print(f"   - Has confirmation: {has_confirmation}")
-        print(f"   - Has all info: {has_all_info}")
-        print(f"   - Should show: {should_show}")
+        cards_log.debug("Lab booking confirmation check", has_confirmation=has_confirmation,
+                        has_all_info=bool(has_all_info), should_show=bool(should_show))
         
         return should_show
 
@@ -1075,10 +1127,14 @@ class WellnessManager:
             return False
         
         # Show confirmation when all details are collected and agent confirms
-        response_lower = agent_response.lower()
-        has_confirmation = any(phrase in response_lower for phrase in [
-            'confirmed', 'booked', 'scheduled', 'booking id'
-        ])
+        structured = context.get('current_structured')
+        if structured:
+            has_confirmation = structured['confirmation']['confirmed']
+        else:
+            response_lower = agent_response.lower()
+            has_confirmation = any(phrase in response_lower for phrase in [
+                'confirmed', 'booked', 'scheduled', 'booking id'
+            ])
         
         has_all_info = (
             test_booking_info.get('location') and
@@ -1097,7 +1153,6 @@ class WellnessManager:
         return should_show
     def _should_show_hospital_cards(self, user_input: str, agent_response: str, context: dict) -> bool:
         """Determine if hospital selection cards should be shown"""
-        user_input_lower = user_input.lower()
         scheduling_info = context['shared_memory'].get('scheduling_info', {})
         test_booking_info = context['shared_memory'].get('test_booking_info', {})
         
@@ -1111,8 +1166,7 @@ class WellnessManager:
         is_scheduling = context['active_agent'] == 'scheduling'
         has_location = scheduling_info.get('location')
         no_hospital_selected = not scheduling_info.get('hospital_preference')
-        no_hospital_mentioned = not any(hospital in user_input_lower for hospital in 
-                                        ['apollo', 'max', 'fortis', 'aiims', 'manipal', 'medanta'])
+        no_hospital_mentioned = self.directory.find_hospital(user_input) is None
         is_test_booking = test_booking_info.get('is_test_booking', False)
         
         should_show = (is_scheduling and 
@@ -1121,13 +1175,9 @@ class WellnessManager:
                     no_hospital_mentioned and
                     not is_test_booking)  # CRITICAL: Don't show hospital cards for test booking
         
-        print(f"   HOSPITAL CARD CHECK:")
-        print(f"   - Scheduling: {is_scheduling}")
-        print(f"   - Location: {has_location} ({scheduling_info.get('location')})")
-        print(f"   - No hospital selected: {no_hospital_selected}")
-        print(f"   - No hospital mentioned: {no_hospital_mentioned}")
-        print(f"   - Is test booking: {is_test_booking}")
-        print(f"   - Should show: {should_show}")
+        cards_log.debug("Hospital card check", scheduling=is_scheduling, location=has_location,
+                        no_hospital_selected=no_hospital_selected, no_hospital_mentioned=no_hospital_mentioned,
+                        test_booking=is_test_booking, should_show=bool(should_show))
         
         return should_show
 
@@ -1148,7 +1198,11 @@ class WellnessManager:
             'i\'ve scheduled', 'your appointment is', 'see you on', 'arrive at'
         ]
         
-        has_confirmation = any(phrase in response_lower for phrase in confirmation_phrases)
+        structured = context.get('current_structured')
+        if structured:
+            has_confirmation = structured['confirmation']['confirmed']
+        else:
+            has_confirmation = any(phrase in response_lower for phrase in confirmation_phrases)
         
         has_required_info = (
             scheduling_info.get('hospital_preference') and 
@@ -1159,20 +1213,9 @@ class WellnessManager:
         
         should_show = (has_confirmation and has_required_info and not already_shown)
         
-        # Enhanced debugging
-        print(f"🎫 BOOKING CONFIRMATION CHECK:")
-        print(f"   Response snippet: {response_lower[:200]}...")
-        print(f"   - Has confirmation phrase: {has_confirmation}")
-        print(f"   - Hospital: {scheduling_info.get('hospital_preference')}")
-        print(f"   - Location: {scheduling_info.get('location')}")
-        print(f"   - Has required info: {has_required_info}")
-        print(f"   - Already shown: {already_shown}")
-        print(f"   - SHOULD SHOW: {should_show}")
-        
-        if should_show:
-            print("✅ Should show booking confirmation card")
-            # Mark as shown to prevent duplicates
-            scheduling_info['confirmation_shown'] = True
+        cards_log.debug("Booking confirmation check", has_confirmation=has_confirmation,
+                        hospital=scheduling_info.get('hospital_preference'), location=scheduling_info.get('location'),
+                        already_shown=already_shown, should_show=bool(should_show))
         
         return should_show
 
@@ -1189,8 +1232,8 @@ class WellnessManager:
         )
         
         if should_stop:
-            print(f" Stopping all cards - confirmed: {scheduling_info.get('appointment_confirmed')}, "
-                  f"hospital_selected: {bool(scheduling_info.get('hospital_preference'))}")
+            cards_log.debug("Stopping all cards", confirmed=scheduling_info.get('appointment_confirmed'),
+                            hospital_selected=bool(scheduling_info.get('hospital_preference')))
         
         return should_stop
     def _should_show_medicine_cards(self, agent_response: str, context: dict) -> bool:
@@ -1203,25 +1246,27 @@ class WellnessManager:
             # 2. Response shows search results
             # 3. AND user hasn't selected a medicine yet
             
-            shows_availability = any(phrase in response_lower for phrase in [
-                'we have', 'available', 'in stock', 'i can check', 
-                'here are the', 'these medicines', 'following medicines'
-            ])
-            
-            asks_for_selection = any(phrase in response_lower for phrase in [
-                'which one', 'would you like to order', 'which medicine',
-                'select', 'choose'
-            ])
+            structured = context.get('current_structured')
+            if structured:
+                shows_availability = bool(structured['entities']['medicines'])
+                asks_for_selection = structured['step'] == 'choosing_medicine'
+            else:
+                shows_availability = any(phrase in response_lower for phrase in [
+                    'we have', 'available', 'in stock', 'i can check', 
+                    'here are the', 'these medicines', 'following medicines'
+                ])
+                
+                asks_for_selection = any(phrase in response_lower for phrase in [
+                    'which one', 'would you like to order', 'which medicine',
+                    'select', 'choose'
+                ])
             
             medicine_already_selected = pharmacy_context.get('medicine_selected')
             
             should_show = (shows_availability or asks_for_selection) and not medicine_already_selected
             
-            if should_show:
-                print(f" Should show medicine cards - availability: {shows_availability}, "
-                    f"asks_selection: {asks_for_selection}, selected: {medicine_already_selected}")
-            else:
-                print(f" NOT showing medicine cards - selected: {medicine_already_selected}")
+            cards_log.debug("Medicine card check", availability=shows_availability, asks_selection=asks_for_selection,
+                            selected=medicine_already_selected, should_show=bool(should_show))
             
             return should_show
     
@@ -1254,21 +1299,60 @@ class WellnessManager:
             }
         return self.user_contexts[user_id]
 
+    @traced('suggestions')
     async def _generate_ai_suggestions(self, user_input: str, agent_response: str, context: dict, agent_type: str) -> list:
         """Generate AI-powered context-aware suggested replies"""
+
+        # Structured/inline replies already include suggestions - skip the extra LLM call
+        if context.get('current_suggestions'):
+            return context['current_suggestions']
+
+        degraded = (self.token_ledger.degraded() or
+                    self.load_shedder.turn_level() >= NO_SUGGESTIONS)
+        user_id = context.get('user_id', 'temp')
+        cache_key = None
+        if self.suggestion_cache is not None:
+            # Buckets are shared across users: generate from the state signature, not this conversation
+            cache_key = state_signature(agent_type, context)
+            situation = describe_signature(cache_key)
+            cached, needs_refresh = self.suggestion_cache.get(cache_key)
+            if cached:
+                if needs_refresh and not degraded:
+                    # Serve the cached bucket now, regenerate it off the request path - on the
+                    # system account, since the bucket belongs to every user in this state
+                    self.suggestion_cache.schedule_refresh(
+                        cache_key,
+                        lambda: self._request_ai_suggestions(situation, SYSTEM_ACCOUNT, agent_type)
+                    )
+                suggestions_log.debug("Serving cached suggestions", agent=agent_type)
+                return cached
+        else:
+            situation = self._conversation_situation(user_input, agent_response, context, agent_type)
+
+        if degraded:
+            # Over the token budget or shedding load: rule-based suggestions instead of another model call
+            return self._get_fallback_suggestions(agent_type, context)
+
+        suggestions = await self._request_ai_suggestions(situation, user_id, agent_type)
+        if suggestions:
+            if cache_key is not None:
+                self.suggestion_cache.put(cache_key, suggestions)
+            return suggestions
+
+        # Fallback to smart rule-based suggestions if AI fails
+        return self._get_fallback_suggestions(agent_type, context)
+
+    def _conversation_situation(self, user_input: str, agent_response: str, context: dict, agent_type: str) -> str:
+        """Suggestion prompt context taken from one user's conversation"""
+        conversation_history = context.get('conversation_history', [])
+        recent_conversation = "\n".join(conversation_history[-self._history_window(6):]) if conversation_history else "No previous conversation"
         
-        try:
-            # Build conversation context for the AI
-            conversation_history = context.get('conversation_history', [])
-            recent_conversation = "\n".join(conversation_history[-6:]) if conversation_history else "No previous conversation"
-            
-            shared_memory = context['shared_memory']
-            symptoms = shared_memory.get('symptoms_discussed', [])
-            scheduling_info = shared_memory.get('scheduling_info', {})
-            pharmacy_info = shared_memory.get('pharmacy_info', {})
-            
-            # Build AI prompt for suggestion generation
-            suggestion_prompt = f"""CONVERSATION CONTEXT:
+        shared_memory = context['shared_memory']
+        symptoms = shared_memory.get('symptoms_discussed', [])
+        scheduling_info = shared_memory.get('scheduling_info', {})
+        pharmacy_info = shared_memory.get('pharmacy_info', {})
+        
+        return f"""CONVERSATION CONTEXT:
             {recent_conversation}
 
             CURRENT AGENT: {agent_type}
@@ -1278,7 +1362,14 @@ class WellnessManager:
             ADDITIONAL CONTEXT:
             - Symptoms discussed: {symptoms}
             - Scheduling info: {scheduling_info}
-            - Pharmacy info: {pharmacy_info}
+            - Pharmacy info: {pharmacy_info}"""
+
+    async def _request_ai_suggestions(self, situation: str, user_id: str, agent_type: str) -> list:
+        """Ask the orchestrator model for suggested replies to a situation; returns [] when it fails"""
+
+        try:
+            # Build AI prompt for suggestion generation
+            suggestion_prompt = f"""{situation}
 
             TASK: Generate 3-4 natural follow-up questions that a PATIENT/USER would likely ask next based on this medical conversation.
             Think from the user's perspective - what would they naturally want to know next?
@@ -1308,27 +1399,29 @@ class WellnessManager:
             # Use the orchestrator agent to generate intelligent suggestions
             orchestrator_agent = self.agents.get('orchestrator')
             if orchestrator_agent:
-                ai_response = await self._call_agent(
+                async def check_suggestions(reply: str):
+                    return 'malformed' if len(self._parse_ai_suggestions(reply)) < 2 else None
+                
+                ai_response = await self._call_tiered(
                     orchestrator_agent, 
                     suggestion_prompt, 
-                    context.get('user_id', 'temp') + '_suggestions', 
-                    'suggestions'
+                    user_id,  # sessions are kept per agent type, apart from the user's other agents
+                    'suggestions',
+                    check_suggestions
                 )
                 
                 # Parse the AI response to extract suggestions
                 suggestions = self._parse_ai_suggestions(ai_response)
                 
                 if suggestions:
-                    print(f"🤖 AI generated {len(suggestions)} suggestions: {suggestions}")
+                    suggestions_log.debug("Generated suggestions", count=len(suggestions), suggestions=suggestions)
                     return suggestions
             
-            # Fallback to smart rule-based suggestions if AI fails
-            return self._get_fallback_suggestions(agent_type, context)
+            return []
             
         except Exception as e:
-            print(f"AI suggestion error: {e}")
-            # Fallback to rule-based suggestions
-            return self._get_fallback_suggestions(agent_type, context)
+            suggestions_log.warning("Suggestion generation failed", error=e)
+            return []
 
     def _parse_ai_suggestions(self, ai_response: str) -> list:
         """Parse AI response to extract suggested replies"""
@@ -1457,6 +1550,7 @@ class WellnessManager:
         
         return suggestions[:4]
     
+    @traced('format')
     def _format_agent_response(self, response: str, agent: str, suggested_replies: list = None) -> dict:
         """Format the agent response with metadata and suggested replies"""
         
@@ -1506,9 +1600,9 @@ class WellnessManager:
             self.users_collection = self.db.collection('users')
             self.conversations_collection = self.db.collection('conversations')
             
-            print("Firebase services initialized")
+            log.info("Firebase services initialized")
         except Exception as e:
-            print(f"Firebase setup warning: {e}")
+            log.warning("Firebase setup failed", error=e)
     
     def _initialize_agents(self):
         """Initialize all agents"""
@@ -1532,18 +1626,33 @@ class WellnessManager:
             'lab_test': ('Lab Test Specialist', LabTestAgent)  # NEW: Lab test agent
         }
         
+        full_model = self.model_tiers.model_for(FULL)
         for key, (name, AgentClass) in agent_configs.items():
             try:
-                self.agents[key] = AgentClass()
-                print(f"  {name} Agent - Initialized")
+                agent = AgentClass()
+                self.agents[key] = agent if agent.model == full_model else agent.with_model(full_model)
+                log.info("Agent initialized", agent=name)
             except Exception as e:
-                print(f"  {name} Agent - Failed: {e}")
+                log.warning("Agent failed to initialize", agent=name, error=e)
+        
+        # Lite-tier copies of the agents behind lite call purposes
+        lite_model = self.model_tiers.model_for(LITE)
+        for purpose in self.model_tiers.lite_purposes():
+            agent = self.agents.get(PURPOSE_AGENTS.get(purpose, purpose))
+            if agent:
+                self.lite_agents[purpose] = agent.with_model(lite_model)
+                log.info("Lite tier enabled", purpose=purpose, model=lite_model)
     
     async def detect_query_type(self, user_input: str, context: dict) -> str:
         """Detect query type using LLM-based router with keyword fallback"""
+        return (await self.detect_intents(user_input, context))[0]
+    
+    @traced('route')
+    async def detect_intents(self, user_input: str, context: dict) -> list:
+        """Routes for a message, most important first (several only when the router finds a compound message)"""
         
         # Build context for router
-        recent_conv = "\n".join(context['conversation_history'][-4:]) if context['conversation_history'] else "No previous conversation"
+        recent_conv = "\n".join(context['conversation_history'][-self._history_window(4):]) if context['conversation_history'] else "No previous conversation"
         current_agent = context.get('active_agent', 'orchestrator')
         
         router_context = f"""
@@ -1557,39 +1666,74 @@ Which agent should handle this message?
 """
         
         try:
+            if self.token_ledger.degraded():
+                result = await self._keyword_fallback(user_input)
+                self.route_decisions.inc(source='budget', intent=result)
+                return [result]
+            if self.load_shedder.turn_level() >= KEYWORD_ROUTER:
+                result = await self._keyword_fallback(user_input)
+                self.route_decisions.inc(source='load_shedding', intent=result)
+                return [result]
+            
             router_agent = self.agents.get('router')
             if not router_agent:
-                print("Router agent not found, falling back to keywords")
-                return await self._keyword_fallback(user_input)
+                routing_log.warning("Router agent not found, falling back to keywords")
+                result = await self._keyword_fallback(user_input)
+                self.route_decisions.inc(source='keyword_fallback', intent=result)
+                return [result]
+            
+            async def check_route(reply: str):
+                # Labels outside the map are malformed; a bare GENERAL when the keywords
+                # point at a specialist is treated as low confidence
+                labels = self._router_labels(reply)
+                if any(label not in ROUTER_INTENT_MAP for label in labels):
+                    return 'unrecognized'
+                if labels == ['GENERAL'] and await self._keyword_fallback(user_input) != 'general':
+                    return 'low_confidence'
+                return None
             
-            # Call router agent
-            response = await self._call_agent(
+            # Call router agent (lite tier first when configured)
+            response = await self._call_tiered(
                 router_agent, 
                 router_context, 
                 context.get('user_id', 'temp'), 
-                'router'
+                'router',
+                check_route
             )
             
-            detected_intent = response.strip().upper()
+            labels = self._router_labels(response)
+            detected_intent = labels[0]
             
-            # Map router response to agent names
-            intent_map = {
-                'SYMPTOM': 'symptom',
-                'SCHEDULING': 'scheduling',
-                'PHARMACY': 'pharmacy',
-                'INSURANCE': 'policy_analysis',
-                'CARE_PLAN': 'care_plan',
-                'LAB_TEST': 'lab_test',
-                'GENERAL': 'general'
-            }
-            
-            result = intent_map.get(detected_intent, 'general')
-            print(f"Router detected: {detected_intent} → {result}")
-            return result
+            # Map router response to agent names (GENERAL only counts when nothing else was named)
+            routes = []
+            for label in labels:
+                route = ROUTER_INTENT_MAP.get(label, 'general')
+                if route not in routes:
+                    routes.append(route)
+            if len(routes) > 1 and 'general' in routes:
+                routes.remove('general')
+            result = routes[0]
+            routing_log.debug("Router detected", intent=','.join(labels), route=result, routes=routes)
+            self.route_decisions.inc(source='router' if detected_intent in ROUTER_INTENT_MAP else 'router_unrecognized',
+                                     intent=result)
+            for route in routes[1:]:
+                self.route_decisions.inc(source='router_secondary', intent=route)
+            return routes
             
         except Exception as e:
-            print(f" Router error: {e}, falling back to keywords")
-            return await self._keyword_fallback(user_input)
+            routing_log.warning("Router failed, falling back to keywords", error=e)
+            result = await self._keyword_fallback(user_input)
+            self.route_decisions.inc(source='keyword_fallback', intent=result)
+            return [result]
+    
+    def _router_labels(self, response: str) -> list:
+        """'SYMPTOM, PHARMACY' -> ['SYMPTOM', 'PHARMACY'] (a single label for a single-intent message)"""
+        labels = [label.strip().strip('"\'') for label in response.strip().upper().split(',')]
+        return [label for label in labels if label] or ['']
+    
+    def _history_window(self, turns: int) -> int:
+        """How many history lines go into a prompt (fewer while shedding load)"""
+        return min(turns, 2) if self.load_shedder.turn_level() >= SHORT_HISTORY else turns
     
     async def _keyword_fallback(self, user_input: str) -> str:
         """Fallback to keyword-based routing when LLM fails"""
@@ -1617,23 +1761,16 @@ Which agent should handle this message?
         if any(keyword in user_input_lower for keyword in lab_test_keywords):
             appointment_keywords = ['doctor', 'appointment', 'consult', 'see a doctor', 'physician']
             if not any(kw in user_input_lower for kw in appointment_keywords):
-                print("🔬 Lab test detected via keyword fallback")
+                routing_log.debug("Lab test detected via keyword fallback")
                 return 'lab_test'
         
-        # Check for common medicine names (strong pharmacy indicator)
-        medicine_names = [
-            'paracetamol', 'dolo', 'crocin', 'calpol', 'ibuprofen', 'aspirin',
-            'amoxicillin', 'azithromycin', 'ciprofloxacin', 'augmentin',
-            'cetirizine', 'levocetirizine', 'allegra', 'avil', 'montair',
-            'montelukast', 'metformin', 'glucophage', 'glycomet',
-            'atorvastatin', 'lipitor', 'rosuvastatin', 'crestor',
-            'omeprazole', 'pantoprazole', 'rabeprazole', 'pan',
-            'vitamin', 'supplement', 'calcium', 'iron', 'multivitamin',
-            'combiflam', 'disprin', 'saridon', 'sinarest'
-        ]
+        # Check for medicine names (strong pharmacy indicator) - brands, generics and misspellings
+        medicines = self.medicine_resolver.find_in_text(user_input)
+        if medicines:
+            routing_log.debug("Medicines recognised", medicines=[m['name'] for m in medicines])
         
         # Check if user mentions medicine names directly
-        medicine_mentioned = any(med in user_input_lower for med in medicine_names)
+        medicine_mentioned = bool(medicines) or 'supplement' in user_input_lower
         
         # Also check for availability queries with medicine context
         availability_query = any(phrase in user_input_lower for phrase in [
@@ -1650,10 +1787,10 @@ Which agent should handle this message?
         # Boost pharmacy score if medicine mentioned or availability query
         if medicine_mentioned or availability_query:
             pharmacy_score += 2
-            print(f"Medicine/availability detected - pharmacy_score boosted to {pharmacy_score}")
+            routing_log.debug("Medicine or availability query - pharmacy boosted", pharmacy=pharmacy_score)
         
-        print(f"🔍 Keyword fallback scores - symptom:{symptom_score}, scheduling:{scheduling_score}, "
-            f"pharmacy:{pharmacy_score}, insurance:{insurance_score}, care:{care_plan_score}")
+        routing_log.debug("Keyword fallback scores", symptom=symptom_score, scheduling=scheduling_score,
+                          pharmacy=pharmacy_score, insurance=insurance_score, care_plan=care_plan_score)
         
         # Medical workflow priority:
         if symptom_score >= 1 and pharmacy_score < 2:  # Only route to symptom if not clearly pharmacy
@@ -1669,10 +1806,11 @@ Which agent should handle this message?
         
         return 'general'
     
+    @traced('prompt')
     def _build_agent_context(self, user_input: str, context: dict, target_agent: str) -> str:
         """Build shared context for any agent"""
         shared = context['shared_memory']
-        recent_conversation = "\n".join(context['conversation_history'][-6:]) if context['conversation_history'] else "No previous conversation"
+        recent_conversation = "\n".join(context['conversation_history'][-self._history_window(6):]) if context['conversation_history'] else "No previous conversation"
         
         base_context = f"""
 SHARED CONVERSATION CONTEXT:
@@ -1707,7 +1845,7 @@ IMPORTANT:
         - Lab: {test_booking_info.get('lab_preference', 'Not selected')}
         - Visit Type: {test_booking_info.get('visit_type', 'Not selected')}
 
-        Use test booking confirmation format with booking ID starting with TEST-
+        Use test booking confirmation format with this booking ID: {self._pending_booking_id(test_booking_info, 'test_booking')}
         """
             else:
                 base_context += """
@@ -1720,14 +1858,34 @@ IMPORTANT:
         3. Confirm appointment details
 
         Use hospital appointment confirmation format with appointment ID starting with APPT-
+        """
+                hospital_name = shared.get('scheduling_info', {}).get('hospital_preference')
+                held_slot = self.slot_engine.held_slot(context['user_id']) if hospital_name else None
+                if held_slot:
+                    base_context += f"""
+        RESERVED SLOT (offer exactly this - do not invent other times or doctors):
+        - Doctor: {held_slot['doctor']} ({held_slot['department']})
+        - Hospital: {held_slot['hospital']}
+        - Date: {held_slot['date']}
+        - Time: {held_slot['time']}
+        - Appointment ID (use exactly this when confirming): {self._pending_booking_id(shared['scheduling_info'], 'appointment')}
+        """
+                elif hospital_name:
+                    base_context += f"""
+        NO BOOKABLE SLOT at {hospital_name} for the user's preferred time or the next few days.
+        Do not confirm an appointment - suggest another hospital or a different day.
+        """
+        
+        elif target_agent == 'lab_test' and 'lab_test_info' in shared:
+            lab_test_info = shared['lab_test_info']
+            base_context += f"""
+        If you confirm a lab booking in this reply, use this booking ID: {self._pending_booking_id(lab_test_info, 'lab_booking')}
         """
         
         return base_context.strip()
     
-    def _update_shared_context(self, user_input: str, agent_response: str, context: dict, agent_type: str):
-        """Update shared context with new information from conversation"""
-        
-        # Add to conversation history
+    def _append_history(self, user_input: str, agent_response: str, context: dict):
+        """Add one exchange to the conversation history (last 20 lines kept)"""
         context['conversation_history'].extend([
             f"User: {user_input}",
             f"Agent: {agent_response}"
@@ -1735,6 +1893,15 @@ IMPORTANT:
         
         if len(context['conversation_history']) > 20:
             context['conversation_history'] = context['conversation_history'][-20:]
+
+    @traced('update_context')
+    def _update_shared_context(self, user_input: str, agent_response: str, context: dict, agent_type: str,
+                               record_history: bool = True):
+        """Update shared context with new information from conversation"""
+        
+        # Add to conversation history
+        if record_history:
+            self._append_history(user_input, agent_response, context)
         
         shared = context['shared_memory']
         user_input_lower = user_input.lower()
@@ -1754,69 +1921,56 @@ IMPORTANT:
             # Update test booking context
             self._update_test_booking_context(user_input, agent_response, context)
         else:
-            # Track location
-            location_indicators = ['delhi', 'mumbai', 'bangalore', 'chennai', 'kolkata', 'hyderabad', 'pune', 'ahmedabad']
-            for location in location_indicators:
-                if location in user_input_lower:
-                    if 'scheduling_info' not in shared:
-                        shared['scheduling_info'] = {}
-                    shared['scheduling_info']['location'] = location.title()
-                    print(f" Location detected: {location.title()}")
-                    break
+            # Track location (city name, pincode or "lat, lng")
+            place = self.directory.locate(user_input)
+            city = (place or {}).get('city') or self.directory.find_city(user_input)
+            if place or city:
+                if 'scheduling_info' not in shared:
+                    shared['scheduling_info'] = {}
+                if place:
+                    shared['scheduling_info']['near'] = place
+                else:
+                    shared['scheduling_info'].pop('near', None)
+                if city:
+                    shared['scheduling_info']['location'] = city
+                    context_log.debug("Location detected", city=city)
             
-            # Track hospital preferences
-            hospital_indicators = {
-                'apollo': 'Apollo Hospital',
-                'max': 'Max Super Specialty Hospital', 
-                'fortis': 'Fortis Escorts Heart Institute'
-            }
-        
-            for hospital_key, hospital_name in hospital_indicators.items():
-                if hospital_key in user_input_lower:
-                    if 'scheduling_info' not in shared:
-                        shared['scheduling_info'] = {}
-                    shared['scheduling_info']['hospital_preference'] = hospital_name
-                    print(f"Hospital selected: {hospital_name}")
-                    break
-
-        # Track time preferences
-        time_indicators = {
-            'morning': 'Morning',
-            'afternoon': 'Afternoon', 
-            'evening': 'Evening',
-            'tomorrow': 'Tomorrow',
-            'today': 'Today'
-        }
-        
-        for time_key, time_name in time_indicators.items():
-            if time_key in user_input_lower:
+            # Track hospital preferences - only while booking, since some aliases
+            # ('max', 'global', 'ruby') are ordinary words elsewhere
+            hospital = self.directory.find_hospital(
+                user_input, shared.get('scheduling_info', {}).get('location')) if agent_type == 'scheduling' else None
+            if hospital:
                 if 'scheduling_info' not in shared:
                     shared['scheduling_info'] = {}
-                shared['scheduling_info']['time_preference'] = time_name
-                print(f" Time preference: {time_name}")
-                break
+                shared['scheduling_info']['hospital_preference'] = hospital['name']
+                shared['scheduling_info']['hospital_id'] = hospital['hospital_id']
+                context_log.debug("Hospital selected", hospital=hospital['name'])
+
+        # Track time preferences
+        self._track_time_preference(user_input, context)
+
+        # Structured replies carry entities and confirmation - no need to scan the text
+        structured = context.get('current_structured')
+        if structured:
+            self._apply_structured_fields(structured, context, agent_type)
+            return
 
         # Track appointment confirmation
         if 'appointment id' in agent_response_lower or 'appointment confirmed' in agent_response_lower:
             if 'scheduling_info' not in shared:
                 shared['scheduling_info'] = {}
             shared['scheduling_info']['appointment_confirmed'] = True
-            print(" Appointment confirmed in shared context")
+            context_log.debug("Appointment confirmed in shared context")
             # Track medicine selection (for pharmacy agent)
         if agent_type == 'pharmacy':
-            # Check if user selected a specific medicine
-            medicine_names = ['paracetamol', 'ibuprofen', 'cetirizine', 'levocetirizine', 
-                            'montelukast', 'azithromycin', 'amoxicillin', 'omeprazole']
-            
-            for medicine in medicine_names:
-                if medicine in user_input_lower and ('order' in user_input_lower or 
-                                                    'want' in user_input_lower or
-                                                    'buy' in user_input_lower):
+            # Check if user selected a specific medicine (typos and brands resolve too)
+            if any(word in user_input_lower for word in ('order', 'want', 'buy')):
+                medicines = self.medicine_resolver.find_in_text(user_input, limit=1)
+                if medicines:
                     if 'pharmacy_info' not in shared:
                         shared['pharmacy_info'] = {}
-                    shared['pharmacy_info']['medicine_selected'] = medicine.title()
-                    print(f" Medicine selected: {medicine.title()}")
-                    break
+                    shared['pharmacy_info']['medicine_selected'] = medicines[0]['name']
+                    context_log.debug("Medicine selected", medicine=medicines[0]['name'])
             
             # Check if asking for quantity (means medicine was selected)
             if any(phrase in agent_response_lower for phrase in 
@@ -1824,56 +1978,434 @@ IMPORTANT:
                 if 'pharmacy_info' not in shared:
                     shared['pharmacy_info'] = {}
                 shared['pharmacy_info']['medicine_selected'] = True
-                print("Medicine selection confirmed (asking for quantity)")
+                context_log.debug("Medicine selection confirmed (asking for quantity)")
+
+    def _apply_structured_fields(self, structured: dict, context: dict, agent_type: str):
+        """Update shared context from the typed fields of a structured agent reply"""
+        shared = context['shared_memory']
+        entities = structured['entities']
+        confirmed = structured['confirmation']['confirmed']
+
+        for symptom in entities['symptoms']:
+            if symptom not in shared['symptoms_discussed']:
+                shared['symptoms_discussed'].append(symptom)
 
-    async def _call_agent(self, agent, message: str, user_id: str, agent_type: str) -> str:
-        """Call an agent"""
+        test_booking_info = shared.get('test_booking_info', {})
+
+        if agent_type == 'scheduling' and test_booking_info.get('is_test_booking'):
+            if entities['location']:
+                test_booking_info['location'] = entities['location'].title()
+                test_booking_info['step'] = 'lab_selection'
+            if entities['lab']:
+                test_booking_info['lab_preference'] = entities['lab']
+                test_booking_info['step'] = 'visit_type_selection'
+            if entities['visit_type']:
+                test_booking_info['visit_type'] = 'Home Visit' if entities['visit_type'] == 'home' else 'Lab Visit'
+                test_booking_info['step'] = 'confirmation'
+            if entities['test_type']:
+                test_booking_info['test_type'] = entities['test_type']
+
+        elif agent_type == 'scheduling':
+            scheduling_info = shared.setdefault('scheduling_info', {})
+            if entities['location']:
+                scheduling_info['location'] = entities['location'].title()
+            if entities['hospital']:
+                # Keep hospital_id in step with the name - bookings go by the id when there is one
+                hospital = self.directory.find_hospital(entities['hospital'], scheduling_info.get('location'))
+                if hospital:
+                    scheduling_info['hospital_preference'] = hospital['name']
+                    scheduling_info['hospital_id'] = hospital['hospital_id']
+                else:
+                    scheduling_info['hospital_preference'] = entities['hospital']
+                    scheduling_info.pop('hospital_id', None)
+            if entities['time_preference']:
+                scheduling_info['time_preference'] = entities['time_preference']
+            if confirmed:
+                scheduling_info['appointment_confirmed'] = True
+                context_log.debug("Appointment confirmed in shared context")
+
+        elif agent_type == 'lab_test' and 'lab_test_info' in shared:
+            lab_info = shared['lab_test_info']
+            field_map = {
+                'location': 'location',
+                'lab': 'preferred_lab',
+                'visit_type': 'visit_type',
+                'test_type': 'test_type',
+                'package': 'package_selected',
+                'time_preference': 'preferred_time'
+            }
+            for entity_key, info_key in field_map.items():
+                if entities[entity_key]:
+                    lab_info[info_key] = entities[entity_key]
+
+        elif agent_type == 'pharmacy':
+            if entities['medicine_selected'] or structured['step'] == 'awaiting_quantity':
+                shared.setdefault('pharmacy_info', {})['medicine_selected'] = entities['medicine_selected'] or True
+                context_log.debug("Medicine selected", medicine=entities['medicine_selected'])
+
+    async def _call_agent(self, agent, message: str, user_id: str, agent_type: str, session: str = None) -> str:
+        """Call an agent through the configured model backend (session: backend session key, default agent_type)"""
+        start = time.perf_counter()
+        try:
+            with span(f"model.{agent_type}"):
+                response_text = await self.model_backend.generate(agent, message, user_id, agent_type, session)
+            elapsed = time.perf_counter() - start
+            if self.recorder:
+                self.recorder.record_call(agent_type, message, response_text, elapsed * 1000)
+            usage = take_usage()
+            estimated = usage is None
+            if estimated:
+                usage = {'prompt': estimate_tokens(message), 'completion': estimate_tokens(response_text)}
+            self._count_llm_call(agent_type, user_id, 'ok' if response_text else 'empty', elapsed,
+                                 usage, estimated, getattr(agent, 'model', None))
+            return response_text if response_text else AGENT_EMPTY_RESPONSE
+            
+        except Exception as e:
+            log.warning("Agent call failed", agent=agent_type, error=e)
+            elapsed = time.perf_counter() - start
+            if self.recorder:
+                self.recorder.record_call(agent_type, message, None, elapsed * 1000, error=type(e).__name__)
+            self._count_llm_call(agent_type, user_id, 'error', elapsed, take_usage(),
+                                 model=getattr(agent, 'model', None))
+            return AGENT_ERROR_RESPONSE
+
+    async def _call_tiered(self, agent, message: str, user_id: str, agent_type: str, check) -> str:
+        """
+        Call an agent on its purpose's tier, escalating unusable lite output to the full model
+        
+        Args:
+            agent: Full-tier agent for the call
+            message: Prompt for this turn
+            user_id: Conversation owner
+            agent_type: Call purpose ('router', 'suggestions', ...)
+            check: async reply -> escalation reason, or None when the reply is usable
         
-        if user_id not in self.user_sessions:
-            self.user_sessions[user_id] = {}
+        Returns:
+            Reply text from the lite model, or from the full model after escalation
         
-        if agent_type not in self.user_sessions[user_id]:
-            session_id = f"{user_id}-{agent_type}-{self.session_counter}"
-            self.session_counter += 1
-            self.user_sessions[user_id][agent_type] = session_id
+        The two tiers keep separate sessions: an escalated call must not see the lite
+        model's rejected reply in its history, nor leave its own in the lite session.
+        """
+        lite_agent = self.lite_agents.get(agent_type)
+        session = None
+        if lite_agent is not None:
+            start = time.perf_counter()
+            response = await self._call_agent(lite_agent, message, user_id, agent_type)
+            self._count_tier_call(agent_type, LITE, time.perf_counter() - start)
+            if response in (AGENT_EMPTY_RESPONSE, AGENT_ERROR_RESPONSE):
+                reason = 'failed'
+            else:
+                reason = await check(response)
+            if reason is None or not self.model_tiers.escalation:
+                return response
+            self.model_tiers.record_escalation(agent_type, reason)
+            self.tier_escalations.inc(agent=agent_type, reason=reason)
+            log.debug("Escalating to full model", agent=agent_type, reason=reason)
+            session = f"{agent_type}:{FULL}"
+        
+        start = time.perf_counter()
+        response = await self._call_agent(agent, message, user_id, agent_type, session)
+        self._count_tier_call(agent_type, FULL, time.perf_counter() - start)
+        return response
+
+    def _count_tier_call(self, agent_type: str, tier: str, elapsed: float):
+        self.model_tiers.record(agent_type, tier, elapsed * 1000)
+        self.tier_calls.inc(agent=agent_type, tier=tier)
+        self.tier_latency.observe(elapsed, agent=agent_type, tier=tier)
+
+    def _count_llm_call(self, agent_type: str, user_id: str, outcome: str, elapsed: float,
+                        usage: dict = None, estimated: bool = False, model: str = None):
+        """Update the model call metrics and load signal, and charge the call's tokens (at model's prices) to the ledger"""
+        self.llm_calls.inc(agent=agent_type, outcome=outcome)
+        self.llm_latency.observe(elapsed, agent=agent_type)
+        self.load_shedder.observe_latency(elapsed * 1000)
+        if usage:
+            self.llm_tokens.inc(usage['prompt'], agent=agent_type, kind='prompt')
+            self.llm_tokens.inc(usage['completion'], agent=agent_type, kind='completion')
+            call = self.token_ledger.record(user_id, agent_type, usage['prompt'], usage['completion'], estimated,
+                                            model if isinstance(model, str) else None)
+            self.llm_cost.inc(call['cost_usd'], agent=agent_type)
+
+    def _collect_metrics(self):
+        """Scrape-time gauges from live state (contexts, sessions, cache counters)"""
+        metrics = self.metrics
+        metrics.gauge('wellness_user_contexts', 'Conversation contexts held in memory').set(len(self.user_contexts))
+        sessions_gauge = metrics.gauge('wellness_model_sessions', 'Model sessions held by the backend')
+        sessions_gauge.set(sum(len(agent_sessions) for agent_sessions in
+                               getattr(self.model_backend, 'user_sessions', {}).values()))
+        metrics.gauge('wellness_policy_documents', 'Parsed policy documents cached').set(len(self.policy_store))
+        load = self.load_shedder.state()
+        metrics.gauge('wellness_degradation_level', 'Load-shedding level (0 normal .. 4 reject)').set(load['level'])
+        metrics.gauge('wellness_load_pressure', 'Worst of model p95 / target and turns in flight / limit').set(
+            load['pressure'])
+        metrics.gauge('wellness_turns_in_flight', 'Turns being processed').set(load['inflight'])
+        metrics.counter('wellness_load_shed_rejections_total', 'Requests rejected at the reject level').sync(
+            load['rejected'])
+
+        caches = {'policy_sections': (self.policy_store.stats['section_prompt_hits'],
+                                      self.policy_store.stats['section_prompt_misses'])}
+        if self.suggestion_cache is not None:
+            caches['suggestions'] = (self.suggestion_cache.stats['hits'], self.suggestion_cache.stats['misses'])
+        if self.policy_answer_cache is not None:
+            answers = self.policy_answer_cache.metrics(self.policy_store.default_version)
+            caches['policy_answers'] = (answers['hits'], answers['misses'])
+            metrics.gauge('wellness_policy_answers_cached', 'FAQ answers held in the policy answer cache').set(
+                answers['entries'])
+            served_age = metrics.gauge('wellness_policy_answer_served_age_seconds',
+                                       'Age of FAQ answers when served from cache', ('stat',))
+            served_age.set(answers['avg_served_age_seconds'], stat='avg')
+            served_age.set(answers['max_served_age_seconds'], stat='max')
+            metrics.gauge('wellness_policy_answer_oldest_entry_age_seconds',
+                          'Age of the oldest cached FAQ answer').set(answers['oldest_entry_age_seconds'])
+        hits = metrics.counter('wellness_cache_hits_total', 'Cache hits', ('cache',))
+        misses = metrics.counter('wellness_cache_misses_total', 'Cache misses', ('cache',))
+        ratio = metrics.gauge('wellness_cache_hit_ratio', 'Fraction of cache lookups that hit', ('cache',))
+        for cache, (cache_hits, cache_misses) in caches.items():
+            hits.sync(cache_hits, cache=cache)
+            misses.sync(cache_misses, cache=cache)
+            ratio.set(cache_hits / (cache_hits + cache_misses) if cache_hits + cache_misses else 0.0, cache=cache)
+
+    def load_insurance_analysis(self, analysis, user_id: str) -> bool:
+        """
+        Load a user's uploaded policy analysis for insurance questions
+        
+        Args:
+            analysis: Policy analysis dict (with 'extracted_policy'), bare policy dict,
+                      or the raw JSON document
+            user_id: User the policy belongs to
             
-            await self.session_service.create_session(
-                app_name="wellness-gpt",
-                user_id=user_id,
-                session_id=session_id,
-            )
+        Returns:
+            True if the policy was loaded
+        """
+        try:
+            record = self.policy_store.load(user_id, analysis)
+        except ValueError as e:
+            log.warning("Policy upload rejected", user=user_id, error=e)
+            return False
         
-        session_id = self.user_sessions[user_id][agent_type]
+        policy_name = record['policy'].get('policy_details', {}).get('policy_name', 'Unnamed policy')
+        log.info("Loaded policy", policy=policy_name, user=user_id, version=record['version'])
+        return True
+
+    @traced('prompt')
+    def _policy_prompt_json(self, user_input: str, user_id: str) -> str:
+        """Serialized policy JSON (relevant sections only) for the insurance prompt"""
+        record = self.policy_store.get(user_id)
+        # Over the token budget: only the single most relevant section
+        top_k = 1 if self.token_ledger.degraded() else self.policy_top_k
+        return self.policy_store.prompt_json(record, user_input, top_k)
+
+    def _insurance_prompt(self, insurance_context: str, user_input: str, user_id: str) -> str:
+        """Insurance specialist prompt: shared context plus the relevant policy sections"""
+        return f"""{insurance_context}
+
+YOUR CURRENT INSURANCE POLICY DETAILS:
+```json
+{self._policy_prompt_json(user_input, user_id)}
+Use this policy data to answer their question."""
+
+    def _pharmacy_prompt(self, pharmacy_context: str, user_input: str) -> str:
+        """Pharmacy specialist prompt: shared context plus the inventory"""
+        return f"""{pharmacy_context}
+YOUR PHARMACY INVENTORY DATA:
+```json
+{self.catalogs.current().index('pharmacy_inventory')['prompt_json']}
+USER IS ASKING ABOUT: "{user_input}"
+CRITICAL INSTRUCTIONS:
+1. Check medicine availability using the inventory data above
+2. When a medicine is selected, automatically process the order and provide order confirmation
+3. For pain/fever medicines like Paracetamol, use appropriate dosage: "1 tablet as needed for pain/fever"
+4. Provide professional order confirmations with delivery details
+5. Ask for prescription if needed, but don't require it for common medicines
+EXAMPLE RESPONSES:
+GOOD: "Great! I've processed your order for Paracetamol. Standard dosage: 1 tablet as needed for pain or fever. Your order will be delivered in 2-4 hours. Total: ₹20"
+BAD: "I'll use the basic_antibiotic prescription template"
+Process orders naturally using the pharmacy inventory data."""
+
+    @traced('specialist')
+    async def _answer_policy_question(self, agent, prompt: str, user_input: str, user_id: str, context: dict) -> str:
+        """Answer an insurance question from the query engine or FAQ cache, falling back to the policy agent"""
+        record = self.policy_store.get(user_id)
         
-        runner = Runner(
-            app_name="wellness-gpt",
-            agent=agent,
-            session_service=self.session_service
-        )
+        if record['engine'] is not None:
+            direct = record['engine'].answer(user_input)
+            if direct:
+                routing_log.debug("Answering insurance question from policy engine", intents=direct['intents'])
+                return direct['answer']
         
-        content = Content(parts=[Part(text=message)])
+        cacheable = (self.policy_answer_cache is not None and
+                     self.policy_answer_cache.is_cacheable(user_input))
         
-        try:
-            response_generator = runner.run(
-                user_id=user_id,
-                session_id=session_id,
-                new_message=content,
+        if cacheable:
+            cached_answer = self.policy_answer_cache.lookup(user_input, record['version'])
+            if cached_answer:
+                routing_log.debug("Answering insurance question from FAQ cache")
+                return cached_answer
+        
+        response = await self._call_specialist(agent, prompt, user_id, 'policy_analysis', context)
+        
+        # The cache is shared across users: only keep answers whose prompt carried nobody's context
+        if (cacheable and response not in (AGENT_EMPTY_RESPONSE, AGENT_ERROR_RESPONSE) and
+                not self._has_user_context(self.user_contexts.get(user_id))):
+            self.policy_answer_cache.store(user_input, record['version'], response)
+        
+        return response
+
+    @staticmethod
+    def _has_user_context(context: dict) -> bool:
+        """Whether agent prompts for this conversation include anything user-specific"""
+        if not context:
+            return False
+        return bool(context['conversation_history']) or any(context['shared_memory'].values())
+
+    @traced('specialist')
+    async def _call_specialist(self, agent, message: str, user_id: str, agent_type: str, context: dict) -> str:
+        """Call a specialist agent, splitting out typed fields or suggestions when enabled"""
+        context['current_structured'] = None
+        context['current_suggestions'] = None
+
+        if self.structured_output:
+            raw_response = await self._call_agent(
+                agent, f"{message}\n{STRUCTURED_OUTPUT_INSTRUCTIONS}", user_id, agent_type
             )
-            response_text = ""
-            for event in response_generator:
-                if hasattr(event, 'content') and event.content and event.content.parts:
-                    response_text = event.content.parts[0].text
-                    break
-            
-            return response_text if response_text else "I'm processing..."
-            
-        except Exception as e:
-            print(f" Agent error: {e}")
-            return "I'm having trouble responding."
+            structured = parse_structured_reply(raw_response)
+            if not structured:
+                log.info("Structured output not parsed, using text heuristics", agent=agent_type)
+                return raw_response
+
+            context['current_structured'] = structured
+            context['current_suggestions'] = structured['suggested_replies']
+            return structured['reply']
+
+        if self.inline_suggestions:
+            raw_response = await self._call_agent(
+                agent, f"{message}\n{SUGGESTION_TRAILER_INSTRUCTIONS}", user_id, agent_type
+            )
+            response, suggestions = split_suggestion_trailer(raw_response)
+            context['current_suggestions'] = suggestions
+            return response
+
+        return await self._call_agent(agent, message, user_id, agent_type)
+
+    # === MULTI-INTENT FAN-OUT ===
     
+    def _fanout_prompt(self, user_input: str, context: dict, intent: str, intents: list, user_id: str) -> str:
+        """Specialist prompt for one part of a compound message"""
+        agent_context = self._build_agent_context(user_input, context, intent)
+        if intent == 'pharmacy':
+            prompt = self._pharmacy_prompt(agent_context, user_input)
+        elif intent == 'policy_analysis':
+            prompt = self._insurance_prompt(agent_context, user_input, user_id)
+        else:
+            prompt = agent_context
+        others = ', '.join(FANOUT_TOPICS[other] for other in intents if other != intent)
+        return f"""{prompt}
+
+This message also asks about {others}; other specialists answer that in the same reply.
+Answer ONLY the part about {FANOUT_TOPICS[intent]}, in a few sentences. Do not greet the user or mention other specialists."""
+
+    async def _fan_out(self, user_input: str, intents: list, context: dict, user_id: str) -> dict:
+        """
+        Answer a compound message with one specialist per intent, concurrently
+        
+        Prompts are built from the context as it was before the turn; each call gets its own
+        scratch context for structured fields, so the calls share nothing while they run.
+        Context updates, cards and one suggestion call then run in intent order on the
+        merged reply.
+        
+        Args:
+            user_input: The user's message
+            intents: Specialist routes, most important first (all in FANOUT_INTENTS)
+            context: The user's conversation context
+            user_id: Conversation owner
+        
+        Returns:
+            Formatted response from the first intent's agent, with 'agents' listing every intent
+        """
+        routing_log.debug("Fanning out", agents=intents)
+        self.fanout_turns.inc(specialists=str(len(intents)))
+        prompts = {intent: self._fanout_prompt(user_input, context, intent, intents, user_id) for intent in intents}
+        scratch = {intent: {} for intent in intents}
+        
+        async def answer(intent: str) -> str:
+            agent = self.agents[intent]
+            if intent == 'policy_analysis':
+                return await self._answer_policy_question(agent, prompts[intent], user_input, user_id, scratch[intent])
+            return await self._call_specialist(agent, prompts[intent], user_id, intent, scratch[intent])
+        
+        with span('fanout'):
+            responses = await asyncio.gather(*(answer(intent) for intent in intents))
+        
+        # Failed parts are left out unless every part failed
+        answered = [(intent, response) for intent, response in zip(intents, responses)
+                    if response not in (AGENT_EMPTY_RESPONSE, AGENT_ERROR_RESPONSE)]
+        merged = "\n\n".join(response.strip() for _, response in answered) or responses[0]
+        
+        primary = intents[0]
+        context['active_agent'] = primary
+        if 'symptom' in intents and not context.get('symptom_assessment_complete', False):
+            context['in_symptom_assessment'] = True
+        self._append_history(user_input, merged, context)
+        cards = []
+        for intent, response in answered:
+            context['current_structured'] = scratch[intent].get('current_structured')
+            self._update_shared_context(user_input, response, context, intent, record_history=False)
+            if intent == 'pharmacy' and self._should_show_medicine_cards(response, context):
+                medicines_data = self._extract_medicines_from_response(response, context)
+                if medicines_data:
+                    cards.extend(self._generate_medicine_cards(medicines_data))
+                    cards_log.debug("Adding cards", cards='medicine availability')
+        context['current_structured'] = None
+        context['current_suggestions'] = next((scratch[intent]['current_suggestions'] for intent in intents
+                                               if scratch[intent].get('current_suggestions')), None)
+        
+        suggested_replies = await self._generate_ai_suggestions(user_input, merged, context, primary)
+        response_data = self._format_agent_response(merged, primary, suggested_replies)
+        response_data["agents"] = intents
+        if cards:
+            response_data["cards"] = cards
+        return response_data
+
     async def process_message(self, user_input: str, user_id: str = None, 
                             firebase_token: str = None) -> dict:
-        """Process message with shared context routing"""
+        """Process message with shared context routing, timing each stage and recording the turn when enabled"""
+        final_user_id = user_id or "anonymous-user"
+        calls = self.recorder.begin_turn() if self.recorder else None
+        start = time.perf_counter()
+        trace = self.tracer.begin_turn()
+        degraded = self.token_ledger.over_budget(final_user_id)
+        if degraded:
+            self.budget_degraded_turns.inc()
+        self.token_ledger.begin_turn(final_user_id, degraded)
+        shed_level = self.load_shedder.turn_started()
+        if shed_level:
+            self.shed_decisions.inc(level=LEVELS[shed_level])
+        try:
+            result = await self._route_message(user_input, user_id, firebase_token)
+        finally:
+            # Close the turn even when routing raises, so its trace and token usage are still rolled up
+            self.load_shedder.turn_finished()
+            self.tracer.end_turn(trace)
+            context = self.user_contexts.get(final_user_id, {})
+            turn_type = context.get('current_query_type')
+            usage = self.token_ledger.end_turn(turn_type)
+            self.turn_tokens.observe(usage['total_tokens'], turn_type=turn_type or 'none')
+        
+        if trace and self.debug_timings:
+            result['timings'] = trace.summary()
+            result['usage'] = usage
+        # One line per turn; the per-step detail is at DEBUG (WELLNESS_LOG_LEVEL)
+        turn_log.info("Turn", user=final_user_id, route=turn_type, agent=result.get('agent'),
+                      ms=round((time.perf_counter() - start) * 1000, 1), tokens=usage['total_tokens'],
+                      cards=len(result.get('cards') or ()), degraded=degraded, shed_level=shed_level)
+        if self.recorder:
+            self.recorder.record_turn(final_user_id, user_input, result, turn_type,
+                                      calls, (time.perf_counter() - start) * 1000)
+        return result
+
+    async def _route_message(self, user_input: str, user_id: str = None,
+                             firebase_token: str = None) -> dict:
+        """Route one message to the right specialist and build the reply"""
         
         if not self.agents:
             return {
@@ -1884,15 +2416,28 @@ IMPORTANT:
         try:
             final_user_id = user_id or "anonymous-user"
             context = self._get_user_context(final_user_id)
-            
+            self._sync_catalogs()
+            context['current_structured'] = None
+            context['current_suggestions'] = None
+            context['current_query_type'] = None
+
             # Detect if we need to route to specialist (NOW ASYNC)
-            query_type = await self.detect_query_type(user_input, context)
+            routes = await self.detect_intents(user_input, context)
+            query_type = routes[0]
+            context['current_query_type'] = query_type
+            
+            # COMPOUND MESSAGE: several answer-only specialists at once
+            fanout_intents = [route for route in routes if route in FANOUT_INTENTS and route in self.agents]
+            if self.fanout and len(fanout_intents) >= 2:
+                fanout_intents = fanout_intents[:self.fanout_max]
+                context['current_query_type'] = fanout_intents[0]
+                return await self._fan_out(user_input, fanout_intents, context, final_user_id)
             
             # SYMPTOM ROUTING
             if query_type == 'symptom' and context['active_agent'] != 'symptom' and not context.get('symptom_assessment_complete', False):
                 context['active_agent'] = 'symptom'
                 context['in_symptom_assessment'] = True
-                print(" Switching to symptom agent")
+                routing_log.debug("Switching agent", agent='symptom')
                 
                 symptom_context = self._build_agent_context(user_input, context, 'symptom')
                 symptom_prompt = f"""{symptom_context}
@@ -1902,7 +2447,7 @@ You are the symptom specialist. Start the assessment immediately. Acknowledge th
 Do NOT say you're connecting them to anyone - you ARE the specialist. Start NOW."""
 
                 agent = self.agents.get('symptom')
-                response = await self._call_agent(agent, symptom_prompt, final_user_id, 'symptom')
+                response = await self._call_specialist(agent, symptom_prompt, final_user_id, 'symptom', context)
                 
                 self._update_shared_context(user_input, response, context, 'symptom')
                 # Generate AI suggestions
@@ -1912,18 +2457,13 @@ Do NOT say you're connecting them to anyone - you ARE the specialist. Start NOW.
             # INSURANCE ROUTING
             elif query_type == 'insurance' and context['active_agent'] != 'policy_analysis':
                 context['active_agent'] = 'policy_analysis'
-                print(" Switching to insurance agent")
+                routing_log.debug("Switching agent", agent='policy_analysis')
                 
                 insurance_context = self._build_agent_context(user_input, context, 'policy_analysis')
                 
-                insurance_prompt = f"""{insurance_context}
-
-YOUR CURRENT INSURANCE POLICY DETAILS:
-```json
-{json.dumps(self.INSURANCE_POLICY_DATA, indent=2)}
-Use this policy data to answer their question."""
+                insurance_prompt = self._insurance_prompt(insurance_context, user_input, final_user_id)
                 agent = self.agents.get('policy_analysis')
-                response = await self._call_agent(agent, insurance_prompt, final_user_id, 'policy_analysis')
+                response = await self._answer_policy_question(agent, insurance_prompt, user_input, final_user_id, context)
                 self._update_shared_context(user_input, response, context, 'policy_analysis')
 
                 suggested_replies = await self._generate_ai_suggestions(user_input, response, context, 'policy_analysis')
@@ -1932,12 +2472,12 @@ Use this policy data to answer their question."""
             # CARE PLAN ROUTING
             elif query_type == 'care_plan' and context['active_agent'] != 'care_plan':
                 context['active_agent'] = 'care_plan'
-                print("Switching to care plan agent")
+                routing_log.debug("Switching agent", agent='care_plan')
                 
                 care_context = self._build_agent_context(user_input, context, 'care_plan')
                 
                 agent = self.agents.get('care_plan')
-                response = await self._call_agent(agent, care_context, final_user_id, 'care_plan')
+                response = await self._call_specialist(agent, care_context, final_user_id, 'care_plan', context)
                 
                 self._update_shared_context(user_input, response, context, 'care_plan')
                 
@@ -1947,27 +2487,13 @@ Use this policy data to answer their question."""
                 # PHARMACY ROUTING
             elif query_type == 'pharmacy' and context['active_agent'] != 'pharmacy':
                 context['active_agent'] = 'pharmacy'
-                print(" Switching to pharmacy agent")
+                routing_log.debug("Switching agent", agent='pharmacy')
                 
                 pharmacy_context = self._build_agent_context(user_input, context, 'pharmacy')
                 
-                pharmacy_prompt = f"""{pharmacy_context}
-YOUR PHARMACY INVENTORY DATA:
-```json
-{json.dumps(self.PHARMACY_INVENTORY_DATA, indent=2)}
-USER IS ASKING ABOUT: "{user_input}"
-CRITICAL INSTRUCTIONS:
-1. Check medicine availability using the inventory data above
-2. When a medicine is selected, automatically process the order and provide order confirmation
-3. For pain/fever medicines like Paracetamol, use appropriate dosage: "1 tablet as needed for pain/fever"
-4. Provide professional order confirmations with delivery details
-5. Ask for prescription if needed, but don't require it for common medicines
-EXAMPLE RESPONSES:
-GOOD: "Great! I've processed your order for Paracetamol. Standard dosage: 1 tablet as needed for pain or fever. Your order will be delivered in 2-4 hours. Total: ₹20"
-BAD: "I'll use the basic_antibiotic prescription template"
-Process orders naturally using the pharmacy inventory data."""
+                pharmacy_prompt = self._pharmacy_prompt(pharmacy_context, user_input)
                 agent = self.agents.get('pharmacy')
-                response = await self._call_agent(agent, pharmacy_prompt, final_user_id, 'pharmacy')
+                response = await self._call_specialist(agent, pharmacy_prompt, final_user_id, 'pharmacy', context)
                 
                 self._update_shared_context(user_input, response, context, 'pharmacy')
                 
@@ -1977,17 +2503,17 @@ Process orders naturally using the pharmacy inventory data."""
 
                 # ONLY show cards when appropriate
                 if self._should_show_medicine_cards(response, context):
-                    medicines_data = self._extract_medicines_from_response(response)
+                    medicines_data = self._extract_medicines_from_response(response, context)
                     if medicines_data:
                         response_data["cards"] = self._generate_medicine_cards(medicines_data)
-                        print(" Adding medicine availability cards")
+                        cards_log.debug("Adding cards", cards='medicine availability')
                 
                 return response_data
             
             # LAB TEST ROUTING - NEW: Dedicated lab test agent
             elif query_type == 'lab_test' and context['active_agent'] != 'lab_test':
                 context['active_agent'] = 'lab_test'
-                print("🔬 Switching to lab test agent")
+                routing_log.debug("Switching agent", agent='lab_test')
                 
                 # Initialize lab test context
                 if 'lab_test_info' not in context['shared_memory']:
@@ -2005,10 +2531,10 @@ Process orders naturally using the pharmacy inventory data."""
                 
                 agent = self.agents.get('lab_test')
                 if not agent:
-                    print("⚠️ Lab test agent not registered, falling back to scheduling")
+                    routing_log.warning("Lab test agent not registered, falling back to scheduling")
                     query_type = 'scheduling'
                 else:
-                    response = await self._call_agent(agent, lab_test_context, final_user_id, 'lab_test')
+                    response = await self._call_specialist(agent, lab_test_context, final_user_id, 'lab_test', context)
                     
                     # Update context
                     self._update_shared_context(user_input, response, context, 'lab_test')
@@ -2022,39 +2548,40 @@ Process orders naturally using the pharmacy inventory data."""
                     
                     if self._should_show_lab_cards(user_input, context):
                         location = lab_info.get('location', 'delhi')
-                        response_data["cards"] = self._generate_lab_cards(location)
-                        print("🏥 Adding lab selection cards")
+                        response_data["cards"] = self._generate_lab_cards(location, lab_info.get('near'))
+                        cards_log.debug("Adding cards", cards='lab selection')
                     
                     elif self._should_show_test_package_cards(user_input, context):
                         response_data["cards"] = self._generate_test_package_cards()
-                        print("📦 Adding test package cards")
+                        cards_log.debug("Adding cards", cards='test package')
                     
                     elif self._should_show_visit_type_cards(user_input, context):
                         response_data["cards"] = self._generate_visit_type_cards()
-                        print("🏠 Adding visit type cards")
+                        cards_log.debug("Adding cards", cards='visit type')
                     
                     # Check for booking confirmation
                     if self._should_show_lab_booking_confirmation(response, context):
                         response_data["cards"] = [self._generate_lab_booking_confirmation(context)]
-                        print("✅ Adding lab booking confirmation card")
+                        cards_log.debug("Adding cards", cards='lab booking confirmation')
                     
                     return response_data
             
             # SCHEDULING ROUTING
             elif query_type == 'scheduling' and context['active_agent'] != 'scheduling':
                 context['active_agent'] = 'scheduling'
-                print(" Switching to scheduling agent")
+                routing_log.debug("Switching agent", agent='scheduling')
                 
                 # Let the user's words determine what they want - no assumptions
                 is_test_booking = self._detect_test_booking_intent(user_input, context)
                 if is_test_booking:
                     self._initialize_test_booking_context(context)
-                    print("🔬 User explicitly asked for test booking")
+                    routing_log.debug("User explicitly asked for test booking")
                 
+                self._reserve_appointment_slot(user_input, context)
                 scheduling_context = self._build_agent_context(user_input, context, 'scheduling')
                 
                 agent = self.agents.get('scheduling')
-                response = await self._call_agent(agent, scheduling_context, final_user_id, 'scheduling')
+                response = await self._call_specialist(agent, scheduling_context, final_user_id, 'scheduling', context)
                 
                 # UPDATE CONTEXT FIRST (this detects location from user input)
                 self._update_shared_context(user_input, response, context, 'scheduling')
@@ -2068,16 +2595,16 @@ Process orders naturally using the pharmacy inventory data."""
                 
                 if test_booking_info.get('is_test_booking', False):
                     # User wants tests - show lab cards
-                    print("🔬 User wants test booking - checking for lab cards")
+                    routing_log.debug("User wants test booking - checking for lab cards")
                     if self._should_show_lab_cards(user_input, context):
                         location = test_booking_info.get('location', 'delhi')
-                        response_data["cards"] = self._generate_lab_cards(location)
-                        print("Adding lab selection cards")
+                        response_data["cards"] = self._generate_lab_cards(location, test_booking_info.get('near'))
+                        cards_log.debug("Adding cards", cards='lab selection')
                 else:
                     # User wants hospital appointment - show hospital cards
                     if self._should_show_hospital_cards(user_input, agent_response=response, context=context):
-                        response_data["cards"] = self._generate_hospital_cards()
-                        print("Adding hospital selection cards")
+                        response_data["cards"] = self._generate_hospital_cards(context)
+                        cards_log.debug("Adding cards", cards='hospital selection')
                 
                 return response_data
         
@@ -2103,7 +2630,7 @@ Process orders naturally using the pharmacy inventory data."""
                     }
                 
                 if query_type != 'general' and query_type != target_agent:
-                    print(f" User wants {query_type}, switching from {target_agent}")
+                    routing_log.debug("Switching agent", agent=query_type, previous=target_agent)
                     context['active_agent'] = query_type
                     target_agent = query_type    
                 
@@ -2112,15 +2639,20 @@ Process orders naturally using the pharmacy inventory data."""
                 
                 agent = self.agents.get(target_agent, self.agents.get('orchestrator'))
                 
+                if target_agent == 'scheduling':
+                    self._reserve_appointment_slot(user_input, context)
                 contextual_input = self._build_agent_context(user_input, context, target_agent)
                 
                 if target_agent == 'policy_analysis':
                     contextual_input = f"""{contextual_input}
-            {json.dumps(self.INSURANCE_POLICY_DATA, indent=2)}
+            {self._policy_prompt_json(user_input, final_user_id)}
             Use this policy data to answer their question."""
-                print(f" Processing with {target_agent}")
+                routing_log.debug("Processing with agent", agent=target_agent)
                 
-                response = await self._call_agent(agent, contextual_input, final_user_id, target_agent)
+                if target_agent == 'policy_analysis':
+                    response = await self._answer_policy_question(agent, contextual_input, user_input, final_user_id, context)
+                else:
+                    response = await self._call_specialist(agent, contextual_input, final_user_id, target_agent, context)
 
                 # UPDATE CONTEXT FIRST (this includes location detection)
                 self._update_shared_context(user_input, response, context, target_agent)
@@ -2141,12 +2673,16 @@ Process orders naturally using the pharmacy inventory data."""
                         # Test booking confirmation
                         if self._should_show_test_booking_confirmation(response, context):
                             response_data["cards"] = [self._generate_test_booking_confirmation(context)]
-                            print("Adding test booking confirmation card")
+                            cards_log.debug("Adding cards", cards='test booking confirmation')
                     else:
                         # Hospital appointment confirmation
                         if self._should_show_booking_confirmation(response, context):
-                            response_data["cards"] = [self._generate_booking_confirmation_card(context)]
-                            print("✅ Adding booking confirmation card")
+                            booking_card = self._generate_booking_confirmation_card(context)
+                            if booking_card:
+                                # Mark as shown to prevent duplicates - only once a card was actually made
+                                context['shared_memory']['scheduling_info']['confirmation_shown'] = True
+                                response_data["cards"] = [booking_card]
+                                cards_log.debug("Adding cards", cards='booking confirmation')
 
                 # ✅ THEN: Check for other selection cards (subject to stop check)
                 if target_agent == 'scheduling' and not self._should_stop_showing_cards(context):
@@ -2156,43 +2692,46 @@ Process orders naturally using the pharmacy inventory data."""
                     
                     # CHECK WHAT USER ACTUALLY WANTS - USER-DRIVEN LOGIC
                     if test_booking_info.get('is_test_booking', False):
-                        print("🔬 User wants test booking - showing test-related cards")
+                        cards_log.debug("User wants test booking - showing test-related cards")
                         
                         if self._should_show_lab_cards(user_input, context):
                             location = test_booking_info.get('location', 'delhi')
-                            response_data["cards"] = self._generate_lab_cards(location)
-                            print("Adding lab selection cards")
+                            response_data["cards"] = self._generate_lab_cards(location, test_booking_info.get('near'))
+                            cards_log.debug("Adding cards", cards='lab selection')
                         
                         elif self._should_show_visit_type_cards(user_input, context):
                             response_data["cards"] = self._generate_visit_type_cards()
-                            print("Adding visit type cards")
+                            cards_log.debug("Adding cards", cards='visit type')
                     
                     else:
                         # User wants hospital appointment
                         if self._should_show_hospital_cards(user_input, agent_response=response, context=context):
-                            response_data["cards"] = self._generate_hospital_cards()
-                            print("Adding hospital selection cards")
+                            response_data["cards"] = self._generate_hospital_cards(context)
+                            cards_log.debug("Adding cards", cards='hospital selection')
 
                 # CHECK FOR MEDICINE CARDS (for pharmacy agent)
                 if target_agent == 'pharmacy' and self._should_show_medicine_cards(response, context):
-                    medicines_data = self._extract_medicines_from_response(response)
+                    medicines_data = self._extract_medicines_from_response(response, context)
                     if medicines_data:
                         response_data["cards"] = self._generate_medicine_cards(medicines_data)
-                        print(" Adding medicine availability cards")
+                        cards_log.debug("Adding cards", cards='medicine availability')
 
                 # Check if appointment is being confirmed
-                if "appointment id" in response.lower() or "confirmed" in response.lower():
+                structured = context.get('current_structured')
+                if structured:
+                    appointment_confirmed = structured['confirmation']['confirmed']
+                else:
+                    appointment_confirmed = "appointment id" in response.lower() or "confirmed" in response.lower()
+                if appointment_confirmed:
                     if 'scheduling_info' not in context['shared_memory']:
                         context['shared_memory']['scheduling_info'] = {}
                     context['shared_memory']['scheduling_info']['appointment_confirmed'] = True
-                    print("Appointment confirmed - stopping cards")
+                    cards_log.debug("Appointment confirmed - stopping cards")
 
                 return response_data
             
-        except Exception as e:
-            print(f"Error: {e}")
-            import traceback
-            traceback.print_exc()
+        except Exception:
+            log.exception("Turn failed", user=user_id)
             
             # Even in error, provide helpful suggestions
             suggested_replies = ["Try again", "Start over", "Help with symptoms", "Medicine inquiry"]
@@ -2203,7 +2742,8 @@ Process orders naturally using the pharmacy inventory data."""
             )
 
     async def initialize(self):
-        print("Wellness Manager Ready!")
+        log.info("Wellness Manager ready")
 
     async def close(self):
-        pass
\ No newline at end of file
+        if self.recorder:
+            self.recorder.close()
\ No newline at end of file